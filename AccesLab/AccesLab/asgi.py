@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Las vistas async de solo lectura (rutas .../async/..., ver AccesLab/asincrono.py)
+solo liberan el worker mientras esperan a la BD si se sirve con un servidor
+ASGI, p.ej.: uvicorn AccesLab.asgi:application --workers 2
 """
 
 import os
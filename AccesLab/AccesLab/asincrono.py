@@ -0,0 +1,118 @@
+# ==============================================================================
+# ACCESLAB/ASINCRONO.PY - Base de las vistas async de solo lectura (ASGI)
+# ==============================================================================
+# DRF solo ejecuta vistas síncronas: las versiones async de los endpoints de
+# lectura (reportes, catálogos, lista de solicitudes) son funciones async de
+# Django con la misma autenticación (JWT de simplejwt o sesión).
+# - El ORM y los cálculos de reportes son síncronos: se ejecutan en un pool de
+#   hilos propio con `en_hilo`; cada hilo tiene su conexión (o la toma del
+#   pool de sesiones de Oracle) y la devuelve al terminar cada llamada
+# - Varias llamadas a `en_hilo` dentro de un request corren a la vez
+#   (asyncio.gather); el event loop nunca se bloquea esperando a la BD
+# - ASYNC_HILOS_BD limita las consultas simultáneas de todo el proceso:
+#   conviene que no supere DB_POOL_MAX
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.http.response import HttpResponseBase
+from rest_framework import exceptions, status
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+HILOS_POR_DEFECTO = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'ASYNC_HILOS_BD', HILOS_POR_DEFECTO),
+                    thread_name_prefix='async-bd',
+                )
+    return _pool
+
+
+def _cerrar_conexiones_vencidas():
+    # Igual que al inicio/fin de cada request: con pool (CONN_MAX_AGE = 0)
+    # la sesión vuelve al pool; sin él, se reutiliza hasta CONN_MAX_AGE
+    for conexion in connections.all(initialized_only=True):
+        conexion.close_if_unusable_or_obsolete()
+
+
+def _ejecutar(funcion, args, kwargs):
+    _cerrar_conexiones_vencidas()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        _cerrar_conexiones_vencidas()
+
+
+async def en_hilo(funcion, *args, **kwargs):
+    """Ejecuta código síncrono (ORM, cálculos) en el pool de hilos de BD."""
+    loop = asyncio.get_running_loop()
+    # Se copia el contexto para que el código del hilo vea los contextvars del request
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(
+        obtener_pool(), functools.partial(contexto.run, _ejecutar, funcion, args, kwargs)
+    )
+
+
+# ----------------------------------------------------------------------
+# AUTENTICACIÓN
+# ----------------------------------------------------------------------
+def _autenticar(request):
+    """JWT o sesión, como DEFAULT_AUTHENTICATION_CLASSES. Retorna el usuario o None."""
+    resultado = JWTAuthentication().authenticate(request)
+    usuario = resultado[0] if resultado else request.user
+    if not usuario.is_authenticated:
+        return None
+    # Se carga aquí: fuera de este hilo acceder al perfil sería una consulta síncrona
+    getattr(usuario, 'perfil_oracle', None)
+    return usuario
+
+
+def respuesta(datos, estado=status.HTTP_200_OK):
+    return JsonResponse(datos, status=estado, encoder=JSONEncoder, safe=False)
+
+
+def vista_async(vista):
+    """
+    Decorador de las vistas async: solo GET, requiere usuario autenticado
+    (request.user) y convierte el valor retornado en JSON. La vista puede
+    retornar datos, (datos, estado) o un HttpResponse.
+    """
+    @functools.wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        if request.method != 'GET':
+            return respuesta(
+                {'detail': f'Método "{request.method}" no permitido.'}, status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        try:
+            usuario = await en_hilo(_autenticar, request)
+        except exceptions.AuthenticationFailed as e:
+            return respuesta({'detail': e.detail}, status.HTTP_401_UNAUTHORIZED)
+        if usuario is None:
+            return respuesta({'detail': exceptions.NotAuthenticated.default_detail}, status.HTTP_401_UNAUTHORIZED)
+        request.user = usuario
+
+        resultado = await vista(request, *args, **kwargs)
+        if isinstance(resultado, HttpResponseBase):
+            return resultado
+        if isinstance(resultado, tuple):
+            return respuesta(*resultado)
+        return respuesta(resultado)
+
+    return envoltura
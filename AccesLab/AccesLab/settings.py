@@ -4,19 +4,18 @@ Django settings for AccesLab project.
 
 from pathlib import Path
 from datetime import timedelta 
+import json
 import os
-import oracledb # Driver moderno
 
+from django.core.exceptions import ImproperlyConfigured
+
+
+def _env_bool(nombre, defecto=False):
+    return os.environ.get(nombre, str(defecto)).strip().lower() in ('1', 'true', 'si', 'sí', 'yes')
 
-# ----------------------------------------------------------------------
-# INICIALIZACIÓN DE ORACLE INSTANT CLIENT
-# ----------------------------------------------------------------------
-# CRUCIAL: Esto resuelve el TypeError 500 y la inestabilidad de conexión.
-try:
-    # 🚨 RUTA FINAL DE OCI.DLL APLICADA 🚨
-    oracledb.init_oracle_client(lib_dir=r"C:\app\mipri\product\23ai\dbhomeFree\bin") 
-except Exception:
-    pass
+
+def _env_int(nombre, defecto):
+    return int(os.environ.get(nombre, defecto))
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,7 +25,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-(a-s14s88eap#(ivl2--_@_p-0)5ez1u)til4(@%hpt5e+$jy!'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = _env_bool('DJANGO_DEBUG', True)
+
+# Documentación OpenAPI (drf_spectacular): su import pesa ~80 ms en el arranque
+# de cada worker; por defecto solo se carga en desarrollo
+API_DOCS = _env_bool('API_DOCS', DEBUG)
 
 ALLOWED_HOSTS = []
 
@@ -41,17 +44,26 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'drf_spectacular',
     'usuarios',
     'maestros',
     'reservas',
-    'django_extensions',
     'rest_framework_simplejwt', 
     'corsheaders', 
     'reportes',
+    'monitoreo',
 ]
 
+if API_DOCS:
+    INSTALLED_APPS.append('drf_spectacular')
+
+# Herramientas de desarrollo (shell_plus, runserver_plus, ...)
+if DEBUG:
+    INSTALLED_APPS.append('django_extensions')
+
 MIDDLEWARE = [
+    # Primeros: miden el request completo (métricas, consultas SQL y Server-Timing)
+    'monitoreo.middleware.MetricasMiddleware',
+    'monitoreo.middleware.InstrumentacionSQLMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -118,24 +130,187 @@ WSGI_APPLICATION = 'AccesLab.wsgi.application'
 
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.oracle',
-        
-        'HOST': 'localhost', 
-        'PORT': '1521',
-        'NAME': 'FREE', # Este es el SERVICE_NAME que Oracle necesita
-        
-        'USER': 'C##_ACCESLAB_USER', 
-        'PASSWORD': 'Wilder2004',
-        
-        # ⚠️ DEJAMOS EL DICCIONARIO OPTIONS VACÍO ⚠️
-        'OPTIONS': {
-             
+# ----------------------------------------------------------------------
+# Configuración por variables de entorno: el mismo código corre con Oracle
+# y pool de sesiones en producción y con SQLite en local.
+#   DB_ENGINE              oracle (por defecto) | sqlite
+#   ORACLE_DRIVER_MODE     thin (por defecto) | thick
+#   ORACLE_CLIENT_LIB_DIR  con thick: carpeta de Oracle Instant Client
+#   DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+#   DB_POOL                true: pool de sesiones de python-oracledb
+#                          (integrado en el backend de Django; CONN_MAX_AGE = 0)
+#   DB_POOL_MIN / DB_POOL_MAX / DB_POOL_INCREMENT   tamaño del pool
+#   DB_POOL_PING_INTERVAL  segundos sin uso tras los que se hace ping antes de entregar la sesión
+#   DB_POOL_TIMEOUT        segundos que una sesión ociosa sobra antes de cerrarse
+#   DB_POOL_WAIT_TIMEOUT   ms que se espera una sesión libre con el pool lleno
+#   DB_POOL_MAX_LIFETIME   segundos de vida máxima de una sesión (0 = sin límite)
+#   DB_STMT_CACHE          sentencias cacheadas por sesión
+#   DB_CONN_MAX_AGE        sin pool: segundos que se reutiliza la conexión (0 = por request)
+#   DB_CONN_HEALTH_CHECKS  sin pool: verificar la conexión reutilizada antes de usarla
+# ----------------------------------------------------------------------
+DB_ENGINE = os.environ.get('DB_ENGINE', 'oracle').strip().lower()
+ORACLE_DRIVER_MODE = os.environ.get('ORACLE_DRIVER_MODE', 'thin').strip().lower()
+# Con thick: carpeta de Instant Client (None = la del sistema: LD_LIBRARY_PATH / PATH)
+ORACLE_CLIENT_LIB_DIR = os.environ.get('ORACLE_CLIENT_LIB_DIR') or None
+DB_POOL = _env_bool('DB_POOL', True) and DB_ENGINE == 'oracle'
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': _env_int('DB_CONN_MAX_AGE', 60),
+            'CONN_HEALTH_CHECKS': _env_bool('DB_CONN_HEALTH_CHECKS', True),
+        }
+    }
+else:
+    import oracledb
+
+    # Modo del driver, explícito: thin (Python puro, sin Instant Client) o
+    # thick (Instant Client; requerido p.ej. por verificadores de contraseña
+    # antiguos o Native Network Encryption). Si thick falla, falla el arranque:
+    # nada de caer en silencio a thin.
+    if ORACLE_DRIVER_MODE == 'thick':
+        oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR)
+    elif ORACLE_DRIVER_MODE != 'thin':
+        raise ImproperlyConfigured(f'ORACLE_DRIVER_MODE debe ser "thin" o "thick", no "{ORACLE_DRIVER_MODE}"')
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.oracle',
+
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '1521'),
+            'NAME': os.environ.get('DB_NAME', 'FREE'), # Este es el SERVICE_NAME que Oracle necesita
+
+            'USER': os.environ.get('DB_USER', 'C##_ACCESLAB_USER'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'Wilder2004'),
+
+            # Con pool, las sesiones las reutiliza el pool; sin él, Django
+            # mantiene la conexión abierta CONN_MAX_AGE segundos
+            'CONN_MAX_AGE': 0 if DB_POOL else _env_int('DB_CONN_MAX_AGE', 60),
+            'CONN_HEALTH_CHECKS': _env_bool('DB_CONN_HEALTH_CHECKS', True),
+
+            'OPTIONS': {
+                'stmtcachesize': _env_int('DB_STMT_CACHE', 50),
+            }
         }
     }
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min': _env_int('DB_POOL_MIN', 2),
+            'max': _env_int('DB_POOL_MAX', 10),
+            'increment': _env_int('DB_POOL_INCREMENT', 1),
+            'ping_interval': _env_int('DB_POOL_PING_INTERVAL', 60),
+            'timeout': _env_int('DB_POOL_TIMEOUT', 300),
+            'wait_timeout': _env_int('DB_POOL_WAIT_TIMEOUT', 5000),
+            'max_lifetime_session': _env_int('DB_POOL_MAX_LIFETIME', 0),
+            'getmode': oracledb.POOL_GETMODE_TIMEDWAIT,
+        }
+
+# Pruebas: crea las tablas managed = False en la base de pruebas (solo SQLite;
+# ver monitoreo/pruebas.py). Se ejecutan con DB_ENGINE=sqlite python manage.py test
+TEST_RUNNER = 'monitoreo.pruebas.RunnerEsquemaSQLite'
+
+# Caché de Django, compartida entre workers
+# ----------------------------------------------------------------------
+# Las versiones de los catálogos, los reportes cacheados (y su candado de
+# single-flight), el horario semanal, el índice de búsqueda y los trabajos
+# de PDF deben verse iguales desde todos los workers de gunicorn/uvicorn.
+#   CACHE_BACKEND  db (por defecto): tabla CACHE_TABLA en la base de datos
+#                  (la crea "migrate"; ver monitoreo/apps.py)
+#                  redis: servidor en CACHE_URL (redis://host:6379/1); requiere
+#                  el paquete "redis"
+#                  local: en memoria de cada proceso; solo para un único proceso
+#   CACHE_TIMEOUT  TTL por defecto en segundos
+# ----------------------------------------------------------------------
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'db').strip().lower()
+CACHE_TIMEOUT = _env_int('CACHE_TIMEOUT', 300)
+
+if CACHE_BACKEND == 'redis':
+    if not os.environ.get('CACHE_URL'):
+        raise ImproperlyConfigured('CACHE_BACKEND=redis requiere CACHE_URL (p. ej. redis://localhost:6379/1)')
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+            'TIMEOUT': CACHE_TIMEOUT,
+            'KEY_PREFIX': 'acceslab',
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_TABLA', 'ACCESLAB_CACHE'),
+            'TIMEOUT': CACHE_TIMEOUT,
+            # Los reportes cacheados por parámetros superan el límite por defecto (300)
+            'OPTIONS': {'MAX_ENTRIES': _env_int('CACHE_MAX_ENTRIES', 20000), 'CULL_FREQUENCY': 4},
+        }
+    }
+elif CACHE_BACKEND == 'local':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'TIMEOUT': CACHE_TIMEOUT,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'CACHE_BACKEND debe ser "db", "redis" o "local", no "{CACHE_BACKEND}"')
+
+# Catálogos de maestros (maestros/catalogos.py): antigüedad máxima de la copia
+# de cada proceso y TTL de las versiones en la caché compartida (red de
+# seguridad para escrituras que no pasan por el ORM)
+MAESTROS_CATALOGO_TTL = _env_int('MAESTROS_CATALOGO_TTL', 600)
+MAESTROS_CATALOGO_TTL_VERSIONES = _env_int('MAESTROS_CATALOGO_TTL_VERSIONES', 7 * 24 * 3600)
+
+# Precarga del pool y de las cachés en proceso al arrancar cada worker
+# (ver monitoreo/calentamiento.py)
+PRECALENTAR = _env_bool('PRECALENTAR', False)
+
+
+# Instrumentación SQL por request (monitoreo/middleware.py)
+INSTRUMENTACION_SQL = _env_bool('INSTRUMENTACION_SQL', True)
+# Máximo de consultas por vista, por nombre de ruta ('solicitudes-list', 'reportes:kpis'...);
+# '*' aplica a las demás. Ej.: PRESUPUESTO_CONSULTAS='{"solicitudes-list": 10, "*": 50}'
+PRESUPUESTO_CONSULTAS = json.loads(os.environ.get('PRESUPUESTO_CONSULTAS', '{}'))
+# true: exceder el presupuesto lanza PresupuestoExcedido (pruebas / CI) en vez de un warning
+PRESUPUESTO_CONSULTAS_ESTRICTO = _env_bool('PRESUPUESTO_CONSULTAS_ESTRICTO', False)
+
+# Métricas en /metrics (monitoreo/metricas.py)
+METRICAS = _env_bool('METRICAS', True)
+# Con varios workers (gunicorn): directorio compartido donde cada proceso vuelca
+# sus series; vaciarlo al arrancar el servidor. Sin él cada proceso expone solo las suyas
+METRICAS_DIR = os.environ.get('METRICAS_DIR') or None
+METRICAS_INTERVALO = _env_int('METRICAS_INTERVALO', 2)
+# /metrics responde a "Authorization: Bearer <METRICAS_TOKEN>" o a las IPs/redes
+# de METRICAS_IPS (separadas por comas; por defecto solo localhost). Detrás de un
+# proxy REMOTE_ADDR es la del proxy: en ese caso conviene usar el token
+METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN') or None
+METRICAS_IPS = [
+    red.strip() for red in os.environ.get('METRICAS_IPS', '127.0.0.1,::1').split(',') if red.strip()
+]
+
+# Logs de la aplicación a consola; "monitoreo.sql" escribe una línea JSON por request
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s %(message)s'},
+    },
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        nombre: {'handlers': ['consola'], 'level': os.environ.get('LOG_NIVEL', 'INFO'), 'propagate': False}
+        for nombre in ('usuarios', 'maestros', 'reservas', 'reportes', 'monitoreo')
+    },
+}
+LOGGING['loggers']['monitoreo.sql'] = {
+    'handlers': ['consola'], 'level': os.environ.get('LOG_SQL_NIVEL', 'INFO'), 'propagate': False,
 }
 
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -176,8 +351,9 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
+if API_DOCS:
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 
 # Configuración de expiración de tokens
 SIMPLE_JWT = {
@@ -0,0 +1,69 @@
+# ==============================================================================
+# ACCESLAB/SETTINGS_BENCHMARK.PY - Perfil de benchmarks sobre SQLite
+# ==============================================================================
+# Todos los modelos son managed = False contra Oracle: este perfil usa un
+# archivo SQLite local donde "manage.py preparar_benchmark" materializa las
+# tablas y siembra datos a escala de producción (ver monitoreo/benchmark/).
+#
+#   python manage.py preparar_benchmark --settings=AccesLab.settings_benchmark
+#   python manage.py benchmark --settings=AccesLab.settings_benchmark --salida resultados.json
+#
+# Variables de entorno:
+#   BENCHMARK_DB            archivo SQLite (default: <BASE_DIR>/benchmark.sqlite3)
+#   BENCHMARK_SNAPSHOT_DIR  snapshot del motor analítico (default: <BASE_DIR>/benchmark_analitica)
+
+import os
+
+# Se fijan antes de importar la configuración base: así no se importa oracledb
+# y las apps de desarrollo (documentación, django_extensions) no se cargan
+os.environ['DB_ENGINE'] = 'sqlite'
+os.environ.setdefault('DJANGO_DEBUG', 'false')
+os.environ.setdefault('API_DOCS', 'false')
+
+from .settings import *  # noqa: E402,F401,F403
+from .settings import BASE_DIR, LOGGING  # noqa: E402
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCHMARK_DB', str(BASE_DIR / 'benchmark.sqlite3')),
+        # Una sola conexión reutilizada, como el pool en producción
+        'CONN_MAX_AGE': None,
+        'OPTIONS': {
+            # "generar_datos --procesos N" escribe desde varios procesos: esperan
+            # el bloqueo de escritura en lugar de fallar con "database is locked"
+            'timeout': 60,
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA cache_size=-200000;',
+        },
+    }
+}
+
+# Un solo proceso (el cliente de pruebas): la caché en memoria basta
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+}
+
+# Aparte del snapshot de desarrollo: "preparar_benchmark" lo reescribe completo
+REPORTES_SNAPSHOT_DIR = os.environ.get('BENCHMARK_SNAPSHOT_DIR', str(BASE_DIR / 'benchmark_analitica'))
+
+SILENCED_SYSTEM_CHECKS = ['monitoreo.W001']
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+PRECALENTAR = False
+
+# Las consultas se cuentan con monitoreo.sql.medir(); sin línea de log por request
+INSTRUMENTACION_SQL = True
+PRESUPUESTO_CONSULTAS_ESTRICTO = False
+METRICAS = False
+# Los logs por request (permisos, cambios de estado) no forman parte de lo medido
+for _logger in LOGGING['loggers'].values():
+    _logger['level'] = 'ERROR'
+
+# Hasher rápido: los usuarios sembrados comparten un hash precalculado y el
+# login de los escenarios no debe medir las iteraciones de PBKDF2
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -1,13 +1,16 @@
 # AccesLab/urls.py
 
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 
-# Importaciones para Documentación (DRF Spectacular)
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from maestros.imagenes import servir_imagen
+from monitoreo.views import exponer_metricas
+
 
 urlpatterns = [
     # ============================================
@@ -15,12 +18,6 @@ urlpatterns = [
     # ============================================
     path('admin/', admin.site.urls),
     
-    # ============================================
-    # DOCUMENTACIÓN DE LA API
-    # ============================================
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    
     # ============================================
     # MÓDULOS DE LA APLICACIÓN
     # ============================================
@@ -40,12 +37,48 @@ urlpatterns = [
     # 4. Reportes y Análisis
     # Rutas: /api/reportes/kpis/, /api/reportes/actividad-mensual/, etc.
     path('api/reportes/', include('reportes.urls')),
+
+    # 5. Monitoreo (sondas de liveness/readiness, pool de conexiones y métricas)
+    # Rutas: /api/monitoreo/salud/, /api/monitoreo/listo/, /api/monitoreo/pool/
+    path('api/monitoreo/', include('monitoreo.urls')),
+
+    # Métricas para Prometheus (ruta estándar del scraper)
+    path('metrics', exponer_metricas, name='metricas'),
 ]
 
+# ============================================
+# DOCUMENTACIÓN DE LA API
+# ============================================
+# Solo con API_DOCS (por defecto en desarrollo): drf_spectacular no se
+# importa en los workers de producción
+if settings.API_DOCS:
+    from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+
+    urlpatterns += [
+        path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+        path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    ]
+
 # ============================================
 # SERVIR ARCHIVOS MEDIA EN DESARROLLO
 # ============================================
 # ⚠️ IMPORTANTE: Solo funciona con DEBUG=True
-# Para producción, usa Nginx o un servicio de almacenamiento (S3, etc.)
+# Para producción, usa Nginx o un servicio de almacenamiento (S3, etc.).
+# Las imágenes de objetos (rutas por contenido, inmutables) van antes de
+# static() para tomar precedencia y salir con Cache-Control de un año; en
+# producción Nginx debe servir esa carpeta con la misma cabecera:
+#
+#   location /media/objetos/ {
+#       alias /ruta/a/MEDIA_ROOT/objetos/;
+#       expires max;
+#       add_header Cache-Control "public, max-age=31536000, immutable";
+#   }
 if settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            r'^' + re.escape(settings.MEDIA_URL.lstrip('/')) + r'objetos/(?P<path>[0-9a-f]{2}/[0-9a-f]{64}/[\w.]+)$',
+            servir_imagen,
+            name='imagen-objeto',
+        ),
+    ]
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MaestrosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'maestros'
+
+    def ready(self):
+        # Invalida el índice de búsqueda de Objetos y el horario semanal compilado
+        from . import signals  # noqa: F401
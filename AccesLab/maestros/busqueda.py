@@ -0,0 +1,152 @@
+# ==============================================================================
+# MAESTROS/BUSQUEDA.PY - Búsqueda de texto en el inventario de Objetos
+# ==============================================================================
+# Dos motores, elegidos con settings.MAESTROS_BUSQUEDA_OBJETOS:
+# - 'oracle_text': CONTAINS sobre el índice CTXSYS.CONTEXT creado con
+#   maestros/sql/indice_texto_objetos.sql (producción)
+# - 'indice' (por defecto): índice invertido en memoria del proceso,
+#   término normalizado -> IDs de objetos. Se construye con UNA consulta y se
+#   reconstruye cuando cambia la versión compartida en la caché de Django
+#   (ver maestros/signals.py). Requiere una caché compartida entre workers
+#   (CACHE_BACKEND db o redis; ver settings.py): con LocMem solo el worker que
+#   escribió reconstruye su índice
+#
+# En ambos casos cada palabra buscada debe coincidir como prefijo con alguna
+# palabra de Nombre_Objetos o Descripcion ("osci dig" encuentra
+# "Osciloscopio digital"), sin distinguir mayúsculas ni tildes.
+
+import bisect
+import re
+import threading
+
+from django.conf import settings
+
+from monitoreo import versiones
+
+from .catalogos import normalizar_nombre
+from .models import Objetos
+
+CLAVE_VERSION = 'maestros:objetos:indice:version'
+
+MOTORES = ('indice', 'oracle_text')
+
+_local = {'version': None, 'terminos': [], 'ids': []}
+_lock = threading.Lock()
+
+_PALABRA = re.compile(r'[a-z0-9]+')
+
+
+def tokenizar(texto):
+    """Palabras normalizadas (minúsculas, sin tildes) del texto."""
+    return _PALABRA.findall(normalizar_nombre(texto))
+
+
+# ----------------------------------------------------------------------
+# VERSIÓN COMPARTIDA
+# ----------------------------------------------------------------------
+def version_actual():
+    return versiones.actual(CLAVE_VERSION)
+
+
+def invalidar_indice():
+    versiones.incrementar(CLAVE_VERSION)
+
+
+# ----------------------------------------------------------------------
+# ÍNDICE EN MEMORIA
+# ----------------------------------------------------------------------
+def _construir_indice():
+    por_termino = {}
+    for objeto_id, nombre, descripcion in Objetos.objects.values_list(
+        'Objetos_Id', 'Nombre_Objetos', 'Descripcion'
+    ).iterator(chunk_size=5000):
+        for termino in set(tokenizar(nombre) + tokenizar(descripcion)):
+            por_termino.setdefault(termino, set()).add(objeto_id)
+
+    # Términos ordenados: los que empiezan por un prefijo quedan contiguos
+    terminos = sorted(por_termino)
+    return terminos, [frozenset(por_termino[t]) for t in terminos]
+
+
+def _indice():
+    version = version_actual()
+    if _local['version'] == version:
+        return _local['terminos'], _local['ids']
+
+    with _lock:
+        if _local['version'] != version:
+            terminos, ids = _construir_indice()
+            _local.update(version=version, terminos=terminos, ids=ids)
+        return _local['terminos'], _local['ids']
+
+
+def _ids_con_prefijo(terminos, ids, prefijo):
+    encontrados = set()
+    posicion = bisect.bisect_left(terminos, prefijo)
+    while posicion < len(terminos) and terminos[posicion].startswith(prefijo):
+        encontrados |= ids[posicion]
+        posicion += 1
+    return encontrados
+
+
+def buscar_ids(texto):
+    """
+    IDs de los objetos que contienen todas las palabras de `texto` como
+    prefijo. None si el texto no tiene palabras (no se filtra).
+    """
+    palabras = tokenizar(texto)
+    if not palabras:
+        return None
+
+    terminos, ids = _indice()
+    resultado = None
+    # Primero las palabras más largas: suelen ser las más selectivas
+    for palabra in sorted(set(palabras), key=len, reverse=True):
+        encontrados = _ids_con_prefijo(terminos, ids, palabra)
+        resultado = encontrados if resultado is None else resultado & encontrados
+        if not resultado:
+            return set()
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# ORACLE TEXT
+# ----------------------------------------------------------------------
+def consulta_oracle_text(texto):
+    """
+    Expresión para CONTAINS: cada palabra como prefijo y todas requeridas.
+    Solo pasan letras y dígitos ("acero-inox" son dos palabras) y cada una
+    va entre llaves: las palabras reservadas de Oracle Text (and, or, not,
+    near, about, within...) se buscan como texto y no como operadores.
+    """
+    palabras = tokenizar(texto)
+    if not palabras:
+        return None
+    return ' AND '.join(f'{{{palabra}}}%' for palabra in palabras)
+
+
+# ----------------------------------------------------------------------
+# FILTRO PARA QUERYSETS
+# ----------------------------------------------------------------------
+def motor():
+    valor = getattr(settings, 'MAESTROS_BUSQUEDA_OBJETOS', 'indice')
+    if valor not in MOTORES:
+        raise ValueError(f'MAESTROS_BUSQUEDA_OBJETOS debe ser uno de: {", ".join(MOTORES)}')
+    return valor
+
+
+def filtrar(queryset, texto):
+    """Restringe un queryset de Objetos a los que coinciden con `texto`."""
+    if motor() == 'oracle_text':
+        consulta = consulta_oracle_text(texto)
+        if consulta is None:
+            return queryset
+        return queryset.extra(
+            where=['CONTAINS("OBJETOS"."NOMBRE_OBJETOS", %s) > 0'],
+            params=[consulta],
+        )
+
+    ids = buscar_ids(texto)
+    if ids is None:
+        return queryset
+    return queryset.filter(Objetos_Id__in=ids)
@@ -0,0 +1,336 @@
+# ==============================================================================
+# MAESTROS/CATALOGOS.PY - Caché en proceso de los catálogos pequeños
+# ==============================================================================
+# - Cada catálogo se carga completo con UNA consulta y se indexa por ID y por
+#   nombre normalizado (minúsculas, sin tildes, espacios simples)
+# - La versión de cada catálogo vive en la caché de Django, que debe ser
+#   compartida entre workers (CACHE_BACKEND db o redis; ver settings.py);
+#   cada proceso la revisa como máximo una vez por segundo para todas las
+#   tablas a la vez (un solo get_many)
+# - Toda escritura por el ORM (API, admin, shell, creaciones "al vuelo" de los
+#   serializers) sube la versión: señales post_save/post_delete en signals.py
+# - Red de seguridad para lo que no dispara señales (bulk_create, .update(),
+#   SQL directo): la copia de cada proceso se recarga tras MAESTROS_CATALOGO_TTL
+#   segundos y las claves compartidas expiran tras MAESTROS_CATALOGO_TTL_VERSIONES
+# - Se retornan copias de las instancias: nadie modifica la versión cacheada
+# - Las versiones salen de un contador global: la versión de un catálogo es el
+#   valor global en su última escritura. Junto con una "época" (se regenera si
+#   la caché pierde el contador) permite pedir solo lo cambiado desde una versión
+
+import copy
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from monitoreo import metricas
+
+from .models import (
+    Estados, Roles, Tipo_Servicio, Tipo_Identificacion, Tipo_Solicitantes,
+    Categorias, Facultades, Programas, Laboratorios, Frecuencia_Servicio
+)
+
+
+# Modelo -> (nombre del catálogo, campo de nombre)
+CATALOGOS = {
+    Estados: ('estados', 'Nombre_Estado'),
+    Roles: ('roles', 'Nombre_Roles'),
+    Tipo_Servicio: ('tipo_servicio', 'Nombre_Tipo_Servicio'),
+    Tipo_Identificacion: ('tipo_identificacion', 'Nombre_Tipo_Identificacion'),
+    Tipo_Solicitantes: ('tipo_solicitantes', 'Nombre_Solicitante'),
+    Categorias: ('categorias', 'Nombre_Categoria'),
+    Facultades: ('facultades', 'Nombre_Facultad'),
+    Programas: ('programas', 'Nombre_Programa'),
+    Laboratorios: ('laboratorios', 'Nombre_Laboratorio'),
+    Frecuencia_Servicio: ('frecuencia_servicio', 'Nombre_Frecuencia_Servicio'),
+}
+
+# Cada cuánto (segundos) se consulta la versión compartida
+VERIFICACION_POR_DEFECTO = 1.0
+# Antigüedad máxima (segundos) de la copia de un catálogo en el proceso
+TTL_POR_DEFECTO = 600
+# TTL de las versiones en la caché compartida
+TTL_VERSIONES_POR_DEFECTO = 7 * 24 * 3600
+
+_lock = threading.Lock()
+_tablas = {}              # nombre -> {'version', 'cargada', 'por_id', 'por_nombre'}
+_versiones = {}           # nombre -> versión compartida vista en la última verificación
+_ultima_verificacion = [0.0]
+_paquete = {}             # caché del paquete serializado: {'version', 'creado', 'datos', 'etag'}
+
+CLAVE_GLOBAL = 'maestros:catalogo:version_global'
+CLAVE_EPOCA = 'maestros:catalogo:epoca'
+
+
+def normalizar_nombre(nombre):
+    sin_tildes = unicodedata.normalize('NFKD', str(nombre or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(sin_tildes.lower().split())
+
+
+def _ttl():
+    return getattr(settings, 'MAESTROS_CATALOGO_TTL', TTL_POR_DEFECTO)
+
+
+def _ttl_versiones():
+    return getattr(settings, 'MAESTROS_CATALOGO_TTL_VERSIONES', TTL_VERSIONES_POR_DEFECTO)
+
+
+def _clave_version(nombre):
+    return f'maestros:catalogo:{nombre}:version'
+
+
+def _catalogo(modelo):
+    try:
+        return CATALOGOS[modelo]
+    except KeyError:
+        raise ValueError(f'{modelo.__name__} no es un catálogo cacheado')
+
+
+# ----------------------------------------------------------------------
+# VERSIONES
+# ----------------------------------------------------------------------
+def _verificar_versiones():
+    """Trae todas las versiones compartidas de una vez, como máximo cada N segundos."""
+    intervalo = getattr(settings, 'MAESTROS_CATALOGO_VERIFICACION', VERIFICACION_POR_DEFECTO)
+    ahora = time.monotonic()
+    if ahora - _ultima_verificacion[0] < intervalo:
+        return
+    nombres = [nombre for nombre, _ in CATALOGOS.values()]
+    valores = cache.get_many([_clave_version(n) for n in nombres] + [CLAVE_GLOBAL, CLAVE_EPOCA])
+    for nombre in nombres:
+        _versiones[nombre] = valores.get(_clave_version(nombre), 0)
+    _versiones[CLAVE_GLOBAL] = valores.get(CLAVE_GLOBAL, 0)
+    _versiones[CLAVE_EPOCA] = valores.get(CLAVE_EPOCA) or _crear_epoca()
+    _ultima_verificacion[0] = ahora
+
+
+def version(modelo):
+    """Versión compartida actual del catálogo (0 si nunca se ha escrito)."""
+    nombre, _ = _catalogo(modelo)
+    _verificar_versiones()
+    return _versiones.get(nombre, 0)
+
+
+def versiones():
+    """{nombre del catálogo: versión} de todos los catálogos."""
+    _verificar_versiones()
+    return {nombre: _versiones.get(nombre, 0) for nombre, _ in CATALOGOS.values()}
+
+
+def version_global():
+    """Token 'epoca.n' que identifica el estado de todos los catálogos."""
+    _verificar_versiones()
+    return f"{_versiones[CLAVE_EPOCA]}.{_versiones.get(CLAVE_GLOBAL, 0)}"
+
+
+def _crear_epoca():
+    cache.add(CLAVE_EPOCA, uuid.uuid4().hex[:8], timeout=_ttl_versiones())
+    cache.add(CLAVE_GLOBAL, 0, timeout=_ttl_versiones())
+    return cache.get(CLAVE_EPOCA)
+
+
+def _subir_version(nombre):
+    ttl = _ttl_versiones()
+    try:
+        nueva = cache.incr(CLAVE_GLOBAL)
+    except ValueError:
+        # La caché perdió el contador: las versiones anteriores ya no son comparables
+        cache.delete(CLAVE_EPOCA)
+        _crear_epoca()
+        nueva = cache.incr(CLAVE_GLOBAL)
+    # incr() no renueva el TTL en todos los backends (en DatabaseCache lo
+    # reemplaza por el TIMEOUT por defecto)
+    cache.touch(CLAVE_GLOBAL, ttl)
+    cache.touch(CLAVE_EPOCA, ttl)
+    cache.set(_clave_version(nombre), nueva, timeout=ttl)
+    with _lock:
+        _versiones[nombre] = nueva
+        _tablas.pop(nombre, None)
+        _ultima_verificacion[0] = 0.0
+
+
+def invalidar(modelo):
+    """
+    Marca el catálogo como modificado en todos los workers. Si hay una
+    transacción abierta, se aplica al confirmarla. Lo llaman las señales
+    de signals.py; llamarlo a mano tras escrituras masivas (.update(),
+    bulk_create) para no esperar al TTL.
+    """
+    nombre, _ = _catalogo(modelo)
+    with _lock:
+        _tablas.pop(nombre, None)
+    transaction.on_commit(lambda: _subir_version(nombre))
+
+
+# ----------------------------------------------------------------------
+# CARGA Y CONSULTA
+# ----------------------------------------------------------------------
+def _vigente(tabla, version_actual):
+    return (
+        tabla is not None and tabla['version'] == version_actual
+        and time.monotonic() - tabla['cargada'] < _ttl()
+    )
+
+
+def _tabla(modelo):
+    nombre, campo_nombre = _catalogo(modelo)
+    # Con la época: si la caché compartida pierde el contador, los números se
+    # repiten y una copia vieja no debe confundirse con la nueva
+    vigente = (version_global().partition('.')[0], version(modelo))
+    tabla = _tablas.get(nombre)
+    if _vigente(tabla, vigente):
+        metricas.incrementar('acceslab_cache_eventos_total', cache='catalogos', nombre=nombre, resultado='hit')
+        return tabla
+
+    with _lock:
+        tabla = _tablas.get(nombre)
+        if _vigente(tabla, vigente):
+            metricas.incrementar('acceslab_cache_eventos_total', cache='catalogos', nombre=nombre, resultado='hit')
+            return tabla
+
+        metricas.incrementar('acceslab_cache_eventos_total', cache='catalogos', nombre=nombre, resultado='miss')
+        query = modelo.objects.all()
+        if modelo is Programas:
+            query = query.select_related('Facultad_Id')
+        por_id, por_nombre = {}, {}
+        for instancia in query.order_by('pk'):
+            por_id[instancia.pk] = instancia
+            # Con nombres repetidos gana el de menor ID, como un .filter().first()
+            por_nombre.setdefault(normalizar_nombre(getattr(instancia, campo_nombre)), instancia)
+
+        tabla = {'version': vigente, 'cargada': time.monotonic(), 'por_id': por_id, 'por_nombre': por_nombre}
+        _tablas[nombre] = tabla
+        return tabla
+
+
+def _a_entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def obtener(modelo, pk):
+    """Igual que modelo.objects.get(pk=pk), pero desde la caché."""
+    instancia = _tabla(modelo)['por_id'].get(_a_entero(pk))
+    if instancia is None:
+        raise modelo.DoesNotExist(f'{modelo.__name__} con ID {pk} no existe')
+    return copy.copy(instancia)
+
+
+def existe(modelo, pk):
+    return _a_entero(pk) in _tabla(modelo)['por_id']
+
+
+def buscar_por_nombre(modelo, nombre):
+    """Instancia cuyo nombre normalizado coincide, o None."""
+    instancia = _tabla(modelo)['por_nombre'].get(normalizar_nombre(nombre))
+    return copy.copy(instancia) if instancia is not None else None
+
+
+def todos(modelo):
+    """Todas las instancias del catálogo ordenadas por ID."""
+    return [copy.copy(instancia) for instancia in _tabla(modelo)['por_id'].values()]
+
+
+def precargar():
+    """Carga todos los catálogos en este proceso (calentamiento al arrancar)."""
+    for modelo in CATALOGOS:
+        _tabla(modelo)
+
+
+def obtener_o_crear_por_nombre(modelo, nombre, defaults=None):
+    """
+    Como get_or_create(<campo nombre>=nombre): busca primero en la caché
+    (ignorando mayúsculas y tildes) y solo va a la base de datos si no existe.
+    `defaults` puede ser una función, así get_next_id() solo corre al crear.
+    Retorna (instancia, creado).
+    """
+    existente = buscar_por_nombre(modelo, nombre)
+    if existente is not None:
+        return existente, False
+
+    if callable(defaults):
+        defaults = defaults()
+    _, campo_nombre = _catalogo(modelo)
+    # Si se crea, la señal post_save invalida el catálogo
+    return modelo.objects.get_or_create(**{campo_nombre: nombre}, defaults=defaults or {})
+
+
+# ----------------------------------------------------------------------
+# PAQUETE DE CATÁLOGOS (arranque de clientes)
+# ----------------------------------------------------------------------
+def _columnas(modelo):
+    campos = modelo._meta.concrete_fields
+    return [campo.name for campo in campos], [campo.attname for campo in campos]
+
+
+def _serializar_tabla(modelo):
+    columnas, atributos = _columnas(modelo)
+    filas = [
+        [getattr(instancia, atributo) for atributo in atributos]
+        for instancia in _tabla(modelo)['por_id'].values()
+    ]
+    return {'columnas': columnas, 'filas': filas}
+
+
+def _posterior_o_ajena(desde, actual):
+    """True si la versión `desde` es de otra época o más nueva que `actual`."""
+    epoca, _, numero = desde.partition('.')
+    epoca_actual, _, numero_actual = actual.partition('.')
+    return epoca != epoca_actual or (numero.isdigit() and int(numero) > int(numero_actual))
+
+
+def paquete(desde=None):
+    """
+    Todos los catálogos en formato compacto (columnas + filas):
+    {'version', 'completo', 'catalogos': {nombre: {'columnas', 'filas'}}}.
+    Con `desde` ('epoca.n' de una respuesta anterior, misma época) solo se
+    incluyen los catálogos escritos después; si no aplica, va el paquete
+    completo. Retorna (paquete, etag del paquete completo).
+    La época, las versiones y por tanto el ETag son los mismos en todos los
+    workers solo con una caché compartida (ver CACHES en settings.py).
+    """
+    actual = version_global()
+    if desde and desde != actual and _posterior_o_ajena(desde, actual):
+        # Otro worker ya vio una escritura que este aún no (verifica cada
+        # segundo): se relee la versión compartida antes de responder
+        _ultima_verificacion[0] = 0.0
+        actual = version_global()
+    completo = (
+        _paquete.get('version') == actual and time.monotonic() - _paquete['creado'] < _ttl() and _paquete
+    )
+    if not completo:
+        datos = {
+            'version': actual,
+            'completo': True,
+            'catalogos': {nombre: _serializar_tabla(modelo) for modelo, (nombre, _) in CATALOGOS.items()},
+        }
+        contenido = json.dumps(datos, sort_keys=True, default=str, separators=(',', ':'))
+        completo = {
+            'version': actual,
+            'creado': time.monotonic(),
+            'datos': datos,
+            'etag': '"' + hashlib.sha256(contenido.encode('utf-8')).hexdigest()[:32] + '"',
+        }
+        _paquete.clear()
+        _paquete.update(completo)
+
+    epoca, _, numero = (desde or '').partition('.')
+    epoca_actual, _, numero_actual = actual.partition('.')
+    if desde and epoca == epoca_actual and numero.isdigit() and int(numero) <= int(numero_actual):
+        numero = int(numero)
+        cambiados = {
+            nombre: completo['datos']['catalogos'][nombre]
+            for nombre, _ in CATALOGOS.values()
+            if _versiones.get(nombre, 0) > numero
+        }
+        return {'version': actual, 'completo': False, 'catalogos': cambiados}, completo['etag']
+
+    return completo['datos'], completo['etag']
@@ -0,0 +1,169 @@
+# ==============================================================================
+# MAESTROS/HORARIOS.PY - Horario semanal compilado de cada laboratorio
+# ==============================================================================
+# Horarios_Laboratorio guarda el día como texto libre ("Lunes", "miercoles")
+# y las horas como DateTime anclados a la fecha en que se crearon. Aquí se
+# compilan a intervalos en "minuto de la semana" (Lunes 00:00 = 0,
+# Domingo 23:59 = 10079), ordenados y fusionados por laboratorio:
+# - "¿Está abierto el laboratorio?" es una búsqueda binaria sobre la lista
+# - El horario compilado vive en la caché de Django bajo una sola clave
+#   versionada: el endpoint semanal y la validación de reservas hacen UNA
+#   lectura (más la de la versión)
+# - Escribir Horarios_Laboratorio sube la versión (ver maestros/signals.py);
+#   un worker que compiló con datos previos guarda bajo la versión anterior
+#   y no pisa el horario nuevo
+# - Requiere una caché compartida entre workers (CACHE_BACKEND db o redis; ver
+#   settings.py): con LocMem los demás workers validarían reservas contra un
+#   horario de hasta TIMEOUT_HORARIO de antigüedad
+
+import bisect
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from monitoreo import versiones
+
+from .catalogos import normalizar_nombre
+from .models import Horarios_Laboratorio
+
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+MINUTOS_DIA = 24 * 60
+MINUTOS_SEMANA = 7 * MINUTOS_DIA
+
+CLAVE_HORARIO = 'maestros:horarios:semana'
+CLAVE_VERSION = 'maestros:horarios:version'
+# Red de seguridad para cambios que no pasan por el ORM
+TIMEOUT_HORARIO = 60 * 60
+
+_INDICE_DIA = {normalizar_nombre(dia): i for i, dia in enumerate(DIAS_SEMANA)}
+
+
+def indice_dia(nombre):
+    """0 (Lunes) .. 6 (Domingo), o None si el texto no es un día."""
+    return _INDICE_DIA.get(normalizar_nombre(nombre))
+
+
+def minuto_del_dia(valor):
+    """Minuto del día de un datetime/time (hora local si es aware); None si no hay hora."""
+    if valor is None:
+        return None
+    if getattr(valor, 'tzinfo', None) is not None and hasattr(valor, 'date'):
+        valor = timezone.localtime(valor)
+    return valor.hour * 60 + valor.minute
+
+
+def formato_minuto(minuto):
+    return f'{minuto // 60:02d}:{minuto % 60:02d}'
+
+
+def _fusionar(intervalos):
+    """Ordena y une intervalos solapados o contiguos."""
+    fusionados = []
+    for inicio, fin in sorted(intervalos):
+        if fusionados and inicio <= fusionados[-1][1]:
+            fusionados[-1][1] = max(fusionados[-1][1], fin)
+        else:
+            fusionados.append([inicio, fin])
+    return fusionados
+
+
+# ----------------------------------------------------------------------
+# COMPILACIÓN Y CACHÉ
+# ----------------------------------------------------------------------
+def _compilar():
+    """
+    {laboratorio_id: {'intervalos': [[inicio, fin], ...] en minutos de la semana,
+                      'dias': {'Lunes': [['08:00', '12:00']], ...}}}
+    Las franjas con día u horas inválidas se ignoran.
+    """
+    crudos = {}
+    for laboratorio_id, dia_semana, h_ini, h_fin in Horarios_Laboratorio.objects.values_list(
+        'Laboratorio_Id', 'Dia_Semana', 'Hora_Inicio', 'Hora_Fin'
+    ):
+        dia = indice_dia(dia_semana)
+        inicio, fin = minuto_del_dia(h_ini), minuto_del_dia(h_fin)
+        if dia is None or inicio is None or fin is None or fin <= inicio:
+            continue
+        base = dia * MINUTOS_DIA
+        crudos.setdefault(laboratorio_id, []).append((base + inicio, base + fin))
+
+    compilado = {}
+    for laboratorio_id, intervalos in crudos.items():
+        fusionados = _fusionar(intervalos)
+        dias = {}
+        for inicio, fin in fusionados:
+            dia, desde = divmod(inicio, MINUTOS_DIA)
+            hasta = fin - dia * MINUTOS_DIA
+            dias.setdefault(DIAS_SEMANA[dia], []).append([formato_minuto(desde), formato_minuto(hasta)])
+        compilado[laboratorio_id] = {'intervalos': fusionados, 'dias': dias}
+    return compilado
+
+
+def horario_compilado():
+    """Horario de todos los laboratorios: una lectura de caché (o una consulta si no está)."""
+    clave = f'{CLAVE_HORARIO}:v{versiones.actual(CLAVE_VERSION)}'
+    compilado = cache.get(clave)
+    if compilado is None:
+        compilado = _compilar()
+        cache.set(clave, compilado, timeout=TIMEOUT_HORARIO)
+    return compilado
+
+
+def invalidar_horarios():
+    versiones.incrementar(CLAVE_VERSION)
+
+
+def intervalos(laboratorio_id, compilado=None):
+    compilado = horario_compilado() if compilado is None else compilado
+    laboratorio = compilado.get(laboratorio_id)
+    return laboratorio['intervalos'] if laboratorio else []
+
+
+# ----------------------------------------------------------------------
+# CONSULTAS
+# ----------------------------------------------------------------------
+def _cubierto(lista, inicio, fin):
+    """¿[inicio, fin) cabe completo dentro de un solo intervalo de la lista?"""
+    posicion = bisect.bisect_right(lista, [inicio, MINUTOS_SEMANA]) - 1
+    return posicion >= 0 and lista[posicion][0] <= inicio and fin <= lista[posicion][1]
+
+
+def esta_abierto(laboratorio_id, momento):
+    """¿El laboratorio está abierto en el datetime `momento`?"""
+    lista = intervalos(laboratorio_id)
+    if timezone.is_aware(momento):
+        momento = timezone.localtime(momento)
+    minuto = momento.weekday() * MINUTOS_DIA + momento.hour * 60 + momento.minute
+    return _cubierto(lista, minuto, minuto + 1)
+
+
+def fuera_de_horario(laboratorio_id, fecha_inicio, fecha_fin, hora_inicio, hora_fin):
+    """
+    Valida una reserva que ocupa el laboratorio cada día de fecha_inicio a
+    fecha_fin, de hora_inicio a hora_fin. Retorna None si cabe en el horario
+    o un mensaje con el primer día que no cabe. Un laboratorio sin horarios
+    registrados no se restringe.
+    """
+    lista = intervalos(laboratorio_id)
+    if not lista:
+        return None
+
+    desde, hasta = minuto_del_dia(hora_inicio), minuto_del_dia(hora_fin)
+    if desde is None or hasta is None:
+        return None
+    if hasta <= desde:
+        return 'La hora de fin debe ser posterior a la hora de inicio.'
+
+    fecha_fin = fecha_fin or fecha_inicio
+    # Solo hay 7 días distintos: basta revisar la primera semana del rango
+    for i in range(min((fecha_fin - fecha_inicio).days + 1, 7)):
+        dia = (fecha_inicio + timedelta(days=i)).weekday()
+        base = dia * MINUTOS_DIA
+        if not _cubierto(lista, base + desde, base + hasta):
+            return (
+                f'El laboratorio no está abierto el {DIAS_SEMANA[dia]} de '
+                f'{formato_minuto(desde)} a {formato_minuto(hasta)}.'
+            )
+    return None
@@ -0,0 +1,285 @@
+# ==============================================================================
+# MAESTROS/IMAGENES.PY - Imágenes de Objetos con variantes pregeneradas
+# ==============================================================================
+# - Almacenamiento por contenido: cada imagen vive en
+#   MEDIA_ROOT/objetos/<ab>/<sha256>/original.<ext>; subir dos veces el mismo
+#   archivo (aunque sea para objetos distintos) lo guarda una sola vez
+# - Las variantes (miniatura y tarjeta, en WebP y JPEG) se generan en un pool
+#   de procesos: el redimensionado con Pillow es CPU pura y no debe bloquear
+#   el worker web. Si un proceso del pool muere (OOM, señal), el pool queda
+#   roto para siempre: se descarta y se crea otro al encolar
+# - Como la ruta depende del contenido, las URLs nunca cambian de contenido:
+#   se sirven con Cache-Control de un año e "immutable". Django solo las sirve
+#   con DEBUG (servir_imagen); en producción las sirve Nginx con la misma
+#   cabecera (configuración en AccesLab/urls.py)
+# - No hay columnas nuevas: las URLs de las variantes se derivan de Imagen_Url
+#   y de variantes.json, el manifiesto que el pool escribe al terminar. Como el
+#   contenido es inmutable, el serializer consulta una memoria del proceso y
+#   solo lee el manifiesto la primera vez (o cada pocos segundos mientras falta)
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.views.static import serve
+
+
+logger = logging.getLogger(__name__)
+
+CARPETA = 'objetos'
+
+# Formato de Pillow -> extensión del original
+FORMATOS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+# Nombre -> tamaño máximo (ancho, alto); se conserva la proporción
+VARIANTES = {
+    'miniatura': (160, 160),
+    'tarjeta': (480, 360),
+}
+EXTENSIONES_VARIANTE = ('webp', 'jpg')
+
+MAX_BYTES_POR_DEFECTO = 5 * 1024 * 1024
+MAX_PIXELES = 40_000_000
+PROCESOS_POR_DEFECTO = 2
+
+MANIFIESTO = 'variantes.json'
+# Segundos antes de volver a buscar un manifiesto que faltaba
+REINTENTO_MANIFIESTO = 30
+
+CACHE_CONTROL_INMUTABLE = 'public, max-age=31536000, immutable'
+
+_RUTA_ORIGINAL = re.compile(r'(?:^|/)' + CARPETA + r'/([0-9a-f]{2})/([0-9a-f]{64})/original\.(\w+)$')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# digest -> manifiesto leído (definitivo) o instante del último intento fallido
+_manifiestos = {}
+
+
+class ImagenInvalida(ValueError):
+    pass
+
+
+def obtener_pool():
+    """Pool compartido por el proceso; se crea al primer uso."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'MAESTROS_IMAGENES_PROCESOS', PROCESOS_POR_DEFECTO)
+                )
+    return _pool
+
+
+def _descartar_pool(pool):
+    """Saca del proceso un pool roto; el próximo obtener_pool() crea uno nuevo."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def encolar(funcion, *argumentos):
+    """submit() al pool; si está roto, lo reemplaza y reintenta una vez."""
+    pool = obtener_pool()
+    try:
+        return pool.submit(funcion, *argumentos)
+    except BrokenProcessPool:
+        logger.warning('El pool de imágenes estaba roto; se crea uno nuevo')
+        _descartar_pool(pool)
+        return obtener_pool().submit(funcion, *argumentos)
+
+
+def _ruta_relativa(digest):
+    return f'{CARPETA}/{digest[:2]}/{digest}'
+
+
+def _nombre_variante(variante, extension):
+    return f'{variante}.{extension}'
+
+
+def _escribir_atomico(ruta, contenido):
+    # Escribir a un temporal y renombrar: nadie ve un archivo a medio escribir
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+# ----------------------------------------------------------------------
+# INGESTA (worker web)
+# ----------------------------------------------------------------------
+def _verificar_tamano(tamano):
+    maximo = getattr(settings, 'MAESTROS_IMAGEN_MAX_BYTES', MAX_BYTES_POR_DEFECTO)
+    if tamano > maximo:
+        raise ImagenInvalida(f'La imagen no puede superar {maximo // (1024 * 1024)} MB')
+
+
+def validar(contenido):
+    """Retorna la extensión del original; lanza ImagenInvalida si no sirve."""
+    # Pillow se carga con la primera subida, no al arrancar el worker
+    from PIL import Image, UnidentifiedImageError
+
+    _verificar_tamano(len(contenido))
+    try:
+        with Image.open(BytesIO(contenido)) as imagen:
+            formato = imagen.format
+            if imagen.width * imagen.height > MAX_PIXELES:
+                raise ImagenInvalida('La imagen tiene demasiados píxeles')
+            imagen.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise ImagenInvalida('El archivo no es una imagen válida')
+    if formato not in FORMATOS:
+        raise ImagenInvalida(f'Formato no soportado; use {", ".join(FORMATOS)}')
+    return FORMATOS[formato]
+
+
+def guardar(archivo):
+    """
+    Guarda el original por contenido y encola la generación de variantes
+    si faltan. Retorna (URL del original, variantes listas).
+    """
+    # Un archivo demasiado grande se rechaza por su tamaño declarado, sin leerlo a memoria
+    if archivo.size is not None:
+        _verificar_tamano(archivo.size)
+    contenido = archivo.read()
+    extension = validar(contenido)
+    digest = hashlib.sha256(contenido).hexdigest()
+
+    relativa = _ruta_relativa(digest)
+    directorio = os.path.join(settings.MEDIA_ROOT, relativa)
+    os.makedirs(directorio, exist_ok=True)
+    original = os.path.join(directorio, f'original.{extension}')
+    if not os.path.exists(original):
+        _escribir_atomico(original, contenido)
+
+    listas = variantes_listas(directorio)
+    if not listas:
+        futuro = encolar(generar_variantes, original, directorio)
+        futuro.add_done_callback(partial(_variantes_terminadas, directorio))
+    return f'{settings.MEDIA_URL}{relativa}/original.{extension}', listas
+
+
+# ----------------------------------------------------------------------
+# VARIANTES (pool de procesos)
+# ----------------------------------------------------------------------
+def _codificar(imagen, extension):
+    salida = BytesIO()
+    if extension == 'webp':
+        imagen.save(salida, 'WEBP', quality=80, method=4)
+    else:
+        imagen.convert('RGB').save(salida, 'JPEG', quality=82, optimize=True, progressive=True)
+    return salida.getvalue()
+
+
+def generar_variantes(ruta_original, directorio):
+    """Escribe todas las variantes y al final el manifiesto que las declara listas."""
+    from PIL import Image, ImageOps
+
+    with Image.open(ruta_original) as imagen:
+        imagen = ImageOps.exif_transpose(imagen)
+        if imagen.mode not in ('RGB', 'RGBA'):
+            imagen = imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+        for variante, tamano in VARIANTES.items():
+            copia = imagen.copy()
+            copia.thumbnail(tamano, Image.Resampling.LANCZOS)
+            for extension in EXTENSIONES_VARIANTE:
+                _escribir_atomico(
+                    os.path.join(directorio, _nombre_variante(variante, extension)),
+                    _codificar(copia, extension),
+                )
+    manifiesto = {variante: list(EXTENSIONES_VARIANTE) for variante in VARIANTES}
+    _escribir_atomico(os.path.join(directorio, MANIFIESTO), json.dumps(manifiesto).encode())
+    return directorio
+
+
+def _variantes_terminadas(directorio, futuro):
+    """Callback del pool (en el worker web): registra las fallas, que si no se pierden."""
+    error = futuro.exception()
+    if error is not None:
+        logger.error('No se pudieron generar las variantes de %s', directorio, exc_info=error)
+
+
+def _leer_manifiesto(directorio):
+    try:
+        with open(os.path.join(directorio, MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        pass
+    # Imágenes generadas antes del manifiesto: la última variante marca que están listas
+    ultima_variante = list(VARIANTES)[-1]
+    if os.path.exists(os.path.join(directorio, _nombre_variante(ultima_variante, EXTENSIONES_VARIANTE[-1]))):
+        return {variante: list(EXTENSIONES_VARIANTE) for variante in VARIANTES}
+    return None
+
+
+def variantes_listas(directorio):
+    return _leer_manifiesto(directorio) is not None
+
+
+def _manifiesto(digest):
+    """
+    Manifiesto de variantes de `digest`, con memoria del proceso. Un manifiesto
+    encontrado no cambia nunca; uno ausente se vuelve a buscar cada
+    REINTENTO_MANIFIESTO segundos, no en cada fila serializada.
+    """
+    memoria = _manifiestos.get(digest)
+    if isinstance(memoria, dict):
+        return memoria
+    ahora = time.monotonic()
+    if memoria is not None and ahora - memoria < REINTENTO_MANIFIESTO:
+        return None
+    manifiesto = _leer_manifiesto(os.path.join(settings.MEDIA_ROOT, _ruta_relativa(digest)))
+    _manifiestos[digest] = manifiesto if manifiesto is not None else ahora
+    return manifiesto
+
+
+# ----------------------------------------------------------------------
+# URLS PARA EL SERIALIZER
+# ----------------------------------------------------------------------
+def urls_variantes(imagen_url):
+    """
+    {'miniatura': {'webp', 'jpg'}, 'tarjeta': {...}} para una imagen subida
+    por este pipeline; None si Imagen_Url es externa o las variantes aún se
+    están generando (el cliente usa Imagen_Url).
+    """
+    coincidencia = _RUTA_ORIGINAL.search(imagen_url or '')
+    if not coincidencia:
+        return None
+    digest = coincidencia.group(2)
+    manifiesto = _manifiesto(digest)
+    if manifiesto is None:
+        return None
+    relativa = _ruta_relativa(digest)
+    return {
+        variante: {
+            extension: f'{settings.MEDIA_URL}{relativa}/{_nombre_variante(variante, extension)}'
+            for extension in extensiones
+        }
+        for variante, extensiones in manifiesto.items()
+    }
+
+
+# ----------------------------------------------------------------------
+# SERVIR CON CACHÉ LARGA
+# ----------------------------------------------------------------------
+def servir_imagen(request, path):
+    """
+    Sirve MEDIA_ROOT/objetos/... con caché de un año. Solo se registra con
+    DEBUG: en producción Nginx sirve la carpeta (ver AccesLab/urls.py).
+    """
+    respuesta = serve(request, f'{CARPETA}/{path}', document_root=settings.MEDIA_ROOT)
+    respuesta['Cache-Control'] = CACHE_CONTROL_INMUTABLE
+    return respuesta
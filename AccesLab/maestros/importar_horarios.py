@@ -0,0 +1,250 @@
+# ==============================================================================
+# MAESTROS/IMPORTAR_HORARIOS.PY - Importación masiva de horarios de laboratorio
+# ==============================================================================
+# - Entrada: filas JSON o CSV con laboratorio (ID o nombre), día, hora_inicio
+#   y hora_fin
+# - Los laboratorios se resuelven contra el catálogo en memoria
+#   (maestros/catalogos.py): ninguna consulta por fila
+# - Se agrupa por (laboratorio, día) junto con los horarios existentes (o sin
+#   ellos si se reemplaza el horario completo) y una pasada ordenada detecta
+#   solapamientos (error) y huecos entre franjas (informativo)
+# - Todo o nada: con un solo error no se escribe nada; si no, se borra lo
+#   reemplazado y se inserta con bulk_create en una transacción
+
+import csv
+import io
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from reservas.models import Solicitudes
+from . import catalogos, horarios
+from .models import Horarios_Laboratorio, Laboratorios
+from .serializers import get_next_id
+
+
+MAX_FILAS_POR_DEFECTO = 5000
+TAMANO_BLOQUE = 500
+
+
+class ImportacionInvalida(ValueError):
+    """Errores del lote: [{'fila', 'error'}] (fila None = error general)."""
+
+    def __init__(self, errores):
+        super().__init__('La importación de horarios tiene errores')
+        self.errores = errores
+
+
+def leer_csv(archivo):
+    """
+    Filas (dict) de un CSV con encabezado; acepta ',' o ';' como separador.
+    UTF-8 (con o sin BOM) o, si no decodifica, Latin-1 (Excel en Windows).
+    """
+    texto = archivo.read()
+    if isinstance(texto, bytes):
+        try:
+            texto = texto.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            texto = texto.decode('latin-1')
+    try:
+        dialecto = csv.Sniffer().sniff(texto[:2048], delimiters=',;')
+    except csv.Error:
+        dialecto = csv.excel
+    return [
+        {(clave or '').strip().lower(): (valor or '').strip() for clave, valor in fila.items()}
+        for fila in csv.DictReader(io.StringIO(texto), dialect=dialecto)
+    ]
+
+
+def _minuto(valor):
+    """'HH:MM' o 'HH:MM:SS' -> minuto del día; None si no es válido."""
+    partes = str(valor or '').strip().split(':')
+    if len(partes) not in (2, 3) or not all(p.isdigit() for p in partes):
+        return None
+    hora, minuto = int(partes[0]), int(partes[1])
+    if hora > 23 or minuto > 59:
+        return None
+    return hora * 60 + minuto
+
+
+def _laboratorio(fila):
+    """Laboratorio de la fila por ID o nombre, desde el catálogo en memoria."""
+    referencia = fila.get('laboratorio_id') or fila.get('laboratorio')
+    nombre = fila.get('laboratorio_nombre') or fila.get('laboratorio')
+    if referencia not in (None, '') and catalogos.existe(Laboratorios, referencia):
+        return catalogos.obtener(Laboratorios, referencia)
+    if nombre:
+        return catalogos.buscar_por_nombre(Laboratorios, nombre)
+    return None
+
+
+def normalizar_filas(filas):
+    """Valida cada fila; retorna [{'fila', 'laboratorio_id', 'dia', 'inicio', 'fin'}]."""
+    maximo = getattr(settings, 'MAESTROS_IMPORTACION_MAX_FILAS', MAX_FILAS_POR_DEFECTO)
+    if not isinstance(filas, list) or not filas:
+        raise ImportacionInvalida([{'fila': None, 'error': 'No hay filas para importar'}])
+    if len(filas) > maximo:
+        raise ImportacionInvalida([{'fila': None, 'error': f'Máximo {maximo} filas por importación'}])
+
+    errores, normalizadas = [], []
+    for numero, fila in enumerate(filas, start=1):
+        if not isinstance(fila, dict):
+            errores.append({'fila': numero, 'error': 'Cada fila debe ser un objeto'})
+            continue
+        laboratorio = _laboratorio(fila)
+        dia = horarios.indice_dia(fila.get('dia_semana') or fila.get('dia'))
+        inicio, fin = _minuto(fila.get('hora_inicio')), _minuto(fila.get('hora_fin'))
+        if laboratorio is None:
+            error = 'Laboratorio no encontrado'
+        elif dia is None:
+            error = 'Día de la semana inválido'
+        elif inicio is None or fin is None:
+            error = 'Horas inválidas; use HH:MM'
+        elif fin <= inicio:
+            error = 'La hora de fin debe ser posterior a la hora de inicio'
+        else:
+            error = None
+        if error:
+            errores.append({'fila': numero, 'error': error})
+            continue
+        normalizadas.append({
+            'fila': numero,
+            'laboratorio_id': laboratorio.Laboratorio_Id,
+            'dia': dia,
+            'inicio': inicio,
+            'fin': fin,
+        })
+
+    if errores:
+        raise ImportacionInvalida(errores)
+    return normalizadas
+
+
+def _franjas_existentes(laboratorios_ids):
+    """Franjas ya guardadas de esos laboratorios, con el mismo formato que las filas."""
+    existentes = []
+    for horario_id, laboratorio_id, dia_semana, h_ini, h_fin in Horarios_Laboratorio.objects.filter(
+        Laboratorio_Id__in=laboratorios_ids
+    ).values_list('Horario_Id', 'Laboratorio_Id', 'Dia_Semana', 'Hora_Inicio', 'Hora_Fin'):
+        dia = horarios.indice_dia(dia_semana)
+        inicio, fin = horarios.minuto_del_dia(h_ini), horarios.minuto_del_dia(h_fin)
+        if dia is None or inicio is None or fin is None:
+            continue
+        existentes.append({
+            'horario_id': horario_id,
+            'laboratorio_id': laboratorio_id,
+            'dia': dia,
+            'inicio': inicio,
+            'fin': fin,
+        })
+    return existentes
+
+
+def _origen(franja):
+    if 'fila' in franja:
+        return f"fila {franja['fila']}"
+    return f"horario existente {franja['horario_id']}"
+
+
+def barrido(franjas):
+    """
+    Agrupa por (laboratorio, día), ordena por inicio y recorre una vez cada
+    grupo. Retorna (solapamientos, huecos).
+    """
+    grupos = {}
+    for franja in franjas:
+        grupos.setdefault((franja['laboratorio_id'], franja['dia']), []).append(franja)
+
+    solapamientos, huecos = [], []
+    for (laboratorio_id, dia), grupo in sorted(grupos.items()):
+        grupo.sort(key=lambda f: (f['inicio'], f['fin']))
+        # La franja que llega más lejos hasta ahora: contra ella se compara la siguiente
+        mas_larga = grupo[0]
+        for franja in grupo[1:]:
+            # Solapamientos que ya existían entre horarios guardados no bloquean la importación
+            nueva = 'fila' in franja or 'fila' in mas_larga
+            if franja['inicio'] < mas_larga['fin'] and nueva:
+                solapamientos.append({
+                    'fila': franja.get('fila', mas_larga.get('fila')),
+                    'error': (
+                        f"{_origen(franja)} se solapa con {_origen(mas_larga)} "
+                        f"({horarios.DIAS_SEMANA[dia]}, laboratorio {laboratorio_id})"
+                    ),
+                })
+            elif franja['inicio'] > mas_larga['fin']:
+                huecos.append({
+                    'laboratorio_id': laboratorio_id,
+                    'dia': horarios.DIAS_SEMANA[dia],
+                    'desde': horarios.formato_minuto(mas_larga['fin']),
+                    'hasta': horarios.formato_minuto(franja['inicio']),
+                })
+            if franja['fin'] > mas_larga['fin']:
+                mas_larga = franja
+    return solapamientos, huecos
+
+
+def _a_datetime(minuto):
+    # Mismo criterio que TimeToDateTimeField: la hora anclada a la fecha actual
+    hora, minuto = divmod(minuto, 60)
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time(hora, minuto)))
+
+
+@transaction.atomic
+def importar(filas, reemplazar=False, simular=False):
+    """
+    Importa las filas. Con reemplazar=True el horario semanal completo de cada
+    laboratorio presente en el lote se sustituye por el del lote.
+    Retorna {'simulado', 'creados', 'reemplazados', 'laboratorios', 'huecos'}.
+    Lanza ImportacionInvalida con la lista de errores.
+    """
+    nuevas = normalizar_filas(filas)
+    laboratorios_ids = sorted({franja['laboratorio_id'] for franja in nuevas})
+
+    if reemplazar:
+        # HORARIO_ID de SOLICITUDES apunta a estas filas: no se pueden borrar
+        en_uso = sorted(set(Solicitudes.objects.filter(
+            Horario_Id__Laboratorio_Id__in=laboratorios_ids
+        ).values_list('Horario_Id', flat=True)))
+        if en_uso:
+            raise ImportacionInvalida([{
+                'fila': None,
+                'error': f'No se puede reemplazar: los horarios {en_uso} están asignados a solicitudes',
+            }])
+
+    existentes = [] if reemplazar else _franjas_existentes(laboratorios_ids)
+    solapamientos, huecos = barrido(nuevas + existentes)
+    if solapamientos:
+        raise ImportacionInvalida(solapamientos)
+
+    reemplazados = 0
+    if not simular:
+        if reemplazar:
+            reemplazados, _ = Horarios_Laboratorio.objects.filter(
+                Laboratorio_Id__in=laboratorios_ids
+            ).delete()
+
+        siguiente = get_next_id(Horarios_Laboratorio, 'Horario_Id')
+        Horarios_Laboratorio.objects.bulk_create([
+            Horarios_Laboratorio(
+                Horario_Id=siguiente + i,
+                Laboratorio_Id_id=franja['laboratorio_id'],
+                Dia_Semana=horarios.DIAS_SEMANA[franja['dia']],
+                Hora_Inicio=_a_datetime(franja['inicio']),
+                Hora_Fin=_a_datetime(franja['fin']),
+            )
+            for i, franja in enumerate(sorted(nuevas, key=lambda f: (f['laboratorio_id'], f['dia'], f['inicio'])))
+        ], batch_size=TAMANO_BLOQUE)
+        # bulk_create no dispara post_save: se invalida el horario compilado aquí
+        transaction.on_commit(horarios.invalidar_horarios)
+    elif reemplazar:
+        reemplazados = Horarios_Laboratorio.objects.filter(Laboratorio_Id__in=laboratorios_ids).count()
+
+    return {
+        'simulado': simular,
+        'creados': len(nuevas),
+        'reemplazados': reemplazados,
+        'laboratorios': laboratorios_ids,
+        'huecos': huecos,
+    }
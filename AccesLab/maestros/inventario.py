@@ -0,0 +1,199 @@
+# ==============================================================================
+# MAESTROS/INVENTARIO.PY - Ajuste masivo de stock (toma física de inventario)
+# ==============================================================================
+# - Cada ajuste trae `cantidad` (valor absoluto de Cant_Stock) o `delta`
+#   (suma/resta) y opcionalmente `activo`
+# - Todo o nada: se valida el lote completo antes de escribir; con un solo
+#   error no se aplica ningún ajuste
+# - Las filas se bloquean (SELECT ... FOR UPDATE) para que un préstamo que
+#   descuenta stock en paralelo no se pierda, y se escriben con bulk_update
+#   (un UPDATE ... CASE por bloque) dentro de una transacción
+# - Cant_Stock son las unidades en estante: la entrega descuenta lo prestado
+#   y la devolución lo repone (reservas/prestamos.py). Los préstamos
+#   pendientes de devolución se informan en el reporte y no se permite
+#   desactivar un objeto que los tenga
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from reservas.estados import ESTADOS_PRESTAMO_ACTIVO, ids_estados
+from reservas.models import Solicitudes_Objetos
+from .models import Objetos
+
+
+MAX_AJUSTES_POR_DEFECTO = 5000
+TAMANO_BLOQUE = 500
+
+
+class AjusteInvalido(ValueError):
+    """Errores de validación del lote: [{'indice', 'objetos_id', 'error'}]."""
+
+    def __init__(self, errores):
+        super().__init__('El ajuste de inventario tiene errores')
+        self.errores = errores
+
+
+def _entero(valor):
+    if isinstance(valor, bool):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalizar_ajustes(ajustes):
+    """
+    Valida la forma de cada ajuste y retorna {objetos_id: ajuste} con las
+    claves 'indice', 'cantidad', 'delta' y 'activo'.
+    """
+    maximo = getattr(settings, 'MAESTROS_AJUSTE_MAX_ITEMS', MAX_AJUSTES_POR_DEFECTO)
+    if not isinstance(ajustes, list) or not ajustes:
+        raise AjusteInvalido([{'indice': None, 'objetos_id': None, 'error': 'Envíe una lista "ajustes" no vacía'}])
+    if len(ajustes) > maximo:
+        raise AjusteInvalido([{'indice': None, 'objetos_id': None, 'error': f'Máximo {maximo} ajustes por petición'}])
+
+    errores, por_objeto = [], {}
+    for indice, ajuste in enumerate(ajustes):
+        if not isinstance(ajuste, dict):
+            errores.append({'indice': indice, 'objetos_id': None, 'error': 'Cada ajuste debe ser un objeto'})
+            continue
+        objeto_id = _entero(ajuste.get('objetos_id'))
+        if objeto_id is None:
+            errores.append({'indice': indice, 'objetos_id': ajuste.get('objetos_id'), 'error': 'objetos_id inválido'})
+            continue
+        if objeto_id in por_objeto:
+            errores.append({'indice': indice, 'objetos_id': objeto_id, 'error': 'Objeto repetido en el lote'})
+            continue
+
+        tiene_cantidad, tiene_delta = 'cantidad' in ajuste, 'delta' in ajuste
+        cantidad, delta = _entero(ajuste.get('cantidad')), _entero(ajuste.get('delta'))
+        activo = ajuste.get('activo')
+        if tiene_cantidad and tiene_delta:
+            error = 'Use "cantidad" o "delta", no ambos'
+        elif tiene_cantidad and (cantidad is None or cantidad < 0):
+            error = '"cantidad" debe ser un entero mayor o igual a cero'
+        elif tiene_delta and delta is None:
+            error = '"delta" debe ser un entero'
+        elif activo is not None and not isinstance(activo, bool):
+            error = '"activo" debe ser true o false'
+        elif not (tiene_cantidad or tiene_delta or activo is not None):
+            error = 'Indique "cantidad", "delta" o "activo"'
+        else:
+            error = None
+        if error:
+            errores.append({'indice': indice, 'objetos_id': objeto_id, 'error': error})
+            continue
+
+        por_objeto[objeto_id] = {
+            'indice': indice,
+            'cantidad': cantidad if tiene_cantidad else None,
+            'delta': delta if tiene_delta else None,
+            'activo': activo,
+        }
+
+    if errores:
+        raise AjusteInvalido(errores)
+    return por_objeto
+
+
+def prestamos_pendientes(objetos_ids):
+    """{Objetos_Id: unidades prestadas sin devolver} con una sola consulta."""
+    return dict(
+        Solicitudes_Objetos.objects.filter(
+            Objetos_Id__in=objetos_ids,
+            Solicitud_Id__Estado_Id__in=ids_estados(ESTADOS_PRESTAMO_ACTIVO),
+        ).values('Objetos_Id').annotate(
+            total=Sum('Cantidad_Objetos')
+        ).values_list('Objetos_Id', 'total')
+    )
+
+
+@transaction.atomic
+def ajustar_stock(ajustes, simular=False):
+    """
+    Aplica el lote y retorna el reporte de diferencias:
+    {'simulado', 'resumen': {...}, 'cambios': [...]}.
+    Con simular=True valida y calcula el reporte sin escribir.
+    Lanza AjusteInvalido con la lista de errores.
+    """
+    por_objeto = normalizar_ajustes(ajustes)
+    ids = list(por_objeto)
+
+    objetos = {
+        objeto.Objetos_Id: objeto
+        for objeto in Objetos.objects.select_for_update().filter(Objetos_Id__in=ids).only(
+            'Objetos_Id', 'Nombre_Objetos', 'Cant_Stock', 'Activo'
+        )
+    }
+    prestados = prestamos_pendientes(ids)
+
+    errores, cambios, modificados = [], [], []
+    agregadas = retiradas = 0
+    for objeto_id, ajuste in por_objeto.items():
+        objeto = objetos.get(objeto_id)
+        if objeto is None:
+            errores.append({'indice': ajuste['indice'], 'objetos_id': objeto_id, 'error': 'El objeto no existe'})
+            continue
+
+        stock_anterior = objeto.Cant_Stock or 0
+        if ajuste['cantidad'] is not None:
+            stock_nuevo = ajuste['cantidad']
+        elif ajuste['delta'] is not None:
+            stock_nuevo = stock_anterior + ajuste['delta']
+        else:
+            stock_nuevo = stock_anterior
+        activo_nuevo = objeto.Activo if ajuste['activo'] is None else ajuste['activo']
+        en_prestamo = prestados.get(objeto_id, 0)
+
+        if stock_nuevo < 0:
+            errores.append({
+                'indice': ajuste['indice'], 'objetos_id': objeto_id,
+                'error': f'El stock quedaría negativo ({stock_nuevo})',
+            })
+            continue
+        if objeto.Activo and not activo_nuevo and en_prestamo:
+            errores.append({
+                'indice': ajuste['indice'], 'objetos_id': objeto_id,
+                'error': f'No se puede desactivar: tiene {en_prestamo} unidades prestadas sin devolver',
+            })
+            continue
+
+        if stock_nuevo == objeto.Cant_Stock and activo_nuevo == objeto.Activo:
+            continue
+
+        diferencia = stock_nuevo - stock_anterior
+        agregadas += max(diferencia, 0)
+        retiradas += max(-diferencia, 0)
+        cambios.append({
+            'objetos_id': objeto_id,
+            'nombre': objeto.Nombre_Objetos,
+            'stock_anterior': objeto.Cant_Stock,
+            'stock_nuevo': stock_nuevo,
+            'diferencia': diferencia,
+            'activo_anterior': objeto.Activo,
+            'activo_nuevo': activo_nuevo,
+            'prestados': en_prestamo,
+        })
+        objeto.Cant_Stock, objeto.Activo = stock_nuevo, activo_nuevo
+        modificados.append(objeto)
+
+    if errores:
+        raise AjusteInvalido(sorted(errores, key=lambda e: e['indice']))
+
+    if not simular and modificados:
+        # bulk_update no dispara señales: el índice de búsqueda no depende del stock
+        Objetos.objects.bulk_update(modificados, ['Cant_Stock', 'Activo'], batch_size=TAMANO_BLOQUE)
+
+    return {
+        'simulado': simular,
+        'resumen': {
+            'recibidos': len(por_objeto),
+            'modificados': len(cambios),
+            'sin_cambios': len(por_objeto) - len(cambios),
+            'unidades_agregadas': agregadas,
+            'unidades_retiradas': retiradas,
+        },
+        'cambios': sorted(cambios, key=lambda c: c['objetos_id']),
+    }
@@ -0,0 +1,30 @@
+# maestros/paginacion.py
+# Paginación por cursor para listados grandes de maestros
+# - Opcional: solo pagina si la petición trae ?cursor o ?page_size, así los
+#   clientes que esperan la lista completa siguen funcionando igual
+# - Orden estable (nombre + ID) respaldado por un índice en Oracle. El cursor
+#   de DRF filtra solo por el primer campo ("WHERE nombre > último visto") y
+#   desempata los nombres repetidos con un desplazamiento guardado en el propio
+#   cursor (OFFSET pequeño, solo dentro de los empates)
+# - Sin COUNT(*): se leen page_size + 1 filas para saber si hay página
+#   siguiente; la respuesta no trae total
+
+from rest_framework.pagination import CursorPagination
+
+
+class CursorOpcionalPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (
+            self.cursor_query_param not in request.query_params
+            and self.page_size_query_param not in request.query_params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class ObjetosPagination(CursorOpcionalPagination):
+    ordering = ('Nombre_Objetos', 'Objetos_Id')
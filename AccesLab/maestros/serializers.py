@@ -1,3 +1,5 @@
+import logging
+
 from rest_framework import serializers
 from django.db import transaction, models
 from datetime import datetime, time
@@ -6,6 +8,9 @@ from .models import (
     Categorias, Objetos, Estados, Frecuencia_Servicio, Entregas, Devoluciones, 
     Tipo_Servicio, Laboratorios, Horarios_Laboratorio
 )
+from . import catalogos, imagenes
+
+logger = logging.getLogger(__name__)
 
 
 # ----------------------------------------------------------------------
@@ -233,7 +238,7 @@ class ProgramaSerializer(serializers.ModelSerializer):
         
         if facultad_id:
             try:
-                return Facultades.objects.get(Facultad_Id=facultad_id)
+                return catalogos.obtener(Facultades, facultad_id)
             except Facultades.DoesNotExist:
                 if not facultad_nombre:
                     raise serializers.ValidationError({
@@ -241,9 +246,9 @@ class ProgramaSerializer(serializers.ModelSerializer):
                     })
         
         if facultad_nombre:
-            facultad, created = Facultades.objects.get_or_create(
-                Nombre_Facultad=facultad_nombre,
-                defaults={
+            facultad, created = catalogos.obtener_o_crear_por_nombre(
+                Facultades, facultad_nombre,
+                defaults=lambda: {
                     'Facultad_Id': get_next_id(Facultades, 'Facultad_Id')
                 }
             )
@@ -281,6 +286,7 @@ class ObjetoSerializer(serializers.ModelSerializer):
     # Campos para lectura
     nombre_categoria = serializers.CharField(source='Categoria_Id.Nombre_Categoria', read_only=True)
     disponible = serializers.BooleanField(read_only=True)
+    imagenes = serializers.SerializerMethodField()
     
     # 🔥 Campos para escritura flexible
     categoria_id = serializers.IntegerField(write_only=True, required=False)
@@ -298,26 +304,26 @@ class ObjetoSerializer(serializers.ModelSerializer):
             'categoria_id',  # Campo para enviar ID existente
             'categoria_nombre',  # Campo para crear nueva categoría
             'Imagen_Url',
+            'imagenes',
             'Activo',
             'disponible'
         )
-        read_only_fields = ('Objetos_Id', 'nombre_categoria', 'disponible', 'Categoria_Id')  # 🔥 AGREGADO Categoria_Id aquí
+        read_only_fields = ('Objetos_Id', 'nombre_categoria', 'disponible', 'Categoria_Id', 'imagenes')  # 🔥 AGREGADO Categoria_Id aquí
         
         # 🔥 ALTERNATIVA: Usar extra_kwargs
         extra_kwargs = {
             'Categoria_Id': {'read_only': True, 'required': False}  # Ignorar en POST/PATCH
         }
 
+    def get_imagenes(self, obj):
+        """URLs de miniatura y tarjeta (WebP/JPEG), o None si no hay variantes."""
+        return imagenes.urls_variantes(obj.Imagen_Url)
+
     def validate(self, data):
         """Validar que se proporcione categoria_id O categoria_nombre."""
         categoria_id = data.get('categoria_id')
         categoria_nombre = data.get('categoria_nombre')
         
-        print(f"🔍 Validando Objeto:")
-        print(f"   - categoria_id: {categoria_id}")
-        print(f"   - categoria_nombre: {categoria_nombre}")
-        print(f"   - Es actualización: {self.instance is not None}")
-        
         # Si se está actualizando y no se proporciona ninguno, está OK
         if self.instance and not categoria_id and not categoria_nombre:
             return data
@@ -342,41 +348,31 @@ class ObjetoSerializer(serializers.ModelSerializer):
         categoria_id = validated_data.pop('categoria_id', None)
         categoria_nombre = validated_data.pop('categoria_nombre', None)
         
-        print(f"🔍 _get_or_create_categoria:")
-        print(f"   - categoria_id: {categoria_id}")
-        print(f"   - categoria_nombre: {categoria_nombre}")
-        
         if categoria_id:
             try:
-                categoria = Categorias.objects.get(Categoria_Id=categoria_id)
-                print(f"   ✅ Categoría encontrada: {categoria.Nombre_Categoria}")
-                return categoria
+                return catalogos.obtener(Categorias, categoria_id)
             except Categorias.DoesNotExist:
                 if not categoria_nombre:
                     raise serializers.ValidationError({
                         'categoria_id': f'No existe una categoría con ID {categoria_id}'
                     })
-                print(f"   ⚠️ Categoría {categoria_id} no existe, intentando crear con nombre...")
+                logger.info('Categoría %s no existe; se busca o crea "%s"', categoria_id, categoria_nombre)
         
         if categoria_nombre:
-            categoria, created = Categorias.objects.get_or_create(
-                Nombre_Categoria=categoria_nombre,
-                defaults={
+            categoria, created = catalogos.obtener_o_crear_por_nombre(
+                Categorias, categoria_nombre,
+                defaults=lambda: {
                     'Categoria_Id': get_next_id(Categorias, 'Categoria_Id')
                 }
             )
             if created:
-                print(f"   ✅ Categoría CREADA: {categoria.Nombre_Categoria} (ID: {categoria.Categoria_Id})")
-            else:
-                print(f"   ✅ Categoría existente encontrada: {categoria.Nombre_Categoria}")
+                logger.info('Categoría creada: %s (ID: %s)', categoria.Nombre_Categoria, categoria.Categoria_Id)
             return categoria
         
         return None
 
     @transaction.atomic
     def create(self, validated_data):
-        print(f"🔧 CREATE Objeto - validated_data: {validated_data}")
-        
         categoria = self._get_or_create_categoria(validated_data)
         
         if 'Objetos_Id' not in validated_data or validated_data['Objetos_Id'] is None:
@@ -393,7 +389,7 @@ class ObjetoSerializer(serializers.ModelSerializer):
             **validated_data
         )
         
-        print(f"✅ Objeto creado: {objeto.Nombre_Objetos} (ID: {objeto.Objetos_Id})")
+        logger.info('Objeto creado: %s (ID: %s)', objeto.Nombre_Objetos, objeto.Objetos_Id)
         return objeto
 
     @transaction.atomic
@@ -409,6 +405,34 @@ class ObjetoSerializer(serializers.ModelSerializer):
         return instance
 
 
+class ObjetoResumenSerializer(serializers.ModelSerializer):
+    """
+    Versión liviana para listados (?compacto=true): sin Descripcion ni
+    Imagen_Url, solo la miniatura.
+    """
+    nombre_categoria = serializers.CharField(source='Categoria_Id.Nombre_Categoria', read_only=True)
+    disponible = serializers.BooleanField(read_only=True)
+    miniatura = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Objetos
+        fields = (
+            'Objetos_Id',
+            'Nombre_Objetos',
+            'Cant_Stock',
+            'Categoria_Id',
+            'nombre_categoria',
+            'miniatura',
+            'Activo',
+            'disponible'
+        )
+        read_only_fields = fields
+
+    def get_miniatura(self, obj):
+        variantes = imagenes.urls_variantes(obj.Imagen_Url)
+        return variantes['miniatura'] if variantes else None
+
+
 # 🔥🔥 HORARIOS SERIALIZER CORREGIDO 🔥🔥
 class HorariosLaboratorioSerializer(serializers.ModelSerializer):
     # Campos para lectura
@@ -441,12 +465,6 @@ class HorariosLaboratorioSerializer(serializers.ModelSerializer):
         laboratorio_id = data.get('laboratorio_id')
         laboratorio_nombre = data.get('laboratorio_nombre')
         
-        print(f"🔍 Validando Horario:")
-        print(f"   - laboratorio_id: {laboratorio_id}")
-        print(f"   - laboratorio_nombre: {laboratorio_nombre}")
-        print(f"   - Hora_Inicio: {data.get('Hora_Inicio')}")
-        print(f"   - Hora_Fin: {data.get('Hora_Fin')}")
-        
         # Si se está actualizando y no se proporciona ninguno, está OK
         if self.instance and not laboratorio_id and not laboratorio_nombre:
             pass
@@ -475,7 +493,7 @@ class HorariosLaboratorioSerializer(serializers.ModelSerializer):
         
         if laboratorio_id:
             try:
-                return Laboratorios.objects.get(Laboratorio_Id=laboratorio_id)
+                return catalogos.obtener(Laboratorios, laboratorio_id)
             except Laboratorios.DoesNotExist:
                 if not laboratorio_nombre:
                     raise serializers.ValidationError({
@@ -483,9 +501,9 @@ class HorariosLaboratorioSerializer(serializers.ModelSerializer):
                     })
         
         if laboratorio_nombre:
-            laboratorio, created = Laboratorios.objects.get_or_create(
-                Nombre_Laboratorio=laboratorio_nombre,
-                defaults={
+            laboratorio, created = catalogos.obtener_o_crear_por_nombre(
+                Laboratorios, laboratorio_nombre,
+                defaults=lambda: {
                     'Laboratorio_Id': get_next_id(Laboratorios, 'Laboratorio_Id'),
                     'Capacidad': 20,  # Valor por defecto
                     'Ubicacion': 'Por definir'  # Valor por defecto
@@ -497,8 +515,6 @@ class HorariosLaboratorioSerializer(serializers.ModelSerializer):
 
     @transaction.atomic
     def create(self, validated_data):
-        print(f"🔧 CREATE Horario - validated_data: {validated_data}")
-        
         laboratorio = self._get_or_create_laboratorio(validated_data)
         
         if 'Horario_Id' not in validated_data or validated_data['Horario_Id'] is None:
@@ -509,7 +525,7 @@ class HorariosLaboratorioSerializer(serializers.ModelSerializer):
             **validated_data
         )
         
-        print(f"✅ Horario creado: ID {horario.Horario_Id}")
+        logger.info('Horario creado: ID %s (laboratorio %s)', horario.Horario_Id, horario.Laboratorio_Id_id)
         return horario
 
     @transaction.atomic
@@ -564,7 +580,7 @@ class EntregasSerializer(serializers.ModelSerializer):
         
         if frecuencia_id:
             try:
-                return Frecuencia_Servicio.objects.get(Frecuencia_Servicio_Id=frecuencia_id)
+                return catalogos.obtener(Frecuencia_Servicio, frecuencia_id)
             except Frecuencia_Servicio.DoesNotExist:
                 if not frecuencia_nombre:
                     raise serializers.ValidationError({
@@ -572,9 +588,9 @@ class EntregasSerializer(serializers.ModelSerializer):
                     })
         
         if frecuencia_nombre:
-            frecuencia, created = Frecuencia_Servicio.objects.get_or_create(
-                Nombre_Frecuencia_Servicio=frecuencia_nombre,
-                defaults={
+            frecuencia, created = catalogos.obtener_o_crear_por_nombre(
+                Frecuencia_Servicio, frecuencia_nombre,
+                defaults=lambda: {
                     'Frecuencia_Servicio_Id': get_next_id(Frecuencia_Servicio, 'Frecuencia_Servicio_Id')
                 }
             )
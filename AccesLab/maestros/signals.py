@@ -0,0 +1,37 @@
+# maestros/signals.py
+# Invalidación de los catálogos cacheados (maestros/catalogos.py), del índice
+# de búsqueda de Objetos (maestros/busqueda.py) y del horario semanal
+# compilado (maestros/horarios.py). Las señales cubren toda escritura por el
+# ORM: API, admin de Django, shell y comandos.
+# Los descuentos de stock usan .update() y no disparan señales: el índice
+# solo depende de Nombre_Objetos y Descripcion.
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import catalogos
+from .busqueda import invalidar_indice
+from .horarios import invalidar_horarios
+from .models import Horarios_Laboratorio, Objetos
+
+
+@receiver(post_save, sender=Objetos)
+@receiver(post_delete, sender=Objetos)
+def invalidar_por_escritura(sender, **kwargs):
+    transaction.on_commit(invalidar_indice)
+
+
+@receiver(post_save, sender=Horarios_Laboratorio)
+@receiver(post_delete, sender=Horarios_Laboratorio)
+def invalidar_horario_semanal(sender, **kwargs):
+    transaction.on_commit(invalidar_horarios)
+
+
+def invalidar_catalogo(sender, **kwargs):
+    catalogos.invalidar(sender)
+
+
+for _modelo in catalogos.CATALOGOS:
+    post_save.connect(invalidar_catalogo, sender=_modelo, dispatch_uid=f'catalogos.guardar.{_modelo.__name__}')
+    post_delete.connect(invalidar_catalogo, sender=_modelo, dispatch_uid=f'catalogos.borrar.{_modelo.__name__}')
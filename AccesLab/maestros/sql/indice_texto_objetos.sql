@@ -0,0 +1,62 @@
+-- ==============================================================================
+-- MAESTROS/SQL/INDICE_TEXTO_OBJETOS.SQL - Búsqueda e inventario de Objetos
+-- ==============================================================================
+-- Los modelos son managed = False: Django no crea estos índices, se ejecutan
+-- a mano en Oracle (sqlplus / SQL Developer) con el usuario dueño del esquema,
+-- que necesita el rol CTXAPP. Después de crearlos, activar el motor con
+-- MAESTROS_BUSQUEDA_OBJETOS = 'oracle_text' en settings.
+
+-- Texto: un solo índice CONTEXT sobre NOMBRE_OBJETOS y DESCRIPCION
+-- (MULTI_COLUMN_DATASTORE). BASE_LETTER ignora tildes y MIXED_CASE = NO
+-- ignora mayúsculas, igual que el índice en memoria de maestros/busqueda.py.
+BEGIN
+    CTX_DDL.CREATE_PREFERENCE('OBJETOS_DATASTORE', 'MULTI_COLUMN_DATASTORE');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_DATASTORE', 'COLUMNS', 'NOMBRE_OBJETOS, DESCRIPCION');
+
+    CTX_DDL.CREATE_PREFERENCE('OBJETOS_LEXER', 'BASIC_LEXER');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_LEXER', 'BASE_LETTER', 'YES');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_LEXER', 'MIXED_CASE', 'NO');
+
+    -- Las búsquedas son por prefijo ("osci%"): índice de prefijos
+    CTX_DDL.CREATE_PREFERENCE('OBJETOS_WORDLIST', 'BASIC_WORDLIST');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_WORDLIST', 'PREFIX_INDEX', 'TRUE');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_WORDLIST', 'PREFIX_MIN_LENGTH', '2');
+    CTX_DDL.SET_ATTRIBUTE('OBJETOS_WORDLIST', 'PREFIX_MAX_LENGTH', '8');
+END;
+/
+
+-- SYNC (ON COMMIT): los cambios se ven en la búsqueda al confirmar la transacción
+CREATE INDEX IX_OBJETOS_TEXTO
+    ON OBJETOS (NOMBRE_OBJETOS)
+    INDEXTYPE IS CTXSYS.CONTEXT
+    PARAMETERS ('DATASTORE OBJETOS_DATASTORE LEXER OBJETOS_LEXER WORDLIST OBJETOS_WORDLIST SYNC (ON COMMIT)');
+
+-- El índice está definido sobre NOMBRE_OBJETOS: Oracle Text solo reindexa una
+-- fila si se actualiza esa columna. Este trigger la "toca" cuando cambia
+-- solo DESCRIPCION, para que la búsqueda no quede desactualizada.
+CREATE OR REPLACE TRIGGER TRG_OBJETOS_TEXTO
+    BEFORE UPDATE OF DESCRIPCION ON OBJETOS
+    FOR EACH ROW
+BEGIN
+    :NEW.NOMBRE_OBJETOS := :NEW.NOMBRE_OBJETOS;
+END;
+/
+
+-- Paginación por cursor (ORDER BY NOMBRE_OBJETOS, OBJETOS_ID): cada página
+-- es un rango del índice, sin ordenar la tabla completa.
+CREATE INDEX IX_OBJETOS_NOMBRE_ID
+    ON OBJETOS (NOMBRE_OBJETOS, OBJETOS_ID);
+
+-- Filtros por categoría y estado del listado
+CREATE INDEX IX_OBJETOS_CATEGORIA_ACTIVO
+    ON OBJETOS (CATEGORIA_ID, ACTIVO, CANT_STOCK);
+
+-- Estadísticas actualizadas para que el optimizador elija los índices
+BEGIN
+    DBMS_STATS.GATHER_TABLE_STATS(
+        ownname => USER,
+        tabname => 'OBJETOS',
+        cascade => TRUE
+    );
+END;
+/
@@ -1,3 +1,304 @@
-from django.test import TestCase
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from monitoreo.pruebas import reiniciar_catalogos
+from usuarios.models import Usuarios, Usuarios_Roles
+
+from . import catalogos, imagenes
+from .horarios import MINUTOS_DIA, _cubierto
+from .importar_horarios import barrido
+from .inventario import AjusteInvalido, normalizar_ajustes
+from .models import Estados, Horarios_Laboratorio, Laboratorios, Roles, Tipo_Identificacion
+
+
+class PaqueteCatalogosTests(TestCase):
+    """maestros/catalogos.py: paquete completo, ETag y deltas por versión."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Estados.objects.create(Estado_Id=1, Nombre_Estado='Pendiente')
+        Laboratorios.objects.create(Laboratorio_Id=1, Nombre_Laboratorio='Redes', Capacidad=30, Ubicacion='B1')
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+
+    def _escribir(self, **campos):
+        # Las versiones suben al confirmar la transacción (on_commit)
+        with self.captureOnCommitCallbacks(execute=True):
+            Estados.objects.create(**campos)
+        catalogos._ultima_verificacion[0] = 0.0
+
+    def test_paquete_completo(self):
+        datos, etag = catalogos.paquete()
+
+        self.assertTrue(datos['completo'])
+        self.assertEqual(set(datos['catalogos']), {nombre for nombre, _ in catalogos.CATALOGOS.values()})
+        estados = datos['catalogos']['estados']
+        self.assertEqual(estados['columnas'], ['Estado_Id', 'Nombre_Estado'])
+        self.assertEqual(estados['filas'], [[1, 'Pendiente']])
+        self.assertRegex(datos['version'], r'^\w+\.\d+$')
+        self.assertRegex(etag, r'^"[0-9a-f]{32}"$')
+
+    def test_etag_estable_hasta_una_escritura(self):
+        _, etag = catalogos.paquete()
+        self.assertEqual(catalogos.paquete()[1], etag)
+
+        self._escribir(Estado_Id=2, Nombre_Estado='Aprobada')
+        datos, nuevo = catalogos.paquete()
+        self.assertNotEqual(nuevo, etag)
+        self.assertEqual(len(datos['catalogos']['estados']['filas']), 2)
+
+    def test_desde_una_version_solo_lo_cambiado(self):
+        anterior, _ = catalogos.paquete()
+        self._escribir(Estado_Id=2, Nombre_Estado='Aprobada')
+
+        datos, _ = catalogos.paquete(desde=anterior['version'])
+        self.assertFalse(datos['completo'])
+        self.assertEqual(list(datos['catalogos']), ['estados'])
+        self.assertNotEqual(datos['version'], anterior['version'])
+
+        # Ya al día: delta vacío
+        datos, _ = catalogos.paquete(desde=datos['version'])
+        self.assertFalse(datos['completo'])
+        self.assertEqual(datos['catalogos'], {})
+
+    def test_version_de_otra_epoca_recibe_el_paquete_completo(self):
+        datos, _ = catalogos.paquete(desde='otraepoca.3')
+        self.assertTrue(datos['completo'])
+
+
+class NormalizarAjustesTests(SimpleTestCase):
+    """maestros/inventario.py: validación del lote antes de tocar la base."""
+
+    def _errores(self, ajustes):
+        with self.assertRaises(AjusteInvalido) as contexto:
+            normalizar_ajustes(ajustes)
+        return [(e['indice'], e['error']) for e in contexto.exception.errores]
+
+    def test_lote_valido(self):
+        resultado = normalizar_ajustes([
+            {'objetos_id': 1, 'cantidad': 10},
+            {'objetos_id': '2', 'delta': -3, 'activo': False},
+            {'objetos_id': 3, 'activo': True},
+        ])
+        self.assertEqual(resultado, {
+            1: {'indice': 0, 'cantidad': 10, 'delta': None, 'activo': None},
+            2: {'indice': 1, 'cantidad': None, 'delta': -3, 'activo': False},
+            3: {'indice': 2, 'cantidad': None, 'delta': None, 'activo': True},
+        })
+
+    def test_lote_vacio_o_no_lista(self):
+        self.assertEqual(self._errores([])[0][0], None)
+        self.assertEqual(self._errores({'objetos_id': 1})[0][0], None)
+
+    @override_settings(MAESTROS_AJUSTE_MAX_ITEMS=2)
+    def test_maximo_de_ajustes(self):
+        errores = self._errores([{'objetos_id': i, 'cantidad': 1} for i in range(3)])
+        self.assertEqual(errores, [(None, 'Máximo 2 ajustes por petición')])
+
+    def test_reporta_todos_los_errores_del_lote(self):
+        errores = self._errores([
+            'no es objeto',
+            {'objetos_id': True, 'cantidad': 1},
+            {'objetos_id': 1, 'cantidad': 1, 'delta': 1},
+            {'objetos_id': 2, 'cantidad': -1},
+            {'objetos_id': 3, 'delta': 'x'},
+            {'objetos_id': 4, 'activo': 'si'},
+            {'objetos_id': 5},
+            {'objetos_id': 6, 'cantidad': 0},
+            {'objetos_id': 6, 'delta': 1},
+        ])
+        self.assertEqual([indice for indice, _ in errores], [0, 1, 2, 3, 4, 5, 6, 8])
+        self.assertEqual(errores[-1][1], 'Objeto repetido en el lote')
+
+
+class CubiertoTests(SimpleTestCase):
+    """maestros/horarios.py: ¿[inicio, fin) cabe en un solo intervalo de apertura?"""
+
+    # Lunes 08:00-12:00 y 14:00-18:00, martes 08:00-12:00 (minutos de la semana)
+    LISTA = [[480, 720], [840, 1080], [MINUTOS_DIA + 480, MINUTOS_DIA + 720]]
+
+    def test_dentro_de_un_intervalo(self):
+        self.assertTrue(_cubierto(self.LISTA, 480, 720))
+        self.assertTrue(_cubierto(self.LISTA, 900, 960))
+        self.assertTrue(_cubierto(self.LISTA, MINUTOS_DIA + 500, MINUTOS_DIA + 501))
+
+    def test_fuera_o_atravesando_un_hueco(self):
+        self.assertFalse(_cubierto(self.LISTA, 400, 500))
+        self.assertFalse(_cubierto(self.LISTA, 700, 900))
+        self.assertFalse(_cubierto(self.LISTA, 720, 721))
+        self.assertFalse(_cubierto(self.LISTA, MINUTOS_DIA + 720, MINUTOS_DIA + 800))
+
+    def test_lista_vacia(self):
+        self.assertFalse(_cubierto([], 480, 500))
+
+
+def _franja(inicio, fin, fila=None, horario_id=None, laboratorio_id=1, dia=0):
+    franja = {'laboratorio_id': laboratorio_id, 'dia': dia, 'inicio': inicio, 'fin': fin}
+    if fila is not None:
+        franja['fila'] = fila
+    else:
+        franja['horario_id'] = horario_id
+    return franja
+
+
+class BarridoTests(SimpleTestCase):
+    """maestros/importar_horarios.py: solapamientos y huecos por (laboratorio, día)."""
+
+    def test_franjas_contiguas_y_huecos(self):
+        solapamientos, huecos = barrido([
+            _franja(840, 900, fila=3), _franja(480, 600, fila=1), _franja(600, 720, fila=2),
+        ])
+        self.assertEqual(solapamientos, [])
+        self.assertEqual(huecos, [{'laboratorio_id': 1, 'dia': 'Lunes', 'desde': '12:00', 'hasta': '14:00'}])
+
+    def test_solapamiento_con_la_franja_mas_larga(self):
+        # La tercera no toca a la segunda, pero sí a la primera
+        solapamientos, _ = barrido([
+            _franja(480, 720, fila=1), _franja(500, 560, fila=2), _franja(600, 660, fila=3),
+        ])
+        self.assertEqual([s['fila'] for s in solapamientos], [2, 3])
+        self.assertIn('fila 1', solapamientos[1]['error'])
+
+    def test_solapamiento_con_un_horario_guardado(self):
+        solapamientos, _ = barrido([_franja(480, 600, horario_id=7), _franja(540, 660, fila=1)])
+        self.assertEqual(solapamientos[0]['fila'], 1)
+        self.assertIn('horario existente 7', solapamientos[0]['error'])
+
+    def test_solapamientos_previos_no_bloquean(self):
+        solapamientos, _ = barrido([_franja(480, 600, horario_id=1), _franja(540, 660, horario_id=2)])
+        self.assertEqual(solapamientos, [])
+
+    def test_grupos_independientes(self):
+        solapamientos, huecos = barrido([
+            _franja(480, 600, fila=1), _franja(480, 600, fila=2, dia=1), _franja(480, 600, fila=3, laboratorio_id=2),
+        ])
+        self.assertEqual((solapamientos, huecos), ([], []))
+
+
+URL_IMPORTAR = '/api/maestros/horarios-laboratorio/importar/'
+
+
+class ImportarHorariosCSVAPITests(APITestCase):
+    """POST /api/maestros/horarios-laboratorio/importar/ con archivo CSV sobre el perfil SQLite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        rol_admin = Roles.objects.create(Rol_Id=1, Nombre_Roles='Administrador')
+        cls.admin = User.objects.create_user(username='admin', password='x')
+        perfil = Usuarios.objects.create(Usuario_Id=cls.admin, Tipo_Id=tipo_id, Nombres='Eva', Apellido1='Mora')
+        Usuarios_Roles.objects.create(Usuario_Id=perfil, Rol_Id=rol_admin)
+        cls.docente = User.objects.create_user(username='docente', password='x')
+        Usuarios.objects.create(Usuario_Id=cls.docente, Tipo_Id=tipo_id, Nombres='Ana', Apellido1='Ruiz')
+
+        cls.redes = Laboratorios.objects.create(
+            Laboratorio_Id=1, Nombre_Laboratorio='Redes', Capacidad=30, Ubicacion='B1'
+        )
+        Laboratorios.objects.create(Laboratorio_Id=2, Nombre_Laboratorio='Química Básica', Capacidad=20, Ubicacion='B2')
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+        self.client.force_authenticate(self.admin)
+
+    def _importar(self, texto, codificacion='utf-8', **opciones):
+        archivo = SimpleUploadedFile('horarios.csv', texto.encode(codificacion), content_type='text/csv')
+        return self.client.post(URL_IMPORTAR, {'archivo': archivo, **opciones}, format='multipart')
+
+    def test_importa_csv(self):
+        respuesta = self._importar(
+            'laboratorio,dia_semana,hora_inicio,hora_fin\n'
+            'Redes,Lunes,08:00,10:00\n'
+            'Redes,Lunes,11:00,13:00\n'
+            '2,Martes,14:00,16:00\n'
+        )
+        self.assertEqual(respuesta.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(respuesta.data['creados'], 3)
+        self.assertEqual(respuesta.data['laboratorios'], [1, 2])
+        self.assertEqual(respuesta.data['huecos'], [
+            {'laboratorio_id': 1, 'dia': 'Lunes', 'desde': '10:00', 'hasta': '11:00'},
+        ])
+        self.assertEqual(Horarios_Laboratorio.objects.count(), 3)
+
+    def test_csv_latin1_con_punto_y_coma(self):
+        respuesta = self._importar(
+            'laboratorio;dia_semana;hora_inicio;hora_fin\nQuímica Básica;Miércoles;08:00;12:00\n',
+            codificacion='latin-1',
+        )
+        self.assertEqual(respuesta.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Horarios_Laboratorio.objects.get().Dia_Semana, 'Miércoles')
+
+    def test_solapamiento_con_horario_existente_no_escribe_nada(self):
+        hoy = timezone.localdate()
+        Horarios_Laboratorio.objects.create(
+            Horario_Id=1, Laboratorio_Id=self.redes, Dia_Semana='Lunes',
+            Hora_Inicio=timezone.make_aware(datetime.combine(hoy, time(8))),
+            Hora_Fin=timezone.make_aware(datetime.combine(hoy, time(12))),
+        )
+        respuesta = self._importar(
+            'laboratorio,dia_semana,hora_inicio,hora_fin\n'
+            'Redes,Martes,08:00,10:00\n'
+            'Redes,Lunes,11:00,13:00\n'
+        )
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['fila'] for e in respuesta.data['errores']], [2])
+        self.assertEqual(Horarios_Laboratorio.objects.count(), 1)
+
+    def test_filas_invalidas(self):
+        respuesta = self._importar(
+            'laboratorio,dia_semana,hora_inicio,hora_fin\n'
+            'Inexistente,Lunes,08:00,10:00\n'
+            'Redes,Funday,08:00,10:00\n'
+            'Redes,Lunes,10:00,08:00\n'
+        )
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([e['fila'] for e in respuesta.data['errores']], [1, 2, 3])
+
+    def test_simular_no_escribe(self):
+        respuesta = self._importar('laboratorio,dia_semana,hora_inicio,hora_fin\nRedes,Lunes,08:00,10:00\n', simular='true')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertTrue(respuesta.data['simulado'])
+        self.assertFalse(Horarios_Laboratorio.objects.exists())
+
+    def test_requiere_administrador(self):
+        self.client.force_authenticate(self.docente)
+        respuesta = self._importar('laboratorio,dia_semana,hora_inicio,hora_fin\nRedes,Lunes,08:00,10:00\n')
+        self.assertEqual(respuesta.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ImagenesTests(SimpleTestCase):
+    """maestros/imagenes.py: pool de variantes y límites de la subida."""
+
+    def setUp(self):
+        self.addCleanup(setattr, imagenes, '_pool', imagenes._pool)
+
+    def test_reemplaza_el_pool_roto(self):
+        roto = mock.Mock()
+        roto.submit.side_effect = BrokenProcessPool('Un proceso del pool terminó de forma abrupta')
+        imagenes._pool = roto
+
+        with mock.patch.object(imagenes, 'ProcessPoolExecutor') as crear_pool:
+            crear_pool.return_value.submit.return_value = 'futuro'
+            self.assertEqual(imagenes.encolar(len, 'abc'), 'futuro')
+
+        roto.shutdown.assert_called_once_with(wait=False, cancel_futures=True)
+        self.assertIs(imagenes._pool, crear_pool.return_value)
+        crear_pool.return_value.submit.assert_called_once_with(len, 'abc')
+
+    @override_settings(MAESTROS_IMAGEN_MAX_BYTES=1024)
+    def test_rechaza_por_tamano_sin_leer_el_archivo(self):
+        archivo = mock.Mock(size=2048)
+        with self.assertRaises(imagenes.ImagenInvalida):
+            imagenes.guardar(archivo)
+        archivo.read.assert_not_called()
@@ -1,6 +1,8 @@
 # maestros/urls.py
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import views_async
 from .views import (
     # Catálogos de Usuarios
     RolesViewSet,
@@ -27,6 +29,12 @@ from .views import (
     # Tablas Transaccionales
     EntregasViewSet,
     DevolucionesViewSet,
+
+    # Paquete de catálogos
+    paquete_catalogos,
+
+    # Horario semanal compilado
+    horario_semanal,
 )
 
 # ============================================
@@ -67,4 +75,12 @@ router.register(r'entregas', EntregasViewSet, basename='entregas')
 router.register(r'devoluciones', DevolucionesViewSet, basename='devoluciones')
 
 # Exportar las URLs del router
-urlpatterns = router.urls
\ No newline at end of file
+# GET /api/maestros/catalogos/ -> todos los catálogos en una respuesta
+# GET /api/maestros/horario-semanal/ -> horario de apertura compilado
+# GET /api/maestros/async/... -> las mismas dos rutas en versión async (ASGI)
+urlpatterns = [
+    path('catalogos/', paquete_catalogos, name='paquete-catalogos'),
+    path('horario-semanal/', horario_semanal, name='horario-semanal'),
+    path('async/catalogos/', views_async.paquete_catalogos, name='paquete-catalogos-async'),
+    path('async/horario-semanal/', views_async.horario_semanal, name='horario-semanal-async'),
+] + router.urls
\ No newline at end of file
@@ -2,9 +2,18 @@
 # MAESTROS/VIEWS.PY - Optimizado y Simplificado
 # ==============================================================================
 
-from rest_framework import viewsets, permissions
+import csv
+
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.response import Response
 from usuarios.permissions import IsAdminUser 
 
+from . import busqueda, catalogos, horarios, imagenes, importar_horarios, inventario
+from .paginacion import ObjetosPagination
+
 from .models import (
     Roles, Frecuencia_Servicio, Entregas, Devoluciones, 
     Tipo_Servicio, Laboratorios, Tipo_Identificacion, 
@@ -15,7 +24,8 @@ from .serializers import (
     RolesSerializer, FrecuenciaServicioSerializer, EntregasSerializer, DevolucionesSerializer,
     TipoServicioSerializer, LaboratoriosSerializer, TipoIdentificacionSerializer, 
     TipoSolicitanteSerializer, FacultadSerializer, ProgramaSerializer, 
-    CategoriaSerializer, ObjetoSerializer, EstadoSerializer, HorariosLaboratorioSerializer
+    CategoriaSerializer, ObjetoSerializer, ObjetoResumenSerializer, EstadoSerializer,
+    HorariosLaboratorioSerializer
 )
 
 
@@ -28,6 +38,7 @@ class BaseAdminViewSet(viewsets.ModelViewSet):
     """
     ViewSet base con permisos de Admin.
     ✅ Compatible con serializers flexibles (auto-generación de IDs).
+    (La caché de catálogos se invalida con las señales de maestros/signals.py.)
     """
     permission_classes = ADMIN_PERMISSION
 
@@ -100,9 +111,105 @@ class ObjetosViewSet(BaseAdminViewSet):
     ✅ Compatible con creación flexible:
     - Puede crear objeto con categoria_id existente
     - Puede crear objeto + categoría nueva con categoria_nombre
+
+    Listado con filtros opcionales (se combinan entre sí):
+    - ?categoria=3 o ?categoria=3,5
+    - ?activo=true|false
+    - ?en_stock=true|false (Cant_Stock > 0)
+    - ?q=texto: busca en Nombre_Objetos y Descripcion (ver maestros/busqueda.py)
+    - ?compacto=true: sin Descripcion ni Imagen_Url
+    Con ?page_size o ?cursor la respuesta se pagina por cursor
+    ({'next', 'previous', 'results'}); sin ellos se retorna la lista completa.
+
+    POST /objetos/{id}/imagen/ (multipart, campo "imagen") sube la imagen del
+    objeto; las variantes se generan en segundo plano (maestros/imagenes.py).
+
+    POST /objetos/ajuste-inventario/ aplica un lote de ajustes de stock en una
+    sola transacción (maestros/inventario.py).
     """
-    queryset = Objetos.objects.all().select_related('Categoria_Id').order_by('Nombre_Objetos')
+    queryset = Objetos.objects.all().select_related('Categoria_Id').order_by('Nombre_Objetos', 'Objetos_Id')
     serializer_class = ObjetoSerializer
+    pagination_class = ObjetosPagination
+
+    def _parametro_booleano(self, nombre):
+        valor = self.request.query_params.get(nombre)
+        if valor in (None, ''):
+            return None
+        if valor.lower() in ('true', '1', 'si', 'sí'):
+            return True
+        if valor.lower() in ('false', '0', 'no'):
+            return False
+        raise ValidationError({nombre: 'Debe ser true o false.'})
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        params = self.request.query_params
+
+        categorias = params.get('categoria')
+        if categorias:
+            try:
+                ids = [int(valor) for valor in categorias.split(',') if valor.strip()]
+            except ValueError:
+                raise ValidationError({'categoria': 'Debe ser un ID o una lista de IDs separados por comas.'})
+            queryset = queryset.filter(Categoria_Id__in=ids)
+
+        activo = self._parametro_booleano('activo')
+        if activo is not None:
+            queryset = queryset.filter(Activo=activo)
+
+        en_stock = self._parametro_booleano('en_stock')
+        if en_stock is True:
+            queryset = queryset.filter(Cant_Stock__gt=0)
+        elif en_stock is False:
+            queryset = queryset.exclude(Cant_Stock__gt=0)
+
+        texto = params.get('q')
+        if texto:
+            queryset = busqueda.filtrar(queryset, texto)
+
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list' and self._parametro_booleano('compacto'):
+            return ObjetoResumenSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, methods=['post'], url_path='imagen', parser_classes=[MultiPartParser])
+    def imagen(self, request, pk=None):
+        objeto = self.get_object()
+        archivo = request.FILES.get('imagen')
+        if archivo is None:
+            return Response(
+                {'error': 'Debe enviar el archivo en el campo "imagen"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            url, listas = imagenes.guardar(archivo)
+        except imagenes.ImagenInvalida as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # update(): solo cambia la URL, sin señales que reconstruyan el índice de búsqueda
+        Objetos.objects.filter(pk=objeto.pk).update(Imagen_Url=url)
+        objeto.Imagen_Url = url
+        datos = self.get_serializer(objeto).data
+        return Response(datos, status=status.HTTP_200_OK if listas else status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'], url_path='ajuste-inventario')
+    def ajuste_inventario(self, request):
+        """
+        Body: {"ajustes": [{"objetos_id": 1, "cantidad": 8}, {"objetos_id": 2, "delta": -1, "activo": false}],
+               "simular": false}
+        """
+        simular = request.data.get('simular', False)
+        if not isinstance(simular, bool):
+            return Response({'error': '"simular" debe ser true o false'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            reporte = inventario.ajustar_stock(request.data.get('ajustes'), simular=simular)
+        except inventario.AjusteInvalido as e:
+            return Response({'error': str(e), 'errores': e.errores}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(reporte, status=status.HTTP_200_OK)
 
 
 class HorariosLaboratorioViewSet(BaseAdminViewSet):
@@ -114,6 +221,32 @@ class HorariosLaboratorioViewSet(BaseAdminViewSet):
     queryset = Horarios_Laboratorio.objects.all().select_related('Laboratorio_Id').order_by('Horario_Id')
     serializer_class = HorariosLaboratorioSerializer
 
+    @action(detail=False, methods=['post'], url_path='importar', parser_classes=[JSONParser, MultiPartParser])
+    def importar(self, request):
+        """
+        Importación masiva (maestros/importar_horarios.py).
+        - JSON: {"horarios": [{"laboratorio": "Lab Redes", "dia_semana": "Lunes",
+          "hora_inicio": "08:00", "hora_fin": "12:00"}, ...], "reemplazar": false, "simular": false}
+        - multipart: campo "archivo" (CSV con esas columnas) y reemplazar/simular opcionales
+        "reemplazar" sustituye el horario semanal completo de los laboratorios del lote.
+        """
+        archivo = request.FILES.get('archivo')
+        opciones = {}
+        for nombre in ('reemplazar', 'simular'):
+            valor = request.data.get(nombre, False)
+            if isinstance(valor, str):
+                valor = valor.lower() in ('true', '1', 'si', 'sí')
+            opciones[nombre] = bool(valor)
+
+        try:
+            filas = importar_horarios.leer_csv(archivo) if archivo else request.data.get('horarios')
+            resultado = importar_horarios.importar(filas, **opciones)
+        except importar_horarios.ImportacionInvalida as e:
+            return Response({'error': str(e), 'errores': e.errores}, status=status.HTTP_400_BAD_REQUEST)
+        except csv.Error as e:
+            return Response({'error': f'El CSV no se pudo leer: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_200_OK if opciones['simular'] else status.HTTP_201_CREATED)
+
 
 # ----------------------------------------------------------------------
 # TABLAS TRANSACCIONALES
@@ -131,4 +264,83 @@ class EntregasViewSet(BaseAdminViewSet):
 
 class DevolucionesViewSet(BaseAdminViewSet):
     queryset = Devoluciones.objects.all().order_by('-Devolucion_Id')
-    serializer_class = DevolucionesSerializer
\ No newline at end of file
+    serializer_class = DevolucionesSerializer
+
+
+# ----------------------------------------------------------------------
+# PAQUETE DE CATÁLOGOS
+# ----------------------------------------------------------------------
+
+def respuesta_paquete(desde, if_none_match):
+    """(datos o None si no cambió, estado, etag) del paquete de catálogos."""
+    datos, etag = catalogos.paquete(desde)
+    sin_cambios = (
+        (not desde and if_none_match == etag)
+        or (desde == datos['version'])
+    )
+    if sin_cambios:
+        return None, status.HTTP_304_NOT_MODIFIED, etag
+    return datos, status.HTTP_200_OK, etag
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def paquete_catalogos(request):
+    """
+    Todos los catálogos en una sola respuesta para el arranque de la app.
+    - ETag = hash del contenido; con If-None-Match igual responde 304
+    - ?since_version=<version> devuelve solo los catálogos que cambiaron
+      (304 si no cambió ninguno)
+    """
+    datos, estado, etag = respuesta_paquete(
+        request.query_params.get('since_version'), request.headers.get('If-None-Match')
+    )
+    respuesta = Response(datos, status=estado)
+    respuesta['ETag'] = etag
+    respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
+# ----------------------------------------------------------------------
+# HORARIO SEMANAL DE LABORATORIOS
+# ----------------------------------------------------------------------
+
+def datos_horario_semanal(laboratorio=None):
+    """(datos, estado) del horario semanal; compartido con la versión async."""
+    compilado = horarios.horario_compilado()
+
+    if laboratorio:
+        try:
+            ids = [catalogos.obtener(Laboratorios, laboratorio).Laboratorio_Id]
+        except Laboratorios.DoesNotExist:
+            return {'error': f'No existe un laboratorio con ID {laboratorio}'}, status.HTTP_404_NOT_FOUND
+    else:
+        ids = sorted(compilado)
+
+    datos = []
+    for laboratorio_id in ids:
+        horario = compilado.get(laboratorio_id, {'intervalos': [], 'dias': {}})
+        try:
+            nombre = catalogos.obtener(Laboratorios, laboratorio_id).Nombre_Laboratorio
+        except Laboratorios.DoesNotExist:
+            nombre = None
+        datos.append({
+            'laboratorio_id': laboratorio_id,
+            'laboratorio': nombre,
+            'dias': horario['dias'],
+            'intervalos': horario['intervalos'],
+        })
+    return {'dias_semana': horarios.DIAS_SEMANA, 'laboratorios': datos}, status.HTTP_200_OK
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def horario_semanal(request):
+    """
+    Horario de apertura de los laboratorios, ya compilado (maestros/horarios.py).
+    ?laboratorio=<id> filtra uno solo. Cada laboratorio trae 'dias'
+    ({'Lunes': [['08:00', '12:00']], ...}) e 'intervalos' en minutos desde
+    el lunes 00:00.
+    """
+    datos, estado = datos_horario_semanal(request.query_params.get('laboratorio'))
+    return Response(datos, status=estado)
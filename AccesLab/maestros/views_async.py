@@ -0,0 +1,32 @@
+# ==============================================================================
+# MAESTROS/VIEWS_ASYNC.PY - Versiones async de los catálogos (ASGI)
+# ==============================================================================
+# Mismas respuestas que paquete_catalogos y horario_semanal de
+# maestros/views.py. Ambos leen cachés en proceso; solo cuando hay que
+# recargarlas se consulta la BD, en el pool de hilos de AccesLab/asincrono.py.
+# Rutas: /api/maestros/async/catalogos/ y /api/maestros/async/horario-semanal/
+
+from django.http import HttpResponse
+from rest_framework import status
+
+from AccesLab.asincrono import en_hilo, respuesta, vista_async
+
+from .views import datos_horario_semanal, respuesta_paquete
+
+
+@vista_async
+async def paquete_catalogos(request):
+    """Todos los catálogos (ETag / If-None-Match y ?since_version como la vista síncrona)."""
+    datos, estado, etag = await en_hilo(
+        respuesta_paquete, request.GET.get('since_version'), request.headers.get('If-None-Match')
+    )
+    resultado = HttpResponse(status=estado) if estado == status.HTTP_304_NOT_MODIFIED else respuesta(datos)
+    resultado['ETag'] = etag
+    resultado['Cache-Control'] = 'private, no-cache'
+    return resultado
+
+
+@vista_async
+async def horario_semanal(request):
+    """Horario de apertura compilado; ?laboratorio=<id> filtra uno solo."""
+    return await en_hilo(datos_horario_semanal, request.GET.get('laboratorio'))
@@ -0,0 +1,33 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+def crear_tabla_cache(using, **kwargs):
+    from django.core.management import call_command
+    call_command('createcachetable', database=using, verbosity=0)
+
+
+class MonitoreoConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoreo'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+
+        # La tabla de la caché compartida (CACHE_BACKEND=db) se crea junto con
+        # las migraciones. post_migrate se emite por cada app con modelos (esta
+        # no tiene): createcachetable no hace nada si la tabla ya existe
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(crear_tabla_cache, dispatch_uid='monitoreo.crear_tabla_cache')
+
+        # Cada conexión nueva registra sus consultas en el request activo
+        # (lo usan la instrumentación SQL y las métricas de /metrics)
+        if getattr(settings, 'INSTRUMENTACION_SQL', True) or getattr(settings, 'METRICAS', True):
+            from django.db.backends.signals import connection_created
+            from .sql import instalar
+            connection_created.connect(instalar, dispatch_uid='monitoreo.sql.instalar')
+
+        # Pool de sesiones y cachés en proceso listos antes del primer request
+        if getattr(settings, 'PRECALENTAR', False):
+            from .calentamiento import calentar_en_segundo_plano
+            calentar_en_segundo_plano()
@@ -0,0 +1,12 @@
+# ==============================================================================
+# MONITOREO/BENCHMARK - Benchmarks de extremo a extremo sobre SQLite
+# ==============================================================================
+# - esquema.py: crea en SQLite las tablas de los modelos managed = False
+#   (más los índices de */sql/*.sql que SQLite entiende)
+# - sintetico.py: siembra datos a escala de producción, deterministas por semilla
+#   (también desde "manage.py generar_datos", contra la base configurada)
+# - escenarios.py: los requests medidos (solicitudes, usuarios, catálogos, reportes)
+# - medicion.py: ejecuta los escenarios y compara contra una línea base JSON
+#
+# Solo con AccesLab.settings_benchmark: nada de esto toca Oracle (salvo
+# generar_datos, que siembra la base configurada si es de desarrollo).
@@ -0,0 +1,149 @@
+# ==============================================================================
+# MONITOREO/BENCHMARK/ESCENARIOS.PY - Requests que mide el benchmark
+# ==============================================================================
+# Cada escenario es un request real (URL, middleware, autenticación JWT,
+# serialización) hecho con el cliente de pruebas de Django:
+# - como el administrador sembrado o como un estudiante con solicitudes propias
+# - `preparar` corre antes de cada iteración y no se mide; los reportes
+#   vacían la caché para medir el cálculo (salvo los escenarios "caliente")
+# - `max_iteraciones` acota los escenarios que a escala completa tardan
+#   segundos por request (listas sin paginar)
+#
+# Los IDs que usan (estudiante, solicitud a modificar, objetos con stock) se
+# resuelven una vez contra los datos sembrados; ver Contexto.
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from maestros.models import Objetos
+from reservas.models import Solicitudes
+from usuarios.models import Usuarios_Roles
+
+from .sintetico import ADMIN_USERNAME
+
+
+class Escenario:
+    def __init__(self, nombre, ruta, metodo='GET', usuario='admin', datos=None,
+                 preparar=None, estado=200, max_iteraciones=None):
+        self.nombre = nombre
+        self.ruta = ruta
+        self.metodo = metodo
+        self.usuario = usuario
+        self.datos = datos
+        self.preparar = preparar
+        self.estado = estado
+        self.max_iteraciones = max_iteraciones
+
+    def url(self, contexto):
+        return self.ruta(contexto) if callable(self.ruta) else self.ruta
+
+    def cuerpo(self, contexto, iteracion):
+        return self.datos(contexto, iteracion) if callable(self.datos) else self.datos
+
+
+class Contexto:
+    """IDs de los datos sembrados que usan los escenarios."""
+
+    def __init__(self):
+        self.admin = User.objects.get(username=ADMIN_USERNAME)
+        # El estudiante con más solicitudes: su lista es la más larga que ve un usuario
+        estudiantes = Usuarios_Roles.objects.filter(Rol_Id=2).values('Usuario_Id')
+        fila = (
+            Solicitudes.objects.filter(Usuario_Id__in=estudiantes)
+            .values('Usuario_Id').annotate(n=Count('Solicitud_Id')).order_by('-n', 'Usuario_Id').first()
+        )
+        if fila is None:
+            raise ValueError('No hay solicitudes de estudiantes: ejecute "preparar_benchmark" primero')
+        self.estudiante = User.objects.get(pk=fila['Usuario_Id'])
+        self.solicitud = Solicitudes.objects.filter(Usuario_Id=self.estudiante.pk).order_by('-Solicitud_Id').first()
+        self.objetos = list(
+            Objetos.objects.filter(Activo=True, Cant_Stock__gte=10)
+            .order_by('Objetos_Id').values_list('Objetos_Id', flat=True)[:2]
+        )
+
+    def encabezados(self, usuario):
+        """Authorization con un token de acceso nuevo (no se mide: la firma es del login)."""
+        user = self.admin if usuario == 'admin' else self.estudiante
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def _vaciar_cache():
+    cache.clear()
+
+
+def _nueva_solicitud(contexto, iteracion):
+    return {
+        'usuario_id': contexto.estudiante.pk,
+        'tipo_servicio_id': 1,
+        'Asignatura': 'Benchmark',
+        'N_asistentes': 1,
+        'Observaciones_Solicitud': f'Benchmark {iteracion}',
+        'objetos_solicitados': [{'objetos_id': o, 'Cantidad_Objetos': 1} for o in contexto.objetos],
+    }
+
+
+def _carrito(contexto, iteracion):
+    # La próxima semana: el barrido de disponibilidad recorre las reservas activas
+    inicio = timezone.localdate() + timedelta(days=7)
+    return {
+        'Fecha_Inicio': inicio.isoformat(),
+        'Fecha_Fin': (inicio + timedelta(days=2)).isoformat(),
+        'objetos_solicitados': [{'objetos_id': o, 'Cantidad_Objetos': 1} for o in contexto.objetos],
+    }
+
+
+def _reporte(nombre, ruta, **opciones):
+    return Escenario(f'reportes.{nombre}', f'/api/reportes/{ruta}', preparar=_vaciar_cache, **opciones)
+
+
+ESCENARIOS = [
+    # Solicitudes
+    Escenario('solicitudes.listar', '/api/reservas/solicitudes/', usuario='estudiante'),
+    Escenario('solicitudes.listar_por_usuario', lambda c: f'/api/reservas/solicitudes/?Usuario_Id={c.estudiante.pk}'),
+    Escenario('solicitudes.pagina_async', '/api/reservas/async/solicitudes/?limite=50&desplazamiento=1000'),
+    Escenario('solicitudes.detalle', lambda c: f'/api/reservas/solicitudes/{c.solicitud.Solicitud_Id}/'),
+    Escenario('solicitudes.crear', '/api/reservas/solicitudes/', metodo='POST', usuario='estudiante',
+              datos=_nueva_solicitud, estado=201),
+    Escenario('solicitudes.modificar', lambda c: f'/api/reservas/solicitudes/{c.solicitud.Solicitud_Id}/',
+              metodo='PATCH', datos=lambda c, i: {'Observaciones_Solicitud': f'Revisión {i}'}),
+    Escenario('solicitudes.disponibilidad', '/api/reservas/solicitudes/disponibilidad/', metodo='POST',
+              usuario='estudiante', datos=_carrito),
+
+    # Usuarios
+    Escenario('usuarios.listar', '/api/auth/usuarios/', max_iteraciones=3),
+    Escenario('usuarios.me', '/api/auth/me/', usuario='estudiante'),
+
+    # Catálogos
+    Escenario('catalogos.paquete', '/api/maestros/catalogos/'),
+    Escenario('catalogos.objetos', '/api/maestros/objetos/'),
+    Escenario('catalogos.laboratorios', '/api/maestros/laboratorios/'),
+    Escenario('catalogos.horario_semanal', '/api/maestros/horario-semanal/'),
+
+    # Reportes (en frío: sin caché de resultados)
+    _reporte('kpis', 'kpis/'),
+    _reporte('actividad_mensual', 'actividad-mensual/?meses=12'),
+    _reporte('distribucion_programas', 'distribucion-programas/'),
+    _reporte('equipos_mas_usados', 'equipos-mas-usados/'),
+    _reporte('utilizacion_equipos', 'utilizacion-equipos/'),
+    _reporte('ocupacion_laboratorios', 'ocupacion-laboratorios/'),
+    _reporte('historial', 'historial/'),
+    _reporte('entregas_devoluciones', 'entregas-devoluciones/'),
+    _reporte('dashboard', 'dashboard/'),
+    _reporte('analitica', 'analitica/?agrupar=mes,tipo_servicio'),
+    _reporte('exportar_pdf', 'exportar/', metodo='POST', datos={'formato': 'pdf'}, max_iteraciones=5),
+    Escenario('reportes.estadisticas_cache', '/api/reportes/cache/estadisticas/'),
+    Escenario('reportes.dashboard_caliente', '/api/reportes/dashboard/'),
+    Escenario('reportes.dashboard_async', '/api/reportes/async/dashboard/', preparar=_vaciar_cache),
+]
+
+
+def seleccionar(prefijos=None):
+    """Escenarios cuyo nombre empieza por alguno de los prefijos (todos si no hay)."""
+    if not prefijos:
+        return list(ESCENARIOS)
+    return [e for e in ESCENARIOS if any(e.nombre.startswith(p) for p in prefijos)]
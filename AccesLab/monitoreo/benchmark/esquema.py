@@ -0,0 +1,75 @@
+# ==============================================================================
+# MONITOREO/BENCHMARK/ESQUEMA.PY - Tablas de Oracle materializadas en SQLite
+# ==============================================================================
+# - Primero las migraciones de Django (auth, sesiones, ...) y luego una
+#   CREATE TABLE por cada modelo managed = False, con los mismos db_table y
+#   db_column: las consultas del ORM son las mismas que en producción
+# - Las claves foráneas quedan indexadas (como en el DDL de Oracle) y se
+#   aplican los CREATE INDEX de los scripts */sql/*.sql; los bloques PL/SQL
+#   y los índices de Oracle Text se omiten
+# - analizar() es el equivalente de DBMS_STATS: estadísticas para el planificador
+
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connections
+
+
+_CREATE_INDEX = re.compile(r'^CREATE\s+(UNIQUE\s+)?INDEX\s+', re.IGNORECASE)
+
+
+def verificar_sqlite(alias='default'):
+    """Evita que el benchmark escriba en una base que no sea la SQLite local."""
+    conexion = connections[alias]
+    if conexion.vendor != 'sqlite':
+        raise ImproperlyConfigured(
+            f'El benchmark requiere SQLite (base "{alias}" es {conexion.vendor}); '
+            'use --settings=AccesLab.settings_benchmark'
+        )
+
+
+def indices_sql():
+    """Sentencias CREATE INDEX de los scripts SQL de las apps, en formato SQLite."""
+    sentencias = []
+    for app in apps.get_app_configs():
+        for archivo in sorted(Path(app.path).glob('sql/*.sql')):
+            lineas = [l for l in archivo.read_text(encoding='utf-8').splitlines() if not l.lstrip().startswith('--')]
+            for sentencia in '\n'.join(lineas).split(';'):
+                sentencia = ' '.join(sentencia.split())
+                if _CREATE_INDEX.match(sentencia) and 'INDEXTYPE' not in sentencia.upper():
+                    sentencias.append(_CREATE_INDEX.sub(
+                        lambda m: f'CREATE {m.group(1) or ""}INDEX IF NOT EXISTS ', sentencia, count=1
+                    ))
+    return sentencias
+
+
+def materializar(alias='default'):
+    """Crea las tablas que falten. Retorna los nombres de las tablas creadas."""
+    verificar_sqlite(alias)
+    call_command('migrate', database=alias, verbosity=0, interactive=False)
+
+    conexion = connections[alias]
+    existentes = set(conexion.introspection.table_names())
+    creadas = []
+    with conexion.schema_editor() as editor:
+        for modelo in apps.get_models():
+            opciones = modelo._meta
+            if opciones.managed or opciones.proxy or opciones.db_table in existentes:
+                continue
+            editor.create_model(modelo)
+            existentes.add(opciones.db_table)
+            creadas.append(opciones.db_table)
+
+    with conexion.cursor() as cursor:
+        for sentencia in indices_sql():
+            cursor.execute(sentencia)
+    return creadas
+
+
+def analizar(alias='default'):
+    verificar_sqlite(alias)
+    with connections[alias].cursor() as cursor:
+        cursor.execute('ANALYZE')
@@ -0,0 +1,161 @@
+# ==============================================================================
+# MONITOREO/BENCHMARK/MEDICION.PY - Ejecución de escenarios y comparación
+# ==============================================================================
+# Por escenario: iteraciones de calentamiento (no cuentan) y luego N
+# iteraciones medidas con:
+# - latencia del request completo (percentiles p50/p90/p95/p99)
+# - consultas SQL y tiempo en la BD (monitoreo.sql.medir)
+# - tamaño de la respuesta
+# - memoria: pico de asignaciones de Python (tracemalloc) en una iteración
+#   aparte, para que el rastreo no infle las latencias; y el RSS máximo del
+#   proceso al final de la corrida
+#
+# La comparación contra una línea base marca una regresión cuando p50 o p95
+# empeoran más que la tolerancia (y más que RUIDO_MS en absoluto), cuando
+# aumentan las consultas o cuando la memoria crece más que la tolerancia.
+
+import json
+import math
+import platform
+import sqlite3
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import django
+from django.test import Client
+from django.utils import timezone
+
+from monitoreo.sql import medir
+
+from .sintetico import conteos
+
+
+PERCENTILES = (50, 90, 95, 99)
+# Diferencias menores se consideran ruido aunque superen la tolerancia relativa
+RUIDO_MS = 2.0
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not valores:
+        return None
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+def _request(cliente, escenario, contexto, iteracion):
+    datos = escenario.cuerpo(contexto, iteracion)
+    encabezados = contexto.encabezados(escenario.usuario)
+    url = escenario.url(contexto)
+    if escenario.preparar:
+        escenario.preparar()
+
+    inicio = time.perf_counter()
+    with medir() as registro:
+        if datos is None:
+            response = cliente.generic(escenario.metodo, url, **encabezados)
+        else:
+            response = cliente.generic(
+                escenario.metodo, url, json.dumps(datos), content_type='application/json', **encabezados
+            )
+        contenido = b''.join(response.streaming_content) if response.streaming else response.content
+    duracion = time.perf_counter() - inicio
+    return response.status_code, duracion, registro, len(contenido)
+
+
+def ejecutar_escenario(escenario, contexto, iteraciones=20, calentamiento=2):
+    cliente = Client(raise_request_exception=False)
+    if escenario.max_iteraciones:
+        iteraciones = min(iteraciones, escenario.max_iteraciones)
+        calentamiento = min(calentamiento, 1)
+
+    for i in range(calentamiento):
+        _request(cliente, escenario, contexto, -1 - i)
+
+    latencias, consultas, tiempos_bd, errores = [], [], [], {}
+    tamano = 0
+    for i in range(iteraciones):
+        estado, duracion, registro, tamano = _request(cliente, escenario, contexto, i)
+        latencias.append(duracion * 1000)
+        consultas.append(registro.consultas)
+        tiempos_bd.append(registro.tiempo * 1000)
+        if estado != escenario.estado:
+            errores[str(estado)] = errores.get(str(estado), 0) + 1
+
+    tracemalloc.start()
+    try:
+        _request(cliente, escenario, contexto, iteraciones)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencias.sort()
+    resultado = {
+        'metodo': escenario.metodo,
+        'url': escenario.url(contexto),
+        'iteraciones': iteraciones,
+        'media_ms': round(sum(latencias) / len(latencias), 2),
+        'min_ms': round(latencias[0], 2),
+        'max_ms': round(latencias[-1], 2),
+        **{f'p{p}_ms': round(percentil(latencias, p), 2) for p in PERCENTILES},
+        'consultas': max(consultas),
+        'tiempo_bd_ms': round(sorted(tiempos_bd)[len(tiempos_bd) // 2], 2),
+        'respuesta_bytes': tamano,
+        'memoria_pico_kb': round(pico / 1024, 1),
+    }
+    if errores:
+        resultado['errores'] = errores
+    return resultado
+
+
+def ejecutar(escenarios, contexto, iteraciones=20, calentamiento=2, al_terminar=None):
+    """Corre los escenarios en orden. Retorna el documento JSON de resultados."""
+    resultados = {}
+    for escenario in escenarios:
+        resultados[escenario.nombre] = ejecutar_escenario(escenario, contexto, iteraciones, calentamiento)
+        if al_terminar:
+            al_terminar(escenario.nombre, resultados[escenario.nombre])
+    return {
+        'meta': {
+            'fecha': timezone.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform(),
+            'iteraciones': iteraciones,
+            'calentamiento': calentamiento,
+            'volumenes': conteos(),
+            'rss_max_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        },
+        'escenarios': resultados,
+    }
+
+
+# ----------------------------------------------------------------------
+# LÍNEA BASE
+# ----------------------------------------------------------------------
+def comparar(actual, base, tolerancia=0.2):
+    """Lista de regresiones [{'escenario', 'metrica', 'base', 'actual'}] de `actual` frente a `base`."""
+    regresiones = []
+    for nombre, medido in actual['escenarios'].items():
+        referencia = base.get('escenarios', {}).get(nombre)
+        if referencia is None:
+            continue
+        for metrica in ('p50_ms', 'p95_ms'):
+            limite = max(referencia[metrica] * (1 + tolerancia), referencia[metrica] + RUIDO_MS)
+            if medido[metrica] > limite:
+                regresiones.append({'escenario': nombre, 'metrica': metrica,
+                                    'base': referencia[metrica], 'actual': medido[metrica]})
+        if medido['consultas'] > referencia['consultas']:
+            regresiones.append({'escenario': nombre, 'metrica': 'consultas',
+                                'base': referencia['consultas'], 'actual': medido['consultas']})
+        if medido['memoria_pico_kb'] > referencia['memoria_pico_kb'] * (1 + tolerancia):
+            regresiones.append({'escenario': nombre, 'metrica': 'memoria_pico_kb',
+                                'base': referencia['memoria_pico_kb'], 'actual': medido['memoria_pico_kb']})
+        if medido.get('errores') and not referencia.get('errores'):
+            regresiones.append({'escenario': nombre, 'metrica': 'errores', 'base': None, 'actual': medido['errores']})
+    return regresiones
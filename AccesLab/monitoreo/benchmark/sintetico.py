@@ -0,0 +1,616 @@
+# ==============================================================================
+# MONITOREO/BENCHMARK/SINTETICO.PY - Datos sintéticos a escala de producción
+# ==============================================================================
+# - Volúmenes por defecto: 100k usuarios, 1M solicitudes, ~5M líneas de objetos
+# - Catálogos: facultades, programas, categorías, objetos, laboratorios con su
+#   horario semanal y los catálogos con los IDs que asume el código
+# - Deterministas: mismo resultado para la misma semilla y fecha de referencia
+#   (las fechas son relativas a ella: los KPIs "últimos 30 días" tienen datos),
+#   con cualquier número de procesos
+# - Cada tabla se genera por bloques de `lote` filas y cada bloque tiene su
+#   propio generador aleatorio (semilla, tabla, bloque): un bloque produce las
+#   mismas filas lo genere el proceso que lo genere
+# - Lo que comparten varias tablas sale de un "plan" por bloque que cada una
+#   recalcula: el rol del usuario (USUARIOS, USUARIOS_ROLES, USUARIOS_PROGRAMAS)
+#   y el tipo de servicio, las líneas y los integrantes de cada solicitud
+# - IDs preasignados: cada tabla continúa desde su máximo actual (el patrón
+#   max + 1 de get_next_id); el plan da cuántas líneas e integrantes tiene cada
+#   bloque, así cada uno conoce su primer ID sin esperar a los anteriores
+# - Las tablas se insertan por niveles de dependencia (claves foráneas); dentro
+#   de un nivel, los bloques de todas sus tablas se reparten entre `procesos`
+# - bulk_create en lotes del tamaño de un INSERT del backend, cada uno en su
+#   transacción: en SQLite el bloqueo de escritura solo se toma mientras corre
+#   el INSERT y los demás procesos preparan sus filas mientras tanto
+# - Todos los usuarios comparten un hash de contraseña calculado una vez
+# - El primer usuario es el administrador (ADMIN_USERNAME) si aún no existe;
+#   los escenarios de benchmark lo usan junto con un estudiante con solicitudes
+
+import functools
+import multiprocessing
+import random
+import string
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+import django
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.db.models import Max
+from django.utils import timezone
+
+from maestros.models import (
+    Categorias, Estados, Facultades, Frecuencia_Servicio, Horarios_Laboratorio, Laboratorios,
+    Objetos, Programas, Roles, Tipo_Identificacion, Tipo_Servicio, Tipo_Solicitantes,
+)
+from reservas.models import Integrante_Solicitud, Solicitudes, Solicitudes_Objetos
+from usuarios.models import Usuarios, Usuarios_Programas, Usuarios_Roles
+
+
+VOLUMENES = {'usuarios': 100_000, 'solicitudes': 1_000_000, 'lineas': 5_000_000}
+TAMANO_LOTE = 20_000
+
+ADMIN_USERNAME = 'bench_admin'
+CONTRASENA = 'benchmark'
+DIAS_HISTORIA = 3 * 365
+# Reservas hechas con anticipación: hasta un mes después de la fecha de referencia
+DIAS_FUTURO = 30
+
+# Catálogos con los IDs que asume el código (Estado 1 = Pendiente, Rol 1 = Admin,
+# Tipo de servicio 1 = Préstamo y 21 = Reserva; ver reportes/calculos.py)
+ESTADOS = {1: 'Pendiente', 2: 'Aprobada', 3: 'En Uso', 4: 'Devuelto', 5: 'Devuelto Tarde', 6: 'Rechazada'}
+ROLES = {1: 'Administrador', 2: 'Estudiante', 3: 'Docente', 4: 'Laboratorista'}
+TIPOS_SERVICIO = {1: 'Préstamo', 21: 'Reserva', 3: 'Asesoría'}
+TIPOS_IDENTIFICACION = {1: 'Cédula de ciudadanía', 2: 'Tarjeta de identidad', 3: 'Cédula de extranjería'}
+TIPOS_SOLICITANTES = {1: 'Estudiante', 2: 'Docente', 3: 'Externo'}
+FRECUENCIAS = {1: 'Única', 2: 'Semanal', 3: 'Mensual'}
+
+FACULTADES = ['Ingeniería', 'Ciencias', 'Salud', 'Artes', 'Economía', 'Educación', 'Derecho', 'Agronomía']
+CATEGORIAS = [
+    'Electrónica', 'Cómputo', 'Óptica', 'Química', 'Biología', 'Mecánica', 'Audiovisual',
+    'Redes', 'Medición', 'Robótica', 'Física', 'Topografía',
+]
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Laura', 'Andrés', 'Sofía', 'Juan', 'Valentina', 'Diego']
+APELLIDOS = ['García', 'Rodríguez', 'Martínez', 'López', 'Gómez', 'Pérez', 'Sánchez', 'Ramírez', 'Torres', 'Díaz']
+ASIGNATURAS = ['Circuitos', 'Física I', 'Química General', 'Redes', 'Biología Celular', 'Robótica', 'Óptica']
+CAMPUS = ['Principal', 'Norte', 'Sur']
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado']
+
+N_PROGRAMAS = 60
+N_OBJETOS = 2_000
+N_LABORATORIOS = 40
+
+# Horario de cada laboratorio: lunes a viernes 7-12 y 14-20; sábado 8-12
+FRANJAS = [(dia, 7, 12) for dia in range(5)] + [(dia, 14, 20) for dia in range(5)] + [(5, 8, 12)]
+
+# Distribuciones: mezcla de roles (2 Estudiante, 3 Docente, 4 Laboratorista),
+# tipos de servicio, actividad por mes (semestres febrero-mayo y agosto-
+# noviembre) y hora de inicio de los préstamos (picos a media mañana y tarde)
+PESOS_ROLES = ((2, 3, 4), (90, 8, 2))
+PESOS_TIPOS = ((1, 21, 3), (60, 30, 10))
+PESO_MES = (0.2, 0.9, 1.0, 1.0, 1.0, 0.5, 0.15, 0.8, 1.0, 1.0, 0.95, 0.2)
+PESOS_HORAS = (tuple(range(7, 19)), (3, 8, 9, 7, 5, 3, 6, 8, 7, 5, 3, 2))
+
+
+def _rng(semilla, *partes):
+    """Generador de un flujo (tabla, bloque): no depende de qué proceso lo use."""
+    return random.Random(':'.join(str(parte) for parte in (semilla, *partes)))
+
+
+def _acumulados(pesos):
+    acumulados, total = [], 0.0
+    for peso in pesos:
+        total += peso
+        acumulados.append(total)
+    return acumulados
+
+
+def _siguiente_id(modelo):
+    campo = modelo._meta.pk.attname
+    return (modelo.objects.aggregate(maximo=Max(campo))['maximo'] or 0) + 1
+
+
+def _contrasena(semilla):
+    """Hash compartido por todos los usuarios, con sal derivada de la semilla (determinista)."""
+    rng = _rng(semilla, 'contrasena')
+    sal = ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(22))
+    return make_password(CONTRASENA, salt=sal)
+
+
+def _momento(fecha, hora):
+    return datetime.combine(fecha, time(hora), tzinfo=dt_timezone.utc)
+
+
+def _fabrica(modelo, columnas):
+    """
+    Construye instancias a partir de tuplas con los valores de `columnas`.
+    Usa el constructor posicional del modelo (casi el doble de rápido que
+    con argumentos por nombre); las columnas no indicadas llevan su default.
+    """
+    campos = modelo._meta.concrete_fields
+    plantilla = [campo.get_default() for campo in campos]
+    nombres = [campo.attname for campo in campos]
+    posiciones = [nombres.index(columna) for columna in columnas]
+
+    def construir(fila):
+        valores = plantilla.copy()
+        for posicion, valor in zip(posiciones, fila):
+            valores[posicion] = valor
+        return modelo(*valores)
+    return construir
+
+
+# ----------------------------------------------------------------------
+# CATÁLOGOS
+# ----------------------------------------------------------------------
+def _catalogo(modelo, campo_nombre, valores):
+    existentes = set(modelo.objects.values_list('pk', flat=True))
+    modelo.objects.bulk_create([
+        modelo(**{modelo._meta.pk.attname: pk, campo_nombre: nombre})
+        for pk, nombre in valores.items() if pk not in existentes
+    ])
+
+
+def sembrar_catalogos(rng):
+    _catalogo(Estados, 'Nombre_Estado', ESTADOS)
+    _catalogo(Roles, 'Nombre_Roles', ROLES)
+    _catalogo(Tipo_Servicio, 'Nombre_Tipo_Servicio', TIPOS_SERVICIO)
+    _catalogo(Tipo_Identificacion, 'Nombre_Tipo_Identificacion', TIPOS_IDENTIFICACION)
+    _catalogo(Tipo_Solicitantes, 'Nombre_Solicitante', TIPOS_SOLICITANTES)
+    _catalogo(Frecuencia_Servicio, 'Nombre_Frecuencia_Servicio', FRECUENCIAS)
+
+    facultad_base = _siguiente_id(Facultades)
+    Facultades.objects.bulk_create([
+        Facultades(Facultad_Id=facultad_base + i, Nombre_Facultad=nombre) for i, nombre in enumerate(FACULTADES)
+    ])
+    programa_base = _siguiente_id(Programas)
+    Programas.objects.bulk_create([
+        Programas(
+            Programa_Id=programa_base + i,
+            Nombre_Programa=f'Programa {i + 1:02d}',
+            Facultad_Id_id=facultad_base + rng.randrange(len(FACULTADES)),
+        )
+        for i in range(N_PROGRAMAS)
+    ])
+
+    categoria_base = _siguiente_id(Categorias)
+    Categorias.objects.bulk_create([
+        Categorias(Categoria_Id=categoria_base + i, Nombre_Categoria=nombre) for i, nombre in enumerate(CATEGORIAS)
+    ])
+    objeto_base = _siguiente_id(Objetos)
+    Objetos.objects.bulk_create([
+        Objetos(
+            Objetos_Id=objeto_base + i,
+            Nombre_Objetos=f'{CATEGORIAS[i % len(CATEGORIAS)]} {i + 1:04d}',
+            Categoria_Id_id=categoria_base + i % len(CATEGORIAS),
+            Descripcion=f'Equipo de {CATEGORIAS[i % len(CATEGORIAS)].lower()} número {i + 1}',
+            Cant_Stock=rng.randint(2, 60),
+            Activo=rng.random() > 0.03,
+        )
+        for i in range(N_OBJETOS)
+    ])
+
+    laboratorio_base = _siguiente_id(Laboratorios)
+    Laboratorios.objects.bulk_create([
+        Laboratorios(
+            Laboratorio_Id=laboratorio_base + i,
+            Nombre_Laboratorio=f'Laboratorio {i + 1:02d}',
+            Capacidad=rng.choice([15, 20, 25, 30, 40]),
+            Ubicacion=f'Bloque {1 + i // 8}, {CAMPUS[i % len(CAMPUS)]}',
+        )
+        for i in range(N_LABORATORIOS)
+    ])
+    horario_base = _siguiente_id(Horarios_Laboratorio)
+    Horarios_Laboratorio.objects.bulk_create([
+        Horarios_Laboratorio(
+            Horario_Id=horario_base + i * len(FRANJAS) + j,
+            Laboratorio_Id_id=laboratorio_base + i,
+            Dia_Semana=DIAS[dia],
+            Hora_Inicio=_momento(date(2025, 1, 6), desde),
+            Hora_Fin=_momento(date(2025, 1, 6), hasta),
+        )
+        for i in range(N_LABORATORIOS) for j, (dia, desde, hasta) in enumerate(FRANJAS)
+    ])
+
+    return {
+        'programas': range(programa_base, programa_base + N_PROGRAMAS),
+        'objetos': range(objeto_base, objeto_base + N_OBJETOS),
+        'laboratorios': range(laboratorio_base, laboratorio_base + N_LABORATORIOS),
+        'horario_base': horario_base,
+    }
+
+
+# ----------------------------------------------------------------------
+# DISTRIBUCIONES (se calculan una vez por proceso)
+# ----------------------------------------------------------------------
+@functools.lru_cache(maxsize=4)
+def _calendario(referencia):
+    """
+    Fechas de inicio posibles con su peso acumulado: semestres, días hábiles
+    (sábado reducido, domingo cerrado), uso creciente hacia el presente y
+    menos solicitudes a futuro que en el pasado.
+    """
+    fechas, pesos = [], []
+    for dias_atras in range(-DIAS_FUTURO, DIAS_HISTORIA):
+        fecha = referencia - timedelta(days=dias_atras)
+        if fecha.weekday() == 6:
+            continue
+        peso = PESO_MES[fecha.month - 1] * (0.35 if fecha.weekday() == 5 else 1.0)
+        peso *= 0.3 if dias_atras < 0 else 1 - 0.4 * dias_atras / DIAS_HISTORIA
+        fechas.append(fecha)
+        pesos.append(peso)
+    return fechas, _acumulados(pesos)
+
+
+@functools.lru_cache(maxsize=4)
+def _popularidad(n, exponente):
+    """Pesos acumulados tipo Zipf: unos pocos elementos concentran el uso."""
+    return _acumulados([1 / (i + 1) ** exponente for i in range(n)])
+
+
+def _distintos(rng, poblacion, acumulados, k):
+    """`k` elementos distintos según los pesos (k es mucho menor que la población)."""
+    elegidos = []
+    while len(elegidos) < k:
+        for elemento in rng.choices(poblacion, cum_weights=acumulados, k=k - len(elegidos)):
+            if elemento not in elegidos:
+                elegidos.append(elemento)
+    return elegidos
+
+
+def _estado(rng, tipo, fecha_inicio, fecha_fin, referencia):
+    if fecha_fin < referencia:
+        # Préstamos recientes aún sin devolver (vencidos)
+        if tipo == 1 and (referencia - fecha_fin).days <= 14 and rng.random() < 0.04:
+            return 3
+        if tipo == 1:
+            return rng.choices((4, 5, 6), weights=(78, 12, 10))[0]
+        return rng.choices((4, 6), weights=(90, 10))[0]
+    if fecha_inicio <= referencia:
+        return rng.choices((3, 2, 6), weights=(80, 15, 5))[0]
+    return rng.choices((1, 2, 6), weights=(55, 38, 7))[0]
+
+
+# ----------------------------------------------------------------------
+# PLANES POR BLOQUE
+# ----------------------------------------------------------------------
+def _rango(p, tabla, bloque):
+    inicio = bloque * p['lote']
+    return inicio, min(p['lote'], p[tabla] - inicio)
+
+
+def _plan_usuarios(p, bloque):
+    """Rol de cada usuario del bloque."""
+    inicio, n = _rango(p, 'n_usuarios', bloque)
+    roles = _rng(p['semilla'], 'plan_usuarios', bloque).choices(
+        PESOS_ROLES[0], cum_weights=_acumulados(PESOS_ROLES[1]), k=n
+    )
+    if inicio == 0 and p['con_admin']:
+        roles[0] = 1
+    return roles
+
+
+def _plan_solicitudes(p, bloque):
+    """(tipo de servicio, líneas, integrantes) de cada solicitud del bloque."""
+    _, n = _rango(p, 'n_solicitudes', bloque)
+    rng = _rng(p['semilla'], 'plan_solicitudes', bloque)
+    tipos = rng.choices(PESOS_TIPOS[0], cum_weights=_acumulados(PESOS_TIPOS[1]), k=n)
+    maximo = min(max(int(2 * p['media_lineas'] - 1), 1), len(p['objetos']))
+    integrantes = min(4, len(p['usuarios']))
+    return [
+        (tipo, rng.randint(1, maximo), rng.randint(0, integrantes) if tipo == 21 else 0)
+        for tipo in tipos
+    ]
+
+
+# ----------------------------------------------------------------------
+# USUARIOS
+# ----------------------------------------------------------------------
+def _usuarios_django(p, bloque):
+    inicio, n = _rango(p, 'n_usuarios', bloque)
+    rng = _rng(p['semilla'], 'auth_user', bloque)
+    base = p['usuario_base'] + inicio
+    construir = _fabrica(User, ('id', 'username', 'password', 'email', 'is_staff', 'date_joined'))
+    referencia = p['referencia']
+    filas = []
+    for i, rol in enumerate(_plan_usuarios(p, bloque)):
+        usuario_id = base + i
+        alta = referencia - timedelta(days=rng.randrange(DIAS_HISTORIA))
+        filas.append(construir((
+            usuario_id,
+            ADMIN_USERNAME if rol == 1 else f'usuario{usuario_id:07d}',
+            p['contrasena'],
+            f'usuario{usuario_id}@acceslab.test',
+            rol in (1, 4),
+            datetime.combine(alta, time(rng.randrange(7, 20)), tzinfo=dt_timezone.utc),
+        )))
+    return filas
+
+
+def _perfiles(p, bloque):
+    inicio, _ = _rango(p, 'n_usuarios', bloque)
+    rng = _rng(p['semilla'], 'usuarios', bloque)
+    base = p['usuario_base'] + inicio
+    construir = _fabrica(Usuarios, (
+        'Usuario_Id_id', 'Tipo_Id_id', 'Solicitante_Id_id', 'Nombres', 'Apellido1', 'Apellido2',
+        'Correo_electronico', 'Numero_celular', 'Campus',
+    ))
+    filas = []
+    for i, rol in enumerate(_plan_usuarios(p, bloque)):
+        if rol == 2:
+            solicitante = 3 if rng.random() < 0.03 else 1
+        else:
+            solicitante = 2
+        filas.append(construir((
+            base + i,
+            rng.choices((1, 2, 3), weights=(85, 12, 3))[0],
+            solicitante,
+            rng.choice(NOMBRES),
+            rng.choice(APELLIDOS),
+            rng.choice(APELLIDOS),
+            f'usuario{base + i}@acceslab.test',
+            3_000_000_000 + rng.randrange(200_000_000),
+            rng.choices(CAMPUS, weights=(70, 20, 10))[0],
+        )))
+    return filas
+
+
+def _roles(p, bloque):
+    inicio, _ = _rango(p, 'n_usuarios', bloque)
+    base = p['usuario_base'] + inicio
+    construir = _fabrica(Usuarios_Roles, ('Usuario_Id_id', 'Rol_Id_id'))
+    return [construir((base + i, rol)) for i, rol in enumerate(_plan_usuarios(p, bloque))]
+
+
+def _programas_usuario(p, bloque):
+    inicio, n = _rango(p, 'n_usuarios', bloque)
+    base = p['usuario_base'] + inicio
+    programas = p['programas']
+    # Programas de tamaño desigual (los de ingeniería y salud son los grandes)
+    elegidos = _rng(p['semilla'], 'usuarios_programas', bloque).choices(
+        programas, cum_weights=_popularidad(len(programas), 0.5), k=n
+    )
+    construir = _fabrica(Usuarios_Programas, ('Usuario_Id_id', 'Programa_Id_id'))
+    return [construir((base + i, programa)) for i, programa in enumerate(elegidos)]
+
+
+# ----------------------------------------------------------------------
+# SOLICITUDES
+# ----------------------------------------------------------------------
+def _solicitudes(p, bloque):
+    inicio, n = _rango(p, 'n_solicitudes', bloque)
+    rng = _rng(p['semilla'], 'solicitudes', bloque)
+    referencia = p['referencia']
+    fechas, acumulados = _calendario(referencia)
+    solicitantes, laboratorios = p['solicitantes'], p['laboratorios']
+    construir = _fabrica(Solicitudes, (
+        'Solicitud_Id', 'Fecha_solicitud', 'Asignatura', 'N_asistentes', 'Fecha_Inicio', 'Fecha_Fin',
+        'Hora_Inicio', 'Hora_Fin', 'Usuario_Id_id', 'Tipo_Servicio_Id_id', 'Estado_Id_id',
+        'Laboratorio_Id_id', 'Horario_Id_id',
+    ))
+    franjas_por_dia = {dia: [(j, f) for j, f in enumerate(FRANJAS) if f[0] == dia] for dia in range(6)}
+    horas = rng.choices(PESOS_HORAS[0], cum_weights=_acumulados(PESOS_HORAS[1]), k=n)
+    inicios = rng.choices(fechas, cum_weights=acumulados, k=n)
+
+    filas = []
+    for i, ((tipo, _, _), fecha_inicio, hora) in enumerate(zip(_plan_solicitudes(p, bloque), inicios, horas)):
+        laboratorio = horario = None
+        if tipo == 21:
+            # Reserva de laboratorio: dentro de una franja del horario de ese día
+            j, (_, desde, hasta) = rng.choice(franjas_por_dia[fecha_inicio.weekday()])
+            indice = rng.randrange(len(laboratorios))
+            laboratorio = laboratorios[indice]
+            horario = p['horario_base'] + indice * len(FRANJAS) + j
+            hora = rng.randrange(desde, hasta)
+            hora_fin = min(hora + rng.randint(1, 3), hasta)
+            fecha_fin = fecha_inicio
+            anticipacion = rng.randrange(1, 21)
+            asistentes = rng.randint(5, 30)
+        elif tipo == 1:
+            fecha_fin = fecha_inicio + timedelta(days=rng.choice((0, 0, 1, 1, 2, 3, 7)))
+            hora_fin = min(hora + rng.randint(1, 3), 20)
+            anticipacion = rng.randrange(0, 4)
+            asistentes = rng.randint(1, 4)
+        else:
+            fecha_fin = fecha_inicio
+            hora_fin = min(hora + rng.randint(1, 2), 20)
+            anticipacion = rng.randrange(0, 8)
+            asistentes = rng.randint(1, 5)
+        # Los usuarios más antiguos son los más activos
+        usuario = solicitantes[int(len(solicitantes) * rng.random() ** 2)]
+        filas.append(construir((
+            p['solicitud_base'] + inicio + i,
+            min(fecha_inicio - timedelta(days=anticipacion), referencia),
+            rng.choice(ASIGNATURAS),
+            asistentes,
+            fecha_inicio,
+            fecha_fin,
+            _momento(fecha_inicio, hora),
+            _momento(fecha_fin, hora_fin),
+            usuario,
+            tipo,
+            _estado(rng, tipo, fecha_inicio, fecha_fin, referencia),
+            laboratorio,
+            horario,
+        )))
+    return filas
+
+
+def _lineas(p, bloque):
+    inicio, _ = _rango(p, 'n_solicitudes', bloque)
+    rng = _rng(p['semilla'], 'solicitudes_objetos', bloque)
+    objetos = p['objetos']
+    popularidad = _popularidad(len(objetos), 0.8)
+    construir = _fabrica(Solicitudes_Objetos, ('Solicitud_Objetos_Id', 'Solicitud_Id_id', 'Objetos_Id_id', 'Cantidad_Objetos'))
+    linea_id = p['lineas_desde'][bloque]
+    filas = []
+    for i, (_, n_lineas, _) in enumerate(_plan_solicitudes(p, bloque)):
+        solicitud_id = p['solicitud_base'] + inicio + i
+        for objeto in _distintos(rng, objetos, popularidad, n_lineas):
+            filas.append(construir((linea_id, solicitud_id, objeto, rng.choice((1, 1, 1, 2, 2, 3)))))
+            linea_id += 1
+    return filas
+
+
+def _integrantes(p, bloque):
+    inicio, _ = _rango(p, 'n_solicitudes', bloque)
+    rng = _rng(p['semilla'], 'usuario_solicitud', bloque)
+    usuarios = p['usuarios']
+    construir = _fabrica(Integrante_Solicitud, ('Usuario_Solicitud_Id', 'Usuario_Id_id', 'Solicitud_Id_id'))
+    integrante_id = p['integrantes_desde'][bloque]
+    filas = []
+    for i, (_, _, n_integrantes) in enumerate(_plan_solicitudes(p, bloque)):
+        elegidos = set()
+        while len(elegidos) < n_integrantes:
+            elegidos.add(usuarios[rng.randrange(len(usuarios))])
+        for usuario in sorted(elegidos):
+            filas.append(construir((integrante_id, usuario, p['solicitud_base'] + inicio + i)))
+            integrante_id += 1
+    return filas
+
+
+# ----------------------------------------------------------------------
+# INSERCIÓN (en este proceso o repartida entre varios)
+# ----------------------------------------------------------------------
+# Niveles en orden de claves foráneas; las tablas de un mismo nivel no se
+# referencian entre sí. Cada tabla: (modelo, generador de un bloque, volumen
+# del que salen sus bloques)
+NIVELES = [
+    [(User, _usuarios_django, 'n_usuarios')],
+    [(Usuarios, _perfiles, 'n_usuarios')],
+    [
+        (Usuarios_Roles, _roles, 'n_usuarios'),
+        (Usuarios_Programas, _programas_usuario, 'n_usuarios'),
+        (Solicitudes, _solicitudes, 'n_solicitudes'),
+    ],
+    [(Solicitudes_Objetos, _lineas, 'n_solicitudes'), (Integrante_Solicitud, _integrantes, 'n_solicitudes')],
+]
+
+# Parámetros de la corrida en cada proceso (los fija _inicializar_proceso)
+_parametros = None
+
+
+def _inicializar_proceso(parametros):
+    global _parametros
+    # Con "spawn" (macOS, Windows) el proceso hijo arranca sin Django configurado
+    if not apps.ready:
+        django.setup()
+    _parametros = parametros
+
+
+def _insertar(modelo, instancias):
+    """bulk_create en lotes del tamaño de un INSERT del backend, cada uno en su transacción."""
+    lote = max(connection.ops.bulk_batch_size(modelo._meta.concrete_fields, instancias), 1)
+    for inicio in range(0, len(instancias), lote):
+        modelo.objects.bulk_create(instancias[inicio:inicio + lote])
+
+
+def _ejecutar_tarea(tarea):
+    modelo, generador, bloque = tarea
+    instancias = generador(_parametros, bloque)
+    _insertar(modelo, instancias)
+    return modelo, len(instancias)
+
+
+def _bloques(p, volumen):
+    return -(-p[volumen] // p['lote'])
+
+
+def _tareas(nivel, p):
+    return [
+        (modelo, generador, bloque)
+        for modelo, generador, volumen in nivel for bloque in range(_bloques(p, volumen))
+    ]
+
+
+def _ejecutar(p, procesos, contar):
+    totales = {}
+
+    def acumular(resultados):
+        for modelo, filas in resultados:
+            totales[modelo] = totales.get(modelo, 0) + filas
+            contar(modelo, totales[modelo])
+
+    if procesos <= 1:
+        _inicializar_proceso(p)
+        for nivel in NIVELES:
+            acumular(map(_ejecutar_tarea, _tareas(nivel, p)))
+        return totales
+
+    # Los hijos abren sus propias conexiones: no se heredan abiertas
+    connections.close_all()
+    with multiprocessing.Pool(procesos, initializer=_inicializar_proceso, initargs=(p,)) as pool:
+        for nivel in NIVELES:
+            acumular(pool.imap_unordered(_ejecutar_tarea, _tareas(nivel, p)))
+    return totales
+
+
+def _desde_por_bloque(primero, cantidades):
+    """Primer ID de cada bloque dadas las filas de cada uno."""
+    desde = []
+    for cantidad in cantidades:
+        desde.append(primero)
+        primero += cantidad
+    return desde
+
+
+def sembrar(usuarios=None, solicitudes=None, lineas=None, semilla=42, referencia=None,
+            lote=TAMANO_LOTE, procesos=1, progreso=None):
+    """
+    Siembra catálogos, usuarios y solicitudes. Retorna los conteos creados.
+    `progreso(modelo, filas)` se llama tras cada bloque con el total de la tabla.
+    """
+    usuarios = VOLUMENES['usuarios'] if usuarios is None else usuarios
+    solicitudes = VOLUMENES['solicitudes'] if solicitudes is None else solicitudes
+    lineas = VOLUMENES['lineas'] if lineas is None else lineas
+    referencia = referencia or timezone.localdate()
+    contar = progreso or (lambda modelo, filas: None)
+
+    catalogos = sembrar_catalogos(_rng(semilla, 'catalogos'))
+    usuario_base = _siguiente_id(User)
+    con_admin = not User.objects.filter(username=ADMIN_USERNAME).exists()
+    ids_usuarios = range(usuario_base, usuario_base + usuarios)
+    p = {
+        'semilla': semilla,
+        'referencia': referencia,
+        'lote': lote,
+        'n_usuarios': usuarios,
+        'n_solicitudes': solicitudes if usuarios else 0,
+        'media_lineas': max(lineas / solicitudes, 1) if solicitudes else 1,
+        'con_admin': con_admin,
+        'contrasena': _contrasena(semilla),
+        'usuario_base': usuario_base,
+        'usuarios': ids_usuarios,
+        # El administrador no hace solicitudes
+        'solicitantes': ids_usuarios[1:] if con_admin and usuarios > 1 else ids_usuarios,
+        'solicitud_base': _siguiente_id(Solicitudes),
+        **catalogos,
+    }
+
+    # Líneas e integrantes de cada bloque: de ahí el primer ID de cada uno
+    planes = [_plan_solicitudes(p, bloque) for bloque in range(_bloques(p, 'n_solicitudes'))]
+    p['lineas_desde'] = _desde_por_bloque(
+        _siguiente_id(Solicitudes_Objetos), [sum(lineas for _, lineas, _ in plan) for plan in planes]
+    )
+    p['integrantes_desde'] = _desde_por_bloque(
+        _siguiente_id(Integrante_Solicitud), [sum(integrantes for _, _, integrantes in plan) for plan in planes]
+    )
+    del planes
+
+    totales = _ejecutar(p, procesos, contar)
+    return {
+        'usuarios': totales.get(Usuarios, 0),
+        'solicitudes': totales.get(Solicitudes, 0),
+        'lineas': totales.get(Solicitudes_Objetos, 0),
+        'integrantes': totales.get(Integrante_Solicitud, 0),
+    }
+
+
+def conteos():
+    """Filas actuales de las tablas grandes (se guardan junto a los resultados)."""
+    return {
+        'usuarios': Usuarios.objects.count(),
+        'solicitudes': Solicitudes.objects.count(),
+        'lineas': Solicitudes_Objetos.objects.count(),
+        'integrantes': Integrante_Solicitud.objects.count(),
+    }
@@ -0,0 +1,69 @@
+# ==============================================================================
+# MONITOREO/CALENTAMIENTO.PY - Precarga al arrancar el worker
+# ==============================================================================
+# Con PRECALENTAR=true, MonitoreoConfig.ready() lanza un hilo que abre el pool
+# de sesiones (crea las DB_POOL_MIN sesiones) y llena las cachés en proceso:
+# catálogos, horario compilado y mapa de programas. Así el primer request no
+# paga esas consultas. Corre en segundo plano: no retrasa el arranque y, si
+# la base de datos no responde, solo se registra el error.
+# ⚠️ No usar con "gunicorn --preload": el pool se crearía en el proceso
+# maestro y los workers heredarían sus sockets.
+
+import logging
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def _conexion():
+    connections[DEFAULT_DB_ALIAS].ensure_connection()
+
+
+def _catalogos():
+    from maestros import catalogos
+    catalogos.precargar()
+
+
+def _horarios():
+    from maestros import horarios
+    horarios.horario_compilado()
+
+
+def _programas():
+    from usuarios.programas import mapa_programas
+    mapa_programas()
+
+
+PASOS = (
+    ('conexion', _conexion),
+    ('catalogos', _catalogos),
+    ('horarios', _horarios),
+    ('programas', _programas),
+)
+
+
+def calentar():
+    """Ejecuta los pasos en orden; retorna {paso: ms} de los que terminaron."""
+    tiempos = {}
+    try:
+        for nombre, paso in PASOS:
+            inicio = time.perf_counter()
+            paso()
+            tiempos[nombre] = round((time.perf_counter() - inicio) * 1000, 2)
+    except Exception:
+        logger.exception('Calentamiento interrumpido tras %s', list(tiempos) or 'ningún paso')
+    finally:
+        # Devuelve la sesión al pool (o cierra la conexión) de este hilo
+        connections.close_all()
+    logger.info('Calentamiento: %s', tiempos)
+    return tiempos
+
+
+def calentar_en_segundo_plano():
+    hilo = threading.Thread(target=calentar, name='calentamiento', daemon=True)
+    hilo.start()
+    return hilo
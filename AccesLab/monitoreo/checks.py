@@ -0,0 +1,28 @@
+# monitoreo/checks.py
+# Chequeos de arranque ("manage.py check") de la configuración de despliegue
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# Backends cuyo contenido es propio de cada proceso
+_CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def cache_compartida(app_configs, **kwargs):
+    """
+    Las versiones de catálogos, los reportes cacheados, el horario semanal, el
+    índice de búsqueda y los trabajos de PDF se coordinan por la caché: con
+    una caché por proceso cada worker ve su propia copia.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if settings.DEBUG or backend not in _CACHES_POR_PROCESO:
+        return []
+    return [Warning(
+        f'La caché "default" ({backend.rsplit(".", 1)[-1]}) no se comparte entre procesos',
+        hint='Con varios workers use CACHE_BACKEND=db o CACHE_BACKEND=redis (ver settings.py).',
+        id='monitoreo.W001',
+    )]
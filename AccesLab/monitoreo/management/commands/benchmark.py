@@ -0,0 +1,79 @@
+# monitoreo/management/commands/benchmark.py
+
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoreo.benchmark import escenarios, esquema, medicion
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta los escenarios de benchmark (solicitudes, usuarios, catálogos y reportes) '
+        'sobre la base SQLite de "preparar_benchmark" y los compara con una línea base. '
+        'Usar con --settings=AccesLab.settings_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenarios', nargs='*',
+                            help='Prefijos de los escenarios a ejecutar (p. ej. "reportes." o "solicitudes.crear")')
+        parser.add_argument('--iteraciones', type=int, default=20)
+        parser.add_argument('--calentamiento', type=int, default=2)
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--linea-base', help='Resultados JSON anteriores contra los que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.2,
+                            help='Empeoramiento relativo admitido frente a la línea base (default: 0.2)')
+        parser.add_argument('--listar', action='store_true', help='Solo lista los escenarios')
+
+    def handle(self, *args, **options):
+        seleccion = escenarios.seleccionar(options['escenarios'])
+        if options['listar']:
+            for escenario in seleccion:
+                self.stdout.write(f'{escenario.nombre:40} {escenario.metodo:6} {escenario.ruta if isinstance(escenario.ruta, str) else "(calculada)"}')
+            return
+        if not seleccion:
+            raise CommandError('Ningún escenario coincide con los prefijos indicados')
+
+        try:
+            esquema.verificar_sqlite()
+            contexto = escenarios.Contexto()
+        except (ImproperlyConfigured, ValueError) as e:
+            raise CommandError(str(e))
+
+        base = None
+        if options['linea_base']:
+            with open(options['linea_base'], encoding='utf-8') as archivo:
+                base = json.load(archivo)
+
+        self.stdout.write(
+            f"{'escenario':40} {'p50':>9} {'p95':>9} {'p99':>9} {'consultas':>9} {'bd':>9} {'memoria':>10}"
+        )
+
+        def imprimir(nombre, r):
+            linea = (
+                f"{nombre:40} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms "
+                f"{r['consultas']:>9} {r['tiempo_bd_ms']:>7.1f}ms {r['memoria_pico_kb']:>8.0f}KB"
+            )
+            if r.get('errores'):
+                linea += f"  estados inesperados: {r['errores']}"
+            self.stdout.write(linea)
+
+        resultados = medicion.ejecutar(
+            seleccion, contexto, options['iteraciones'], options['calentamiento'], al_terminar=imprimir
+        )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if base is not None:
+            regresiones = medicion.comparar(resultados, base, options['tolerancia'])
+            for r in regresiones:
+                self.stdout.write(self.style.ERROR(
+                    f"REGRESIÓN {r['escenario']} {r['metrica']}: {r['base']} -> {r['actual']}"
+                ))
+            if regresiones:
+                raise CommandError(f'{len(regresiones)} regresiones frente a {options["linea_base"]}')
+            self.stdout.write(self.style.SUCCESS(f"Sin regresiones frente a {options['linea_base']}"))
@@ -0,0 +1,86 @@
+# monitoreo/management/commands/generar_datos.py
+
+import os
+import time
+from datetime import date
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from monitoreo.benchmark import esquema, sintetico
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos a escala de producción (facultades, programas, usuarios con '
+        'roles y programas, laboratorios con horario semanal, objetos y solicitudes con líneas '
+        'e integrantes) en la base configurada. Deterministas por semilla y fecha de referencia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=sintetico.VOLUMENES['usuarios'])
+        parser.add_argument('--solicitudes', type=int, default=sintetico.VOLUMENES['solicitudes'])
+        parser.add_argument('--lineas', type=int, default=sintetico.VOLUMENES['lineas'],
+                            help='Líneas de objetos aproximadas (la media por solicitud se deriva de aquí)')
+        parser.add_argument('--escala', type=float, default=1.0,
+                            help='Multiplica los tres volúmenes (p. ej. 0.01 para una corrida rápida)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--referencia', type=date.fromisoformat,
+                            help='Fecha (AAAA-MM-DD) a la que se refieren las fechas generadas (default: hoy)')
+        parser.add_argument('--lote', type=int, default=sintetico.TAMANO_LOTE,
+                            help='Filas por bloque: cada bloque es una tarea y tiene su propio generador aleatorio')
+        parser.add_argument('--procesos', type=int, default=1,
+                            help='Procesos que generan e insertan los bloques de cada tabla (0 = uno por CPU)')
+        parser.add_argument('--materializar', action='store_true',
+                            help='Solo SQLite: crear antes las tablas de los modelos managed = False')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Permitir generar sobre una base que no es SQLite (Oracle de desarrollo o pruebas)')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que 0')
+        procesos = options['procesos'] or os.cpu_count() or 1
+        # DEBUG no distingue una base compartida: fuera de SQLite siempre se pide --forzar
+        if connection.vendor != 'sqlite' and not options['forzar']:
+            raise CommandError(
+                f'La base "{connection.settings_dict["NAME"]}" ({connection.vendor}) no es SQLite: '
+                'use --forzar si de verdad quiere insertar millones de filas sintéticas en ella'
+            )
+
+        if options['materializar']:
+            try:
+                creadas = esquema.materializar()
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'Tablas creadas: {len(creadas)}')
+
+        escala = options['escala']
+        inicio = time.perf_counter()
+        ultimo = {}
+
+        def progreso(modelo, filas):
+            nombre = modelo._meta.db_table
+            # Una línea cada 100k filas por tabla
+            if filas // 100_000 != ultimo.get(nombre, -1):
+                ultimo[nombre] = filas // 100_000
+                self.stdout.write(f'  {nombre}: {filas} filas ({time.perf_counter() - inicio:.0f} s)')
+
+        resultado = sintetico.sembrar(
+            usuarios=max(int(options['usuarios'] * escala), 2),
+            solicitudes=int(options['solicitudes'] * escala),
+            lineas=int(options['lineas'] * escala),
+            semilla=options['semilla'],
+            referencia=options['referencia'],
+            lote=options['lote'],
+            procesos=procesos,
+            progreso=progreso,
+        )
+
+        duracion = time.perf_counter() - inicio
+        filas = sum(resultado.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generado en {duracion:.0f} s con {procesos} proceso(s) ({filas / max(duracion, 1e-9):,.0f} filas/s): "
+            f"{resultado['usuarios']} usuarios, {resultado['solicitudes']} solicitudes, "
+            f"{resultado['lineas']} líneas, {resultado['integrantes']} integrantes."
+        ))
@@ -0,0 +1,124 @@
+# monitoreo/management/commands/perfil_arranque.py
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Se ejecuta en un proceso nuevo con "python -X importtime": mide un arranque
+# en frío real (settings, django.setup() y carga de las URLs), sin lo que este
+# proceso ya tiene importado
+_SCRIPT = '''
+import json, sys, time
+t0 = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS
+t1 = time.perf_counter()
+django.setup()
+t2 = time.perf_counter()
+fases = {"settings": t1 - t0, "setup": t2 - t1}
+if sys.argv[1] == "1":
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+    fases["urls"] = time.perf_counter() - t2
+print(json.dumps({k: round(v * 1000, 2) for k, v in fases.items()}))
+'''
+
+# "import time:       257 |     138387 |   django.urls.base"
+_LINEA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+def _medir(urls):
+    entorno = dict(os.environ, PRECALENTAR='false')
+    proceso = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _SCRIPT, '1' if urls else '0'],
+        capture_output=True, text=True, env=entorno,
+    )
+    if proceso.returncode != 0:
+        raise CommandError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else 'El arranque falló')
+
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        coincidencia = _LINEA.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, modulo = coincidencia.groups()
+            modulos[modulo] = {
+                'propio_ms': int(propio) / 1000,
+                'acumulado_ms': int(acumulado) / 1000,
+                # Importado directamente por el código del proyecto o por Django
+                'raiz': len(sangria) == 1,
+            }
+    return json.loads(proceso.stdout.strip().splitlines()[-1]), modulos
+
+
+def _minimo(mediciones):
+    """Mínimo por fase y por módulo entre varias corridas (reduce el ruido)."""
+    fases, modulos = {}, {}
+    for fases_corrida, modulos_corrida in mediciones:
+        for fase, ms in fases_corrida.items():
+            fases[fase] = min(fases.get(fase, ms), ms)
+        for modulo, datos in modulos_corrida.items():
+            actual = modulos.setdefault(modulo, dict(datos))
+            actual['propio_ms'] = min(actual['propio_ms'], datos['propio_ms'])
+            actual['acumulado_ms'] = min(actual['acumulado_ms'], datos['acumulado_ms'])
+    return fases, modulos
+
+
+def _por_paquete(modulos):
+    paquetes = {}
+    for modulo, datos in modulos.items():
+        paquete = paquetes.setdefault(modulo.split('.')[0], {'propio_ms': 0.0, 'modulos': 0})
+        paquete['propio_ms'] += datos['propio_ms']
+        paquete['modulos'] += 1
+    return paquetes
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque en frío de un worker (python -X importtime en un proceso nuevo): '
+        'tiempo por fase y costo de import por paquete y por módulo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Filas por tabla (default: 15)')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Corridas; se toma el mínimo (default: 3)')
+        parser.add_argument('--sin-urls', action='store_true', help='No cargar ROOT_URLCONF (solo settings y apps)')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        mediciones = [_medir(not options['sin_urls']) for _ in range(max(options['repeticiones'], 1))]
+        fases, modulos = _minimo(mediciones)
+        top = options['top']
+
+        paquetes = sorted(_por_paquete(modulos).items(), key=lambda p: p[1]['propio_ms'], reverse=True)
+        raices = sorted(
+            ((m, d) for m, d in modulos.items() if d['raiz']),
+            key=lambda m: m[1]['acumulado_ms'], reverse=True,
+        )
+        total_imports = round(sum(d['propio_ms'] for d in modulos.values()), 2)
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'fases_ms': fases,
+                'imports_ms': total_imports,
+                'modulos': len(modulos),
+                'paquetes': [{'paquete': p, **d} for p, d in paquetes[:top]],
+                'modulos_raiz': [{'modulo': m, **d} for m, d in raices[:top]],
+            }, indent=2))
+            return
+
+        self.stdout.write('Fases (ms): ' + ', '.join(f'{fase}={ms:.1f}' for fase, ms in fases.items()))
+        self.stdout.write(f'Imports: {total_imports:.1f} ms en {len(modulos)} módulos\n')
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Por paquete (tiempo propio sumado)'))
+        for paquete, datos in paquetes[:top]:
+            self.stdout.write(f"  {datos['propio_ms']:9.1f} ms  {datos['modulos']:4d} mód.  {paquete}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Módulos de primer nivel (acumulado)'))
+        for modulo, datos in raices[:top]:
+            self.stdout.write(f"  {datos['acumulado_ms']:9.1f} ms  {modulo}")
@@ -0,0 +1,74 @@
+# monitoreo/management/commands/preparar_benchmark.py
+
+import os
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoreo.benchmark import esquema, sintetico
+from reservas.models import Solicitudes
+
+
+class Command(BaseCommand):
+    help = (
+        'Materializa en SQLite las tablas de Oracle (managed = False) y siembra datos '
+        'sintéticos para el benchmark. Usar con --settings=AccesLab.settings_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=sintetico.VOLUMENES['usuarios'])
+        parser.add_argument('--solicitudes', type=int, default=sintetico.VOLUMENES['solicitudes'])
+        parser.add_argument('--lineas', type=int, default=sintetico.VOLUMENES['lineas'],
+                            help='Líneas de objetos aproximadas (la media por solicitud se deriva de aquí)')
+        parser.add_argument('--escala', type=float, default=1.0,
+                            help='Multiplica los tres volúmenes (p. ej. 0.01 para una corrida rápida)')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=sintetico.TAMANO_LOTE)
+        parser.add_argument('--procesos', type=int, default=1,
+                            help='Procesos que generan e insertan los datos (0 = uno por CPU; ver generar_datos)')
+        parser.add_argument('--sin-snapshot', action='store_true',
+                            help='No exportar el snapshot del motor analítico')
+
+    def handle(self, *args, **options):
+        try:
+            creadas = esquema.materializar()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        self.stdout.write(f'Tablas creadas: {len(creadas)}')
+
+        if Solicitudes.objects.exists():
+            raise CommandError(
+                'La base del benchmark ya tiene datos: borre el archivo (BENCHMARK_DB) para sembrar de nuevo'
+            )
+
+        escala = options['escala']
+        inicio = time.perf_counter()
+        ultimo = {}
+
+        def progreso(modelo, filas):
+            nombre = modelo._meta.db_table
+            # Una línea cada 100k filas por tabla
+            if filas // 100_000 != ultimo.get(nombre, -1):
+                ultimo[nombre] = filas // 100_000
+                self.stdout.write(f'  {nombre}: {filas} filas ({time.perf_counter() - inicio:.0f} s)')
+
+        resultado = sintetico.sembrar(
+            usuarios=max(int(options['usuarios'] * escala), 2),
+            solicitudes=int(options['solicitudes'] * escala),
+            lineas=int(options['lineas'] * escala),
+            semilla=options['semilla'],
+            lote=options['lote'],
+            procesos=options['procesos'] or os.cpu_count() or 1,
+            progreso=progreso,
+        )
+        esquema.analizar()
+        if not options['sin_snapshot']:
+            call_command('exportar_snapshot', completo=True, stdout=self.stdout)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sembrado en {time.perf_counter() - inicio:.0f} s: {resultado['usuarios']} usuarios, "
+            f"{resultado['solicitudes']} solicitudes, {resultado['lineas']} líneas, "
+            f"{resultado['integrantes']} integrantes."
+        ))
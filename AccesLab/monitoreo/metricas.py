@@ -0,0 +1,355 @@
+# ==============================================================================
+# MONITOREO/METRICAS.PY - Métricas de la aplicación en formato Prometheus
+# ==============================================================================
+# - Contadores e histogramas con etiquetas, en memoria del proceso (sin
+#   prometheus_client ni servicios externos); /metrics los expone en el
+#   formato de texto de Prometheus (ver monitoreo/views.py)
+# - Cada hilo acumula en sus propias series (sin candado ni JSON en el camino
+#   caliente; las claves son tuplas de etiquetas). Cuando el hilo termina sus
+#   series se pliegan en un total del proceso. Las series de los hilos vivos
+#   más ese total se suman y se serializan solo al volcar o al responder /metrics
+# - Multiproceso (workers de gunicorn): con METRICAS_DIR cada proceso vuelca
+#   sus series a <METRICAS_DIR>/metricas-<pid>-<inicio>.json (escritura
+#   atómica con os.replace) como máximo cada METRICAS_INTERVALO segundos y al
+#   salir; /metrics suma los archivos de todos los procesos más los valores
+#   en memoria del proceso que responde
+# - Los archivos de workers terminados se conservan para que los contadores
+#   no retrocedan; el directorio se vacía al arrancar el servidor con
+#   limpiar_directorio() (p. ej. en el hook on_starting de gunicorn)
+# - Un proceso hijo (fork con --preload) empieza con las series vacías
+
+import atexit
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+INTERVALO_POR_DEFECTO = 2
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+# ----------------------------------------------------------------------
+# DEFINICIONES
+# ----------------------------------------------------------------------
+class Metrica:
+    def __init__(self, nombre, tipo, ayuda, etiquetas, buckets=None):
+        self.nombre = nombre
+        self.tipo = tipo
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(float(b) for b in buckets) if buckets else None
+
+
+_definiciones = {}
+
+
+def _definir(nombre, tipo, ayuda, etiquetas=(), buckets=None):
+    _definiciones[nombre] = Metrica(nombre, tipo, ayuda, etiquetas, buckets)
+
+
+_definir(
+    'acceslab_http_duracion_segundos', 'histogram',
+    'Latencia de los requests por vista (ruta o acción de DRF).',
+    ('vista', 'metodo', 'estado'), BUCKETS_SEGUNDOS,
+)
+_definir(
+    'acceslab_http_respuesta_bytes', 'histogram',
+    'Tamaño del cuerpo de las respuestas por vista.',
+    ('vista', 'metodo'), BUCKETS_BYTES,
+)
+_definir(
+    'acceslab_bd_tiempo_segundos', 'histogram',
+    'Tiempo en la base de datos por request.',
+    ('vista',), BUCKETS_SEGUNDOS,
+)
+_definir(
+    'acceslab_bd_consultas', 'histogram',
+    'Consultas SQL por request.',
+    ('vista',), BUCKETS_CONSULTAS,
+)
+_definir(
+    'acceslab_cache_eventos_total', 'counter',
+    'Accesos a las cachés de la aplicación por resultado (hit, miss, stale).',
+    ('cache', 'nombre', 'resultado'),
+)
+_definir(
+    'acceslab_reporte_duracion_segundos', 'histogram',
+    'Duración del cálculo de los reportes (solo los que no salen de la caché).',
+    ('reporte',), BUCKETS_SEGUNDOS,
+)
+_definir(
+    'acceslab_auth_fallos_total', 'counter',
+    'Respuestas 401 (credenciales ausentes o inválidas) y 403 (sin permiso).',
+    ('vista', 'motivo'),
+)
+
+
+# ----------------------------------------------------------------------
+# SERIES DEL PROCESO
+# ----------------------------------------------------------------------
+# Series de cada hilo: {nombre: {clave: valor}}; clave = tupla con los valores
+# de las etiquetas. Contador: número. Histograma: [conteo por bucket...,
+# conteo +Inf, suma]. Solo el hilo dueño las modifica. Las de los hilos que
+# terminan (p. ej. los de refresco de reportes/cache.py) se suman a _plegadas,
+# así los contadores no retroceden y _fragmentos solo tiene hilos vivos
+_fragmentos = {}          # id(series) -> series de un hilo vivo
+_plegadas = {}
+_local = threading.local()
+_lock = threading.Lock()
+_pid = os.getpid()
+_archivo = None
+_ultimo_volcado = 0.0
+
+
+def _verificar_proceso():
+    # Tras un fork el hijo hereda las series del padre: empieza de cero
+    global _pid, _archivo, _ultimo_volcado
+    if os.getpid() != _pid:
+        _pid = os.getpid()
+        _archivo = None
+        _ultimo_volcado = 0.0
+        _fragmentos.clear()
+        _plegadas.clear()
+
+
+class _SeriesHilo:
+    """Dueño de las series de un hilo; vive en el threading.local y muere con el hilo."""
+
+    def __init__(self):
+        self.series = {}
+        self.pid = os.getpid()
+
+
+def _plegar(series, pid):
+    """Al terminar el hilo: sus series pasan al total del proceso."""
+    with _lock:
+        if pid != os.getpid() or _fragmentos.pop(id(series), None) is None:
+            return  # Series del padre heredadas en un fork: ya no cuentan
+        _sumar(_plegadas, series)
+
+
+def _series_del_hilo():
+    propio = getattr(_local, 'propio', None)
+    if propio is None or propio.pid != os.getpid():
+        # Primer uso en este hilo (o primer uso tras un fork): se registra una vez
+        propio = _local.propio = _SeriesHilo()
+        with _lock:
+            _verificar_proceso()
+            _fragmentos[id(propio.series)] = propio.series
+        weakref.finalize(propio, _plegar, propio.series, propio.pid)
+    return propio.series
+
+
+def _clave(metrica, etiquetas):
+    return tuple(str(etiquetas.get(e, '')) for e in metrica.etiquetas)
+
+
+def incrementar(nombre, valor=1, /, **etiquetas):
+    metrica = _definiciones[nombre]
+    series = _series_del_hilo().setdefault(nombre, {})
+    clave = _clave(metrica, etiquetas)
+    series[clave] = series.get(clave, 0) + valor
+
+
+def observar(nombre, valor, /, **etiquetas):
+    metrica = _definiciones[nombre]
+    series = _series_del_hilo().setdefault(nombre, {})
+    clave = _clave(metrica, etiquetas)
+    acumulado = series.get(clave)
+    if acumulado is None:
+        acumulado = series[clave] = [0] * (len(metrica.buckets) + 2)
+    indice = next((i for i, limite in enumerate(metrica.buckets) if valor <= limite), len(metrica.buckets))
+    acumulado[indice] += 1
+    acumulado[-1] += valor
+
+
+def _copia():
+    """Suma de las series de todos los hilos del proceso (vivos y terminados)."""
+    total = {}
+    # Con el candado tomado ningún hilo se pliega a mitad de la suma (se contaría dos veces)
+    with _lock:
+        _verificar_proceso()
+        _sumar(total, _plegadas)
+        for fragmento in list(_fragmentos.values()):
+            # dict()/list() copian en una sola operación mientras el hilo dueño sigue escribiendo
+            _sumar(total, {nombre: dict(series) for nombre, series in list(fragmento.items())})
+    return total
+
+
+# ----------------------------------------------------------------------
+# AGREGACIÓN ENTRE PROCESOS
+# ----------------------------------------------------------------------
+def directorio():
+    return getattr(settings, 'METRICAS_DIR', None)
+
+
+def _ruta_archivo(carpeta):
+    global _archivo
+    if _archivo is None:
+        _archivo = os.path.join(carpeta, f'metricas-{_pid}-{int(time.time() * 1000)}.json')
+    return _archivo
+
+
+def volcar():
+    """Escribe las series del proceso en METRICAS_DIR (nada si no está configurado)."""
+    global _ultimo_volcado
+    carpeta = directorio()
+    if not carpeta:
+        return
+    series = _copia()
+    ruta = _ruta_archivo(carpeta)
+    try:
+        os.makedirs(carpeta, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=carpeta, prefix='.metricas-', suffix='.tmp')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+            json.dump(_a_json(series), archivo, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        logger.warning("No se pudieron volcar las métricas a %s: %s", carpeta, e)
+    _ultimo_volcado = time.monotonic()
+
+
+def volcar_si_toca():
+    """Vuelca si pasaron METRICAS_INTERVALO segundos desde el último volcado."""
+    if not directorio():
+        return
+    intervalo = getattr(settings, 'METRICAS_INTERVALO', INTERVALO_POR_DEFECTO)
+    if time.monotonic() - _ultimo_volcado >= intervalo:
+        volcar()
+
+
+def limpiar_directorio():
+    """Borra los archivos de procesos anteriores; llamar una vez al arrancar el servidor."""
+    carpeta = directorio()
+    if not carpeta:
+        return
+    for ruta in glob.glob(os.path.join(carpeta, 'metricas-*.json')):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+
+def _a_json(series):
+    # JSON solo admite claves de texto: la tupla de etiquetas va como lista serializada
+    return {
+        nombre: {json.dumps(clave, ensure_ascii=False): valor for clave, valor in valores.items()}
+        for nombre, valores in series.items()
+    }
+
+
+def _de_json(series):
+    return {
+        nombre: {tuple(json.loads(clave)): valor for clave, valor in valores.items()}
+        for nombre, valores in series.items()
+    }
+
+
+def _sumar(destino, origen):
+    for nombre, series in origen.items():
+        metrica = _definiciones.get(nombre)
+        if metrica is None:
+            continue  # Métrica de una versión anterior del código
+        acumuladas = destino.setdefault(nombre, {})
+        for clave, valor in series.items():
+            previo = acumuladas.get(clave)
+            if metrica.tipo == 'counter':
+                acumuladas[clave] = (previo or 0) + valor
+            elif len(valor) == len(metrica.buckets) + 2:
+                acumuladas[clave] = [a + b for a, b in zip(previo, valor)] if previo else list(valor)
+
+
+def recolectar():
+    """Series de todos los procesos (archivos de METRICAS_DIR + memoria de este)."""
+    total = {}
+    propias = _copia()
+    carpeta = directorio()
+    if carpeta:
+        propio = _ruta_archivo(carpeta)
+        for ruta in glob.glob(os.path.join(carpeta, 'metricas-*.json')):
+            if ruta == propio:
+                continue  # Este proceso aporta sus valores en memoria (más recientes)
+            try:
+                with open(ruta, encoding='utf-8') as archivo:
+                    _sumar(total, _de_json(json.load(archivo)))
+            except (OSError, ValueError):
+                continue  # Archivo reemplazado o a medio escribir por otro proceso
+    _sumar(total, propias)
+    return total
+
+
+atexit.register(volcar)
+
+
+# ----------------------------------------------------------------------
+# FORMATO DE TEXTO DE PROMETHEUS
+# ----------------------------------------------------------------------
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        if math.isinf(valor):
+            return '+Inf' if valor > 0 else '-Inf'
+        return repr(valor)
+    return str(valor)
+
+
+def _ratios_cache(eventos):
+    """{(cache, nombre): (hit + stale) / total} a partir de los contadores de la caché."""
+    conteos = {}
+    for (cache, nombre, resultado), valor in eventos.items():
+        conteo = conteos.setdefault((cache, nombre), {'servidos': 0, 'total': 0})
+        conteo['total'] += valor
+        if resultado in ('hit', 'stale'):
+            conteo['servidos'] += valor
+    return {k: c['servidos'] / c['total'] for k, c in conteos.items() if c['total']}
+
+
+def exponer():
+    """Texto de /metrics (text/plain; version=0.0.4)."""
+    series = recolectar()
+    lineas = []
+    for nombre, metrica in _definiciones.items():
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        for valores, valor in sorted(series.get(nombre, {}).items()):
+            if metrica.tipo == 'counter':
+                lineas.append(f'{nombre}{_etiquetas(metrica.etiquetas, valores)} {_numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, conteo in zip(metrica.buckets + (math.inf,), valor[:-1]):
+                acumulado += conteo
+                le = f'le="{_numero(limite)}"'
+                lineas.append(f'{nombre}_bucket{_etiquetas(metrica.etiquetas, valores, le)} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(metrica.etiquetas, valores)} {_numero(float(valor[-1]))}')
+            lineas.append(f'{nombre}_count{_etiquetas(metrica.etiquetas, valores)} {acumulado}')
+
+    # Derivada de acceslab_cache_eventos_total, para consultarla sin PromQL
+    nombre = 'acceslab_cache_ratio_aciertos'
+    lineas.append(f'# HELP {nombre} Fracción de accesos servidos desde la caché (hit + stale) / total.')
+    lineas.append(f'# TYPE {nombre} gauge')
+    for (cache, reporte), ratio in sorted(_ratios_cache(series.get('acceslab_cache_eventos_total', {})).items()):
+        lineas.append(f'{nombre}{_etiquetas(("cache", "nombre"), (cache, reporte))} {_numero(round(ratio, 4))}')
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,149 @@
+# ==============================================================================
+# MONITOREO/MIDDLEWARE.PY - Instrumentación SQL y métricas por request
+# ==============================================================================
+# InstrumentacionSQLMiddleware: por cada request, número de consultas, tiempo
+# total en la BD, duplicadas y la consulta más lenta (ver monitoreo/sql.py).
+# Se emite como:
+# - Cabecera Server-Timing (visible en las DevTools del navegador):
+#     db;dur=12.3;desc="7 consultas", dup;desc="2 duplicadas", app;dur=40.1
+# - Una línea JSON en el logger "monitoreo.sql"
+# Si la vista supera su PRESUPUESTO_CONSULTAS se registra un warning, o se
+# lanza PresupuestoExcedido con PRESUPUESTO_CONSULTAS_ESTRICTO (pruebas/CI).
+#
+# MetricasMiddleware: latencia, tamaño de respuesta, tiempo y consultas de BD
+# y fallos de autenticación por vista, para /metrics (ver monitoreo/metricas.py).
+#
+# Ambos funcionan igual con vistas síncronas (WSGI) y async (ASGI).
+
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metricas
+from .sql import PresupuestoExcedido, medir, presupuesto
+
+logger = logging.getLogger('monitoreo.sql')
+
+
+def _nombre_vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return None
+    return coincidencia.view_name or coincidencia._func_path
+
+
+def _tamano_respuesta(response):
+    if not response.streaming:
+        return len(response.content)
+    # Streaming (imágenes, PDF): solo si la longitud se conoce de antemano
+    longitud = response.get('Content-Length')
+    return int(longitud) if longitud else None
+
+
+class InstrumentacionSQLMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_SQL', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        with medir() as registro:
+            response = self.get_response(request)
+        return self._reportar(request, response, registro, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        with medir() as registro:
+            response = await self.get_response(request)
+        return self._reportar(request, response, registro, time.perf_counter() - inicio)
+
+    def _reportar(self, request, response, registro, duracion):
+        resumen = registro.resumen()
+        total_ms = round(duracion * 1000, 2)
+
+        metricas = [f'db;dur={resumen["tiempo_bd_ms"]};desc="{resumen["consultas"]} consultas"']
+        if resumen['duplicadas']:
+            metricas.append(f'dup;desc="{resumen["duplicadas"]} duplicadas"')
+        metricas.append(f'app;dur={total_ms}')
+        response['Server-Timing'] = ', '.join(metricas)
+
+        vista = _nombre_vista(request)
+        maximo = presupuesto(vista)
+        excedido = maximo is not None and resumen['consultas'] > maximo
+
+        linea = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'vista': vista,
+            'estado': response.status_code,
+            'total_ms': total_ms,
+            **resumen,
+        }
+        if maximo is not None:
+            linea['presupuesto'] = maximo
+        logger.log(logging.WARNING if excedido else logging.INFO, json.dumps(linea, ensure_ascii=False))
+
+        if excedido and getattr(settings, 'PRESUPUESTO_CONSULTAS_ESTRICTO', False):
+            raise PresupuestoExcedido(
+                f'{vista} hizo {resumen["consultas"]} consultas (presupuesto {maximo}); '
+                f'más repetida: {resumen["repetida"]}'
+            )
+        return response
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICAS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        with medir() as registro:
+            response = self.get_response(request)
+        self._registrar(request, response, registro, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        with medir() as registro:
+            response = await self.get_response(request)
+        self._registrar(request, response, registro, time.perf_counter() - inicio)
+        return response
+
+    def _registrar(self, request, response, registro, duracion):
+        # Las rutas que no existen se agrupan: la URL no puede ser una etiqueta
+        vista = _nombre_vista(request) or 'sin_ruta'
+        estado = response.status_code
+
+        metricas.observar('acceslab_http_duracion_segundos', duracion, vista=vista, metodo=request.method, estado=estado)
+        tamano = _tamano_respuesta(response)
+        if tamano is not None:
+            metricas.observar('acceslab_http_respuesta_bytes', tamano, vista=vista, metodo=request.method)
+        metricas.observar('acceslab_bd_tiempo_segundos', registro.tiempo, vista=vista)
+        metricas.observar('acceslab_bd_consultas', registro.consultas, vista=vista)
+        if estado == 401:
+            metricas.incrementar('acceslab_auth_fallos_total', vista=vista, motivo='no_autenticado')
+        elif estado == 403:
+            metricas.incrementar('acceslab_auth_fallos_total', vista=vista, motivo='prohibido')
+
+        metricas.volcar_si_toca()
@@ -0,0 +1,71 @@
+# ==============================================================================
+# MONITOREO/POOL.PY - Estado de la conexión a la base de datos
+# ==============================================================================
+# Con DB_POOL activo (ver AccesLab/settings.py) el backend Oracle de Django
+# toma las sesiones de un pool de python-oracledb, uno por proceso: cada
+# request hace acquire() al conectarse y release() al cerrar la conexión.
+# Aquí se leen sus contadores y se hace un ping real para la readiness.
+
+import time
+
+from django.db import DEFAULT_DB_ALIAS, Error, connections
+
+
+# Atributos de oracledb.ConnectionPool que se exponen tal cual
+_ATRIBUTOS_POOL = (
+    'min', 'max', 'increment', 'opened', 'busy', 'ping_interval',
+    'stmtcachesize', 'timeout', 'wait_timeout', 'max_lifetime_session',
+)
+
+
+def _pool(conexion):
+    # .pool solo existe en el backend Oracle; None si no hay pool configurado
+    return getattr(conexion, 'pool', None) if conexion.vendor == 'oracle' else None
+
+
+def estado_pool(alias=DEFAULT_DB_ALIAS):
+    """
+    {'alias', 'motor', 'pool': bool, ...}. Con pool incluye sus contadores
+    (opened, busy, libres, uso, ...); sin él, CONN_MAX_AGE y CONN_HEALTH_CHECKS.
+    """
+    conexion = connections[alias]
+    estado = {'alias': alias, 'motor': conexion.vendor}
+    try:
+        # Crear el pool ya abre las sesiones mínimas: puede fallar si la BD no
+        # responde. El backend no envuelve create_pool(): wrap_database_errors
+        # convierte oracledb.Error en las excepciones de Django (db.Error)
+        with conexion.wrap_database_errors:
+            pool = _pool(conexion)
+    except Error as e:
+        return {**estado, 'pool': True, 'error': type(e).__name__}
+
+    if pool is None:
+        return {
+            **estado,
+            'pool': False,
+            'conn_max_age': conexion.settings_dict.get('CONN_MAX_AGE'),
+            'conn_health_checks': conexion.settings_dict.get('CONN_HEALTH_CHECKS'),
+        }
+
+    estado['pool'] = True
+    for atributo in _ATRIBUTOS_POOL:
+        estado[atributo] = getattr(pool, atributo, None)
+    estado['libres'] = max(estado['opened'] - estado['busy'], 0)
+    estado['uso'] = round(estado['busy'] / estado['max'], 4) if estado['max'] else None
+    estado['saturado'] = estado['busy'] >= estado['max']
+    return estado
+
+
+def verificar_conexion(alias=DEFAULT_DB_ALIAS):
+    """Ping a la base de datos: {'ok', 'latencia_ms'} o {'ok': False, 'error'}."""
+    conexion = connections[alias]
+    consulta = 'SELECT 1 FROM DUAL' if conexion.vendor == 'oracle' else 'SELECT 1'
+    inicio = time.perf_counter()
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(consulta)
+            cursor.fetchone()
+    except Error as e:
+        # Solo el tipo: el mensaje puede incluir host o usuario
+        return {'ok': False, 'error': type(e).__name__}
+    return {'ok': True, 'latencia_ms': round((time.perf_counter() - inicio) * 1000, 2)}
@@ -0,0 +1,32 @@
+# ==============================================================================
+# MONITOREO/PRUEBAS.PY - Runner de pruebas sobre SQLite
+# ==============================================================================
+# Los modelos son managed = False: las migraciones no crean sus tablas en la
+# base de pruebas. Este runner (TEST_RUNNER en settings.py) las materializa
+# tras crear la base, con el mismo código del benchmark
+# (monitoreo/benchmark/esquema.py). Requiere el perfil SQLite:
+#
+#   DB_ENGINE=sqlite python manage.py test
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+from maestros import catalogos
+
+from .benchmark.esquema import materializar
+
+
+def reiniciar_catalogos():
+    """Olvida la copia en proceso: la base y la caché de cada prueba se revierten al terminar."""
+    catalogos._tablas.clear()
+    catalogos._versiones.clear()
+    catalogos._paquete.clear()
+    catalogos._ultima_verificacion[0] = 0.0
+
+
+class RunnerEsquemaSQLite(DiscoverRunner):
+    def setup_databases(self, **kwargs):
+        configuracion = super().setup_databases(**kwargs)
+        for alias in connections:
+            materializar(alias)
+        return configuracion
@@ -0,0 +1,131 @@
+# ==============================================================================
+# MONITOREO/SQL.PY - Conteo y tiempo de las consultas SQL por request
+# ==============================================================================
+# - Cada conexión nueva recibe un execute_wrapper (señal connection_created)
+#   que anota la consulta en el RegistroSQL activo del contextvar; sin
+#   registro activo solo ejecuta
+# - El contextvar viaja con el request a los hilos que lo copian
+#   (AccesLab/asincrono.py, dashboard de reportes): las consultas hechas en
+#   paralelo también se cuentan
+# - Duplicadas: misma SQL con los mismos parámetros. Repetidas: misma SQL con
+#   distintos parámetros (el patrón N+1)
+# - Presupuesto: PRESUPUESTO_CONSULTAS = {'nombre-de-ruta': máximo, '*': máximo}
+
+import contextlib
+import contextvars
+import threading
+import time
+
+from django.conf import settings
+
+
+MAX_SQL_REPORTADA = 500
+
+_registro = contextvars.ContextVar('monitoreo_sql', default=None)
+
+
+class PresupuestoExcedido(AssertionError):
+    """Una vista (o bloque medido) hizo más consultas de las permitidas."""
+
+
+class RegistroSQL:
+    def __init__(self, padre=None):
+        self.padre = padre
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.mas_lenta = None
+        self._por_sql = {}
+        self._exactas = {}
+        self._lock = threading.Lock()
+
+    def anotar(self, sql, params, many, duracion):
+        # executemany: los parámetros no identifican la consulta
+        clave = None if many else (sql, repr(params))
+        with self._lock:
+            self.consultas += 1
+            self.tiempo += duracion
+            self._por_sql[sql] = self._por_sql.get(sql, 0) + 1
+            if clave is not None:
+                self._exactas[clave] = self._exactas.get(clave, 0) + 1
+            if self.mas_lenta is None or duracion > self.mas_lenta[1]:
+                self.mas_lenta = (sql, duracion)
+        if self.padre is not None:
+            self.padre.anotar(sql, params, many, duracion)
+
+    @property
+    def tiempo_ms(self):
+        return round(self.tiempo * 1000, 2)
+
+    @property
+    def duplicadas(self):
+        """Ejecuciones sobrantes de consultas idénticas (SQL y parámetros)."""
+        return sum(n - 1 for n in self._exactas.values() if n > 1)
+
+    def repetida(self):
+        """(sql, veces) de la SQL más repetida, o None si ninguna se repite."""
+        if not self._por_sql:
+            return None
+        sql, veces = max(self._por_sql.items(), key=lambda item: item[1])
+        return (sql, veces) if veces > 1 else None
+
+    def resumen(self):
+        repetida = self.repetida()
+        return {
+            'consultas': self.consultas,
+            'tiempo_bd_ms': self.tiempo_ms,
+            'duplicadas': self.duplicadas,
+            'repetida': {'sql': repetida[0][:MAX_SQL_REPORTADA], 'veces': repetida[1]} if repetida else None,
+            'mas_lenta': {
+                'sql': self.mas_lenta[0][:MAX_SQL_REPORTADA],
+                'ms': round(self.mas_lenta[1] * 1000, 2),
+            } if self.mas_lenta else None,
+        }
+
+
+def _medir(execute, sql, params, many, context):
+    registro = _registro.get()
+    if registro is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        registro.anotar(sql, params, many, time.perf_counter() - inicio)
+
+
+def instalar(sender, connection, **kwargs):
+    """Receptor de connection_created: agrega el wrapper una vez por conexión."""
+    if _medir not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir)
+
+
+@contextlib.contextmanager
+def medir():
+    """Registra las consultas del bloque (y las de los hilos que copien el contexto)."""
+    registro = RegistroSQL(padre=_registro.get())
+    token = _registro.set(registro)
+    try:
+        yield registro
+    finally:
+        _registro.reset(token)
+
+
+# ----------------------------------------------------------------------
+# PRESUPUESTO DE CONSULTAS
+# ----------------------------------------------------------------------
+def presupuesto(nombre_vista):
+    """Máximo de consultas de la vista según PRESUPUESTO_CONSULTAS (None = sin límite)."""
+    limites = getattr(settings, 'PRESUPUESTO_CONSULTAS', {}) or {}
+    return limites.get(nombre_vista, limites.get('*'))
+
+
+@contextlib.contextmanager
+def limite_consultas(maximo, descripcion='El bloque'):
+    """Para pruebas: falla con PresupuestoExcedido si el bloque hace más de `maximo` consultas."""
+    with medir() as registro:
+        yield registro
+    if registro.consultas > maximo:
+        raise PresupuestoExcedido(
+            f'{descripcion} hizo {registro.consultas} consultas (máximo {maximo}); '
+            f'más repetida: {registro.repetida()}'
+        )
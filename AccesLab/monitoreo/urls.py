@@ -0,0 +1,12 @@
+# monitoreo/urls.py
+
+from django.urls import path
+from . import views
+
+app_name = 'monitoreo'
+
+urlpatterns = [
+    path('salud/', views.salud, name='salud'),
+    path('listo/', views.listo, name='listo'),
+    path('pool/', views.obtener_estado_pool, name='estado-pool'),
+]
@@ -0,0 +1,38 @@
+# ==============================================================================
+# MONITOREO/VERSIONES.PY - Contadores de versión en la caché compartida
+# ==============================================================================
+# Invalidación por versión: las claves derivadas incluyen el número actual y
+# una escritura lo incrementa, con lo que todas las anteriores quedan
+# obsoletas en todos los workers (requiere una caché compartida; ver CACHES en
+# settings.py).
+# - El contador no expira: incr() en DatabaseCache reemplaza el TTL por el
+#   TIMEOUT por defecto, así que se renueva con touch(timeout=None)
+# - Si la caché pierde el contador, se reinicia desde la hora actual en ms y no
+#   desde 1: las claves de la numeración anterior no vuelven a coincidir
+
+import time
+
+from django.core.cache import cache
+
+
+def _inicial():
+    return int(time.time() * 1000)
+
+
+def actual(clave):
+    """Versión vigente del contador `clave` (lo crea si no existe)."""
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, _inicial(), timeout=None)
+        version = cache.get(clave) or _inicial()
+    return version
+
+
+def incrementar(clave):
+    """Deja obsoletas las claves derivadas de la versión actual."""
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.add(clave, _inicial(), timeout=None)
+        return
+    cache.touch(clave, None)
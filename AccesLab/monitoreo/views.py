@@ -0,0 +1,92 @@
+# ==============================================================================
+# MONITOREO/VIEWS.PY - Sondas de liveness/readiness y estado del pool
+# ==============================================================================
+# - salud/: el proceso responde (no toca la base de datos)
+# - listo/: la base de datos responde; 503 si no, para que el balanceador
+#   deje de enviar tráfico a esta instancia. Sin autenticación: la usan
+#   las sondas del orquestador
+# - pool/: contadores del pool de sesiones (usuarios autenticados)
+# - /metrics: métricas en formato de texto de Prometheus (ver metricas.py).
+#   Vista de Django sin DRF: el scraper no negocia contenido. Solo responde
+#   a "Authorization: Bearer <METRICAS_TOKEN>" o a clientes de METRICAS_IPS
+#   (por defecto solo localhost); al resto, 403
+
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+
+from usuarios.permissions import IsAdminUser
+
+from . import metricas
+from .pool import estado_pool, verificar_conexion
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def salud(request):
+    """Liveness: el proceso está vivo."""
+    return Response({'estado': 'ok'})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def listo(request):
+    """
+    Readiness: ping a la base de datos y estado del pool.
+    200 {'estado': 'listo', ...} o 503 {'estado': 'no_listo', ...}.
+    """
+    # El estado se lee antes del ping: así 'busy' no cuenta la sesión de esta sonda
+    pool = estado_pool()
+    base_de_datos = verificar_conexion()
+    listo = base_de_datos['ok'] and 'error' not in pool
+    return Response(
+        {'estado': 'listo' if listo else 'no_listo', 'base_de_datos': base_de_datos, 'pool': pool},
+        status=status.HTTP_200_OK if listo else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def obtener_estado_pool(request):
+    """Contadores del pool de sesiones de este proceso (o la configuración sin pool)."""
+    return Response(estado_pool())
+
+
+METRICAS_IPS_POR_DEFECTO = ('127.0.0.1', '::1')
+
+
+def _metricas_permitidas(request):
+    """Token válido o REMOTE_ADDR dentro de alguna red de METRICAS_IPS."""
+    token = getattr(settings, 'METRICAS_TOKEN', None)
+    if token:
+        recibido = request.headers.get('Authorization', '')
+        if hmac.compare_digest(recibido.encode(), f'Bearer {token}'.encode()):
+            return True
+    try:
+        cliente = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    for red in getattr(settings, 'METRICAS_IPS', METRICAS_IPS_POR_DEFECTO):
+        try:
+            if cliente in ipaddress.ip_network(red, strict=False):
+                return True
+        except ValueError:
+            continue  # Entrada mal escrita en la configuración
+    return False
+
+
+@require_GET
+def exponer_metricas(request):
+    """Métricas de todos los procesos en formato de texto de Prometheus."""
+    if not _metricas_permitidas(request):
+        return HttpResponse('Prohibido\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
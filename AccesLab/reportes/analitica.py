@@ -0,0 +1,642 @@
+# ==============================================================================
+# REPORTES/ANALITICA.PY - Snapshot columnar y motor de reportes vectorizado
+# ==============================================================================
+# El snapshot es un directorio con una columna NumPy (.npy) por campo:
+#
+#   <version>/meta.json                 versión, fecha y marca de agua (Solicitud_Id)
+#   <version>/catalogos.json            nombres de estados, tipos, labs, programas...
+#   <version>/solicitudes/*.npy         una fila por solicitud
+#   <version>/solicitudes_objetos/*.npy una fila por objeto solicitado
+#   <version>/usuarios_programas/*.npy  una fila por (usuario, programa)
+#
+# Cada exportación escribe una versión completa en <ruta>/versiones/ y la
+# publica cambiando el enlace simbólico <ruta>/actual con un solo os.replace:
+# un lector ve la versión anterior o la nueva, nunca una mezcla. Se conservan
+# las dos últimas versiones (los lectores con mmap abierto siguen leyendo la
+# suya aunque se borre).
+#
+# Los textos se guardan como IDs de catálogo y las fechas como días desde
+# 1970-01-01 (int32), así las columnas son compactas y se cargan con
+# mmap_mode='r' sin copiar a memoria. El motor responde las métricas de
+# reportes y agrupaciones arbitrarias con operaciones de NumPy.
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from maestros.models import (
+    Estados, Tipo_Servicio, Laboratorios, Programas, Facultades, Categorias, Objetos
+)
+from usuarios.models import Usuarios_Programas
+from reservas.models import Solicitudes, Solicitudes_Objetos
+
+
+VERSION_FORMATO = 1
+
+# Valor para fechas/IDs nulos en columnas enteras
+NULO = np.iinfo(np.int32).min
+
+_EPOCA = date(1970, 1, 1).toordinal()
+
+TAMANO_LOTE = 50_000
+
+ENLACE_ACTUAL = 'actual'
+DIRECTORIO_VERSIONES = 'versiones'
+VERSIONES_CONSERVADAS = 2
+
+COLUMNAS = {
+    'solicitudes': {
+        'solicitud_id': np.int64,
+        'fecha_solicitud': np.int32,
+        'fecha_inicio': np.int32,
+        'fecha_fin': np.int32,
+        'usuario_id': np.int64,
+        'tipo_servicio_id': np.int32,
+        'estado_id': np.int32,
+        'laboratorio_id': np.int32,
+        'n_asistentes': np.int32,
+    },
+    'solicitudes_objetos': {
+        'solicitud_id': np.int64,
+        'objetos_id': np.int32,
+        'cantidad': np.int32,
+    },
+    'usuarios_programas': {
+        'usuario_id': np.int64,
+        'programa_id': np.int32,
+    },
+}
+
+
+def ruta_por_defecto():
+    return getattr(settings, 'REPORTES_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'analitica'))
+
+
+def a_dia(fecha):
+    """date -> días desde 1970-01-01 (NULO si no hay fecha)."""
+    if fecha is None:
+        return NULO
+    return fecha.toordinal() - _EPOCA
+
+
+def de_dia(dia):
+    return date.fromordinal(int(dia) + _EPOCA)
+
+
+def _entero(valor):
+    return NULO if valor is None else int(valor)
+
+
+# ==============================================================================
+# EXPORTACIÓN
+# ==============================================================================
+def _leer_lotes(queryset, campos, conversores, tipos):
+    """
+    Recorre un values_list en lotes y arma una columna NumPy por campo,
+    sin materializar todas las filas como objetos de Python a la vez.
+    """
+    lotes = {nombre: [] for nombre in tipos}
+    filas = []
+
+    def volcar():
+        if not filas:
+            return
+        for indice, (nombre, tipo) in enumerate(tipos.items()):
+            conversor = conversores[indice]
+            lotes[nombre].append(np.fromiter((conversor(f[indice]) for f in filas), dtype=tipo, count=len(filas)))
+        filas.clear()
+
+    for fila in queryset.values_list(*campos).iterator(chunk_size=TAMANO_LOTE):
+        filas.append(fila)
+        if len(filas) >= TAMANO_LOTE:
+            volcar()
+    volcar()
+
+    return {
+        nombre: np.concatenate(partes) if partes else np.empty(0, dtype=tipos[nombre])
+        for nombre, partes in lotes.items()
+    }
+
+
+def _exportar_catalogos():
+    return {
+        'estados': dict(Estados.objects.values_list('Estado_Id', 'Nombre_Estado')),
+        'tipos_servicio': dict(Tipo_Servicio.objects.values_list('Tipo_Servicio_Id', 'Nombre_Tipo_Servicio')),
+        'laboratorios': dict(Laboratorios.objects.values_list('Laboratorio_Id', 'Nombre_Laboratorio')),
+        'facultades': dict(Facultades.objects.values_list('Facultad_Id', 'Nombre_Facultad')),
+        'categorias': dict(Categorias.objects.values_list('Categoria_Id', 'Nombre_Categoria')),
+        'programas': {
+            p_id: {'nombre': nombre, 'facultad_id': facultad_id}
+            for p_id, nombre, facultad_id in Programas.objects.values_list(
+                'Programa_Id', 'Nombre_Programa', 'Facultad_Id'
+            )
+        },
+        'objetos': {
+            o_id: {'nombre': nombre, 'categoria_id': categoria_id, 'stock': stock or 0, 'activo': bool(activo)}
+            for o_id, nombre, categoria_id, stock, activo in Objetos.objects.values_list(
+                'Objetos_Id', 'Nombre_Objetos', 'Categoria_Id', 'Cant_Stock', 'Activo'
+            )
+        },
+    }
+
+
+def _guardar_columna(directorio, nombre, arreglo):
+    np.save(os.path.join(directorio, f'{nombre}.npy'), arreglo)
+
+
+def _cargar_tabla(ruta, tabla, mmap=True):
+    directorio = os.path.join(ruta, tabla)
+    return {
+        nombre: np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r' if mmap else None)
+        for nombre in COLUMNAS[tabla]
+    }
+
+
+def directorio_actual(ruta):
+    """
+    Directorio de la versión publicada en `ruta` (enlace resuelto), `ruta`
+    misma si tiene el formato anterior sin versiones, o None si no hay snapshot.
+    """
+    enlace = os.path.join(ruta, ENLACE_ACTUAL)
+    if os.path.isdir(enlace):
+        return os.path.realpath(enlace)
+    if os.path.exists(os.path.join(ruta, 'meta.json')):
+        return ruta
+    return None
+
+
+def _publicar(ruta, version):
+    """Apunta <ruta>/actual a `version` (reemplazo atómico) y borra las versiones viejas."""
+    temporal = os.path.join(ruta, f'.{ENLACE_ACTUAL}.tmp')
+    if os.path.lexists(temporal):
+        os.remove(temporal)
+    os.symlink(os.path.relpath(version, ruta), temporal)
+    os.replace(temporal, os.path.join(ruta, ENLACE_ACTUAL))
+
+    versiones = os.path.join(ruta, DIRECTORIO_VERSIONES)
+    # Los nombres empiezan con la fecha de generación: el orden es cronológico
+    for nombre in sorted(os.listdir(versiones))[:-VERSIONES_CONSERVADAS]:
+        if nombre == os.path.basename(version):
+            continue
+        shutil.rmtree(os.path.join(versiones, nombre), ignore_errors=True)
+
+
+def _leer_meta(ruta):
+    try:
+        with open(os.path.join(ruta, 'meta.json'), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return None
+
+
+def exportar_snapshot(ruta=None, completo=False):
+    """
+    Escribe (o actualiza) el snapshot en `ruta`.
+
+    Incremental (por defecto): solo se agregan las solicitudes con
+    Solicitud_Id mayor que la marca de agua anterior, y sus objetos.
+    Los catálogos y Usuarios_Programas se reescriben siempre (son pequeños).
+    Los cambios de estado de solicitudes ya exportadas solo se reflejan con
+    `completo=True`.
+
+    Retorna el contenido de meta.json.
+    """
+    ruta = ruta or ruta_por_defecto()
+    anterior = None if completo else directorio_actual(ruta)
+    meta = _leer_meta(anterior) if anterior else None
+    if meta and meta.get('version_formato') != VERSION_FORMATO:
+        meta = None
+    marca_agua = meta['marca_agua'] if meta else 0
+
+    nuevas = _leer_lotes(
+        Solicitudes.objects.filter(Solicitud_Id__gt=marca_agua).order_by('Solicitud_Id'),
+        ('Solicitud_Id', 'Fecha_solicitud', 'Fecha_Inicio', 'Fecha_Fin', 'Usuario_Id',
+         'Tipo_Servicio_Id', 'Estado_Id', 'Laboratorio_Id', 'N_asistentes'),
+        (int, a_dia, a_dia, a_dia, int, _entero, _entero, _entero, _entero),
+        COLUMNAS['solicitudes'],
+    )
+    nuevos_objetos = _leer_lotes(
+        Solicitudes_Objetos.objects.filter(Solicitud_Id__gt=marca_agua).order_by('Solicitud_Id'),
+        ('Solicitud_Id', 'Objetos_Id', 'Cantidad_Objetos'),
+        (int, int, _entero),
+        COLUMNAS['solicitudes_objetos'],
+    )
+    programas = _leer_lotes(
+        Usuarios_Programas.objects.order_by('Usuario_Id', 'Programa_Id'),
+        ('Usuario_Id', 'Programa_Id'),
+        (int, int),
+        COLUMNAS['usuarios_programas'],
+    )
+
+    ahora = timezone.now()
+    versiones = os.path.join(ruta, DIRECTORIO_VERSIONES)
+    os.makedirs(versiones, exist_ok=True)
+    version = tempfile.mkdtemp(prefix=f'{ahora:%Y%m%dT%H%M%S%f}-', dir=versiones)
+    try:
+        for tabla, columnas in (('solicitudes', nuevas), ('solicitudes_objetos', nuevos_objetos)):
+            directorio = os.path.join(version, tabla)
+            os.makedirs(directorio)
+            anteriores = _cargar_tabla(anterior, tabla) if meta else None
+            for nombre, arreglo in columnas.items():
+                if anteriores is not None:
+                    arreglo = np.concatenate([anteriores[nombre], arreglo])
+                _guardar_columna(directorio, nombre, arreglo)
+
+        directorio = os.path.join(version, 'usuarios_programas')
+        os.makedirs(directorio)
+        for nombre, arreglo in programas.items():
+            _guardar_columna(directorio, nombre, arreglo)
+
+        with open(os.path.join(version, 'catalogos.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(_exportar_catalogos(), archivo, ensure_ascii=False)
+
+        ids = nuevas['solicitud_id']
+        total = (meta['filas'] if meta else 0) + len(ids)
+        meta = {
+            'version_formato': VERSION_FORMATO,
+            'generado': ahora.isoformat(),
+            'marca_agua': int(ids.max()) if len(ids) else marca_agua,
+            'filas': total,
+            'agregadas': len(ids),
+        }
+        with open(os.path.join(version, 'meta.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(meta, archivo)
+    except BaseException:
+        shutil.rmtree(version, ignore_errors=True)
+        raise
+
+    _publicar(ruta, version)
+    return meta
+
+
+# ==============================================================================
+# MOTOR DE REPORTES
+# ==============================================================================
+class SnapshotNoDisponible(Exception):
+    pass
+
+
+# Por debajo de este tamaño de espacio de claves se agrupa con bincount (sin ordenar)
+LIMITE_DENSO = 4_000_000
+
+
+def _factorizar(columna):
+    """
+    Retorna (valores_unicos, codigos) para una columna entera.
+    Si el rango de valores es pequeño (IDs de catálogo, meses) los códigos
+    se obtienen restando el mínimo, sin ordenar; NULO recibe el código 0.
+    """
+    columna = np.asarray(columna)
+    if not len(columna):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    nulos = columna == NULO
+    hay_nulos = bool(nulos.any())
+    presentes = columna[~nulos] if hay_nulos else columna
+    if len(presentes):
+        minimo, maximo = int(presentes.min()), int(presentes.max())
+        if maximo - minimo < LIMITE_DENSO:
+            codigos = columna.astype(np.int64) - minimo
+            valores = np.arange(minimo, maximo + 1, dtype=np.int64)
+            if hay_nulos:
+                codigos = np.where(nulos, 0, codigos + 1)
+                valores = np.r_[NULO, valores]
+            return valores, codigos
+    return np.unique(columna, return_inverse=True)
+
+
+def _agrupar_codigos(clave, espacio, pesos=None):
+    """Retorna (grupos, totales) para claves enteras en [0, espacio)."""
+    if espacio <= LIMITE_DENSO:
+        presencia = np.bincount(clave, minlength=espacio)
+        grupos = np.flatnonzero(presencia)
+        totales = presencia if pesos is None else np.bincount(clave, weights=pesos, minlength=espacio)
+        return grupos, totales[grupos]
+    grupos, inverso = np.unique(clave, return_inverse=True)
+    return grupos, np.bincount(inverso, weights=pesos)
+
+
+class MotorAnalitico:
+    """
+    Motor vectorizado sobre un snapshot. Las columnas se abren con mmap,
+    así que crear el motor es barato y varios procesos comparten las páginas.
+    """
+
+    # Dimensiones disponibles para agrupar
+    DIMENSIONES = (
+        'laboratorio', 'programa', 'facultad', 'tipo_servicio', 'estado',
+        'mes', 'anio', 'objeto', 'categoria',
+    )
+    # Dimensiones que exigen trabajar a nivel de objeto solicitado
+    DIMENSIONES_OBJETO = ('objeto', 'categoria')
+
+    def __init__(self, ruta=None):
+        ruta = ruta or ruta_por_defecto()
+        # La versión se resuelve una vez: todas las columnas salen del mismo directorio
+        self.ruta = directorio_actual(ruta)
+        self.meta = _leer_meta(self.ruta) if self.ruta else None
+        if not self.meta:
+            raise SnapshotNoDisponible(
+                f'No existe un snapshot en {ruta}. Ejecute "manage.py exportar_snapshot".'
+            )
+        with open(os.path.join(self.ruta, 'catalogos.json'), encoding='utf-8') as archivo:
+            # JSON convierte las claves a texto; se restauran como enteros
+            self.catalogos = {
+                nombre: {int(k): v for k, v in valores.items()}
+                for nombre, valores in json.load(archivo).items()
+            }
+        self.solicitudes = _cargar_tabla(self.ruta, 'solicitudes')
+        self.objetos = _cargar_tabla(self.ruta, 'solicitudes_objetos')
+        self._programa_principal = self._calcular_programa_principal()
+        self._indice_objetos = None
+
+    # ------------------------------------------------------------------
+    # Preparación
+    # ------------------------------------------------------------------
+    def _calcular_programa_principal(self):
+        """usuario_id -> programa principal (el de menor ID), como arreglos ordenados."""
+        programas = _cargar_tabla(self.ruta, 'usuarios_programas', mmap=False)
+        usuarios = programas['usuario_id']
+        if not len(usuarios):
+            return usuarios, programas['programa_id']
+        orden = np.lexsort((programas['programa_id'], usuarios))
+        usuarios = usuarios[orden]
+        primeros = np.r_[True, usuarios[1:] != usuarios[:-1]]
+        return usuarios[primeros], programas['programa_id'][orden][primeros]
+
+    def _buscar(self, claves_ordenadas, valores, consultas):
+        """Búsqueda vectorizada: valores[claves == consulta] o NULO si no existe."""
+        if not len(claves_ordenadas):
+            return np.full(len(consultas), NULO, dtype=np.int64)
+        minimo, maximo = int(claves_ordenadas[0]), int(claves_ordenadas[-1])
+        if maximo - minimo < LIMITE_DENSO:
+            # Tabla directa indexada por clave: evita la búsqueda binaria
+            tabla = np.full(maximo - minimo + 1, NULO, dtype=np.int64)
+            tabla[claves_ordenadas - minimo] = valores
+            dentro = (consultas >= minimo) & (consultas <= maximo)
+            return np.where(dentro, tabla[np.clip(consultas - minimo, 0, maximo - minimo)], NULO)
+        posicion = np.searchsorted(claves_ordenadas, consultas)
+        posicion = np.clip(posicion, 0, len(claves_ordenadas) - 1)
+        encontrado = claves_ordenadas[posicion] == consultas
+        return np.where(encontrado, valores[posicion], NULO)
+
+    def _fila_de_objeto(self):
+        """Índice de la solicitud padre de cada objeto solicitado (las solicitudes están ordenadas por ID)."""
+        if self._indice_objetos is None:
+            ids = self.solicitudes['solicitud_id']
+            posicion = np.clip(np.searchsorted(ids, self.objetos['solicitud_id']), 0, max(len(ids) - 1, 0))
+            valido = ids[posicion] == self.objetos['solicitud_id'] if len(ids) else np.zeros(0, bool)
+            self._indice_objetos = (posicion, valido)
+        return self._indice_objetos
+
+    # ------------------------------------------------------------------
+    # Columnas derivadas
+    # ------------------------------------------------------------------
+    def _columna_solicitud(self, dimension, filas=None):
+        s = self.solicitudes
+        tomar = (lambda c: s[c]) if filas is None else (lambda c: s[c][filas])
+
+        if dimension == 'laboratorio':
+            return tomar('laboratorio_id')
+        if dimension == 'tipo_servicio':
+            return tomar('tipo_servicio_id')
+        if dimension == 'estado':
+            return tomar('estado_id')
+        if dimension in ('mes', 'anio'):
+            fechas = tomar('fecha_solicitud').astype('datetime64[D]')
+            if dimension == 'anio':
+                return fechas.astype('datetime64[Y]').astype(np.int64) + 1970
+            meses = fechas.astype('datetime64[M]').astype(np.int64)
+            return (meses // 12 + 1970) * 100 + meses % 12 + 1  # AAAAMM
+        if dimension in ('programa', 'facultad'):
+            usuarios, programas = self._programa_principal
+            programa = self._buscar(usuarios, programas, tomar('usuario_id'))
+            if dimension == 'programa':
+                return programa
+            valores, codigos = _factorizar(programa)
+            facultades = np.array([
+                self.catalogos['programas'].get(int(p), {}).get('facultad_id') or NULO
+                for p in valores
+            ], dtype=np.int64)
+            return facultades[codigos] if len(codigos) else codigos
+        raise ValueError(f'Dimensión no soportada: {dimension}')
+
+    def _columna_objeto(self, dimension):
+        if dimension == 'objeto':
+            return self.objetos['objetos_id']
+        if dimension == 'categoria':
+            ids = np.array(sorted(self.catalogos['objetos']), dtype=np.int64)
+            categorias = np.array(
+                [self.catalogos['objetos'][i]['categoria_id'] for i in ids], dtype=np.int64
+            )
+            return self._buscar(ids, categorias, self.objetos['objetos_id'])
+        filas, _ = self._fila_de_objeto()
+        return self._columna_solicitud(dimension, filas)
+
+    def _etiqueta(self, dimension, valor):
+        valor = int(valor)
+        if valor == NULO:
+            return None
+        catalogo = {
+            'laboratorio': 'laboratorios', 'tipo_servicio': 'tipos_servicio', 'estado': 'estados',
+            'facultad': 'facultades', 'categoria': 'categorias',
+        }.get(dimension)
+        if catalogo:
+            return self.catalogos[catalogo].get(valor)
+        if dimension == 'programa':
+            return self.catalogos['programas'].get(valor, {}).get('nombre')
+        if dimension == 'objeto':
+            return self.catalogos['objetos'].get(valor, {}).get('nombre')
+        if dimension == 'mes':
+            return f'{valor // 100}-{valor % 100:02d}'
+        return valor
+
+    def _asistentes(self, filas):
+        """N_asistentes (float) de las solicitudes indicadas; NULO cuenta como 0."""
+        asistentes = self.solicitudes['n_asistentes'][filas]
+        return np.where(asistentes == NULO, 0, asistentes).astype(np.float64)
+
+    # ------------------------------------------------------------------
+    # Filtros
+    # ------------------------------------------------------------------
+    def mascara(self, fecha_desde=None, fecha_hasta=None, **iguales):
+        """
+        Máscara booleana sobre solicitudes. `iguales` acepta
+        estado, tipo_servicio, laboratorio (valor o lista de valores).
+        """
+        s = self.solicitudes
+        mascara = np.ones(len(s['solicitud_id']), dtype=bool)
+        if fecha_desde:
+            mascara &= s['fecha_solicitud'] >= a_dia(fecha_desde)
+        if fecha_hasta:
+            mascara &= s['fecha_solicitud'] <= a_dia(fecha_hasta)
+        for dimension, valor in iguales.items():
+            if valor in (None, '', []):
+                continue
+            valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+            mascara &= np.isin(self._columna_solicitud(dimension), [int(v) for v in valores])
+        return mascara
+
+    # ------------------------------------------------------------------
+    # Agrupación genérica
+    # ------------------------------------------------------------------
+    def agrupar(self, dimensiones, medida='solicitudes', fecha_desde=None, fecha_hasta=None,
+                limite=None, **filtros):
+        """
+        Agrupa por una o más dimensiones.
+        medida: 'solicitudes' (conteo), 'unidades' (suma de Cantidad_Objetos)
+                o 'asistentes' (suma de N_asistentes).
+        """
+        dimensiones = list(dimensiones)
+        for dimension in dimensiones:
+            if dimension not in self.DIMENSIONES:
+                raise ValueError(f'Dimensión no soportada: {dimension}')
+
+        mascara = self.mascara(fecha_desde, fecha_hasta, **filtros)
+        por_objeto = medida == 'unidades' or any(d in self.DIMENSIONES_OBJETO for d in dimensiones)
+
+        if por_objeto:
+            filas, valido = self._fila_de_objeto()
+            seleccion = valido & mascara[filas]
+            columnas = [self._columna_objeto(d)[seleccion] for d in dimensiones]
+            filas_seleccionadas = filas[seleccion]
+            pesos = self.objetos['cantidad'][seleccion].astype(np.float64) if medida == 'unidades' else None
+        else:
+            columnas = [self._columna_solicitud(d)[mascara] for d in dimensiones]
+            pesos = self._asistentes(mascara) if medida == 'asistentes' else None
+
+        if not columnas or not len(columnas[0]):
+            return []
+
+        # Codificación mixta: cada combinación de dimensiones -> un entero
+        unicos, codigos = zip(*(_factorizar(c) for c in columnas))
+        clave = np.zeros(len(columnas[0]), dtype=np.int64)
+        espacio = 1
+        for u, c in zip(unicos, codigos):
+            clave = clave * len(u) + c
+            espacio *= len(u)
+
+        if por_objeto and medida != 'unidades':
+            # Cada solicitud cuenta una vez por grupo aunque tenga varios objetos
+            # (y sus asistentes también). Los objetos vienen ordenados por
+            # solicitud, así que las claves (solicitud, grupo) están casi
+            # ordenadas y el sort estable es casi lineal.
+            pares = np.sort(filas_seleccionadas.astype(np.int64) * espacio + clave, kind='stable')
+            pares = pares[np.r_[True, pares[1:] != pares[:-1]]]
+            pesos = self._asistentes(pares // espacio) if medida == 'asistentes' else None
+            grupos, totales = _agrupar_codigos(pares % espacio, espacio, pesos)
+        else:
+            grupos, totales = _agrupar_codigos(clave, espacio, pesos)
+
+        orden = np.argsort(-totales, kind='stable')
+        if limite:
+            orden = orden[:limite]
+
+        resultado = []
+        for i in orden:
+            codigo = int(grupos[i])
+            valores = []
+            for u in reversed(unicos):
+                valores.append(u[codigo % len(u)])
+                codigo //= len(u)
+            valores.reverse()
+            fila = {}
+            for dimension, valor in zip(dimensiones, valores):
+                fila[f'{dimension}_id'] = None if int(valor) == NULO else int(valor)
+                fila[dimension] = self._etiqueta(dimension, valor)
+            total = totales[i]
+            fila[medida] = int(total) if float(total).is_integer() else round(float(total), 2)
+            resultado.append(fila)
+        return resultado
+
+    # ------------------------------------------------------------------
+    # Métricas equivalentes a los reportes existentes
+    # ------------------------------------------------------------------
+    def kpis(self, hoy=None):
+        hoy = hoy or timezone.localdate()
+        s = self.solicitudes
+        dia = a_dia(hoy)
+        fechas = s['fecha_solicitud']
+
+        activos = np.unique(s['usuario_id'][fechas >= dia - 30])
+        anteriores = np.unique(s['usuario_id'][(fechas >= dia - 60) & (fechas < dia - 30)])
+        return {
+            'usuarios_activos': int(len(activos)),
+            'usuarios_mes_anterior': int(len(anteriores)),
+            'prestamos_activos': int(np.count_nonzero(s['estado_id'] == 2)),
+            'reservas_semana': int(np.count_nonzero((fechas >= dia - hoy.weekday()) & (fechas <= dia))),
+            'equipos_fuera_servicio': sum(1 for o in self.catalogos['objetos'].values() if not o['activo']),
+        }
+
+    def actividad_mensual(self, meses=6, hoy=None):
+        hoy = hoy or timezone.localdate()
+        indice_actual = hoy.year * 12 + hoy.month - 1
+        indices = range(indice_actual - meses + 1, indice_actual + 1)
+        desde = date(indices[0] // 12, indices[0] % 12 + 1, 1)
+
+        filas = self.agrupar(['mes', 'tipo_servicio'], fecha_desde=desde)
+        conteo = {}
+        for fila in filas:
+            conteo.setdefault(fila['mes_id'], {})[fila['tipo_servicio_id']] = fila['solicitudes']
+
+        tipos = self.catalogos['tipos_servicio']
+        resultado = []
+        for indice in indices:
+            anio, mes = indice // 12, indice % 12 + 1
+            del_mes = conteo.get(anio * 100 + mes, {})
+            resultado.append({
+                'anio': anio,
+                'mes_num': mes,
+                'series': {nombre: del_mes.get(tipo_id, 0) for tipo_id, nombre in sorted(tipos.items())},
+                'total': sum(del_mes.values()),
+            })
+        return resultado
+
+    def distribucion_programas(self, fecha_desde=None, fecha_hasta=None):
+        filas = [
+            f for f in self.agrupar(['programa'], fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+            if f['programa_id'] is not None
+        ]
+        total = sum(f['solicitudes'] for f in filas)
+        return [
+            {
+                'programa': f['programa'],
+                'programa_id': f['programa_id'],
+                'cantidad': f['solicitudes'],
+                'porcentaje': round(f['solicitudes'] / total * 100, 1) if total else 0,
+            }
+            for f in filas
+        ]
+
+    def equipos_mas_usados(self, limite=10, fecha_desde=None, fecha_hasta=None):
+        return [
+            {'equipo': f['objeto'], 'objeto_id': f['objeto_id'], 'unidades': f['unidades']}
+            for f in self.agrupar(
+                ['objeto'], medida='unidades', fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, limite=limite
+            )
+        ]
+
+
+# ----------------------------------------------------------------------
+# Instancia compartida por proceso (se recarga si cambia el snapshot)
+# ----------------------------------------------------------------------
+_motor = None
+_motor_candado = threading.Lock()
+
+
+def obtener_motor():
+    global _motor
+    ruta = ruta_por_defecto()
+    version = directorio_actual(ruta)
+    meta = _leer_meta(version) if version else None
+    with _motor_candado:
+        if _motor is None or _motor.ruta != version or _motor.meta != meta:
+            _motor = MotorAnalitico(ruta)
+        return _motor
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reportes'
+
+    def ready(self):
+        # Conecta la invalidación de caché a las escrituras de solicitudes
+        from . import signals  # noqa: F401
@@ -0,0 +1,261 @@
+# ==============================================================================
+# REPORTES/CACHE.PY - Caché de resultados de reportes
+# ==============================================================================
+# - Clave = nombre del reporte + generación + parámetros normalizados
+# - TTL por reporte (configurable con settings.REPORTES_CACHE_TTL)
+# - Single-flight: si varias peticiones fallan la caché a la vez, solo una calcula
+# - Stale-while-revalidate: un resultado vencido se sigue sirviendo durante
+#   REPORTES_CACHE_STALE segundos mientras se recalcula en segundo plano
+# - Invalidación: las escrituras de solicitudes incrementan la generación
+#   (ver reportes/signals.py), lo que deja obsoletas todas las claves anteriores
+# - Requiere una caché compartida entre workers (CACHE_BACKEND db o redis; ver
+#   settings.py): la generación, los resultados y el candado de single-flight
+#   viven en ella. Con LocMem cada proceso invalida y bloquea solo lo suyo
+# - Contadores de hit/miss/stale por reporte en monitoreo/metricas.py (memoria
+#   del proceso, sin escrituras a la caché compartida en cada acierto); se
+#   exportan en /metrics junto con la duración de cada cálculo
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from monitoreo import metricas, versiones
+
+logger = logging.getLogger(__name__)
+
+
+# TTL (segundos) por reporte. Se pueden sobrescribir desde settings.REPORTES_CACHE_TTL
+TTL_POR_DEFECTO = {
+    'kpis': 60,
+    'actividad_mensual': 300,
+    'distribucion_programas': 300,
+    'equipos_mas_usados': 300,
+    'historial': 30,
+    'entregas_devoluciones': 60,
+    'utilizacion_equipos': 300,
+    'ocupacion_laboratorios': 300,
+}
+TTL_GENERICO = 60
+
+# Ventana (segundos) en la que un resultado vencido todavía puede servirse
+STALE_POR_DEFECTO = 300
+
+# Tiempo máximo que una petición espera a que otro proceso termine el cálculo
+ESPERA_MAXIMA = 10
+INTERVALO_ESPERA = 0.05
+
+CLAVE_GENERACION = 'reportes:generacion'
+
+# TTL de los periodos cerrados (meses, semanas) que se cachean fuera de la
+# generación: solo cambian si se edita una solicitud antigua, y las señales ya
+# los invalidan; el TTL es la red de seguridad para escrituras fuera del ORM
+TTL_CERRADOS_POR_DEFECTO = 7 * 24 * 3600
+
+# Candados por franjas: acotan la memoria sin importar cuántas claves existan
+_candados_locales = [threading.Lock() for _ in range(64)]
+
+# Nombres de los reportes decorados con @reporte_cacheado
+_registrados = set()
+
+
+def _ttl(nombre):
+    ttls = {**TTL_POR_DEFECTO, **getattr(settings, 'REPORTES_CACHE_TTL', {})}
+    return ttls.get(nombre, TTL_GENERICO)
+
+
+def ttl_cerrados():
+    return getattr(settings, 'REPORTES_CACHE_TTL_CERRADOS', TTL_CERRADOS_POR_DEFECTO)
+
+
+def _stale():
+    return getattr(settings, 'REPORTES_CACHE_STALE', STALE_POR_DEFECTO)
+
+
+def _candado_local(clave):
+    return _candados_locales[hash(clave) % len(_candados_locales)]
+
+
+# ----------------------------------------------------------------------
+# CLAVES
+# ----------------------------------------------------------------------
+def _normalizar_valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, str):
+        return valor.strip()
+    return valor
+
+
+def normalizar_parametros(**parametros):
+    """
+    Normaliza los parámetros para que peticiones equivalentes compartan clave:
+    se descartan los vacíos, se recortan cadenas, las fechas pasan a ISO y
+    las claves se ordenan.
+    """
+    return {
+        nombre: _normalizar_valor(valor)
+        for nombre, valor in sorted(parametros.items())
+        if valor not in (None, '')
+    }
+
+
+def generacion_actual():
+    return versiones.actual(CLAVE_GENERACION)
+
+
+def clave_reporte(nombre, parametros):
+    contenido = json.dumps(parametros, sort_keys=True, default=str)
+    resumen = hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+    return f'reportes:{nombre}:g{generacion_actual()}:{resumen}'
+
+
+# ----------------------------------------------------------------------
+# CONTADORES
+# ----------------------------------------------------------------------
+EVENTOS = ('hit', 'miss', 'stale')
+
+
+def _contar(nombre, evento):
+    metricas.incrementar('acceslab_cache_eventos_total', cache='reportes', nombre=nombre, resultado=evento)
+
+
+def estadisticas():
+    """
+    Retorna {reporte: {'hit', 'miss', 'stale', 'ratio'}} para todos los reportes
+    conocidos, desde los contadores de /metrics: suma todos los workers si
+    METRICAS_DIR está configurado; si no, solo el proceso que responde.
+    """
+    nombres = sorted(set(TTL_POR_DEFECTO) | set(_registrados))
+    valores = metricas.recolectar().get('acceslab_cache_eventos_total', {})
+
+    resultado = {}
+    for nombre in nombres:
+        conteo = {e: int(valores.get(('reportes', nombre, e), 0)) for e in EVENTOS}
+        total = sum(conteo.values())
+        servidos = conteo['hit'] + conteo['stale']
+        conteo['ratio'] = round(servidos / total, 3) if total else 0.0
+        resultado[nombre] = conteo
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# INVALIDACIÓN
+# ----------------------------------------------------------------------
+def invalidar_reportes():
+    """Deja obsoletos todos los resultados cacheados (se llama al escribir solicitudes)."""
+    versiones.incrementar(CLAVE_GENERACION)
+
+
+# ----------------------------------------------------------------------
+# CÁLCULO CON SINGLE-FLIGHT
+# ----------------------------------------------------------------------
+def _guardar(clave, nombre, valor):
+    ttl = _ttl(nombre)
+    sobre = {'valor': valor, 'expira': time.time() + ttl}
+    cache.set(clave, sobre, timeout=ttl + _stale())
+
+
+def _calcular_con_candado(clave, nombre, calcular):
+    """
+    Calcula el reporte asegurando que solo un proceso lo haga a la vez.
+    El candado entre procesos es una clave con cache.add (atómico en
+    Redis, Memcached y DatabaseCache, donde la clave es la llave primaria);
+    quien no lo obtiene espera el resultado.
+    """
+    clave_candado = f'{clave}:candado'
+    if cache.add(clave_candado, 1, timeout=ESPERA_MAXIMA):
+        try:
+            valor = calcular()
+            _guardar(clave, nombre, valor)
+            return valor
+        finally:
+            cache.delete(clave_candado)
+
+    limite = time.monotonic() + ESPERA_MAXIMA
+    while time.monotonic() < limite:
+        time.sleep(INTERVALO_ESPERA)
+        sobre = cache.get(clave)
+        if sobre is not None:
+            return sobre['valor']
+
+    logger.warning("Tiempo de espera agotado para %s; se calcula sin candado", clave)
+    valor = calcular()
+    _guardar(clave, nombre, valor)
+    return valor
+
+
+def _revalidar_en_segundo_plano(clave, nombre, calcular):
+    clave_candado = f'{clave}:candado'
+    if not cache.add(clave_candado, 1, timeout=ESPERA_MAXIMA):
+        return  # Otro proceso ya lo está recalculando
+
+    def tarea():
+        try:
+            _guardar(clave, nombre, calcular())
+        except Exception as e:
+            logger.error(f"Error revalidando reporte {nombre}: {e}")
+        finally:
+            cache.delete(clave_candado)
+            connections.close_all()
+
+    threading.Thread(target=tarea, name=f'revalidar-{nombre}', daemon=True).start()
+
+
+def _cronometrar(nombre, calcular):
+    """Envuelve el cálculo para registrar su duración en /metrics."""
+    def cronometrado():
+        inicio = time.perf_counter()
+        try:
+            return calcular()
+        finally:
+            metricas.observar('acceslab_reporte_duracion_segundos', time.perf_counter() - inicio, reporte=nombre)
+    return cronometrado
+
+
+def obtener_reporte(nombre, calcular, **parametros):
+    """Retorna el resultado cacheado de `calcular(**parametros)` o lo calcula."""
+    normalizados = normalizar_parametros(**parametros)
+    clave = clave_reporte(nombre, normalizados)
+    funcion = _cronometrar(nombre, functools.partial(calcular, **parametros))
+
+    sobre = cache.get(clave)
+    if sobre is not None:
+        if sobre['expira'] > time.time():
+            _contar(nombre, 'hit')
+            return sobre['valor']
+        _contar(nombre, 'stale')
+        _revalidar_en_segundo_plano(clave, nombre, funcion)
+        return sobre['valor']
+
+    _contar(nombre, 'miss')
+    with _candado_local(clave):
+        # Otro hilo de este proceso pudo haberlo calculado mientras esperábamos
+        sobre = cache.get(clave)
+        if sobre is not None:
+            return sobre['valor']
+        return _calcular_con_candado(clave, nombre, funcion)
+
+
+def reporte_cacheado(nombre):
+    """
+    Decorador para funciones de cálculo de reportes.
+    La función original queda disponible como `funcion.sin_cache`.
+    """
+    _registrados.add(nombre)
+
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(**parametros):
+            return obtener_reporte(nombre, funcion, **parametros)
+        envoltura.sin_cache = funcion
+        envoltura.nombre_reporte = nombre
+        return envoltura
+    return decorador
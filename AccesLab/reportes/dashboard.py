@@ -0,0 +1,184 @@
+# ==============================================================================
+# REPORTES/DASHBOARD.PY - Todas las secciones del dashboard en una respuesta
+# ==============================================================================
+# - Cada sección corre en un hilo de un pool pequeño y acotado, propio del
+#   dashboard: con todos los cupos ocupados (hilos + cola) el dashboard se
+#   rechaza (DashboardSaturado, 503) en vez de encolarse sin límite
+# - Cada hilo conserva su propia conexión a la base de datos (Django las asocia
+#   al hilo), así el pool de hilos funciona también como pool de conexiones
+# - Timeout por sección: lo que no termina a tiempo se reporta en 'errores'
+#   y el resto de secciones se retorna igual (resultado parcial). El mismo
+#   plazo se aplica a las consultas del hilo (call_timeout en Oracle, progress
+#   handler en SQLite), así una sección abandonada no sigue ocupando el hilo
+#   ni la sesión; una sección que sale de la cola ya vencida no se ejecuta
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from . import calculos
+
+logger = logging.getLogger(__name__)
+
+
+HILOS_POR_DEFECTO = 6
+# Secciones en espera además de las que corren: un dashboard completo
+COLA_POR_DEFECTO = 6
+TIMEOUT_POR_DEFECTO = 10
+
+_pool = None
+_cupos = None
+_pool_lock = threading.Lock()
+
+
+class DashboardSaturado(Exception):
+    """No hay cupos para las secciones de otro dashboard en este proceso."""
+
+
+def obtener_pool():
+    """Pool y semáforo de cupos del dashboard; se crean al primer uso."""
+    global _pool, _cupos
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                hilos = getattr(settings, 'REPORTES_DASHBOARD_HILOS', HILOS_POR_DEFECTO)
+                _cupos = threading.BoundedSemaphore(
+                    hilos + getattr(settings, 'REPORTES_DASHBOARD_COLA', COLA_POR_DEFECTO)
+                )
+                _pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='dashboard')
+    return _pool
+
+
+def reservar_cupos(cantidad):
+    """
+    Toma `cantidad` cupos sin esperar (todos o ninguno). Lanza
+    DashboardSaturado si no alcanzan; el llamador libera cada cupo con
+    liberar_cupo() cuando su sección termina.
+    """
+    obtener_pool()
+    tomados = 0
+    while tomados < cantidad and _cupos.acquire(blocking=False):
+        tomados += 1
+    if tomados < cantidad:
+        for _ in range(tomados):
+            _cupos.release()
+        raise DashboardSaturado('Hay demasiados dashboards en proceso, intente más tarde')
+
+
+def liberar_cupo(*_):
+    _cupos.release()
+
+
+def _timeout_seccion(nombre):
+    timeouts = getattr(settings, 'REPORTES_DASHBOARD_TIMEOUT', {})
+    if isinstance(timeouts, dict):
+        return timeouts.get(nombre, TIMEOUT_POR_DEFECTO)
+    return timeouts
+
+
+@contextmanager
+def limitar_consultas(limite):
+    """
+    Interrumpe las consultas de la conexión por defecto de este hilo que sigan
+    corriendo después de `limite` (instante de time.monotonic()). La consulta
+    interrumpida lanza un error de base de datos; el cálculo Python que no
+    consulta la BD no se corta.
+    """
+    conexion = connections['default']
+    conexion.ensure_connection()
+    nativa = conexion.connection
+    if conexion.vendor == 'oracle':
+        # call_timeout (ms) limita cada ida y vuelta al servidor
+        anterior = nativa.call_timeout
+        nativa.call_timeout = max(1, int((limite - time.monotonic()) * 1000))
+        try:
+            yield
+        finally:
+            if conexion.connection is nativa:
+                nativa.call_timeout = anterior
+    elif conexion.vendor == 'sqlite':
+        # SQLite llama al handler cada N instrucciones de su VM; True aborta la consulta
+        nativa.set_progress_handler(lambda: time.monotonic() > limite, 10_000)
+        try:
+            yield
+        finally:
+            if conexion.connection is nativa:
+                nativa.set_progress_handler(None, 0)
+    else:
+        yield
+
+
+def ejecutar_seccion(funcion, parametros, limite):
+    """Corre una sección en el hilo actual con sus consultas limitadas a `limite`."""
+    if time.monotonic() >= limite:
+        # Esperó en la cola más que su plazo: nadie va a leer el resultado
+        raise TimeoutError
+    # Igual que al inicio/fin de cada request: descarta conexiones caídas o vencidas
+    for conexion in connections.all(initialized_only=True):
+        conexion.close_if_unusable_or_obsolete()
+    inicio = time.monotonic()
+    try:
+        with limitar_consultas(limite):
+            datos = funcion(**parametros)
+        return datos, round((time.monotonic() - inicio) * 1000)
+    finally:
+        for conexion in connections.all(initialized_only=True):
+            conexion.close_if_unusable_or_obsolete()
+
+
+def secciones_dashboard(meses=6, limite_equipos=10, limite_historial=20):
+    """(nombre, función, parámetros) de cada sección del dashboard."""
+    return [
+        ('kpis', calculos.calcular_kpis, {}),
+        ('actividad_mensual', calculos.calcular_actividad_mensual, {'meses': meses}),
+        ('distribucion_programas', calculos.calcular_distribucion_programas, {}),
+        ('equipos_mas_usados', calculos.calcular_equipos_mas_usados, {'limite': limite_equipos}),
+        ('historial', calculos.calcular_historial, {'limite': limite_historial}),
+        ('entregas_devoluciones', calculos.calcular_entregas_devoluciones, {}),
+    ]
+
+
+def calcular_dashboard(**parametros):
+    """
+    Ejecuta las secciones en paralelo y retorna
+    {'secciones': {nombre: datos}, 'errores': {nombre: mensaje}, 'tiempos_ms': {...}}.
+    Lanza DashboardSaturado si el pool no tiene cupos para todas las secciones.
+    """
+    pool = obtener_pool()
+    secciones = secciones_dashboard(**parametros)
+    reservar_cupos(len(secciones))
+    inicio = time.monotonic()
+
+    futuros = []
+    for indice, (nombre, funcion, argumentos) in enumerate(secciones):
+        limite = inicio + _timeout_seccion(nombre)
+        try:
+            # Cada sección con su copia del contexto: sus consultas cuentan para el request
+            futuro = pool.submit(contextvars.copy_context().run, ejecutar_seccion, funcion, argumentos, limite)
+        except BaseException:
+            for _ in secciones[indice:]:
+                liberar_cupo()
+            raise
+        futuro.add_done_callback(liberar_cupo)
+        futuros.append((nombre, futuro))
+
+    secciones, errores, tiempos = {}, {}, {}
+    for nombre, futuro in futuros:
+        # Todas arrancaron a la vez: el plazo de cada una se mide desde el inicio
+        restante = max(0, inicio + _timeout_seccion(nombre) - time.monotonic())
+        try:
+            secciones[nombre], tiempos[nombre] = futuro.result(timeout=restante)
+        except TimeoutError:
+            futuro.cancel()
+            errores[nombre] = 'Tiempo de espera agotado'
+        except Exception as e:
+            logger.error(f"Error en la sección {nombre} del dashboard: {e}")
+            errores[nombre] = str(e)
+
+    return {'secciones': secciones, 'errores': errores, 'tiempos_ms': tiempos}
@@ -0,0 +1,27 @@
+# reportes/management/commands/exportar_snapshot.py
+
+from django.core.management.base import BaseCommand
+
+from reportes.analitica import exportar_snapshot, ruta_por_defecto
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta Solicitudes, Solicitudes_Objetos, Usuarios_Programas y los catálogos '
+        'a un snapshot columnar para el motor analítico. Por defecto es incremental '
+        '(solo solicitudes nuevas según la marca de agua de Solicitud_Id).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ruta', default=None, help=f'Directorio destino (default: {ruta_por_defecto()})')
+        parser.add_argument(
+            '--completo', action='store_true',
+            help='Reescribe el snapshot completo (refleja también cambios de estado).'
+        )
+
+    def handle(self, *args, **options):
+        meta = exportar_snapshot(ruta=options['ruta'], completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot actualizado: {meta['agregadas']} solicitudes nuevas, "
+            f"{meta['filas']} en total (marca de agua: {meta['marca_agua']})."
+        ))
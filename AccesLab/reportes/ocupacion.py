@@ -0,0 +1,288 @@
+# ==============================================================================
+# REPORTES/OCUPACION.PY - Mapa de calor de ocupación de laboratorios
+# ==============================================================================
+# Matriz día de la semana (Lunes..Domingo) × hora (0..23) por laboratorio y
+# para todo el campus:
+# - horas reservadas vs. horas de apertura (Horarios_Laboratorio)
+# - asistentes (N_asistentes) vs. Capacidad en las horas reservadas
+#
+# Una reserva ocupa su laboratorio cada día entre Fecha_Inicio y Fecha_Fin, de
+# la hora de Hora_Inicio a la de Hora_Fin (sin horas: el día completo). Las
+# reservas se expanden a días con np.repeat y los días a horas con la misma
+# acumulación por diferencias de reportes/utilizacion.py, en una sola pasada.
+#
+# El rango se extiende a semanas completas (lunes a domingo). Las semanas ya
+# cerradas no cambian salvo que se edite una reserva antigua, así que se guardan
+# en caché con un TTL largo bajo una generación propia que las señales
+# incrementan (ver reportes/signals.py). La generación es un contador de
+# monitoreo/versiones.py: requiere la caché compartida entre workers.
+
+from datetime import timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from maestros import horarios
+from maestros.models import Laboratorios
+from monitoreo import metricas, versiones
+from reservas.estados import ESTADOS_SIN_USO, ids_estados
+from reservas.models import Solicitudes
+
+from .cache import reporte_cacheado, ttl_cerrados
+from .utilizacion import _hora_del_dia, ocupacion_por_hora
+
+
+DIAS_SEMANA = horarios.DIAS_SEMANA
+SEMANAS_POR_DEFECTO = 8
+SEMANAS_MAXIMAS = 104
+
+CLAVE_GENERACION_SEMANAS = 'reportes:ocupacion:generacion'
+
+
+def lunes_de(fecha):
+    return fecha - timedelta(days=fecha.weekday())
+
+
+# ----------------------------------------------------------------------
+# CACHÉ DE SEMANAS CERRADAS
+# ----------------------------------------------------------------------
+def _generacion_semanas():
+    return versiones.actual(CLAVE_GENERACION_SEMANAS)
+
+
+def invalidar_semanas_cerradas():
+    """Se llama cuando se escribe una reserva que toca semanas ya cerradas."""
+    versiones.incrementar(CLAVE_GENERACION_SEMANAS)
+
+
+def clave_semana_cerrada(lunes, generacion):
+    return f'reportes:ocupacion:g{generacion}:{lunes:%G-W%V}'
+
+
+# ----------------------------------------------------------------------
+# AGREGACIÓN
+# ----------------------------------------------------------------------
+def _reservas_por_semana(desde, n_semanas, laboratorios_ids):
+    """
+    Horas reservadas y horas-asistente por (laboratorio, semana, día, hora)
+    para las n_semanas que empiezan el lunes `desde`. Una sola consulta.
+    """
+    n_labs = len(laboratorios_ids)
+    n_dias = n_semanas * 7
+    forma = (n_labs, n_semanas, 7, 24)
+    if not n_labs or not n_semanas:
+        return np.zeros(forma), np.zeros(forma)
+
+    hasta = desde + timedelta(days=n_dias - 1)
+    filas = Solicitudes.objects.filter(
+        Laboratorio_Id__isnull=False,
+        Fecha_Inicio__isnull=False,
+        Fecha_Inicio__lte=hasta,
+    ).filter(
+        # Sin Fecha_Fin la reserva dura solo su día de inicio
+        Q(Fecha_Fin__gte=desde) | Q(Fecha_Fin__isnull=True, Fecha_Inicio__gte=desde)
+    ).exclude(
+        Estado_Id__in=ids_estados(ESTADOS_SIN_USO)
+    ).values_list(
+        'Laboratorio_Id', 'N_asistentes', 'Fecha_Inicio', 'Fecha_Fin', 'Hora_Inicio', 'Hora_Fin'
+    )
+
+    lab, asistentes, dia_ini, dia_fin, hora_ini, hora_fin = [], [], [], [], [], []
+    for laboratorio_id, n_asistentes, f_ini, f_fin, h_ini, h_fin in filas.iterator(chunk_size=5000):
+        lab.append(laboratorio_id)
+        asistentes.append(n_asistentes or 0)
+        dia_ini.append((f_ini - desde).days)
+        dia_fin.append(((f_fin or f_ini) - desde).days)
+        inicio = _hora_del_dia(h_ini)
+        fin = _hora_del_dia(h_fin)
+        hora_ini.append(0 if inicio is None else inicio)
+        hora_fin.append(24 if fin is None or (inicio is not None and fin <= inicio) else fin)
+
+    ids = np.asarray(laboratorios_ids, dtype=np.int64)
+    lab = np.asarray(lab, dtype=np.int64)
+    dia_ini = np.asarray(dia_ini, dtype=np.int64)
+    dia_fin = np.asarray(dia_fin, dtype=np.int64)
+    # Antes de recortar: una reserva que termina antes del rango (o con
+    # Fecha_Fin < Fecha_Inicio) no debe caer sobre el primer día
+    validos = np.isin(lab, ids) & (dia_fin >= 0) & (dia_ini < n_dias) & (dia_fin >= dia_ini)
+    dia_ini = np.clip(dia_ini, 0, n_dias - 1)
+    dia_fin = np.clip(dia_fin, 0, n_dias - 1)
+
+    codigos = np.searchsorted(ids, lab[validos])
+    asistentes = np.asarray(asistentes, dtype=np.float64)[validos]
+    hora_ini = np.asarray(hora_ini, dtype=np.float64)[validos]
+    hora_fin = np.asarray(hora_fin, dtype=np.float64)[validos]
+    dia_ini, dia_fin = dia_ini[validos], dia_fin[validos]
+
+    # Expandir cada reserva a sus días: repetir y sumar el desplazamiento del día
+    n_por_reserva = dia_fin - dia_ini + 1
+
+    def repetir(arreglo):
+        return np.repeat(arreglo, n_por_reserva)
+
+    desplazamiento = np.arange(n_por_reserva.sum()) - repetir(np.cumsum(n_por_reserva) - n_por_reserva)
+    dia = repetir(dia_ini) + desplazamiento
+    inicio = dia * 24 + repetir(hora_ini)
+    fin = dia * 24 + repetir(hora_fin)
+    codigos = repetir(codigos)
+
+    n_horas = n_dias * 24
+    reservadas = ocupacion_por_hora(codigos, np.ones(len(codigos)), inicio, fin, n_labs, n_horas)
+    con_asistentes = ocupacion_por_hora(codigos, repetir(asistentes), inicio, fin, n_labs, n_horas)
+    return reservadas.reshape(forma), con_asistentes.reshape(forma)
+
+
+def _semanas(desde, n_semanas, laboratorios_ids):
+    """
+    (reservadas, asistentes) de forma (n_labs, n_semanas, 7, 24); las
+    semanas cerradas salen de la caché y las faltantes se calculan juntas.
+    """
+    lunes_actual = lunes_de(timezone.localdate())
+    generacion = _generacion_semanas()
+    lunes = [desde + timedelta(weeks=i) for i in range(n_semanas)]
+    claves = {l: clave_semana_cerrada(l, generacion) for l in lunes if l < lunes_actual}
+    en_cache = cache.get_many(list(claves.values()))
+
+    faltantes = [i for i, l in enumerate(lunes) if claves.get(l) not in en_cache]
+    # Solo las semanas cerradas pasan por la caché
+    for resultado, veces in (('hit', len(en_cache)), ('miss', len(claves) - len(en_cache))):
+        if veces:
+            metricas.incrementar(
+                'acceslab_cache_eventos_total', veces, cache='ocupacion_semanas', nombre='semana', resultado=resultado
+            )
+    forma = (len(laboratorios_ids), n_semanas, 7, 24)
+    reservadas, asistentes = np.zeros(forma), np.zeros(forma)
+
+    if faltantes:
+        primero, ultimo = faltantes[0], faltantes[-1]
+        calc_res, calc_asis = _reservas_por_semana(lunes[primero], ultimo - primero + 1, laboratorios_ids)
+        nuevos = {}
+        for i in faltantes:
+            reservadas[:, i] = calc_res[:, i - primero]
+            asistentes[:, i] = calc_asis[:, i - primero]
+            if lunes[i] in claves:
+                nuevos[claves[lunes[i]]] = {
+                    lab_id: (reservadas[j, i].tolist(), asistentes[j, i].tolist())
+                    for j, lab_id in enumerate(laboratorios_ids)
+                }
+        if nuevos:
+            cache.set_many(nuevos, timeout=ttl_cerrados())
+
+    for i, l in enumerate(lunes):
+        semana = en_cache.get(claves.get(l))
+        if semana is None:
+            continue
+        for j, lab_id in enumerate(laboratorios_ids):
+            # Un laboratorio creado después de cachear la semana no tenía reservas
+            if lab_id in semana:
+                reservadas[j, i], asistentes[j, i] = semana[lab_id]
+
+    return reservadas, asistentes
+
+
+def _horarios_apertura(laboratorios_ids):
+    """Horas de apertura (n_labs, 7, 24) según el horario compilado (maestros/horarios.py)."""
+    compilado = horarios.horario_compilado()
+    codigos, inicio, fin = [], [], []
+    for codigo, laboratorio_id in enumerate(laboratorios_ids):
+        for desde, hasta in horarios.intervalos(laboratorio_id, compilado):
+            codigos.append(codigo)
+            inicio.append(desde / 60)
+            fin.append(hasta / 60)
+
+    apertura = ocupacion_por_hora(
+        np.asarray(codigos, dtype=np.int64), np.ones(len(codigos)),
+        np.asarray(inicio, dtype=np.float64), np.asarray(fin, dtype=np.float64),
+        len(laboratorios_ids), 7 * 24
+    )
+    # Dos franjas solapadas del mismo día no abren el laboratorio "dos veces"
+    return np.minimum(apertura, 1).reshape(len(laboratorios_ids), 7, 24)
+
+
+def _porcentaje(numerador, denominador):
+    """Porcentaje elemento a elemento; None donde el denominador es 0."""
+    numerador = np.atleast_1d(np.asarray(numerador, dtype=np.float64))
+    denominador = np.atleast_1d(np.asarray(denominador, dtype=np.float64))
+    resultado = np.full(numerador.shape, np.nan)
+    np.divide(numerador * 100, denominador, out=resultado, where=denominador > 0)
+    redondeado = np.round(resultado, 1).astype(object)
+    redondeado[np.isnan(resultado)] = None
+    return redondeado.tolist()
+
+
+def _porcentaje_total(numerador, denominador):
+    return _porcentaje(numerador, denominador)[0]
+
+
+def _mapa(reservadas, asistentes, abiertas, capacidad_horas):
+    """Bloque de respuesta para un laboratorio o para el campus."""
+    dentro = np.minimum(reservadas, abiertas)
+    return {
+        'horas_reservadas': np.round(reservadas, 2).tolist(),
+        'horas_abiertas': np.round(abiertas, 2).tolist(),
+        'ocupacion_pct': _porcentaje(dentro, abiertas),
+        'uso_capacidad_pct': _porcentaje(asistentes, capacidad_horas),
+        'totales': {
+            'horas_reservadas': round(float(reservadas.sum()), 2),
+            'horas_abiertas': round(float(abiertas.sum()), 2),
+            'horas_fuera_de_horario': round(float(np.clip(reservadas - abiertas, 0, None).sum()), 2),
+            'ocupacion_pct': _porcentaje_total(dentro.sum(), abiertas.sum()),
+            'uso_capacidad_pct': _porcentaje_total(asistentes.sum(), capacidad_horas.sum()),
+        },
+    }
+
+
+@reporte_cacheado('ocupacion_laboratorios')
+def calcular_ocupacion_laboratorios(fecha_desde=None, fecha_hasta=None, laboratorio_id=None):
+    """
+    Mapa de calor 7×24 por laboratorio y del campus entre fecha_desde y
+    fecha_hasta (extendidas a semanas completas; por defecto las últimas 8).
+    - horas_reservadas: horas con reserva en esa franja, sumadas en el rango
+    - horas_abiertas: horas de apertura de la franja en el rango
+    - ocupacion_pct: reservadas (dentro del horario) / abiertas
+    - uso_capacidad_pct: asistentes / (Capacidad × horas reservadas)
+    """
+    hoy = timezone.localdate()
+    fecha_hasta = fecha_hasta or hoy
+    fecha_desde = fecha_desde or fecha_hasta - timedelta(weeks=SEMANAS_POR_DEFECTO) + timedelta(days=1)
+    if fecha_desde > fecha_hasta:
+        raise ValueError('fecha_desde debe ser anterior o igual a fecha_hasta')
+    desde = lunes_de(fecha_desde)
+    n_semanas = (lunes_de(fecha_hasta) - desde).days // 7 + 1
+    if n_semanas > SEMANAS_MAXIMAS:
+        raise ValueError(f'El rango no puede superar {SEMANAS_MAXIMAS} semanas')
+
+    laboratorios = list(
+        Laboratorios.objects.order_by('Laboratorio_Id').values_list('Laboratorio_Id', 'Nombre_Laboratorio', 'Capacidad')
+    )
+    laboratorios_ids = [l[0] for l in laboratorios]
+
+    reservadas, asistentes = _semanas(desde, n_semanas, laboratorios_ids)
+    reservadas = reservadas.sum(axis=1)
+    asistentes = asistentes.sum(axis=1)
+    abiertas = _horarios_apertura(laboratorios_ids) * n_semanas
+    capacidad = np.asarray([l[2] or 0 for l in laboratorios], dtype=np.float64)
+    capacidad_horas = reservadas * capacidad[:, None, None]
+
+    resultado_labs = []
+    for i, (lab_id, nombre, cap) in enumerate(laboratorios):
+        if laboratorio_id and lab_id != laboratorio_id:
+            continue
+        resultado_labs.append({
+            'laboratorio_id': lab_id,
+            'laboratorio': nombre,
+            'capacidad': cap,
+            **_mapa(reservadas[i], asistentes[i], abiertas[i], capacidad_horas[i]),
+        })
+
+    return {
+        'fecha_desde': desde.isoformat(),
+        'fecha_hasta': (desde + timedelta(weeks=n_semanas, days=-1)).isoformat(),
+        'semanas': n_semanas,
+        'dias': DIAS_SEMANA,
+        'horas': list(range(24)),
+        'campus': _mapa(reservadas.sum(axis=0), asistentes.sum(axis=0), abiertas.sum(axis=0), capacidad_horas.sum(axis=0)),
+        'laboratorios': resultado_labs,
+    }
@@ -0,0 +1,91 @@
+# reportes/signals.py
+# Invalidación de la caché de reportes cuando se escriben solicitudes
+
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from reservas.models import Solicitudes, Solicitudes_Objetos, Integrante_Solicitud
+from reservas.signals import solicitudes_actualizadas
+
+from .cache import invalidar_reportes
+from .calculos import clave_mes_cerrado
+
+
+@receiver(post_save, sender=Solicitudes)
+@receiver(post_delete, sender=Solicitudes)
+@receiver(post_save, sender=Solicitudes_Objetos)
+@receiver(post_delete, sender=Solicitudes_Objetos)
+@receiver(post_save, sender=Integrante_Solicitud)
+@receiver(post_delete, sender=Integrante_Solicitud)
+def invalidar_por_escritura(sender, **kwargs):
+    # Se invalida al confirmar la transacción para que nadie vuelva a
+    # cachear datos previos a la escritura
+    transaction.on_commit(invalidar_reportes)
+
+
+def _toca_mes(update_fields):
+    return update_fields is None or bool({'Fecha_solicitud', 'Tipo_Servicio_Id'} & set(update_fields))
+
+
+@receiver(post_init, sender=Solicitudes)
+def recordar_mes_anterior(sender, instance, **kwargs):
+    """Guarda la Fecha_solicitud cargada: si la edición la cambia, su mes también queda obsoleto."""
+    # __dict__: leer un campo diferido (.only()/.defer()) haría una consulta por fila
+    if 'Fecha_solicitud' in instance.__dict__:
+        instance._fecha_solicitud_anterior = instance.__dict__['Fecha_solicitud']
+
+
+@receiver(pre_save, sender=Solicitudes)
+def consultar_mes_anterior(sender, instance, update_fields=None, **kwargs):
+    """Solo si Fecha_solicitud no venía cargada (campo diferido): se lee de la base."""
+    if instance._state.adding or hasattr(instance, '_fecha_solicitud_anterior') or not _toca_mes(update_fields):
+        return
+    instance._fecha_solicitud_anterior = Solicitudes.objects.filter(
+        pk=instance.pk
+    ).values_list('Fecha_solicitud', flat=True).first()
+
+
+@receiver(post_save, sender=Solicitudes)
+@receiver(post_delete, sender=Solicitudes)
+def invalidar_mes_cerrado(sender, instance, update_fields=None, **kwargs):
+    """Crear, editar o eliminar una solicitud antigua modifica el conteo cacheado de su mes (y del anterior si se movió)."""
+    if not _toca_mes(update_fields):
+        return
+    fechas = {instance.Fecha_solicitud, getattr(instance, '_fecha_solicitud_anterior', None)}
+    # El próximo save() de esta instancia parte de lo que quedó guardado
+    instance._fecha_solicitud_anterior = instance.Fecha_solicitud
+    claves = [clave_mes_cerrado(fecha) for fecha in fechas if isinstance(fecha, date)]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+@receiver(post_save, sender=Solicitudes)
+@receiver(post_delete, sender=Solicitudes)
+def invalidar_semanas_ocupacion(sender, instance, **kwargs):
+    """Una reserva de laboratorio que toca semanas cerradas invalida su mapa de ocupación."""
+    # ocupacion usa numpy: se importa al primer uso, no al registrar las señales
+    from .ocupacion import invalidar_semanas_cerradas, lunes_de
+
+    fecha_inicio = instance.Fecha_Inicio
+    if instance.Laboratorio_Id_id and isinstance(fecha_inicio, date):
+        if fecha_inicio < lunes_de(timezone.localdate()):
+            transaction.on_commit(invalidar_semanas_cerradas)
+
+
+@receiver(solicitudes_actualizadas)
+def invalidar_por_lote(sender, solicitudes, **kwargs):
+    """Entregas y devoluciones en lote (reservas/prestamos.py); ya se está fuera de la transacción."""
+    from .ocupacion import invalidar_semanas_cerradas, lunes_de
+
+    invalidar_reportes()
+    lunes = lunes_de(timezone.localdate())
+    if any(
+        s.Laboratorio_Id_id and isinstance(s.Fecha_Inicio, date) and s.Fecha_Inicio < lunes
+        for s in solicitudes
+    ):
+        invalidar_semanas_cerradas()
@@ -1,3 +1,486 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time as reloj
+from datetime import date, datetime, time
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from maestros.models import (
+    Categorias, Estados, Facultades, Laboratorios, Objetos, Programas, Tipo_Identificacion, Tipo_Servicio,
+)
+from monitoreo.pruebas import reiniciar_catalogos
+from reservas.models import Solicitudes, Solicitudes_Objetos
+from usuarios.models import Usuarios, Usuarios_Programas
+
+from . import cache as cache_reportes
+from .calculos import clave_mes_cerrado
+from .analitica import (
+    DIRECTORIO_VERSIONES, ENLACE_ACTUAL, MotorAnalitico, SnapshotNoDisponible, exportar_snapshot,
+)
+from .ocupacion import _reservas_por_semana
+from .utilizacion import calcular_utilizacion_equipos, horas_de_uso
+
+
+# Lunes
+DESDE = date(2025, 3, 3)
+
+
+def _hora(fecha, hora):
+    return timezone.make_aware(datetime.combine(fecha, time(hora)))
+
+
+class ReservasPorSemanaTests(TestCase):
+    """reportes/ocupacion.py: expansión de reservas a (laboratorio, semana, día, hora)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        usuario = User.objects.create_user(username='docente', password='x')
+        cls.usuario = Usuarios.objects.create(Usuario_Id=usuario, Tipo_Id=tipo_id, Nombres='Ana', Apellido1='Ruiz')
+        cls.servicio = Tipo_Servicio.objects.create(Tipo_Servicio_Id=1, Nombre_Tipo_Servicio='Reserva')
+        cls.aprobada = Estados.objects.create(Estado_Id=2, Nombre_Estado='Aprobada')
+        cls.pendiente = Estados.objects.create(Estado_Id=1, Nombre_Estado='Pendiente')
+        cls.lab = Laboratorios.objects.create(Laboratorio_Id=1, Nombre_Laboratorio='Redes', Capacidad=30, Ubicacion='B1')
+        cls.otro_lab = Laboratorios.objects.create(
+            Laboratorio_Id=2, Nombre_Laboratorio='Química', Capacidad=20, Ubicacion='B2'
+        )
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+
+    def _reserva(self, inicio, fin=None, horas=(8, 10), asistentes=10, estado=None, lab=None):
+        return Solicitudes.objects.create(
+            Fecha_solicitud=DESDE,
+            Asignatura='Redes I',
+            N_asistentes=asistentes,
+            Fecha_Inicio=inicio,
+            Fecha_Fin=fin,
+            Hora_Inicio=_hora(inicio, horas[0]) if horas else None,
+            Hora_Fin=_hora(inicio, horas[1]) if horas else None,
+            Usuario_Id=self.usuario,
+            Tipo_Servicio_Id=self.servicio,
+            Estado_Id=estado or self.aprobada,
+            Laboratorio_Id=lab or self.lab,
+        )
+
+    def test_reserva_de_un_dia(self):
+        self._reserva(date(2025, 3, 5), date(2025, 3, 5), asistentes=12)
+        reservadas, asistentes = _reservas_por_semana(DESDE, 2, [1])
+
+        self.assertEqual(reservadas.shape, (1, 2, 7, 24))
+        self.assertEqual(reservadas.sum(), 2)
+        self.assertEqual(list(reservadas[0, 0, 2, 7:11]), [0, 1, 1, 0])
+        self.assertEqual(asistentes[0, 0, 2, 8], 12)
+
+    def test_reserva_de_varios_dias_se_recorta_al_rango(self):
+        # Empieza el sábado anterior y termina el martes de la primera semana
+        self._reserva(date(2025, 3, 1), date(2025, 3, 4))
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1])
+
+        self.assertEqual(reservadas[0, 0, :, 8].tolist(), [1, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(reservadas.sum(), 4)
+
+    def test_sin_fecha_fin_ocupa_solo_el_dia_de_inicio(self):
+        self._reserva(date(2025, 3, 10), None)
+        reservadas, _ = _reservas_por_semana(DESDE, 2, [1])
+
+        self.assertEqual(reservadas[0, 1, 0, 8], 1)
+        self.assertEqual(reservadas.sum(), 2)
+
+    def test_sin_horas_ocupa_el_dia_completo(self):
+        self._reserva(date(2025, 3, 3), date(2025, 3, 3), horas=None)
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1])
+
+        self.assertEqual(reservadas[0, 0, 0].sum(), 24)
+
+    def test_descarta_reservas_fuera_de_rango_o_inconsistentes(self):
+        # Termina antes del rango
+        self._reserva(date(2025, 2, 20), date(2025, 2, 25))
+        # Fecha_Fin anterior a Fecha_Inicio: no debe caer sobre ningún día
+        self._reserva(date(2025, 3, 6), date(2025, 3, 4))
+        # Empieza después del rango
+        self._reserva(date(2025, 3, 20), date(2025, 3, 21))
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1])
+
+        self.assertEqual(reservadas.sum(), 0)
+
+    def test_excluye_estados_sin_uso_y_otros_laboratorios(self):
+        self._reserva(date(2025, 3, 4), date(2025, 3, 4), estado=self.pendiente)
+        self._reserva(date(2025, 3, 4), date(2025, 3, 4), lab=self.otro_lab)
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1])
+        self.assertEqual(reservadas.sum(), 0)
+
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1, 2])
+        self.assertEqual(reservadas[1].sum(), 2)
+        self.assertEqual(reservadas[0].sum(), 0)
+
+    def test_estados_sin_uso_sin_mayusculas_ni_tildes(self):
+        Estados.objects.filter(pk=self.pendiente.pk).update(Nombre_Estado='PENDIENTE')
+        self._reserva(date(2025, 3, 4), date(2025, 3, 4), estado=self.pendiente)
+        reservadas, _ = _reservas_por_semana(DESDE, 1, [1])
+        self.assertEqual(reservadas.sum(), 0)
+
+    def test_sin_laboratorios_o_semanas(self):
+        reservadas, asistentes = _reservas_por_semana(DESDE, 0, [1])
+        self.assertEqual(reservadas.shape, (1, 0, 7, 24))
+        self.assertEqual(asistentes.sum(), 0)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas-meses'}},
+)
+class InvalidacionMesCerradoTests(TestCase):
+    """reportes/signals.py: editar Fecha_solicitud invalida el mes nuevo y el anterior sin releer la fila."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        usuario = User.objects.create_user(username='docente', password='x')
+        usuario = Usuarios.objects.create(Usuario_Id=usuario, Tipo_Id=tipo_id, Nombres='Ana', Apellido1='Ruiz')
+        cls.solicitud = Solicitudes.objects.create(
+            Fecha_solicitud=date(2025, 1, 15),
+            Asignatura='Redes I',
+            N_asistentes=1,
+            Usuario_Id=usuario,
+            Tipo_Servicio_Id=Tipo_Servicio.objects.create(Tipo_Servicio_Id=1, Nombre_Tipo_Servicio='Préstamo'),
+            Estado_Id=Estados.objects.create(Estado_Id=2, Nombre_Estado='Aprobada'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.meses = [clave_mes_cerrado(date(2025, mes, 1)) for mes in (1, 2, 3)]
+        cache.set_many({clave: 5 for clave in self.meses})
+
+    def _guardar(self, solicitud, fecha):
+        solicitud.Fecha_solicitud = fecha
+        with self.captureOnCommitCallbacks(execute=True):
+            # Solo el UPDATE: la fecha previa viene de post_init, no de un SELECT
+            with self.assertNumQueries(1):
+                solicitud.save()
+
+    def test_mover_de_mes_invalida_ambos(self):
+        solicitud = Solicitudes.objects.get(pk=self.solicitud.pk)
+        self._guardar(solicitud, date(2025, 2, 3))
+        self.assertEqual(cache.get_many(self.meses), {self.meses[2]: 5})
+
+    def test_segundo_guardado_parte_de_lo_guardado(self):
+        solicitud = Solicitudes.objects.get(pk=self.solicitud.pk)
+        self._guardar(solicitud, date(2025, 2, 3))
+        cache.set_many({clave: 5 for clave in self.meses})
+
+        self._guardar(solicitud, date(2025, 3, 3))
+        self.assertEqual(cache.get_many(self.meses), {self.meses[0]: 5})
+
+    def test_campo_diferido_se_consulta_al_guardar(self):
+        solicitud = Solicitudes.objects.only('Asignatura').get(pk=self.solicitud.pk)
+        solicitud.Fecha_solicitud = date(2025, 2, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitud.save()
+        self.assertEqual(cache.get_many(self.meses), {self.meses[2]: 5})
+
+
+class UtilizacionEquiposTests(TestCase):
+    """reportes/utilizacion.py: horas de uso, pico y utilización por equipo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        usuario = User.objects.create_user(username='estudiante', password='x')
+        cls.usuario = Usuarios.objects.create(Usuario_Id=usuario, Tipo_Id=tipo_id, Nombres='Luis', Apellido1='Gómez')
+        cls.servicio = Tipo_Servicio.objects.create(Tipo_Servicio_Id=2, Nombre_Tipo_Servicio='Préstamo')
+        cls.estados = {
+            nombre: Estados.objects.create(Estado_Id=i, Nombre_Estado=nombre)
+            for i, nombre in enumerate(('Pendiente', 'Aprobada', 'En Uso', 'Devuelto', 'Rechazada'), start=1)
+        }
+        categoria = Categorias.objects.create(Categoria_Id=1, Nombre_Categoria='Electrónica')
+        cls.osciloscopio = Objetos.objects.create(
+            Objetos_Id=1, Nombre_Objetos='Osciloscopio', Categoria_Id=categoria, Cant_Stock=3
+        )
+        cls.multimetro = Objetos.objects.create(
+            Objetos_Id=2, Nombre_Objetos='Multímetro', Categoria_Id=categoria, Cant_Stock=0
+        )
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+
+    def _linea(self, estado, fecha, horas, cantidad, objeto=None, fin=None):
+        fin = fin or fecha
+        solicitud = Solicitudes.objects.create(
+            Fecha_solicitud=fecha,
+            Asignatura='Circuitos',
+            N_asistentes=1,
+            Fecha_Inicio=fecha,
+            Fecha_Fin=fin,
+            Hora_Inicio=_hora(fecha, horas[0]) if horas else None,
+            Hora_Fin=_hora(fin, horas[1]) if horas else None,
+            Usuario_Id=self.usuario,
+            Tipo_Servicio_Id=self.servicio,
+            Estado_Id=self.estados[estado],
+        )
+        Solicitudes_Objetos.objects.create(
+            Solicitud_Id=solicitud, Objetos_Id=objeto or self.osciloscopio, Cantidad_Objetos=cantidad
+        )
+
+    def _calcular(self, **parametros):
+        parametros.setdefault('fecha_desde', DESDE)
+        parametros.setdefault('fecha_hasta', DESDE)
+        resultado = calcular_utilizacion_equipos.sin_cache(**parametros)
+        return resultado, {fila['objeto_id']: fila for fila in resultado['equipos']}
+
+    def test_horas_pico_y_ociosas(self):
+        self._linea('Aprobada', DESDE, (8, 12), 2)
+        self._linea('Aprobada', DESDE, (10, 14), 1)
+        # Sin uso: no cuentan
+        self._linea('Pendiente', DESDE, (8, 20), 3)
+        self._linea('Rechazada', DESDE, (8, 20), 3)
+        Estados.objects.filter(pk=self.estados['Rechazada'].pk).update(Nombre_Estado='rechazada')
+
+        resultado, filas = self._calcular()
+        fila = filas[1]
+        self.assertEqual(resultado['horas_rango'], 24)
+        self.assertEqual(fila['horas_uso'], 12)
+        self.assertEqual(fila['pico_concurrente'], 3)
+        self.assertEqual(fila['pico_en'], '2025-03-03T10:00')
+        self.assertEqual(fila['horas_ociosas'], 18)
+        self.assertEqual(fila['utilizacion_pct'], round(12 / (3 * 24) * 100, 2))
+        # Sin unidades no hay porcentaje; el más usado va primero
+        self.assertIsNone(filas[2]['utilizacion_pct'])
+        self.assertEqual(resultado['equipos'][0]['objeto_id'], 1)
+
+    def test_unidades_en_uso_suman_a_la_capacidad(self):
+        # Dos unidades entregadas: faltan en Cant_Stock pero siguen siendo del equipo
+        self._linea('En Uso', DESDE, (8, 12), 2)
+        self._linea('Aprobada', DESDE, (8, 10), 3)
+
+        fila = self._calcular()[1][1]
+        self.assertEqual((fila['cant_stock'], fila['unidades'], fila['pico_concurrente']), (3, 5, 5))
+        self.assertFalse(fila['excede_stock'])
+        self.assertEqual(fila['utilizacion_pct'], round(14 / (5 * 24) * 100, 2))
+
+        self._linea('Aprobada', DESDE, (9, 10), 1)
+        self.assertTrue(self._calcular()[1][1]['excede_stock'])
+
+    def test_serie_diaria_y_horaria(self):
+        self._linea('Aprobada', DESDE, None, 1)
+        self._linea('Aprobada', date(2025, 3, 4), (8, 9), 2, objeto=self.multimetro)
+
+        _, filas = self._calcular(fecha_hasta=date(2025, 3, 4), serie='dia')
+        self.assertEqual(filas[1]['serie'], [24, 0])
+        self.assertEqual(filas[2]['serie'], [0, 2])
+
+        _, filas = self._calcular(serie='hora', objetos_ids=[1])
+        self.assertEqual(filas[1]['serie'], [1] * 24)
+        self.assertNotIn(2, filas)
+
+    def test_intervalos_de_varios_dias_se_recortan_al_rango(self):
+        # Del domingo 20:00 al martes 10:00: dentro del lunes solo cuentan sus 24 horas
+        self._linea('Aprobada', date(2025, 3, 2), (20, 10), 2, fin=date(2025, 3, 4))
+        # Termina justo antes del rango
+        self._linea('Aprobada', date(2025, 3, 1), (8, 12), 1, fin=date(2025, 3, 2))
+
+        fila = self._calcular()[1][1]
+        self.assertEqual((fila['horas_uso'], fila['horas_ociosas'], fila['pico_concurrente']), (48, 0, 2))
+        self.assertEqual(horas_de_uso(DESDE, DESDE), {1: 48})
+        self.assertEqual(horas_de_uso(), {1: 2 * 38 + 1 * 28})
+
+    def test_valida_parametros(self):
+        with self.assertRaises(ValueError):
+            self._calcular(fecha_desde=date(2025, 3, 5), fecha_hasta=DESDE)
+        with self.assertRaises(ValueError):
+            self._calcular(serie='mes')
+        with self.assertRaises(ValueError):
+            self._calcular(fecha_desde=date(2025, 1, 1), fecha_hasta=date(2025, 3, 1), serie='hora')
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas-reportes'}},
+    REPORTES_CACHE_TTL={'prueba_cache': 60, 'prueba_vencido': 0},
+)
+class ReporteCacheadoTests(SimpleTestCase):
+    """reportes/cache.py: aciertos, single-flight, stale-while-revalidate e invalidación."""
+
+    def setUp(self):
+        cache.clear()
+        self.llamadas = []
+
+    def _reporte(self, nombre='prueba_cache', demora=0):
+        @cache_reportes.reporte_cacheado(nombre)
+        def calcular(**parametros):
+            self.llamadas.append(parametros)
+            if demora:
+                reloj.sleep(demora)
+            return len(self.llamadas)
+        return calcular
+
+    def _conteo(self, nombre):
+        return dict(cache_reportes.estadisticas()[nombre])
+
+    def test_acierto_con_parametros_equivalentes(self):
+        reporte = self._reporte()
+        antes = self._conteo('prueba_cache')
+
+        self.assertEqual(reporte(limite=10, desde=date(2025, 3, 3), estado=None), 1)
+        self.assertEqual(reporte(desde=date(2025, 3, 3), limite=10), 1)
+        self.assertEqual(reporte(limite=5), 2)
+
+        despues = self._conteo('prueba_cache')
+        self.assertEqual((despues['hit'] - antes['hit'], despues['miss'] - antes['miss']), (1, 2))
+        # Las estadísticas salen de /metrics: nada se escribe en la caché compartida por acierto
+        self.assertIsNone(cache.get('reportes:stats:prueba_cache:hit'))
+
+    def test_invalidacion_deja_obsoletos_los_resultados(self):
+        reporte = self._reporte()
+        self.assertEqual(reporte(), 1)
+        cache_reportes.invalidar_reportes()
+        self.assertEqual(reporte(), 2)
+        self.assertEqual(reporte(), 2)
+
+    def test_vencido_se_sirve_mientras_se_recalcula(self):
+        reporte = self._reporte('prueba_vencido')
+        self.assertEqual(reporte(), 1)
+
+        # TTL 0: ya venció; se sirve el valor anterior y se recalcula en segundo plano
+        self.assertEqual(reporte(), 1)
+        for hilo in threading.enumerate():
+            if hilo.name == 'revalidar-prueba_vencido':
+                hilo.join(5)
+        self.assertEqual(len(self.llamadas), 2)
+        self.assertEqual(reporte(), 2)
+
+    def test_un_solo_calculo_por_clave_entre_hilos(self):
+        reporte = self._reporte(demora=0.2)
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(reporte(limite=3))) for _ in range(5)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(5)
+
+        self.assertEqual(resultados, [1] * 5)
+        self.assertEqual(len(self.llamadas), 1)
+
+    def test_espera_el_resultado_de_otro_proceso(self):
+        reporte = self._reporte()
+        clave = cache_reportes.clave_reporte('prueba_cache', cache_reportes.normalizar_parametros(limite=3))
+        # Otro worker tomó el candado y publica su resultado un momento después
+        cache.add(f'{clave}:candado', 1)
+        temporizador = threading.Timer(0.2, lambda: cache_reportes._guardar(clave, 'prueba_cache', 'del otro'))
+        temporizador.start()
+        self.addCleanup(temporizador.cancel)
+
+        self.assertEqual(reporte(limite=3), 'del otro')
+        self.assertEqual(self.llamadas, [])
+
+
+class AnaliticaTests(TestCase):
+    """reportes/analitica.py: snapshot columnar (completo e incremental) y agrupaciones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        usuario = User.objects.create_user(username='docente', password='x')
+        cls.usuario = Usuarios.objects.create(Usuario_Id=usuario, Tipo_Id=tipo_id, Nombres='Ana', Apellido1='Ruiz')
+        facultad = Facultades.objects.create(Facultad_Id=1, Nombre_Facultad='Ingeniería')
+        programa = Programas.objects.create(Programa_Id=10, Nombre_Programa='Sistemas', Facultad_Id=facultad)
+        Usuarios_Programas.objects.create(Usuario_Id=cls.usuario, Programa_Id=programa)
+        cls.servicio = Tipo_Servicio.objects.create(Tipo_Servicio_Id=2, Nombre_Tipo_Servicio='Préstamo')
+        cls.pendiente = Estados.objects.create(Estado_Id=1, Nombre_Estado='Pendiente')
+        cls.aprobada = Estados.objects.create(Estado_Id=2, Nombre_Estado='Aprobada')
+        cls.lab = Laboratorios.objects.create(Laboratorio_Id=1, Nombre_Laboratorio='Redes', Capacidad=30, Ubicacion='B1')
+        categoria = Categorias.objects.create(Categoria_Id=1, Nombre_Categoria='Electrónica')
+        cls.osciloscopio = Objetos.objects.create(
+            Objetos_Id=1, Nombre_Objetos='Osciloscopio', Categoria_Id=categoria, Cant_Stock=5
+        )
+        cls.fuente = Objetos.objects.create(Objetos_Id=2, Nombre_Objetos='Fuente', Categoria_Id=categoria, Cant_Stock=3)
+
+        cls.primera = cls._solicitud(1, date(2025, 3, 3), cls.aprobada, 10, [(cls.osciloscopio, 2), (cls.fuente, 1)])
+        cls._solicitud(2, date(2025, 4, 10), cls.pendiente, 4, [(cls.osciloscopio, 1)], lab=False)
+        cls._solicitud(3, date(2025, 4, 11), cls.aprobada, 5, [])
+
+    @classmethod
+    def _solicitud(cls, solicitud_id, fecha, estado, asistentes, objetos, lab=True):
+        solicitud = Solicitudes.objects.create(
+            Solicitud_Id=solicitud_id,
+            Fecha_solicitud=fecha,
+            Asignatura='Redes I',
+            N_asistentes=asistentes,
+            Fecha_Inicio=fecha,
+            Fecha_Fin=fecha,
+            Usuario_Id=cls.usuario,
+            Tipo_Servicio_Id=cls.servicio,
+            Estado_Id=estado,
+            Laboratorio_Id=cls.lab if lab else None,
+        )
+        for objeto, cantidad in objetos:
+            Solicitudes_Objetos.objects.create(Solicitud_Id=solicitud, Objetos_Id=objeto, Cantidad_Objetos=cantidad)
+        return solicitud
+
+    def setUp(self):
+        self.ruta = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.ruta, ignore_errors=True)
+
+    def _totales(self, motor, dimension, medida='solicitudes', **filtros):
+        return {fila[dimension]: fila[medida] for fila in motor.agrupar([dimension], medida=medida, **filtros)}
+
+    def test_agrupar(self):
+        meta = exportar_snapshot(self.ruta, completo=True)
+        self.assertEqual((meta['filas'], meta['agregadas'], meta['marca_agua']), (3, 3, 3))
+        motor = MotorAnalitico(self.ruta)
+
+        self.assertEqual(self._totales(motor, 'estado'), {'Aprobada': 2, 'Pendiente': 1})
+        self.assertEqual(self._totales(motor, 'estado', 'asistentes'), {'Aprobada': 15, 'Pendiente': 4})
+        self.assertEqual(self._totales(motor, 'laboratorio'), {'Redes': 2, None: 1})
+        self.assertEqual(self._totales(motor, 'facultad'), {'Ingeniería': 3})
+        self.assertEqual(self._totales(motor, 'mes'), {'2025-03': 1, '2025-04': 2})
+        self.assertEqual(self._totales(motor, 'mes', fecha_desde=date(2025, 4, 1), estado=2), {'2025-04': 1})
+        self.assertEqual(self._totales(motor, 'objeto', 'unidades'), {'Osciloscopio': 3, 'Fuente': 1})
+        with self.assertRaises(ValueError):
+            motor.agrupar(['usuario'])
+
+    def test_agrupar_por_objeto_cuenta_cada_solicitud_una_vez(self):
+        exportar_snapshot(self.ruta, completo=True)
+        motor = MotorAnalitico(self.ruta)
+
+        # La primera solicitud tiene dos objetos de la misma categoría
+        self.assertEqual(self._totales(motor, 'categoria'), {'Electrónica': 2})
+        self.assertEqual(self._totales(motor, 'categoria', 'asistentes'), {'Electrónica': 14})
+        self.assertEqual(self._totales(motor, 'categoria', 'unidades'), {'Electrónica': 4})
+
+    def test_exportacion_incremental(self):
+        exportar_snapshot(self.ruta, completo=True)
+        motor_anterior = MotorAnalitico(self.ruta)
+
+        self._solicitud(4, date(2025, 4, 12), self.aprobada, 8, [(self.fuente, 2)])
+        # Los cambios en solicitudes ya exportadas solo entran con una exportación completa
+        Solicitudes.objects.filter(pk=self.primera.pk).update(Estado_Id=self.pendiente)
+
+        meta = exportar_snapshot(self.ruta)
+        self.assertEqual((meta['filas'], meta['agregadas'], meta['marca_agua']), (4, 1, 4))
+        motor = MotorAnalitico(self.ruta)
+        self.assertEqual(self._totales(motor, 'estado'), {'Aprobada': 3, 'Pendiente': 1})
+        self.assertEqual(self._totales(motor, 'objeto', 'unidades'), {'Osciloscopio': 3, 'Fuente': 3})
+        # Un motor abierto sigue leyendo su versión
+        self.assertEqual(self._totales(motor_anterior, 'estado'), {'Aprobada': 2, 'Pendiente': 1})
+
+        meta = exportar_snapshot(self.ruta, completo=True)
+        self.assertEqual((meta['filas'], meta['agregadas']), (4, 4))
+        self.assertEqual(self._totales(MotorAnalitico(self.ruta), 'estado'), {'Aprobada': 2, 'Pendiente': 2})
+
+        # Solo se conservan las últimas versiones y 'actual' apunta a la más reciente
+        versiones = sorted(os.listdir(os.path.join(self.ruta, DIRECTORIO_VERSIONES)))
+        self.assertEqual(len(versiones), 2)
+        self.assertEqual(
+            os.path.realpath(os.path.join(self.ruta, ENLACE_ACTUAL)),
+            os.path.realpath(os.path.join(self.ruta, DIRECTORIO_VERSIONES, versiones[-1])),
+        )
+
+    def test_sin_snapshot(self):
+        with self.assertRaises(SnapshotNoDisponible):
+            MotorAnalitico(self.ruta)
@@ -1,7 +1,7 @@
 # reportes/urls.py
 
 from django.urls import path
-from . import views
+from . import views, views_async
 
 app_name = 'reportes'
 
@@ -10,10 +10,20 @@ urlpatterns = [
     path('actividad-mensual/', views.obtener_actividad_mensual, name='actividad-mensual'),
     path('distribucion-programas/', views.obtener_distribucion_programas, name='distribucion-programas'),
     path('equipos-mas-usados/', views.obtener_equipos_mas_usados, name='equipos-mas-usados'),
+    path('utilizacion-equipos/', views.obtener_utilizacion_equipos, name='utilizacion-equipos'),
+    path('ocupacion-laboratorios/', views.obtener_ocupacion_laboratorios, name='ocupacion-laboratorios'),
     path('historial/', views.obtener_historial, name='historial'),
+    path('dashboard/', views.obtener_dashboard, name='dashboard'),
     
     # === AÑADE ESTA LÍNEA ===
     path('entregas-devoluciones/', views.obtener_entregas_devoluciones, name='entregas-devoluciones'),
     
     path('exportar/', views.exportar_reporte, name='exportar-reporte'),
+    path('exportar/<str:trabajo>/', views.descargar_reporte, name='descargar-reporte'),
+    path('analitica/', views.obtener_analitica, name='analitica'),
+    path('cache/estadisticas/', views.obtener_estadisticas_cache, name='estadisticas-cache'),
+
+    # Versiones async (ASGI) de los reportes de lectura
+    path('async/dashboard/', views_async.obtener_dashboard, name='dashboard-async'),
+    path('async/<str:reporte>/', views_async.obtener_reporte, name='reporte-async'),
 ]
\ No newline at end of file
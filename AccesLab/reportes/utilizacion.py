@@ -0,0 +1,309 @@
+# ==============================================================================
+# REPORTES/UTILIZACION.PY - Utilización real de equipos por ventana de tiempo
+# ==============================================================================
+# Cada línea de Solicitudes_Objetos ocupa `Cantidad_Objetos` unidades desde
+# Fecha_Inicio + hora de Hora_Inicio hasta Fecha_Fin + hora de Hora_Fin de su
+# solicitud. Sin horas, la ocupación cubre los días completos.
+#
+# Los intervalos se convierten a horas (float) desde el inicio del rango y se
+# acumulan con NumPy, sin recorrer hora por hora:
+# - Totales por objeto: bincount de la duración de cada intervalo; las horas
+#   ociosas salen de la unión de los intervalos (barrido), sin matriz por hora
+# - Series: arreglo de diferencias (+q al entrar, -q al salir) y cumsum, con
+#   bincount de pesos fraccionarios para las horas (o días) parciales. Solo se
+#   arma la matriz si se pide la serie; la horaria se limita a DIAS_SERIE_HORA
+# - Concurrencia pico: barrido de eventos ordenados por (objeto, instante, salida
+#   antes que entrada) con una sola suma acumulada
+#
+# Las unidades de cada objeto son las mismas que usa reservas/disponibilidad.py:
+# Cant_Stock (en estante) más las entregadas sin devolver (En Uso). La
+# utilización y `excede_stock` se miden contra ese total, no contra el estante.
+
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from maestros.models import Objetos
+from reservas.estados import ESTADOS_PRESTAMO_ACTIVO, ESTADOS_SIN_USO, ids_estados
+from reservas.models import Solicitudes_Objetos
+
+from .cache import reporte_cacheado
+
+
+# Rango máximo consultable (días)
+DIAS_MAXIMOS = 731
+DIAS_POR_DEFECTO = 30
+# Rango máximo de la serie horaria: una columna por hora y objeto
+DIAS_SERIE_HORA = 31
+
+SERIES = ('dia', 'hora')
+
+
+def _hora_del_dia(valor):
+    """Hora del día (en horas, float) de un DateTimeField; None si no hay hora."""
+    if valor is None:
+        return None
+    if timezone.is_aware(valor):
+        valor = timezone.localtime(valor)
+    return valor.hour + valor.minute / 60 + valor.second / 3600
+
+
+def lineas_en_uso(fecha_desde=None, fecha_hasta=None):
+    """
+    Solicitudes_Objetos que ocupan equipos dentro del rango: con Fecha_Inicio,
+    fuera de ESTADOS_SIN_USO y cuyo intervalo toca [fecha_desde, fecha_hasta].
+    """
+    query = Solicitudes_Objetos.objects.filter(
+        Solicitud_Id__Fecha_Inicio__isnull=False
+    ).exclude(
+        Solicitud_Id__Estado_Id__in=ids_estados(ESTADOS_SIN_USO)
+    )
+    if fecha_hasta:
+        query = query.filter(Solicitud_Id__Fecha_Inicio__lte=fecha_hasta)
+    if fecha_desde:
+        # Fecha_Fin nula: la solicitud dura solo su día de inicio
+        query = query.filter(
+            Q(Solicitud_Id__Fecha_Fin__gte=fecha_desde)
+            | Q(Solicitud_Id__Fecha_Fin__isnull=True, Solicitud_Id__Fecha_Inicio__gte=fecha_desde)
+        )
+    return query
+
+
+def cargar_intervalos(fecha_desde=None, fecha_hasta=None, objetos_ids=None):
+    """
+    Retorna (objeto_id, cantidad, inicio, fin) como arreglos NumPy; inicio y fin
+    en horas desde el 1970-01-01 (float64). Solo intervalos que tocan el rango.
+    """
+    query = lineas_en_uso(fecha_desde, fecha_hasta)
+    if objetos_ids:
+        query = query.filter(Objetos_Id__in=objetos_ids)
+
+    filas = query.values_list(
+        'Objetos_Id', 'Cantidad_Objetos',
+        'Solicitud_Id__Fecha_Inicio', 'Solicitud_Id__Fecha_Fin',
+        'Solicitud_Id__Hora_Inicio', 'Solicitud_Id__Hora_Fin',
+    )
+
+    epoca = date(1970, 1, 1)
+    objeto, cantidad, inicio, fin = [], [], [], []
+    for objeto_id, cant, f_ini, f_fin, h_ini, h_fin in filas.iterator(chunk_size=5000):
+        f_fin = f_fin or f_ini
+        hora_ini = _hora_del_dia(h_ini)
+        hora_fin = _hora_del_dia(h_fin)
+        ini = (f_ini - epoca).days * 24 + (hora_ini if hora_ini is not None else 0)
+        fi = (f_fin - epoca).days * 24 + (hora_fin if hora_fin is not None else 24)
+        if fi <= ini or not cant:
+            continue
+        objeto.append(objeto_id)
+        cantidad.append(cant)
+        inicio.append(ini)
+        fin.append(fi)
+
+    return (
+        np.asarray(objeto, dtype=np.int64),
+        np.asarray(cantidad, dtype=np.float64),
+        np.asarray(inicio, dtype=np.float64),
+        np.asarray(fin, dtype=np.float64),
+    )
+
+
+def horas_de_uso(fecha_desde=None, fecha_hasta=None, objetos_ids=None):
+    """{Objetos_Id: horas-unidad de uso} recortando los intervalos al rango."""
+    objeto, cantidad, inicio, fin = cargar_intervalos(fecha_desde, fecha_hasta, objetos_ids)
+    if not len(objeto):
+        return {}
+    epoca = date(1970, 1, 1)
+    if fecha_desde:
+        inicio = np.maximum(inicio, (fecha_desde - epoca).days * 24)
+    if fecha_hasta:
+        fin = np.minimum(fin, ((fecha_hasta - epoca).days + 1) * 24)
+    duracion = np.clip(fin - inicio, 0, None) * cantidad
+
+    ids, codigos = np.unique(objeto, return_inverse=True)
+    horas = np.bincount(codigos, weights=duracion, minlength=len(ids))
+    return {int(i): float(h) for i, h in zip(ids, horas)}
+
+
+def unidades_prestadas(objetos_ids=None):
+    """{Objetos_Id: unidades entregadas sin devolver} (fuera de Cant_Stock) con una consulta."""
+    query = Solicitudes_Objetos.objects.filter(Solicitud_Id__Estado_Id__in=ids_estados(ESTADOS_PRESTAMO_ACTIVO))
+    if objetos_ids:
+        query = query.filter(Objetos_Id__in=objetos_ids)
+    return dict(query.values('Objetos_Id').annotate(total=Sum('Cantidad_Objetos')).values_list('Objetos_Id', 'total'))
+
+
+def ocupacion_por_hora(codigos, cantidad, inicio, fin, n_objetos, n_horas):
+    """
+    Matriz (n_objetos, n_horas) con las horas-unidad ocupadas en cada hora.
+    `inicio` y `fin` ya están recortados a [0, n_horas].
+    """
+    ancho = n_horas + 1
+    base = codigos * ancho
+
+    piso_ini = np.floor(inicio).astype(np.int64)
+    techo_ini = np.ceil(inicio).astype(np.int64)
+    piso_fin = np.floor(fin).astype(np.int64)
+
+    # Horas completas [techo_ini, piso_fin)
+    completas = techo_ini < piso_fin
+    diferencias = (
+        np.bincount(base[completas] + techo_ini[completas], weights=cantidad[completas], minlength=n_objetos * ancho)
+        - np.bincount(base[completas] + piso_fin[completas], weights=cantidad[completas], minlength=n_objetos * ancho)
+    )
+    matriz = np.cumsum(diferencias.reshape(n_objetos, ancho), axis=1)[:, :n_horas]
+
+    # Fracciones al inicio y al fin (o todo el intervalo si cae en una sola hora)
+    misma_hora = piso_ini == piso_fin
+    parciales = np.zeros(n_objetos * ancho)
+    parciales += np.bincount(
+        base[misma_hora] + piso_ini[misma_hora],
+        weights=(cantidad * (fin - inicio))[misma_hora], minlength=n_objetos * ancho
+    )
+    otras = ~misma_hora
+    parciales += np.bincount(
+        base[otras] + piso_ini[otras],
+        weights=(cantidad * (techo_ini - inicio))[otras], minlength=n_objetos * ancho
+    )
+    parciales += np.bincount(
+        base[otras] + piso_fin[otras],
+        weights=(cantidad * (fin - piso_fin))[otras], minlength=n_objetos * ancho
+    )
+    return matriz + parciales.reshape(n_objetos, ancho)[:, :n_horas]
+
+
+def horas_cubiertas(codigos, inicio, fin, n_objetos):
+    """
+    Horas del rango (índices enteros) en que cada objeto tiene alguna unidad en
+    uso: unión de los tramos [piso(inicio), techo(fin)) por objeto.
+    """
+    cubiertas = np.zeros(n_objetos, dtype=np.int64)
+    if not len(codigos):
+        return cubiertas
+
+    objeto = np.concatenate([codigos, codigos])
+    instante = np.concatenate([np.floor(inicio), np.ceil(fin)]).astype(np.int64)
+    delta = np.concatenate([np.ones(len(codigos), dtype=np.int64), -np.ones(len(codigos), dtype=np.int64)])
+    orden = np.lexsort((delta, instante, objeto))
+    objeto, instante = objeto[orden], instante[orden]
+    nivel = np.cumsum(delta[orden])
+
+    # Cada tramo entre dos eventos consecutivos del mismo objeto cuenta si hay
+    # al menos un intervalo abierto
+    abierto = (nivel[:-1] > 0) & (objeto[1:] == objeto[:-1])
+    np.add.at(cubiertas, objeto[:-1][abierto], (instante[1:] - instante[:-1])[abierto])
+    return cubiertas
+
+
+def concurrencia_pico(codigos, cantidad, inicio, fin, n_objetos):
+    """(pico de unidades simultáneas, instante del pico en horas) por objeto."""
+    picos = np.zeros(n_objetos)
+    instantes = np.full(n_objetos, np.nan)
+    if not len(codigos):
+        return picos, instantes
+
+    objeto = np.concatenate([codigos, codigos])
+    instante = np.concatenate([inicio, fin])
+    delta = np.concatenate([cantidad, -cantidad])
+    # Orden: objeto, instante y salidas (-q) antes que entradas (+q) en el mismo instante
+    orden = np.lexsort((delta, instante, objeto))
+    objeto, instante = objeto[orden], instante[orden]
+    # Cada objeto suma cero, así que la suma acumulada global se "reinicia" sola
+    nivel = np.cumsum(delta[orden])
+
+    inicios_grupo = np.flatnonzero(np.r_[True, objeto[1:] != objeto[:-1]])
+    maximos = np.maximum.reduceat(nivel, inicios_grupo)
+    presentes = objeto[inicios_grupo]
+    picos[presentes] = maximos
+
+    # Primer instante en que cada objeto alcanza su pico
+    en_pico = np.flatnonzero(nivel == picos[objeto])
+    _, idx = np.unique(objeto[en_pico], return_index=True)
+    instantes[objeto[en_pico][idx]] = instante[en_pico][idx]
+    return picos, instantes
+
+
+def _a_datetime(horas, desde):
+    return (datetime.combine(desde, time()) + timedelta(hours=float(horas))).isoformat(timespec='minutes')
+
+
+@reporte_cacheado('utilizacion_equipos')
+def calcular_utilizacion_equipos(fecha_desde=None, fecha_hasta=None, objetos_ids=None, serie=None):
+    """
+    Utilización por objeto entre fecha_desde y fecha_hasta (inclusive):
+    horas de uso, % de utilización frente a las unidades del objeto
+    (Cant_Stock + entregadas sin devolver), pico de unidades simultáneas,
+    horas ociosas (sin ninguna unidad en uso) y, si se pide, la serie diaria
+    u horaria.
+    """
+    hoy = timezone.localdate()
+    fecha_hasta = fecha_hasta or hoy
+    fecha_desde = fecha_desde or fecha_hasta - timedelta(days=DIAS_POR_DEFECTO - 1)
+    if fecha_desde > fecha_hasta:
+        raise ValueError('fecha_desde debe ser anterior o igual a fecha_hasta')
+    n_dias = (fecha_hasta - fecha_desde).days + 1
+    if n_dias > DIAS_MAXIMOS:
+        raise ValueError(f'El rango no puede superar {DIAS_MAXIMOS} días')
+    if serie not in (None, '') and serie not in SERIES:
+        raise ValueError('El parámetro "serie" debe ser dia u hora')
+    if serie == 'hora' and n_dias > DIAS_SERIE_HORA:
+        raise ValueError(f'La serie horaria no puede superar {DIAS_SERIE_HORA} días')
+    n_horas = n_dias * 24
+
+    objetos = Objetos.objects.order_by('Objetos_Id')
+    if objetos_ids:
+        objetos = objetos.filter(Objetos_Id__in=objetos_ids)
+    catalogo = list(objetos.values_list('Objetos_Id', 'Nombre_Objetos', 'Cant_Stock'))
+    ids = np.asarray([o[0] for o in catalogo], dtype=np.int64)
+    prestadas = unidades_prestadas(objetos_ids)
+    unidades = np.asarray([(o[2] or 0) + (prestadas.get(o[0]) or 0) for o in catalogo], dtype=np.float64)
+    n_objetos = len(ids)
+
+    objeto, cantidad, inicio, fin = cargar_intervalos(fecha_desde, fecha_hasta, objetos_ids)
+
+    # Horas relativas al inicio del rango, recortadas a [0, n_horas]
+    origen = (fecha_desde - date(1970, 1, 1)).days * 24
+    inicio = np.clip(inicio - origen, 0, n_horas)
+    fin = np.clip(fin - origen, 0, n_horas)
+    validos = (fin > inicio) & np.isin(objeto, ids)
+    codigos = np.searchsorted(ids, objeto[validos])
+    cantidad, inicio, fin = cantidad[validos], inicio[validos], fin[validos]
+
+    picos, instantes = concurrencia_pico(codigos, cantidad, inicio, fin, n_objetos)
+    horas_uso = np.bincount(codigos, weights=cantidad * (fin - inicio), minlength=n_objetos)
+    capacidad = unidades * n_horas
+    horas_ociosas = n_horas - horas_cubiertas(codigos, inicio, fin, n_objetos)
+
+    series = None
+    if serie == 'dia':
+        # Misma acumulación con días como unidad: q×24 horas por día completo
+        series = ocupacion_por_hora(codigos, cantidad * 24, inicio / 24, fin / 24, n_objetos, n_dias)
+    elif serie == 'hora':
+        series = ocupacion_por_hora(codigos, cantidad, inicio, fin, n_objetos, n_horas)
+
+    resultado = []
+    for i, (objeto_id, nombre, cant_stock) in enumerate(catalogo):
+        fila = {
+            'objeto_id': objeto_id,
+            'equipo': nombre,
+            'cant_stock': cant_stock or 0,
+            'unidades': int(unidades[i]),
+            'horas_uso': round(float(horas_uso[i]), 2),
+            'utilizacion_pct': round(float(horas_uso[i] / capacidad[i] * 100), 2) if capacidad[i] > 0 else None,
+            'pico_concurrente': int(round(picos[i])),
+            'pico_en': _a_datetime(instantes[i], fecha_desde) if not np.isnan(instantes[i]) else None,
+            'excede_stock': bool(picos[i] > unidades[i]),
+            'horas_ociosas': int(horas_ociosas[i]),
+        }
+        if series is not None:
+            fila['serie'] = np.round(series[i], 2).tolist()
+        resultado.append(fila)
+
+    resultado.sort(key=lambda item: item['horas_uso'], reverse=True)
+    return {
+        'fecha_desde': fecha_desde.isoformat(),
+        'fecha_hasta': fecha_hasta.isoformat(),
+        'horas_rango': n_horas,
+        'equipos': resultado,
+    }
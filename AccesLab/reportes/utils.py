@@ -1,5 +1,18 @@
 # reportes/utils.py
-# Archivo nuevo con utilidades para generar reportes
+# Utilidades para generar reportes en PDF
+# - Estilos de párrafo y de tabla precalculados a nivel de módulo (se crean una vez)
+# - El PDF se construye en memoria (BytesIO): sin archivos temporales ni colisiones
+# - El historial se divide en bloques de tabla para no partir una tabla enorme
+# - Pool de hilos acotado para los trabajos de reporte (datos) y pool de
+#   procesos para el renderizado, fuera del ciclo del request
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from io import BytesIO
 
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
@@ -7,58 +20,148 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from datetime import datetime
-import os
 from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# ESTILOS COMPARTIDOS
+# ========================================
+styles = getSampleStyleSheet()
+
+title_style = ParagraphStyle(
+    'CustomTitle',
+    parent=styles['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2C3E50'),
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
+heading_style = ParagraphStyle(
+    'CustomHeading',
+    parent=styles['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#4FC3C3'),
+    spaceAfter=12,
+    spaceBefore=12
+)
+
+KPIS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+ACTIVIDAD_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+PROGRAMAS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
 
+EQUIPOS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),
+    ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+    ('ALIGN', (2, 0), (2, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+HISTORIAL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightcyan),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+])
+
+KPIS_COL_WIDTHS = [3*inch, 2*inch]
+ACTIVIDAD_COL_WIDTHS = [2*inch, 1.5*inch, 1.5*inch]
+PROGRAMAS_COL_WIDTHS = [3*inch, 1*inch, 1*inch]
+EQUIPOS_COL_WIDTHS = [0.5*inch, 3.5*inch, 1*inch]
+HISTORIAL_COL_WIDTHS = [1.3*inch, 1*inch, 1.5*inch, 1.2*inch]
+
+# Filas de historial por tabla: cada bloque se maqueta por separado, así el
+# costo crece linealmente con el número de filas en vez de partir una sola tabla
+HISTORIAL_FILAS_POR_BLOQUE = 40
+HISTORIAL_ENCABEZADO = ['Fecha', 'Tipo', 'Usuario', 'Estado']
+
+
+def _sin_datos():
+    return Paragraph("No hay datos disponibles", styles['Normal'])
+
+
+def _bloques_historial(historial_data):
+    """Genera una tabla por cada HISTORIAL_FILAS_POR_BLOQUE filas del historial."""
+    for inicio in range(0, len(historial_data), HISTORIAL_FILAS_POR_BLOQUE):
+        filas = [HISTORIAL_ENCABEZADO]
+        for item in historial_data[inicio:inicio + HISTORIAL_FILAS_POR_BLOQUE]:
+            filas.append([
+                (item.get('fecha') or 'N/A')[:16],
+                item.get('tipo', 'N/A'),
+                (item.get('usuario') or 'N/A')[:20],
+                item.get('estado', 'N/A')
+            ])
+        tabla = Table(filas, colWidths=HISTORIAL_COL_WIDTHS, repeatRows=1)
+        tabla.setStyle(HISTORIAL_TABLE_STYLE)
+        yield tabla
 
-def generar_reporte_pdf(kpis_data, actividad_data, programas_data, equipos_data, historial_data):
+
+def generar_reporte_pdf(kpis_data, actividad_data, programas_data, equipos_data, historial_data, destino=None):
     """
-    Genera un PDF completo con todos los datos del reporte
+    Genera un PDF completo con todos los datos del reporte.
+    Si `destino` es un objeto tipo archivo, el PDF se escribe ahí; si no,
+    se retornan los bytes del documento.
     """
-    # Crear directorio si no existe
-    reportes_dir = os.path.join(settings.MEDIA_ROOT, 'reportes')
-    os.makedirs(reportes_dir, exist_ok=True)
-    
-    # Nombre del archivo
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f'reporte_{timestamp}.pdf'
-    filepath = os.path.join(reportes_dir, filename)
-    
+    buffer = destino if destino is not None else BytesIO()
+    generado = datetime.now().strftime('%d/%m/%Y %H:%M')
+
     # Crear documento
-    doc = SimpleDocTemplate(filepath, pagesize=A4)
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
     elements = []
-    styles = getSampleStyleSheet()
-    
-    # Estilos personalizados
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#4FC3C3'),
-        spaceAfter=12,
-        spaceBefore=12
-    )
-    
+
     # Título principal
     elements.append(Paragraph("Reporte AccesLab", title_style))
-    elements.append(Paragraph(f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
+    elements.append(Paragraph(f"Generado: {generado}", styles['Normal']))
     elements.append(Spacer(1, 0.3*inch))
-    
+
     # ========================================
     # SECCIÓN 1: KPIs
     # ========================================
     elements.append(Paragraph("📊 Indicadores Clave (KPIs)", heading_style))
-    
+
     kpis_table_data = [
         ['Métrica', 'Valor'],
         ['Usuarios Activos', str(kpis_data.get('usuarios_activos', 0))],
@@ -67,27 +170,18 @@ def generar_reporte_pdf(kpis_data, actividad_data, programas_data, equipos_data,
         ['Equipos Fuera de Servicio', str(kpis_data.get('equipos_fuera_servicio', 0))],
         ['Comparación', kpis_data.get('comparacion_mes_anterior', 'N/A')],
     ]
-    
-    kpis_table = Table(kpis_table_data, colWidths=[3*inch, 2*inch])
-    kpis_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
+
+    kpis_table = Table(kpis_table_data, colWidths=KPIS_COL_WIDTHS)
+    kpis_table.setStyle(KPIS_TABLE_STYLE)
+
     elements.append(kpis_table)
     elements.append(Spacer(1, 0.3*inch))
-    
+
     # ========================================
     # SECCIÓN 2: Actividad Mensual
     # ========================================
     elements.append(Paragraph("📈 Actividad Mensual", heading_style))
-    
+
     if actividad_data:
         actividad_table_data = [['Mes', 'Reservas', 'Préstamos']]
         for item in actividad_data:
@@ -96,132 +190,205 @@ def generar_reporte_pdf(kpis_data, actividad_data, programas_data, equipos_data,
                 str(item.get('reservas', 0)),
                 str(item.get('prestamos', 0))
             ])
-        
-        actividad_table = Table(actividad_table_data, colWidths=[2*inch, 1.5*inch, 1.5*inch])
-        actividad_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
+
+        actividad_table = Table(actividad_table_data, colWidths=ACTIVIDAD_COL_WIDTHS)
+        actividad_table.setStyle(ACTIVIDAD_TABLE_STYLE)
+
         elements.append(actividad_table)
     else:
-        elements.append(Paragraph("No hay datos disponibles", styles['Normal']))
-    
+        elements.append(_sin_datos())
+
     elements.append(Spacer(1, 0.3*inch))
-    
+
     # ========================================
     # SECCIÓN 3: Distribución por Programas
     # ========================================
     elements.append(Paragraph("🎓 Distribución por Programas", heading_style))
-    
+
     if programas_data:
         programas_table_data = [['Programa', 'Cantidad', 'Porcentaje']]
         for item in programas_data[:10]:  # Top 10
             programas_table_data.append([
-                item.get('programa', 'N/A')[:30],  # Truncar si es muy largo
+                (item.get('programa') or 'N/A')[:30],  # Truncar si es muy largo
                 str(item.get('cantidad', 0)),
                 f"{item.get('porcentaje', 0)}%"
             ])
-        
-        programas_table = Table(programas_table_data, colWidths=[3*inch, 1*inch, 1*inch])
-        programas_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
+
+        programas_table = Table(programas_table_data, colWidths=PROGRAMAS_COL_WIDTHS)
+        programas_table.setStyle(PROGRAMAS_TABLE_STYLE)
+
         elements.append(programas_table)
     else:
-        elements.append(Paragraph("No hay datos disponibles", styles['Normal']))
-    
+        elements.append(_sin_datos())
+
     elements.append(PageBreak())
-    
+
     # ========================================
     # SECCIÓN 4: Equipos Más Usados
     # ========================================
     elements.append(Paragraph("🔧 Equipos Más Utilizados", heading_style))
-    
+
     if equipos_data:
         equipos_table_data = [['#', 'Equipo', 'Horas de Uso']]
         for idx, item in enumerate(equipos_data[:10], 1):
             equipos_table_data.append([
                 str(idx),
-                item.get('equipo', 'N/A')[:40],
+                (item.get('equipo') or 'N/A')[:40],
                 str(item.get('horas', 0))
             ])
-        
-        equipos_table = Table(equipos_table_data, colWidths=[0.5*inch, 3.5*inch, 1*inch])
-        equipos_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2C3E50')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (0, -1), 'CENTER'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('ALIGN', (2, 0), (2, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
+
+        equipos_table = Table(equipos_table_data, colWidths=EQUIPOS_COL_WIDTHS)
+        equipos_table.setStyle(EQUIPOS_TABLE_STYLE)
+
         elements.append(equipos_table)
     else:
-        elements.append(Paragraph("No hay datos disponibles", styles['Normal']))
-    
+        elements.append(_sin_datos())
+
     elements.append(Spacer(1, 0.3*inch))
-    
+
     # ========================================
-    # SECCIÓN 5: Historial (últimos 20)
+    # SECCIÓN 5: Historial
     # ========================================
-    elements.append(Paragraph("📜 Historial Reciente (Últimas 20 actividades)", heading_style))
-    
+    elements.append(Paragraph(f"📜 Historial Reciente ({len(historial_data or [])} actividades)", heading_style))
+
     if historial_data:
-        historial_table_data = [['Fecha', 'Tipo', 'Usuario', 'Estado']]
-        for item in historial_data[:20]:
-            historial_table_data.append([
-                item.get('fecha', 'N/A')[:16],
-                item.get('tipo', 'N/A'),
-                item.get('usuario', 'N/A')[:20],
-                item.get('estado', 'N/A')
-            ])
-        
-        historial_table = Table(historial_table_data, colWidths=[1.3*inch, 1*inch, 1.5*inch, 1.2*inch])
-        historial_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4FC3C3')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightcyan),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-        
-        elements.append(historial_table)
+        elements.extend(_bloques_historial(historial_data))
     else:
-        elements.append(Paragraph("No hay datos disponibles", styles['Normal']))
-    
+        elements.append(_sin_datos())
+
     # Pie de página
     elements.append(Spacer(1, 0.5*inch))
     elements.append(Paragraph(
-        f"Reporte generado por AccesLab - {datetime.now().strftime('%d/%m/%Y %H:%M')}",
+        f"Reporte generado por AccesLab - {generado}",
         styles['Normal']
     ))
-    
+
     # Construir PDF
     doc.build(elements)
-    
-    # Retornar la ruta relativa para la URL
-    return f'/media/reportes/{filename}'
\ No newline at end of file
+
+    if destino is not None:
+        return destino
+    return buffer.getvalue()
+
+
+# ========================================
+# TRABAJOS DE REPORTE EN SEGUNDO PLANO
+# ========================================
+# Dos etapas por trabajo:
+# - Un pool de hilos pequeño y acotado por proceso recoge los datos: son
+#   consultas (esperan a la base sin retener el GIL) y usan las conexiones y
+#   la caché de Django del worker. Con todos los cupos ocupados (hilos + cola)
+#   se rechaza el trabajo en vez de encolarlo sin límite
+# - La maquetación de reportlab es CPU pura y retiene el GIL: en un hilo
+#   frenaría a todos los requests del worker. Se envía a un pool de procesos
+#   (REPORTES_PDF_PROCESOS) con datos simples (dicts/listas picklables). Los
+#   procesos salen de un forkserver, no de un fork del worker web con sus
+#   hilos y conexiones abiertas; un pool roto (proceso muerto) se reemplaza
+# El estado de cada trabajo se guarda en la caché compartida, así cualquier
+# worker puede servir la descarga (reportes/views.py).
+HILOS_POR_DEFECTO = 2
+COLA_POR_DEFECTO = 4
+PROCESOS_POR_DEFECTO = 2
+
+_pool = None
+_cupos = None
+_procesos = None
+_pool_lock = threading.Lock()
+
+
+class ReportesSaturados(Exception):
+    """No hay cupo para otro trabajo de reporte en este proceso."""
+
+
+def obtener_pool():
+    """Pool y semáforo de cupos compartidos por el proceso; se crean al primer uso."""
+    global _pool, _cupos
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                hilos = getattr(settings, 'REPORTES_PDF_HILOS', HILOS_POR_DEFECTO)
+                _cupos = threading.BoundedSemaphore(
+                    hilos + getattr(settings, 'REPORTES_PDF_COLA', COLA_POR_DEFECTO)
+                )
+                _pool = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='reportes-pdf')
+    return _pool
+
+
+def _cerrar_conexiones_vencidas():
+    for conexion in connections.all(initialized_only=True):
+        conexion.close_if_unusable_or_obsolete()
+
+
+def _ejecutar(funcion, args):
+    _cerrar_conexiones_vencidas()
+    try:
+        return funcion(*args)
+    finally:
+        _cerrar_conexiones_vencidas()
+
+
+def encolar_trabajo(funcion, *args):
+    """
+    Ejecuta funcion(*args) en el pool de reportes y retorna su Future.
+    Lanza ReportesSaturados si no quedan cupos.
+    """
+    pool = obtener_pool()
+    if not _cupos.acquire(blocking=False):
+        raise ReportesSaturados('Hay demasiados reportes en proceso, intente más tarde')
+    try:
+        futuro = pool.submit(_ejecutar, funcion, args)
+    except BaseException:
+        _cupos.release()
+        raise
+    futuro.add_done_callback(lambda _: _cupos.release())
+    return futuro
+
+
+def renderizar(datos):
+    """
+    Bytes del PDF a partir de un dict con las llaves kpis, actividad,
+    programas, equipos e historial.
+    """
+    return generar_reporte_pdf(
+        datos.get('kpis') or {},
+        datos.get('actividad') or [],
+        datos.get('programas') or [],
+        datos.get('equipos') or [],
+        datos.get('historial') or [],
+    )
+
+
+def obtener_pool_procesos():
+    """Pool de procesos del renderizado; se crea al primer uso."""
+    global _procesos
+    if _procesos is None:
+        with _pool_lock:
+            if _procesos is None:
+                _procesos = ProcessPoolExecutor(
+                    max_workers=getattr(settings, 'REPORTES_PDF_PROCESOS', PROCESOS_POR_DEFECTO),
+                    mp_context=multiprocessing.get_context('forkserver'),
+                )
+    return _procesos
+
+
+def _descartar_pool_procesos(pool):
+    global _procesos
+    with _pool_lock:
+        if _procesos is pool:
+            _procesos = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def renderizar_en_proceso(datos):
+    """
+    renderizar(datos) en el pool de procesos; bloquea el hilo del trabajo
+    hasta tener los bytes. Si un proceso murió, se reintenta una vez con un
+    pool nuevo (renderizar no tiene efectos secundarios).
+    """
+    pool = obtener_pool_procesos()
+    try:
+        return pool.submit(renderizar, datos).result()
+    except BrokenProcessPool:
+        logger.warning('El pool de procesos de PDF estaba roto; se crea uno nuevo')
+        _descartar_pool_procesos(pool)
+        return obtener_pool_procesos().submit(renderizar, datos).result()
@@ -1,20 +1,35 @@
 # ==============================================================================
 # REPORTES/VIEWS.PY - Optimizado con Mejor Manejo de Errores
 # ==============================================================================
+# Las vistas solo leen y validan parámetros; el cálculo (cacheado) vive en
+# reportes/calculos.py. Los módulos que usan numpy o reportlab se importan
+# dentro de su vista: el worker arranca sin cargarlos.
 
 # Imports de Django y DRF
-from django.db.models import Count, Sum, Q, F, Max, Avg, ExpressionWrapper, DurationField
+import logging
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-# Imports de tus Modelos
-from maestros.models import Objetos, Estados
-from usuarios.models import Usuarios
-from reservas.models import Solicitudes, Solicitudes_Objetos
+from usuarios.permissions import IsAdminUser
+
+from . import calculos
+from .cache import estadisticas
+from .dashboard import DashboardSaturado, calcular_dashboard
+
+logger = logging.getLogger(__name__)
+
+
+def _error_parametro(e):
+    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
 # ==============================================================================
@@ -31,49 +46,7 @@ def obtener_kpis(request):
     - Equipos fuera de servicio (Activo = False)
     """
     try:
-        hoy = timezone.now().date()
-        hace_30_dias = hoy - timedelta(days=30)
-        inicio_semana = hoy - timedelta(days=hoy.weekday())
-        
-        # Usuarios activos
-        usuarios_activos = Usuarios.objects.filter(
-            solicitudes_creadas__Fecha_solicitud__gte=hace_30_dias
-        ).distinct().count()
-        
-        # Préstamos activos (Estado APROBADA = 2)
-        prestamos_activos = Solicitudes.objects.filter(Estado_Id=2).count()
-        
-        # Reservas esta semana
-        reservas_semana = Solicitudes.objects.filter(
-            Fecha_solicitud__gte=inicio_semana,
-            Fecha_solicitud__lte=hoy
-        ).count()
-        
-        # Equipos fuera de servicio
-        equipos_fuera_servicio = Objetos.objects.filter(Activo=False).count()
-        
-        # Comparación con mes anterior
-        hace_60_dias = hoy - timedelta(days=60)
-        usuarios_mes_anterior = Usuarios.objects.filter(
-            solicitudes_creadas__Fecha_solicitud__gte=hace_60_dias,
-            solicitudes_creadas__Fecha_solicitud__lt=hace_30_dias
-        ).distinct().count()
-        
-        # Calcular diferencia porcentual
-        comparacion = "Sin datos del mes anterior"
-        if usuarios_mes_anterior > 0:
-            diferencia = ((usuarios_activos - usuarios_mes_anterior) / usuarios_mes_anterior) * 100
-            comparacion = f"{'+' if diferencia > 0 else ''}{diferencia:.1f}% vs mes anterior"
-        elif usuarios_activos > 0:
-            comparacion = "Primeros datos del sistema"
-        
-        return Response({
-            'usuarios_activos': usuarios_activos,
-            'prestamos_activos': prestamos_activos,
-            'reservas_semana': reservas_semana,
-            'equipos_fuera_servicio': equipos_fuera_servicio,
-            'comparacion_mes_anterior': comparacion
-        })
+        return Response(calculos.calcular_kpis())
         
     except Exception as e:
         return Response(
@@ -89,52 +62,15 @@ def obtener_kpis(request):
 @permission_classes([IsAuthenticated])
 def obtener_actividad_mensual(request):
     """
-    Actividad de los últimos N meses:
-    - Reservas por mes (Tipo_Servicio_Id = 21)
-    - Préstamos por mes (Tipo_Servicio_Id = 1)
+    Actividad de los últimos N meses calendario (parámetro: meses, default: 6).
+    Una serie por tipo de servicio, con ceros en los meses sin actividad.
     """
     try:
-        meses = int(request.GET.get('meses', 6))
-        fecha_inicio = timezone.now().date() - timedelta(days=meses * 30)
-        
-        # Agrupar por mes y tipo de servicio
-        actividad_mensual = Solicitudes.objects.filter(
-            Fecha_solicitud__gte=fecha_inicio
-        ).extra(
-            select={
-                'mes': "TO_CHAR(Fecha_solicitud, 'Mon')",
-                'mes_num': "EXTRACT(MONTH FROM Fecha_solicitud)",
-                'anio': "EXTRACT(YEAR FROM Fecha_solicitud)"
-            }
-        ).values('mes', 'mes_num', 'anio').annotate(
-            reservas=Count('Solicitud_Id', filter=Q(Tipo_Servicio_Id=21)),
-            prestamos=Count('Solicitud_Id', filter=Q(Tipo_Servicio_Id=1))
-        ).order_by('anio', 'mes_num')
+        meses = calculos.parametro_entero(request.GET.get('meses'), 'meses', 6)
+        return Response(calculos.calcular_actividad_mensual(meses=meses))
         
-        # Traducir meses
-        meses_es = {
-            'Jan': 'Ene', 'Feb': 'Feb', 'Mar': 'Mar', 'Apr': 'Abr',
-            'May': 'May', 'Jun': 'Jun', 'Jul': 'Jul', 'Aug': 'Ago',
-            'Sep': 'Sep', 'Oct': 'Oct', 'Nov': 'Nov', 'Dec': 'Dic'
-        }
-        
-        resultado = [
-            {
-                'mes': meses_es.get(item['mes'], item['mes']),
-                'reservas': item['reservas'],
-                'prestamos': item['prestamos'],
-                'anio': item['anio']
-            }
-            for item in actividad_mensual
-        ]
-        
-        return Response(resultado)
-        
-    except ValueError:
-        return Response(
-            {'error': 'El parámetro "meses" debe ser un número válido'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+    except ValueError as e:
+        return _error_parametro(e)
     except Exception as e:
         return Response(
             {'error': f'Error al obtener actividad mensual: {str(e)}'},
@@ -151,45 +87,19 @@ def obtener_distribucion_programas(request):
     """
     Distribución de solicitudes por programa académico.
     Filtros opcionales: fecha_desde, fecha_hasta
+    - reparto: principal (default) | fraccional (usuarios con varios programas)
+    - nivel: programa (default) | facultad
     """
     try:
-        fecha_desde = request.GET.get('fecha_desde')
-        fecha_hasta = request.GET.get('fecha_hasta')
-        
-        query = Solicitudes.objects.all()
-        
-        # Aplicar filtros
-        if fecha_desde:
-            query = query.filter(Fecha_solicitud__gte=fecha_desde)
-        if fecha_hasta:
-            query = query.filter(Fecha_solicitud__lte=fecha_hasta)
-        
-        # Agrupar por programa
-        distribucion = query.values(
-            programa_nombre=F('Usuario_Id__programas_asociados__Programa_Id__Nombre_Programa'),
-            programa_id=F('Usuario_Id__programas_asociados__Programa_Id__Programa_Id')
-        ).annotate(
-            cantidad=Count('Solicitud_Id')
-        ).filter(
-            cantidad__gt=0,
-            programa_nombre__isnull=False
-        ).order_by('-cantidad')
-        
-        # Calcular porcentajes
-        total = sum(item['cantidad'] for item in distribucion)
-        
-        resultado = [
-            {
-                'programa': item['programa_nombre'],
-                'programa_id': item['programa_id'],
-                'cantidad': item['cantidad'],
-                'porcentaje': round((item['cantidad'] / total * 100), 1) if total > 0 else 0
-            }
-            for item in distribucion
-        ]
-        
-        return Response(resultado)
-        
+        return Response(calculos.calcular_distribucion_programas(
+            fecha_desde=calculos.parametro_fecha(request.GET.get('fecha_desde'), 'fecha_desde'),
+            fecha_hasta=calculos.parametro_fecha(request.GET.get('fecha_hasta'), 'fecha_hasta'),
+            reparto=request.GET.get('reparto') or 'principal',
+            nivel=request.GET.get('nivel') or 'programa',
+        ))
+        
+    except ValueError as e:
+        return _error_parametro(e)
     except Exception as e:
         return Response(
             {'error': f'Error al obtener distribución por programas: {str(e)}'},
@@ -208,48 +118,14 @@ def obtener_equipos_mas_usados(request):
     Parámetros: limite (default: 10), fecha_desde, fecha_hasta
     """
     try:
-        limite = int(request.GET.get('limite', 10))
-        fecha_desde = request.GET.get('fecha_desde')
-        fecha_hasta = request.GET.get('fecha_hasta')
-        
-        query = Solicitudes_Objetos.objects.select_related('Objetos_Id')
-        
-        # Filtrar por fecha
-        if fecha_desde:
-            query = query.filter(Solicitud_Id__Fecha_solicitud__gte=fecha_desde)
-        if fecha_hasta:
-            query = query.filter(Solicitud_Id__Fecha_solicitud__lte=fecha_hasta)
-        
-        # Agrupar y sumar
-        equipos_usados = query.values(
-            equipo=F('Objetos_Id__Nombre_Objetos'),
-            objeto_id=F('Objetos_Id__Objetos_Id')
-        ).annotate(
-            total_usos=Sum('Cantidad_Objetos')
-        ).order_by('-total_usos')[:limite]
-        
-        equipos_lista = list(equipos_usados)
-        
-        # Calcular horas y porcentajes
-        max_horas = equipos_lista[0]['total_usos'] * 2 if equipos_lista else 1
-        
-        resultado = [
-            {
-                'equipo': item['equipo'],
-                'objeto_id': item['objeto_id'],
-                'horas': item['total_usos'] * 2,
-                'porcentaje_uso': round((item['total_usos'] * 2 / max_horas * 100), 1) if max_horas > 0 else 0
-            }
-            for item in equipos_lista
-        ]
-        
-        return Response(resultado)
-        
-    except ValueError:
-        return Response(
-            {'error': 'El parámetro "limite" debe ser un número válido'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return Response(calculos.calcular_equipos_mas_usados(
+            limite=calculos.parametro_entero(request.GET.get('limite'), 'limite', 10),
+            fecha_desde=calculos.parametro_fecha(request.GET.get('fecha_desde'), 'fecha_desde'),
+            fecha_hasta=calculos.parametro_fecha(request.GET.get('fecha_hasta'), 'fecha_hasta'),
+        ))
+        
+    except ValueError as e:
+        return _error_parametro(e)
     except Exception as e:
         return Response(
             {'error': f'Error al obtener equipos más usados: {str(e)}'},
@@ -268,72 +144,20 @@ def obtener_historial(request):
     Parámetros: limite (default: 50), fecha_desde, fecha_hasta, estado_id
     """
     try:
-        limite = request.GET.get('limite', '50')
-        fecha_desde = request.GET.get('fecha_desde')
-        fecha_hasta = request.GET.get('fecha_hasta')
-        estado_id = request.GET.get('estado_id')
-        
-        query = Solicitudes.objects.select_related(
-            'Usuario_Id',
-            'Estado_Id',
-            'Tipo_Servicio_Id',
-            'Laboratorio_Id'
-        ).prefetch_related('solicitudes_objetos_set__Objetos_Id')
-        
-        # Aplicar filtros
-        if fecha_desde:
-            query = query.filter(Fecha_solicitud__gte=fecha_desde)
-        if fecha_hasta:
-            query = query.filter(Fecha_solicitud__lte=fecha_hasta)
-        if estado_id:
-            query = query.filter(Estado_Id=estado_id)
-        
-        # Ordenar y limitar
-        query = query.order_by('-Fecha_solicitud', '-Solicitud_Id')
-        
         try:
-            limite_int = int(limite)
-            query = query[:limite_int]
+            limite = calculos.parametro_entero(request.GET.get('limite'), 'limite', 50)
         except ValueError:
-            pass  # Si no es número válido, no limitar
+            limite = None  # Si no es número válido, no limitar
         
-        # Construir respuesta
-        resultado = []
-        for solicitud in query:
-            # Determinar qué mostrar
-            equipo_lab = ''
-            if solicitud.Laboratorio_Id:
-                equipo_lab = solicitud.Laboratorio_Id.Nombre_Laboratorio
-            elif solicitud.Asignatura:
-                equipo_lab = solicitud.Asignatura
-            else:
-                primer_objeto = solicitud.solicitudes_objetos_set.first()
-                if primer_objeto:
-                    equipo_lab = primer_objeto.Objetos_Id.Nombre_Objetos
-            
-            # Fecha formateada
-            fecha_hora = solicitud.Fecha_solicitud.strftime('%Y-%m-%d %H:%M') if solicitud.Fecha_solicitud else 'N/A'
-            
-            # Tipo de actividad
-            tipo_actividad = 'Solicitud'
-            if solicitud.Tipo_Servicio_Id:
-                if solicitud.Tipo_Servicio_Id.Tipo_Servicio_Id == 21:
-                    tipo_actividad = 'Reserva'
-                elif solicitud.Tipo_Servicio_Id.Tipo_Servicio_Id == 1:
-                    tipo_actividad = 'Préstamo'
-            
-            resultado.append({
-                'id': solicitud.Solicitud_Id,
-                'fecha': fecha_hora,
-                'tipo': tipo_actividad,
-                'usuario': f"{solicitud.Usuario_Id.Nombres} {solicitud.Usuario_Id.Apellido1}",
-                'equipo': equipo_lab,
-                'estado': solicitud.Estado_Id.Nombre_Estado if solicitud.Estado_Id else 'Pendiente',
-                'solicitud_id': solicitud.Solicitud_Id
-            })
-        
-        return Response(resultado)
+        return Response(calculos.calcular_historial(
+            limite=limite,
+            fecha_desde=calculos.parametro_fecha(request.GET.get('fecha_desde'), 'fecha_desde'),
+            fecha_hasta=calculos.parametro_fecha(request.GET.get('fecha_hasta'), 'fecha_hasta'),
+            estado_id=request.GET.get('estado_id'),
+        ))
         
+    except ValueError as e:
+        return _error_parametro(e)
     except Exception as e:
         return Response(
             {'error': f'Error al obtener historial: {str(e)}'},
@@ -355,94 +179,7 @@ def obtener_entregas_devoluciones(request):
     - Próximas devoluciones ('En Uso')
     """
     try:
-        # --- IDs de Estado (¡¡DEBES VERIFICAR ESTOS IDs!!) ---
-        # Basado en tu kpis, ID_APROBADA = 2 (Préstamo Activo/Pendiente de Entrega)
-        ID_APROBADA = 2
-        # --- Asunciones (VERIFICAR EN TU MODELO 'Estados') ---
-        ID_EN_USO = 3
-        ID_DEVUELTO = 4
-        ID_DEVUELTO_TARDE = 5
-        
-        # Basado en tu actividad_mensual, ID_TIPO_PRESTAMO = 1
-        ID_TIPO_PRESTAMO = 1 
-
-        # 1. Entregas Pendientes (KPI)
-        # Préstamos de Tipo 1 que están en estado 'Aprobada' (2)
-        entregas_pendientes = Solicitudes.objects.filter(
-            Tipo_Servicio_Id=ID_TIPO_PRESTAMO,
-            Estado_Id=ID_APROBADA 
-        ).count()
-
-        # 2. % Devoluciones
-        devoluciones_completadas_qs = Solicitudes.objects.filter(
-            Tipo_Servicio_Id=ID_TIPO_PRESTAMO,
-            Estado_Id__in=[ID_DEVUELTO, ID_DEVUELTO_TARDE]
-        )
-        
-        total_completadas = devoluciones_completadas_qs.count()
-        
-        devoluciones_retrasadas_count = devoluciones_completadas_qs.filter(
-            Estado_Id=ID_DEVUELTO_TARDE
-        ).count()
-        
-        porcentaje_a_tiempo = 0.0
-        if total_completadas > 0:
-            a_tiempo_count = total_completadas - devoluciones_retrasadas_count
-            porcentaje_a_tiempo = round((a_tiempo_count / total_completadas) * 100, 1)
-
-        # 3. Promedio tiempo de uso (PLANIFICADO)
-        # NOTA: Esto calcula la duración *planificada* (Fecha_Fin - Fecha_Inicio)
-        # Para la duración *real*, necesitarías un campo 'Fecha_Devolucion_Real'.
-        avg_duration_data = Solicitudes.objects.filter(
-            Tipo_Servicio_Id=ID_TIPO_PRESTAMO,
-            Estado_Id__in=[ID_DEVUELTO, ID_DEVUELTO_TARDE],
-            Fecha_Inicio__isnull=False,
-            Fecha_Fin__isnull=False
-        ).annotate(
-            duracion=ExpressionWrapper(F('Fecha_Fin') - F('Fecha_Inicio'), output_field=DurationField())
-        ).aggregate(avg_duracion=Avg('duracion'))
-        
-        promedio_dias = 0.0
-        if avg_duration_data['avg_duracion']:
-            # Extraemos los días de la duración promedio
-            promedio_dias = round(avg_duration_data['avg_duracion'].days, 1)
-
-        # 4. Próximas devoluciones
-        hoy = timezone.now().date()
-        manana = hoy + timedelta(days=1)
-        fin_semana = hoy + timedelta(days=(6 - hoy.weekday()))
-        
-        prestamos_en_uso = Solicitudes.objects.filter(
-            Tipo_Servicio_Id=ID_TIPO_PRESTAMO,
-            Estado_Id=ID_EN_USO,
-            Fecha_Fin__isnull=False
-        )
-        
-        proximas_hoy = prestamos_en_uso.filter(Fecha_Fin=hoy).count()
-        proximas_manana = prestamos_en_uso.filter(Fecha_Fin=manana).count()
-        proximas_semana = prestamos_en_uso.filter(
-            Fecha_Fin__gte=hoy, 
-            Fecha_Fin__lte=fin_semana
-        ).count()
-
-        # --- Compilar respuesta ---
-        resumen_data = {
-            'entregas_pendientes': entregas_pendientes,
-            'porcentaje_devoluciones_a_tiempo': porcentaje_a_tiempo,
-            'devoluciones_retrasadas': devoluciones_retrasadas_count,
-            'promedio_tiempo_uso_dias': promedio_dias
-        }
-        
-        proximas_data = {
-            'hoy': proximas_hoy,
-            'manana': proximas_manana,
-            'esta_semana': proximas_semana,
-        }
-
-        return Response({
-            'resumen': resumen_data,
-            'proximas_devoluciones': proximas_data
-        })
+        return Response(calculos.calcular_entregas_devoluciones())
 
     except Exception as e:
         return Response(
@@ -452,8 +189,64 @@ def obtener_entregas_devoluciones(request):
 
 
 # ==============================================================================
-# VISTA 7: EXPORTAR REPORTE (STUB)
+# VISTA 7: EXPORTAR REPORTE
 # ==============================================================================
+# El PDF se genera en los pools de reportes/utils.py: el trabajo recoge los
+# datos en un hilo y el renderizado corre en un proceso aparte, fuera del
+# request. Su estado vive en la caché compartida (depende de CACHES
+# compartida, ver settings), así la descarga funciona desde cualquier worker.
+# - Con "asincrono": true la vista responde 202 de inmediato
+# - Sin él espera hasta REPORTES_PDF_ESPERA segundos; si no terminó responde
+#   202 con la URL de descarga (el trabajo sigue)
+# - Sin cupos en el pool responde 503
+TTL_ARCHIVO_PDF = 600
+ESPERA_PDF = 20
+
+
+def _clave_trabajo_pdf(trabajo):
+    return f'reportes:pdf:{trabajo}'
+
+
+def _datos_reporte_pdf(limite_historial):
+    return {
+        'kpis': calculos.calcular_kpis(),
+        'actividad': calculos.calcular_actividad_mensual(meses=6),
+        'programas': calculos.calcular_distribucion_programas(),
+        'equipos': calculos.calcular_equipos_mas_usados(limite=10),
+        'historial': calculos.calcular_historial(limite=limite_historial),
+    }
+
+
+def _generar_pdf(clave, limite_historial):
+    """Trabajo del pool: datos (en el hilo) + renderizado (en un proceso); deja el resultado en la caché."""
+    from .utils import renderizar_en_proceso
+
+    try:
+        contenido = renderizar_en_proceso(_datos_reporte_pdf(limite_historial))
+    except Exception as e:
+        logger.exception('Error al generar el reporte PDF')
+        cache.set(clave, {'estado': 'error', 'error': str(e) or type(e).__name__}, timeout=TTL_ARCHIVO_PDF)
+        raise
+    cache.set(clave, {'estado': 'listo', 'contenido': contenido}, timeout=TTL_ARCHIVO_PDF)
+    return contenido
+
+
+def _respuesta_trabajo_pdf(trabajo, mensaje):
+    return Response({
+        'message': mensaje,
+        'trabajo': trabajo,
+        'url': reverse('reportes:descargar-reporte', args=[trabajo]),
+        'formato': 'pdf'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def _respuesta_pdf(contenido):
+    nombre = f'reporte_{timezone.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    respuesta = HttpResponse(contenido, content_type='application/pdf')
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def exportar_reporte(request):
@@ -469,9 +262,36 @@ def exportar_reporte(request):
                 {'error': 'Formato no soportado. Use: pdf, excel, o csv'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # TODO: Implementar generación real de archivos
-        # Aquí llamarías a tu utils.py: generar_reporte_pdf(...)
+
+        if formato == 'pdf':
+            try:
+                limite = calculos.parametro_entero(request.data.get('limite_historial'), 'limite_historial', 100)
+            except ValueError as e:
+                return _error_parametro(e)
+
+            from .utils import ReportesSaturados, encolar_trabajo
+
+            trabajo = uuid.uuid4().hex
+            clave = _clave_trabajo_pdf(trabajo)
+            cache.set(clave, {'estado': 'pendiente'}, timeout=TTL_ARCHIVO_PDF)
+            try:
+                futuro = encolar_trabajo(_generar_pdf, clave, limite)
+            except ReportesSaturados as e:
+                cache.delete(clave)
+                respuesta = Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+                respuesta['Retry-After'] = '30'
+                return respuesta
+
+            if str(request.data.get('asincrono', '')).lower() in ('1', 'true'):
+                return _respuesta_trabajo_pdf(trabajo, 'Reporte en proceso')
+
+            try:
+                contenido = futuro.result(timeout=getattr(settings, 'REPORTES_PDF_ESPERA', ESPERA_PDF))
+            except TimeoutError:
+                return _respuesta_trabajo_pdf(trabajo, 'El reporte sigue en proceso, descárguelo desde la URL indicada')
+            return _respuesta_pdf(contenido)
+
+        # TODO: Implementar generación real de Excel y CSV
         url_archivo = f'/media/reportes/reporte_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{formato}'
         
         return Response({
@@ -484,4 +304,203 @@ def exportar_reporte(request):
         return Response(
             {'error': f'Error al exportar reporte: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def descargar_reporte(request, trabajo):
+    """Descarga un PDF generado con "asincrono": true (202 mientras se genera)."""
+    trabajo_pdf = cache.get(_clave_trabajo_pdf(trabajo))
+    if trabajo_pdf is None:
+        return Response({'error': 'Trabajo no encontrado o expirado'}, status=status.HTTP_404_NOT_FOUND)
+    if trabajo_pdf['estado'] == 'pendiente':
+        return Response({'estado': 'pendiente'}, status=status.HTTP_202_ACCEPTED)
+    if trabajo_pdf['estado'] == 'error':
+        return Response(
+            {'error': f"Error al exportar reporte: {trabajo_pdf['error']}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    return _respuesta_pdf(trabajo_pdf['contenido'])
+
+
+# ==============================================================================
+# VISTA 8: ESTADÍSTICAS DE LA CACHÉ DE REPORTES
+# ==============================================================================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def obtener_estadisticas_cache(request):
+    """
+    Contadores de la caché de reportes: hit, miss, stale y ratio por reporte.
+    """
+    return Response(estadisticas())
+
+
+# ==============================================================================
+# VISTA 9: ANÁLISIS AD-HOC SOBRE EL SNAPSHOT COLUMNAR
+# ==============================================================================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def obtener_analitica(request):
+    """
+    Consultas sobre el snapshot exportado con "manage.py exportar_snapshot".
+    - metrica: kpis | actividad_mensual | distribucion_programas | equipos_mas_usados
+    - o agrupar: lista separada por comas de dimensiones
+      (laboratorio, programa, facultad, tipo_servicio, estado, mes, anio, objeto, categoria)
+      con medida: solicitudes (default) | unidades | asistentes
+    Filtros: fecha_desde, fecha_hasta, estado, tipo_servicio, laboratorio, programa, facultad, limite
+    """
+    from .analitica import MotorAnalitico, SnapshotNoDisponible, obtener_motor
+
+    try:
+        motor = obtener_motor()
+        fecha_desde = calculos.parametro_fecha(request.GET.get('fecha_desde'), 'fecha_desde')
+        fecha_hasta = calculos.parametro_fecha(request.GET.get('fecha_hasta'), 'fecha_hasta')
+        limite = calculos.parametro_entero(request.GET.get('limite'), 'limite', None)
+        metrica = request.GET.get('metrica')
+
+        if metrica == 'kpis':
+            datos = motor.kpis()
+        elif metrica == 'actividad_mensual':
+            datos = motor.actividad_mensual(calculos.parametro_entero(request.GET.get('meses'), 'meses', 6))
+        elif metrica == 'distribucion_programas':
+            datos = motor.distribucion_programas(fecha_desde, fecha_hasta)
+        elif metrica == 'equipos_mas_usados':
+            datos = motor.equipos_mas_usados(limite or 10, fecha_desde, fecha_hasta)
+        elif metrica:
+            raise ValueError(f'Métrica no soportada: {metrica}')
+        else:
+            dimensiones = [d.strip() for d in request.GET.get('agrupar', '').split(',') if d.strip()]
+            if not dimensiones:
+                raise ValueError(
+                    f'Indique "metrica" o "agrupar" ({", ".join(MotorAnalitico.DIMENSIONES)})'
+                )
+            medida = request.GET.get('medida', 'solicitudes')
+            if medida not in ('solicitudes', 'unidades', 'asistentes'):
+                raise ValueError('El parámetro "medida" debe ser solicitudes, unidades o asistentes')
+            filtros = {
+                d: request.GET.getlist(d) for d in
+                ('estado', 'tipo_servicio', 'laboratorio', 'programa', 'facultad')
+                if request.GET.get(d)
+            }
+            datos = motor.agrupar(
+                dimensiones, medida=medida, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                limite=limite, **filtros
+            )
+
+        return Response({'snapshot': motor.meta, 'datos': datos})
+
+    except SnapshotNoDisponible as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    except ValueError as e:
+        return _error_parametro(e)
+    except Exception as e:
+        return Response(
+            {'error': f'Error en el análisis: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ==============================================================================
+# VISTA 10: DASHBOARD COMPLETO
+# ==============================================================================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def obtener_dashboard(request):
+    """
+    Las seis secciones del dashboard en una sola respuesta, calculadas en
+    paralelo. Parámetros opcionales: meses, limite_equipos, limite_historial.
+    Si una sección falla o excede su tiempo, se informa en 'errores'.
+    """
+    try:
+        try:
+            parametros = {
+                'meses': calculos.parametro_entero(request.query_params.get('meses'), 'meses', 6),
+                'limite_equipos': calculos.parametro_entero(request.query_params.get('limite_equipos'), 'limite_equipos', 10),
+                'limite_historial': calculos.parametro_entero(request.query_params.get('limite_historial'), 'limite_historial', 20),
+            }
+        except ValueError as e:
+            return _error_parametro(e)
+
+        try:
+            return Response(calcular_dashboard(**parametros))
+        except DashboardSaturado as e:
+            respuesta = Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            respuesta['Retry-After'] = '30'
+            return respuesta
+
+    except Exception as e:
+        return Response(
+            {'error': f'Error al obtener dashboard: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ==============================================================================
+# VISTA 11: UTILIZACIÓN DE EQUIPOS POR TIEMPO
+# ==============================================================================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def obtener_utilizacion_equipos(request):
+    """
+    Utilización real por equipo en un rango de fechas (por defecto los
+    últimos 30 días): horas de uso, % frente a las unidades del equipo
+    (Cant_Stock + entregadas sin devolver), pico de unidades simultáneas y
+    horas ociosas.
+    Parámetros: fecha_desde, fecha_hasta, objeto (repetible), serie (dia|hora)
+    """
+    from .utilizacion import calcular_utilizacion_equipos
+
+    try:
+        try:
+            fecha_desde = calculos.parametro_fecha(request.query_params.get('fecha_desde'), 'fecha_desde')
+            fecha_hasta = calculos.parametro_fecha(request.query_params.get('fecha_hasta'), 'fecha_hasta')
+            objetos_ids = sorted({
+                calculos.parametro_entero(valor, 'objeto', None)
+                for valor in request.query_params.getlist('objeto') if valor
+            }) or None
+            return Response(calcular_utilizacion_equipos(
+                fecha_desde=fecha_desde,
+                fecha_hasta=fecha_hasta,
+                objetos_ids=objetos_ids,
+                serie=request.query_params.get('serie'),
+            ))
+        except ValueError as e:
+            return _error_parametro(e)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Error al obtener utilización de equipos: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# ==============================================================================
+# VISTA 12: MAPA DE CALOR DE OCUPACIÓN DE LABORATORIOS
+# ==============================================================================
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def obtener_ocupacion_laboratorios(request):
+    """
+    Matriz día de la semana × hora por laboratorio y del campus: horas
+    reservadas vs. horario de apertura y asistentes vs. capacidad.
+    Parámetros: fecha_desde, fecha_hasta (por defecto las últimas 8 semanas),
+    laboratorio
+    """
+    from .ocupacion import calcular_ocupacion_laboratorios
+
+    try:
+        try:
+            return Response(calcular_ocupacion_laboratorios(
+                fecha_desde=calculos.parametro_fecha(request.query_params.get('fecha_desde'), 'fecha_desde'),
+                fecha_hasta=calculos.parametro_fecha(request.query_params.get('fecha_hasta'), 'fecha_hasta'),
+                laboratorio_id=calculos.parametro_entero(request.query_params.get('laboratorio'), 'laboratorio', None),
+            ))
+        except ValueError as e:
+            return _error_parametro(e)
+
+    except Exception as e:
+        return Response(
+            {'error': f'Error al obtener ocupación de laboratorios: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -0,0 +1,163 @@
+# ==============================================================================
+# REPORTES/VIEWS_ASYNC.PY - Versiones async de los reportes (ASGI)
+# ==============================================================================
+# Mismos parámetros y respuestas que reportes/views.py, pero el worker no se
+# bloquea mientras se calcula: el cálculo (cacheado) corre en el pool de hilos
+# de AccesLab/asincrono.py y el dashboard lanza sus seis secciones a la vez en
+# el pool acotado de reportes/dashboard.py (mismos cupos y plazos que la
+# versión síncrona).
+# Rutas: /api/reportes/async/dashboard/ y /api/reportes/async/<reporte>/
+
+import asyncio
+import contextvars
+import logging
+import time
+
+from rest_framework import status
+
+from AccesLab.asincrono import en_hilo, respuesta, vista_async
+
+from . import calculos
+from .dashboard import (
+    DashboardSaturado, _timeout_seccion, ejecutar_seccion, liberar_cupo, obtener_pool,
+    reservar_cupos, secciones_dashboard,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _fechas(parametros):
+    return {
+        'fecha_desde': calculos.parametro_fecha(parametros.get('fecha_desde'), 'fecha_desde'),
+        'fecha_hasta': calculos.parametro_fecha(parametros.get('fecha_hasta'), 'fecha_hasta'),
+    }
+
+
+def _parametros_historial(parametros):
+    try:
+        limite = calculos.parametro_entero(parametros.get('limite'), 'limite', 50)
+    except ValueError:
+        limite = None  # Igual que la vista síncrona: sin límite
+    return {'limite': limite, **_fechas(parametros), 'estado_id': parametros.get('estado_id')}
+
+
+def _parametros_utilizacion(parametros):
+    return {
+        **_fechas(parametros),
+        'objetos_ids': sorted({
+            calculos.parametro_entero(valor, 'objeto', None)
+            for valor in parametros.getlist('objeto') if valor
+        }) or None,
+        'serie': parametros.get('serie'),
+    }
+
+
+# numpy se importa con el primer uso (ver reportes/views.py)
+def _utilizacion(**parametros):
+    from .utilizacion import calcular_utilizacion_equipos
+    return calcular_utilizacion_equipos(**parametros)
+
+
+def _ocupacion(**parametros):
+    from .ocupacion import calcular_ocupacion_laboratorios
+    return calcular_ocupacion_laboratorios(**parametros)
+
+
+# reporte -> (descripción para errores, parámetros desde la query string, cálculo)
+REPORTES = {
+    'kpis': ('KPIs', lambda p: {}, calculos.calcular_kpis),
+    'actividad-mensual': (
+        'actividad mensual',
+        lambda p: {'meses': calculos.parametro_entero(p.get('meses'), 'meses', 6)},
+        calculos.calcular_actividad_mensual,
+    ),
+    'distribucion-programas': (
+        'distribución por programas',
+        lambda p: {**_fechas(p), 'reparto': p.get('reparto') or 'principal', 'nivel': p.get('nivel') or 'programa'},
+        calculos.calcular_distribucion_programas,
+    ),
+    'equipos-mas-usados': (
+        'equipos más usados',
+        lambda p: {'limite': calculos.parametro_entero(p.get('limite'), 'limite', 10), **_fechas(p)},
+        calculos.calcular_equipos_mas_usados,
+    ),
+    'historial': ('historial', _parametros_historial, calculos.calcular_historial),
+    'entregas-devoluciones': ('resumen de entregas', lambda p: {}, calculos.calcular_entregas_devoluciones),
+    'utilizacion-equipos': ('utilización de equipos', _parametros_utilizacion, _utilizacion),
+    'ocupacion-laboratorios': (
+        'ocupación de laboratorios',
+        lambda p: {
+            **_fechas(p),
+            'laboratorio_id': calculos.parametro_entero(p.get('laboratorio'), 'laboratorio', None),
+        },
+        _ocupacion,
+    ),
+}
+
+
+@vista_async
+async def obtener_reporte(request, reporte):
+    """Cualquiera de los reportes de REPORTES, con los parámetros de su vista síncrona."""
+    if reporte not in REPORTES:
+        return {'error': f'Reporte desconocido; use uno de: {", ".join(REPORTES)}'}, status.HTTP_404_NOT_FOUND
+    descripcion, leer_parametros, calcular = REPORTES[reporte]
+    try:
+        parametros = leer_parametros(request.GET)
+    except ValueError as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+    try:
+        return await en_hilo(calcular, **parametros)
+    except ValueError as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+    except Exception as e:
+        return {'error': f'Error al obtener {descripcion}: {str(e)}'}, status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+async def _seccion(funcion, parametros, limite):
+    futuro = obtener_pool().submit(contextvars.copy_context().run, ejecutar_seccion, funcion, parametros, limite)
+    # El cupo se libera cuando el hilo termina de verdad, no cuando se deja de esperar
+    futuro.add_done_callback(liberar_cupo)
+    return await asyncio.wait_for(asyncio.wrap_future(futuro), timeout=max(0, limite - time.monotonic()))
+
+
+@vista_async
+async def obtener_dashboard(request):
+    """
+    Igual que /api/reportes/dashboard/: las seis secciones se esperan a la vez
+    con asyncio.gather; lo que falla o excede su tiempo va en 'errores'.
+    """
+    try:
+        parametros = {
+            'meses': calculos.parametro_entero(request.GET.get('meses'), 'meses', 6),
+            'limite_equipos': calculos.parametro_entero(request.GET.get('limite_equipos'), 'limite_equipos', 10),
+            'limite_historial': calculos.parametro_entero(request.GET.get('limite_historial'), 'limite_historial', 20),
+        }
+    except ValueError as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+
+    secciones = secciones_dashboard(**parametros)
+    try:
+        reservar_cupos(len(secciones))
+    except DashboardSaturado as e:
+        saturado = respuesta({'error': str(e)}, status.HTTP_503_SERVICE_UNAVAILABLE)
+        saturado['Retry-After'] = '30'
+        return saturado
+    inicio = time.monotonic()
+    resultados = await asyncio.gather(
+        *[
+            _seccion(funcion, argumentos, inicio + _timeout_seccion(nombre))
+            for nombre, funcion, argumentos in secciones
+        ],
+        return_exceptions=True,
+    )
+
+    datos, errores, tiempos = {}, {}, {}
+    for (nombre, _, _), resultado in zip(secciones, resultados):
+        if isinstance(resultado, TimeoutError):
+            errores[nombre] = 'Tiempo de espera agotado'
+        elif isinstance(resultado, Exception):
+            logger.error(f"Error en la sección {nombre} del dashboard: {resultado}")
+            errores[nombre] = str(resultado)
+        else:
+            datos[nombre], tiempos[nombre] = resultado
+    return {'secciones': datos, 'errores': errores, 'tiempos_ms': tiempos}
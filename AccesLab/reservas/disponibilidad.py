@@ -0,0 +1,148 @@
+# ==============================================================================
+# RESERVAS/DISPONIBILIDAD.PY - Unidades disponibles de cada objeto en el tiempo
+# ==============================================================================
+# Cant_Stock son las unidades en estante: la entrega (reservas/prestamos.py)
+# las descuenta y la devolución las repone; crear o aprobar una solicitud no
+# toca el stock, solo compromete unidades en su ventana de fechas. Para
+# responder "¿puedo pedir 5 osciloscopios el jueves?" se reconstruye la
+# capacidad:
+#
+#   capacidad = Cant_Stock + unidades entregadas sin devolver (En Uso)
+#
+# y se resta el pico de unidades comprometidas (solicitudes activas) dentro de
+# la ventana pedida. El pico sale de un barrido por objeto: eventos (+q al
+# empezar, -q al terminar) ordenados por instante, con las salidas antes que
+# las entradas. Todo el carrito se resuelve con dos consultas (objetos y
+# líneas activas).
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from maestros.models import Objetos
+
+from .estados import ESTADOS_ACTIVOS, ESTADOS_PRESTAMO_ACTIVO, ids_estados
+from .models import Solicitudes_Objetos
+
+
+def _momento(fecha, hora, fin=False):
+    """Fecha + hora del día (aware). Sin hora: inicio del día, o fin del día si fin=True."""
+    if hora is None:
+        return timezone.make_aware(datetime.combine(fecha + timedelta(days=1) if fin else fecha, time()))
+    if isinstance(hora, datetime):
+        hora = timezone.localtime(hora).time() if timezone.is_aware(hora) else hora.time()
+    return timezone.make_aware(datetime.combine(fecha, hora))
+
+
+def ventana(fecha_inicio, fecha_fin=None, hora_inicio=None, hora_fin=None):
+    """
+    (desde, hasta) de una solicitud con el mismo criterio que los reportes de
+    utilización: de Fecha_Inicio a la hora de inicio hasta Fecha_Fin a la hora
+    de fin. None si no hay Fecha_Inicio.
+    """
+    if fecha_inicio is None:
+        return None
+    return _momento(fecha_inicio, hora_inicio), _momento(fecha_fin or fecha_inicio, hora_fin, fin=True)
+
+
+def _pico(intervalos):
+    """Máximo de unidades simultáneas de una lista [(inicio, fin, cantidad)]."""
+    eventos = []
+    for inicio, fin, cantidad in intervalos:
+        eventos.append((inicio, -1, cantidad))   # entrada
+        eventos.append((fin, -2, -cantidad))     # salida: antes que una entrada en el mismo instante
+    eventos.sort(key=lambda e: (e[0], e[1]))
+    nivel = pico = 0
+    for _, _, delta in eventos:
+        nivel += delta
+        pico = max(pico, nivel)
+    return pico
+
+
+def calcular_disponibilidad(objetos_ids, desde=None, hasta=None, excluir_solicitud=None):
+    """
+    {Objetos_Id: {'nombre', 'activo', 'capacidad', 'comprometido', 'disponible'}}
+    para la ventana [desde, hasta). Sin ventana, 'disponible' es el stock actual.
+    excluir_solicitud: la solicitud que se está editando no compite consigo misma.
+    Los IDs que no existen no aparecen en el resultado.
+    """
+    objetos = {
+        objeto_id: {'nombre': nombre, 'activo': activo, 'stock': stock or 0}
+        for objeto_id, nombre, activo, stock in Objetos.objects.filter(
+            Objetos_Id__in=objetos_ids
+        ).values_list('Objetos_Id', 'Nombre_Objetos', 'Activo', 'Cant_Stock')
+    }
+
+    lineas = Solicitudes_Objetos.objects.filter(
+        Objetos_Id__in=list(objetos),
+        Solicitud_Id__Estado_Id__in=ids_estados(ESTADOS_ACTIVOS),
+    )
+    prestados = set(ids_estados(ESTADOS_PRESTAMO_ACTIVO))
+
+    retenido, intervalos = {}, {}
+    for solicitud_id, estado_id, objeto_id, cantidad, f_ini, f_fin, h_ini, h_fin in lineas.values_list(
+        'Solicitud_Id', 'Solicitud_Id__Estado_Id',
+        'Objetos_Id', 'Cantidad_Objetos',
+        'Solicitud_Id__Fecha_Inicio', 'Solicitud_Id__Fecha_Fin',
+        'Solicitud_Id__Hora_Inicio', 'Solicitud_Id__Hora_Fin',
+    ):
+        cantidad = cantidad or 0
+        # Lo entregado falta en Cant_Stock aunque la solicitud sea la excluida
+        if estado_id in prestados:
+            retenido[objeto_id] = retenido.get(objeto_id, 0) + cantidad
+        if desde is None or solicitud_id == excluir_solicitud:
+            continue
+        periodo = ventana(f_ini, f_fin, h_ini, h_fin)
+        if periodo is None:
+            # Sin fechas no se sabe cuándo se usa: ocupa toda la ventana
+            inicio, fin = desde, hasta
+        else:
+            inicio, fin = max(periodo[0], desde), min(periodo[1], hasta)
+        if inicio < fin:
+            intervalos.setdefault(objeto_id, []).append((inicio, fin, cantidad))
+
+    resultado = {}
+    for objeto_id, objeto in objetos.items():
+        if desde is None:
+            capacidad, comprometido = objeto['stock'], 0
+        else:
+            capacidad = objeto['stock'] + retenido.get(objeto_id, 0)
+            comprometido = _pico(intervalos.get(objeto_id, []))
+        disponible = max(capacidad - comprometido, 0) if objeto['activo'] else 0
+        resultado[objeto_id] = {
+            'nombre': objeto['nombre'],
+            'activo': objeto['activo'],
+            'capacidad': capacidad,
+            'comprometido': comprometido,
+            'disponible': disponible,
+        }
+    return resultado
+
+
+def verificar_carrito(items, desde=None, hasta=None, excluir_solicitud=None):
+    """
+    items: [(objetos_id, cantidad)]; un objeto repetido suma sus cantidades.
+    Retorna {'disponible_todo', 'items': [...]} en el orden de los objetos.
+    """
+    pedidos = {}
+    for objeto_id, cantidad in items:
+        pedidos[objeto_id] = pedidos.get(objeto_id, 0) + cantidad
+
+    disponibilidad = calcular_disponibilidad(list(pedidos), desde, hasta, excluir_solicitud)
+    respuesta = []
+    for objeto_id, cantidad in pedidos.items():
+        info = disponibilidad.get(objeto_id)
+        if info is None:
+            respuesta.append({'objetos_id': objeto_id, 'solicitado': cantidad, 'existe': False, 'alcanza': False})
+            continue
+        respuesta.append({
+            'objetos_id': objeto_id,
+            'nombre': info['nombre'],
+            'solicitado': cantidad,
+            'existe': True,
+            'capacidad': info['capacidad'],
+            'comprometido': info['comprometido'],
+            'disponible': info['disponible'],
+            'alcanza': cantidad <= info['disponible'],
+        })
+    return {'disponible_todo': all(item['alcanza'] for item in respuesta), 'items': respuesta}
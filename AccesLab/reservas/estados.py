@@ -0,0 +1,44 @@
+# ==============================================================================
+# RESERVAS/ESTADOS.PY - Estados de solicitud por nombre y sus IDs
+# ==============================================================================
+# Los módulos nombran los estados aquí y filtran por Estado_Id: los IDs salen
+# del catálogo en proceso (maestros/catalogos.py), que compara los nombres
+# sin mayúsculas ni tildes. Así un "En uso" o "Aprobada " en la tabla Estados
+# no deja fuera las solicitudes, y las consultas no necesitan el JOIN a Estados.
+# Un nombre que no existe en el catálogo se omite (y queda en el log).
+
+import logging
+
+from maestros import catalogos
+from maestros.models import Estados
+
+
+logger = logging.getLogger(__name__)
+
+ESTADO_PENDIENTE = 'Pendiente'
+ESTADO_APROBADA = 'Aprobada'
+ESTADO_EN_USO = 'En Uso'
+ESTADO_RECHAZADA = 'Rechazada'
+ESTADO_DEVUELTO = 'Devuelto'
+ESTADO_DEVUELTO_TARDE = 'Devuelto Tarde'
+
+# Solicitudes que comprometen unidades en su ventana de fechas
+ESTADOS_ACTIVOS = (ESTADO_PENDIENTE, ESTADO_APROBADA, ESTADO_EN_USO)
+# Solicitudes cuyas unidades salieron del estante (descontadas de Cant_Stock)
+ESTADOS_PRESTAMO_ACTIVO = (ESTADO_EN_USO,)
+# Solicitudes que no llegan a ocupar equipos ni laboratorios (reportes de uso)
+ESTADOS_SIN_USO = (ESTADO_PENDIENTE, ESTADO_RECHAZADA)
+
+
+def id_estado(nombre):
+    """Estado_Id del estado con ese nombre (catálogo cacheado), o None si no existe."""
+    estado = catalogos.buscar_por_nombre(Estados, nombre)
+    if estado is None:
+        logger.warning(f"El estado '{nombre}' no existe en el catálogo Estados")
+        return None
+    return estado.Estado_Id
+
+
+def ids_estados(nombres):
+    """Estado_Id de los nombres que existen en el catálogo, para filtros Estado_Id__in."""
+    return [estado_id for estado_id in map(id_estado, nombres) if estado_id is not None]
@@ -0,0 +1,290 @@
+# ==============================================================================
+# RESERVAS/PRESTAMOS.PY - Entrega (checkout) y devolución (check-in) de equipos
+# ==============================================================================
+# Cada transición es una sola transacción con un número fijo de sentencias,
+# sin importar cuántas solicitudes se procesen a la vez (fila de mostrador):
+# - Entrega: SELECT ... FOR UPDATE de las solicitudes y de sus objetos,
+#   MAX(ID) de Entregas, INSERT masivo de Entregas (reintentado si otro lote
+#   tomó los mismos IDs), UPDATE ... CASE de Entrega_Id + Estado_Id
+#   (Aprobada -> En Uso) y un UPDATE ... CASE que saca las unidades del
+#   estante (Cant_Stock); si alguna no alcanza, no se entrega
+# - Devolución: lo mismo con Devoluciones (En Uso -> Devuelto / Devuelto Tarde
+#   según la fecha y hora de fin) y un solo UPDATE ... CASE que devuelve las
+#   unidades al estante
+# - Todo o nada: si una solicitud del lote no puede pasar, no se aplica ninguna
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from maestros import catalogos
+from maestros.models import Devoluciones, Entregas, Estados, Frecuencia_Servicio, Objetos
+from maestros.serializers import get_next_id
+
+from .estados import ESTADO_APROBADA, ESTADO_DEVUELTO, ESTADO_DEVUELTO_TARDE, ESTADO_EN_USO
+from .models import Solicitudes, Solicitudes_Objetos
+from .signals import solicitudes_actualizadas
+
+MAX_SOLICITUDES_POR_LOTE = 500
+# Reintentos cuando otro lote tomó los mismos IDs de Entregas/Devoluciones
+INTENTOS_ID = 5
+# Frecuencia de las entregas que no indican frecuencia_servicio_id
+# (settings.RESERVAS_FRECUENCIA_POR_DEFECTO, por nombre)
+FRECUENCIA_POR_DEFECTO = 'Única'
+
+
+class TransicionInvalida(ValueError):
+    """Errores del lote: [{'solicitud_id', 'error'}]."""
+
+    def __init__(self, errores):
+        super().__init__('No se pudo procesar el lote')
+        self.errores = errores
+
+
+def _estado(nombre):
+    estado = catalogos.buscar_por_nombre(Estados, nombre)
+    if estado is None:
+        raise TransicionInvalida([{'solicitud_id': None, 'error': f'No existe el estado "{nombre}"'}])
+    return estado
+
+
+def _ids(solicitudes_ids):
+    if not isinstance(solicitudes_ids, (list, tuple)) or not solicitudes_ids:
+        raise TransicionInvalida([{'solicitud_id': None, 'error': 'Envíe una lista "solicitudes" no vacía'}])
+    if len(solicitudes_ids) > MAX_SOLICITUDES_POR_LOTE:
+        raise TransicionInvalida([{
+            'solicitud_id': None, 'error': f'Máximo {MAX_SOLICITUDES_POR_LOTE} solicitudes por lote',
+        }])
+    try:
+        ids = [int(i) for i in solicitudes_ids]
+    except (TypeError, ValueError):
+        raise TransicionInvalida([{'solicitud_id': None, 'error': 'Los IDs de solicitud deben ser enteros'}])
+    if len(set(ids)) != len(ids):
+        raise TransicionInvalida([{'solicitud_id': None, 'error': 'Hay solicitudes repetidas en el lote'}])
+    return ids
+
+
+def _bloquear(ids, estado_requerido, validar):
+    """SELECT ... FOR UPDATE del lote; valida estado y la condición extra de cada solicitud."""
+    solicitudes = {
+        s.Solicitud_Id: s
+        for s in Solicitudes.objects.select_for_update().filter(Solicitud_Id__in=ids)
+    }
+    errores = []
+    for solicitud_id in ids:
+        solicitud = solicitudes.get(solicitud_id)
+        if solicitud is None:
+            error = 'La solicitud no existe'
+        elif solicitud.Estado_Id_id != estado_requerido.Estado_Id:
+            error = f'La solicitud debe estar en estado "{estado_requerido.Nombre_Estado}"'
+        else:
+            error = validar(solicitud)
+        if error:
+            errores.append({'solicitud_id': solicitud_id, 'error': error})
+    if errores:
+        raise TransicionInvalida(errores)
+    return [solicitudes[i] for i in ids]
+
+
+def _insertar_con_ids(modelo, campo_id, cantidad, construir):
+    """
+    bulk_create de `cantidad` filas con IDs consecutivos desde MAX(ID) + 1.
+    Dos lotes simultáneos pueden leer el mismo máximo: el segundo INSERT choca
+    con la clave primaria (espera a que el primero confirme y falla con
+    IntegrityError) y se reintenta con el nuevo máximo dentro de un savepoint.
+    """
+    for intento in range(INTENTOS_ID):
+        siguiente = get_next_id(modelo, campo_id)
+        try:
+            with transaction.atomic():
+                return modelo.objects.bulk_create([construir(siguiente + i) for i in range(cantidad)])
+        except IntegrityError:
+            if intento == INTENTOS_ID - 1:
+                raise TransicionInvalida([{
+                    'solicitud_id': None,
+                    'error': f'No se pudieron asignar IDs de {modelo._meta.db_table}: intente de nuevo',
+                }])
+
+
+def _notificar(solicitudes):
+    # bulk_update no dispara post_save: se avisa a los reportes al confirmar
+    transaction.on_commit(
+        lambda: solicitudes_actualizadas.send(sender=Solicitudes, solicitudes=solicitudes)
+    )
+
+
+# ----------------------------------------------------------------------
+# STOCK EN ESTANTE
+# ----------------------------------------------------------------------
+def _cantidades(solicitudes_ids):
+    """{Objetos_Id: unidades} de las líneas de las solicitudes."""
+    return dict(
+        Solicitudes_Objetos.objects.filter(Solicitud_Id__in=solicitudes_ids).values('Objetos_Id').annotate(
+            total=Sum('Cantidad_Objetos')
+        ).values_list('Objetos_Id', 'total')
+    )
+
+
+def _sumar_stock(cantidades, signo):
+    """Suma (signo=1) o resta (signo=-1) las cantidades a Cant_Stock en un solo UPDATE ... CASE."""
+    Objetos.objects.filter(Objetos_Id__in=cantidades).update(
+        Cant_Stock=F('Cant_Stock') + Case(
+            *[When(Objetos_Id=objeto_id, then=Value(signo * total)) for objeto_id, total in cantidades.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+
+
+def _descontar_stock(solicitudes):
+    """
+    Saca del estante las unidades del lote. Bloquea los objetos (FOR UPDATE)
+    y rechaza el lote completo si alguno no alcanza: Cant_Stock nunca queda
+    negativo.
+    """
+    cantidades = _cantidades([s.Solicitud_Id for s in solicitudes])
+    if not cantidades:
+        return {}
+    en_estante = dict(
+        Objetos.objects.select_for_update().filter(Objetos_Id__in=cantidades).values_list('Objetos_Id', 'Cant_Stock')
+    )
+    errores = [
+        {
+            'solicitud_id': None,
+            'error': f'El objeto {objeto_id} tiene {en_estante.get(objeto_id) or 0} unidades en stock '
+                     f'y el lote entrega {total}',
+        }
+        for objeto_id, total in cantidades.items()
+        if (en_estante.get(objeto_id) or 0) < total
+    ]
+    if errores:
+        raise TransicionInvalida(errores)
+    _sumar_stock(cantidades, -1)
+    return cantidades
+
+
+def _restaurar_stock(solicitudes_ids):
+    """Devuelve al estante lo descontado en la entrega, en un solo UPDATE."""
+    cantidades = _cantidades(solicitudes_ids)
+    if cantidades:
+        _sumar_stock(cantidades, 1)
+    return cantidades
+
+
+# ----------------------------------------------------------------------
+# ENTREGA (CHECKOUT)
+# ----------------------------------------------------------------------
+@transaction.atomic
+def entregar(solicitudes_ids, observacion='', frecuencia_id=None):
+    """
+    Registra la entrega de las solicitudes aprobadas y descuenta sus unidades
+    del stock. Retorna [{'solicitud_id', 'entrega_id', 'estado'}].
+    """
+    ids = _ids(solicitudes_ids)
+    aprobada, en_uso = _estado(ESTADO_APROBADA), _estado(ESTADO_EN_USO)
+
+    if frecuencia_id is not None:
+        try:
+            frecuencia = catalogos.obtener(Frecuencia_Servicio, frecuencia_id)
+        except Frecuencia_Servicio.DoesNotExist:
+            raise TransicionInvalida([{'solicitud_id': None, 'error': f'No existe la frecuencia {frecuencia_id}'}])
+    else:
+        nombre = getattr(settings, 'RESERVAS_FRECUENCIA_POR_DEFECTO', FRECUENCIA_POR_DEFECTO)
+        frecuencia = catalogos.buscar_por_nombre(Frecuencia_Servicio, nombre)
+        if frecuencia is None:
+            raise TransicionInvalida([{
+                'solicitud_id': None,
+                'error': f'No existe la frecuencia por defecto "{nombre}": envíe frecuencia_servicio_id',
+            }])
+
+    solicitudes = _bloquear(
+        ids, aprobada,
+        lambda s: 'La solicitud ya fue entregada' if s.Entrega_Id_id else None,
+    )
+
+    _descontar_stock(solicitudes)
+
+    ahora = timezone.now()
+    entregas = _insertar_con_ids(Entregas, 'Entrega_Id', len(solicitudes), lambda entrega_id: Entregas(
+        Entrega_Id=entrega_id,
+        Fecha_Entrega=timezone.localdate(ahora),
+        Hora_Entrega=ahora,
+        Observacion_Entrega=observacion or '',
+        Frecuencia_Servicio_Id=frecuencia,
+    ))
+
+    for solicitud, entrega in zip(solicitudes, entregas):
+        solicitud.Entrega_Id = entrega
+        solicitud.Estado_Id = en_uso
+    Solicitudes.objects.bulk_update(solicitudes, ['Entrega_Id', 'Estado_Id'])
+    _notificar(solicitudes)
+
+    return [
+        {'solicitud_id': s.Solicitud_Id, 'entrega_id': s.Entrega_Id_id, 'estado': en_uso.Nombre_Estado}
+        for s in solicitudes
+    ]
+
+
+# ----------------------------------------------------------------------
+# DEVOLUCIÓN (CHECK-IN)
+# ----------------------------------------------------------------------
+def vencimiento(solicitud):
+    """
+    Momento (aware) en que vence el préstamo: Fecha_Fin (o Fecha_Inicio) a la
+    hora de Hora_Fin; sin hora, al terminar ese día. None si no hay fechas.
+    """
+    fecha = solicitud.Fecha_Fin or solicitud.Fecha_Inicio
+    if fecha is None:
+        return None
+    hora_fin = solicitud.Hora_Fin
+    if hora_fin is not None:
+        if timezone.is_aware(hora_fin):
+            hora_fin = timezone.localtime(hora_fin)
+        return timezone.make_aware(datetime.combine(fecha, hora_fin.time()))
+    return timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time()))
+
+
+@transaction.atomic
+def recibir(solicitudes_ids, observacion=''):
+    """
+    Registra la devolución de las solicitudes en uso y restaura el stock.
+    Retorna {'devoluciones': [{'solicitud_id', 'devolucion_id', 'estado', 'tarde'}],
+    'stock_restaurado': {Objetos_Id: unidades}}.
+    """
+    ids = _ids(solicitudes_ids)
+    en_uso = _estado(ESTADO_EN_USO)
+    devuelto, devuelto_tarde = _estado(ESTADO_DEVUELTO), _estado(ESTADO_DEVUELTO_TARDE)
+
+    solicitudes = _bloquear(
+        ids, en_uso,
+        lambda s: 'La solicitud ya fue devuelta' if s.Devolucion_Id_id else None,
+    )
+
+    ahora = timezone.now()
+    devoluciones = _insertar_con_ids(Devoluciones, 'Devolucion_Id', len(solicitudes), lambda devolucion_id: Devoluciones(
+        Devolucion_Id=devolucion_id,
+        Fecha_Devolucion=timezone.localdate(ahora),
+        Hora_Devolucion=ahora,
+        Observaciones_Devolucion=observacion or '',
+    ))
+
+    resultado = []
+    for solicitud, devolucion in zip(solicitudes, devoluciones):
+        limite = vencimiento(solicitud)
+        tarde = limite is not None and ahora > limite
+        solicitud.Devolucion_Id = devolucion
+        solicitud.Estado_Id = devuelto_tarde if tarde else devuelto
+        resultado.append({
+            'solicitud_id': solicitud.Solicitud_Id,
+            'devolucion_id': devolucion.Devolucion_Id,
+            'estado': solicitud.Estado_Id.Nombre_Estado,
+            'tarde': tarde,
+        })
+    Solicitudes.objects.bulk_update(solicitudes, ['Devolucion_Id', 'Estado_Id'])
+    stock = _restaurar_stock(ids)
+    _notificar(solicitudes)
+
+    return {'devoluciones': resultado, 'stock_restaurado': stock}
@@ -7,6 +7,7 @@ import datetime
 
 # Importaciones locales de la app 'reservas'
 from .models import Solicitudes, Solicitudes_Objetos, Integrante_Solicitud 
+from . import disponibilidad, estados
 
 # Importaciones desde la app 'maestros'
 from maestros.models import (
@@ -22,6 +23,7 @@ from maestros.models import (
 
 # Importaciones desde la app 'usuarios'
 from usuarios.models import Usuarios, Usuarios_Programas 
+from maestros import catalogos, horarios
 
 
 # ----------------------------------------------------------------------
@@ -77,21 +79,67 @@ class SolicitudesObjetosSerializer(serializers.ModelSerializer):
                 "Cantidad_Objetos": "La cantidad debe ser mayor a cero."
             })
 
-        # Si se proporciona objeto_id, validar stock
+        # Si se proporciona objeto_id, validar disponibilidad en las fechas de la
+        # solicitud (reservas/disponibilidad.py); todo el carrito en una pasada
         if objeto_id:
-            try:
-                objeto = Objetos.objects.get(Objetos_Id=objeto_id)
-                if objeto.Cant_Stock < cantidad:
-                    raise serializers.ValidationError({
-                        "Cantidad_Objetos": f"El objeto '{objeto.Nombre_Objetos}' solo tiene {objeto.Cant_Stock} en stock, y se solicitan {cantidad}."
-                    })
-            except Objetos.DoesNotExist:
+            carrito = self._disponibilidad_carrito()
+            item = carrito.get(objeto_id)
+            if item is None or not item['existe']:
                 raise serializers.ValidationError({
                     "objetos_id": "El Objetos_Id proporcionado no existe. Use 'nombre_objeto' para crear uno nuevo."
                 })
+            if not item['alcanza']:
+                raise serializers.ValidationError({
+                    "Cantidad_Objetos": (
+                        f"El objeto '{item['nombre']}' solo tiene {item['disponible']} unidades disponibles "
+                        f"en esas fechas, y se solicitan {item['solicitado']}."
+                    )
+                })
         
         return data
 
+    def _disponibilidad_carrito(self):
+        """
+        Disponibilidad de todos los objetos de la solicitud, calculada una sola
+        vez y guardada en el serializer raíz. Las fechas se toman de la
+        solicitud (raíz); sin Fecha_Inicio se compara contra el stock actual.
+        """
+        raiz = self.root
+        calculado = getattr(raiz, '_carrito', None)
+        if calculado is not None:
+            return calculado
+
+        datos = getattr(raiz, 'initial_data', None) or {}
+        lineas = [datos] if raiz is self else datos.get('objetos_solicitados') or []
+        items = []
+        for linea in lineas:
+            try:
+                items.append((int(linea.get('objetos_id')), int(linea.get('Cantidad_Objetos', 0))))
+            except (AttributeError, TypeError, ValueError):
+                continue
+
+        valores = {}
+        for campo in ('Fecha_Inicio', 'Fecha_Fin', 'Hora_Inicio', 'Hora_Fin'):
+            valor = datos.get(campo)
+            if valor in (None, '') or campo not in raiz.fields:
+                valores[campo] = None
+                continue
+            try:
+                valores[campo] = raiz.fields[campo].run_validation(valor)
+            except serializers.ValidationError:
+                valores[campo] = None
+        periodo = disponibilidad.ventana(
+            valores['Fecha_Inicio'], valores['Fecha_Fin'], valores['Hora_Inicio'], valores['Hora_Fin']
+        )
+        desde, hasta = periodo if periodo else (None, None)
+
+        resultado = disponibilidad.verificar_carrito(
+            items, desde, hasta, excluir_solicitud=getattr(raiz.instance, 'Solicitud_Id', None)
+        )
+        calculado = {item['objetos_id']: item for item in resultado['items']}
+        raiz._carrito = calculado
+        return calculado
+
 
 class SolicitudesObjetosReadSerializer(serializers.ModelSerializer):
     nombre_objeto = serializers.CharField(source='Objetos_Id.Nombre_Objetos', read_only=True)
@@ -101,6 +149,30 @@ class SolicitudesObjetosReadSerializer(serializers.ModelSerializer):
         fields = ('Solicitud_Objetos_Id', 'Objetos_Id', 'nombre_objeto', 'Cantidad_Objetos')
 
 
+class ItemCarritoSerializer(serializers.Serializer):
+    objetos_id = serializers.IntegerField()
+    Cantidad_Objetos = serializers.IntegerField(min_value=1)
+
+
+class DisponibilidadCarritoSerializer(serializers.Serializer):
+    """
+    Consulta de disponibilidad de un carrito: mismo formato que el cuerpo de
+    una solicitud (fechas, horas y objetos_solicitados).
+    """
+    Fecha_Inicio = serializers.DateField(required=False, allow_null=True)
+    Fecha_Fin = serializers.DateField(required=False, allow_null=True)
+    Hora_Inicio = serializers.DateTimeField(required=False, allow_null=True)
+    Hora_Fin = serializers.DateTimeField(required=False, allow_null=True)
+    objetos_solicitados = ItemCarritoSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        if data.get('Fecha_Inicio') and data.get('Fecha_Fin') and data['Fecha_Inicio'] > data['Fecha_Fin']:
+            raise serializers.ValidationError({
+                'Fecha_Fin': 'La fecha de fin debe ser posterior a la fecha de inicio.'
+            })
+        return data
+
+
 # ----------------------------------------------------------------------
 # 2. Serializers para SOLICITUDES (Principal)
 # ----------------------------------------------------------------------
@@ -200,7 +272,25 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
         # Validación de concurrencia SOLO si hay laboratorio Y fechas completas
         # Usar 'self.instance' para obtener el lab actual si no se está cambiando
         laboratorio_id = data.get('laboratorio_id', getattr(self.instance, 'Laboratorio_Id_id', None))
-        
+
+        # Validar horario de apertura (maestros/horarios.py) cuando cambia el
+        # laboratorio o el horario de la reserva; en PATCH se completan los
+        # campos que no vienen con los de la solicitud actual
+        campos_reserva = ('Fecha_Inicio', 'Fecha_Fin', 'Hora_Inicio', 'Hora_Fin')
+        if laboratorio_id and any(campo in data for campo in ('laboratorio_id',) + campos_reserva):
+            reserva = {
+                campo: data.get(campo, getattr(self.instance, campo, None))
+                for campo in campos_reserva
+            }
+            if reserva['Fecha_Inicio'] and reserva['Hora_Inicio'] and reserva['Hora_Fin']:
+                error_horario = horarios.fuera_de_horario(
+                    laboratorio_id,
+                    reserva['Fecha_Inicio'], reserva['Fecha_Fin'],
+                    reserva['Hora_Inicio'], reserva['Hora_Fin'],
+                )
+                if error_horario:
+                    raise serializers.ValidationError({'Hora_Inicio': error_horario})
+
         if laboratorio_id and all([data.get('Fecha_Inicio'), data.get('Fecha_Fin'), 
                                    data.get('Hora_Inicio'), data.get('Hora_Fin')]):
             
@@ -235,7 +325,7 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
         
         if tipo_servicio_id:
             try:
-                return Tipo_Servicio.objects.get(Tipo_Servicio_Id=tipo_servicio_id)
+                return catalogos.obtener(Tipo_Servicio, tipo_servicio_id)
             except Tipo_Servicio.DoesNotExist:
                 if not tipo_servicio_nombre:
                     raise serializers.ValidationError({
@@ -244,9 +334,9 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
         
         # Crear nuevo tipo de servicio
         if tipo_servicio_nombre:
-            tipo_servicio, created = Tipo_Servicio.objects.get_or_create(
-                Nombre_Tipo_Servicio=tipo_servicio_nombre,
-                defaults={
+            tipo_servicio, created = catalogos.obtener_o_crear_por_nombre(
+                Tipo_Servicio, tipo_servicio_nombre,
+                defaults=lambda: {
                     'Tipo_Servicio_Id': get_next_id(Tipo_Servicio, 'Tipo_Servicio_Id')
                 }
             )
@@ -261,23 +351,23 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
         
         if estado_id:
             try:
-                return Estados.objects.get(Estado_Id=estado_id)
+                return catalogos.obtener(Estados, estado_id)
             except Estados.DoesNotExist:
                 if not estado_nombre:
                     # Estado por defecto: PENDIENTE
-                    return Estados.objects.get(Estado_Id=1)
+                    return catalogos.obtener(Estados, 1)
         
         if estado_nombre:
-            estado, created = Estados.objects.get_or_create(
-                Nombre_Estado=estado_nombre,
-                defaults={
+            estado, created = catalogos.obtener_o_crear_por_nombre(
+                Estados, estado_nombre,
+                defaults=lambda: {
                     'Estado_Id': get_next_id(Estados, 'Estado_Id')
                 }
             )
             return estado
         
         # Estado por defecto
-        return Estados.objects.get(Estado_Id=1)
+        return catalogos.obtener(Estados, 1)
 
     def _get_or_create_laboratorio(self, validated_data):
         """Obtiene o crea el laboratorio."""
@@ -286,15 +376,15 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
         
         if laboratorio_id:
             try:
-                return Laboratorios.objects.get(Laboratorio_Id=laboratorio_id)
+                return catalogos.obtener(Laboratorios, laboratorio_id)
             except Laboratorios.DoesNotExist:
                 if not laboratorio_nombre:
                     return None
         
         if laboratorio_nombre:
-            laboratorio, created = Laboratorios.objects.get_or_create(
-                Nombre_Laboratorio=laboratorio_nombre,
-                defaults={
+            laboratorio, created = catalogos.obtener_o_crear_por_nombre(
+                Laboratorios, laboratorio_nombre,
+                defaults=lambda: {
                     'Laboratorio_Id': get_next_id(Laboratorios, 'Laboratorio_Id')
                 }
             )
@@ -353,6 +443,16 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
             except AttributeError:
                 pass
 
+        # El stock no se descuenta aquí sino en la entrega (reservas/prestamos.py):
+        # la solicitud solo compromete unidades en su ventana de fechas
+        self._verificar_disponibilidad(
+            [
+                (detalle['objetos_id'], detalle.get('Cantidad_Objetos') or 0)
+                for detalle in objetos_data if detalle.get('objetos_id')
+            ],
+            validated_data,
+        )
+
         try:
             # Generar ID para la solicitud
             solicitud_id = get_next_id(Solicitudes, 'Solicitud_Id')
@@ -397,19 +497,53 @@ class SolicitudesWriteSerializer(serializers.ModelSerializer):
                             Cantidad_Objetos=cantidad,
                         )
 
-                        # Actualizar inventario si el objeto existía
-                        if detalle_data.get('objetos_id'):
-                            Objetos.objects.filter(Objetos_Id=objeto.Objetos_Id).update(
-                                Cant_Stock=models.F('Cant_Stock') - cantidad 
-                            )
                 
             return solicitud
         except Exception as e:
             raise serializers.ValidationError({"detail": f"Error al guardar la solicitud: {str(e)}"})
 
+    def _verificar_disponibilidad(self, items, datos, excluir_solicitud=None):
+        """
+        Comprueba dentro de la transacción que los objetos alcancen en la
+        ventana de la solicitud. Los objetos se bloquean (FOR UPDATE): dos
+        solicitudes simultáneas del mismo objeto se verifican una tras otra.
+        """
+        if not items:
+            return
+        list(Objetos.objects.select_for_update().filter(
+            Objetos_Id__in=[objeto_id for objeto_id, _ in items]
+        ).values_list('Objetos_Id', flat=True))
+
+        periodo = disponibilidad.ventana(
+            datos.get('Fecha_Inicio'), datos.get('Fecha_Fin'), datos.get('Hora_Inicio'), datos.get('Hora_Fin')
+        )
+        desde, hasta = periodo if periodo else (None, None)
+        resultado = disponibilidad.verificar_carrito(items, desde, hasta, excluir_solicitud)
+        faltantes = [
+            f"El objeto '{item.get('nombre', item['objetos_id'])}' solo tiene {item.get('disponible', 0)} "
+            f"unidades disponibles en esas fechas, y se solicitan {item['solicitado']}."
+            for item in resultado['items'] if not item['alcanza']
+        ]
+        if faltantes:
+            raise serializers.ValidationError({'Cantidad_Objetos': faltantes})
+
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Actualización flexible de solicitudes."""
         validated_data.pop('objetos_solicitados', None)
+
+        # Cambiar las fechas de una solicitud activa mueve sus unidades
+        # comprometidas: se vuelve a verificar sin contar la propia solicitud
+        campos_ventana = ('Fecha_Inicio', 'Fecha_Fin', 'Hora_Inicio', 'Hora_Fin')
+        if (
+            any(campo in validated_data for campo in campos_ventana)
+            and instance.Estado_Id_id in estados.ids_estados(estados.ESTADOS_ACTIVOS)
+        ):
+            self._verificar_disponibilidad(
+                list(instance.solicitudes_objetos_set.values_list('Objetos_Id', 'Cantidad_Objetos')),
+                {campo: validated_data.get(campo, getattr(instance, campo)) for campo in campos_ventana},
+                excluir_solicitud=instance.Solicitud_Id,
+            )
         
         # Manejar relaciones si se proporcionan
         if 'tipo_servicio_id' in validated_data or 'tipo_servicio_nombre' in validated_data:
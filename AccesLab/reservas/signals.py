@@ -0,0 +1,8 @@
+# reservas/signals.py
+# Señales propias de reservas
+
+from django.dispatch import Signal
+
+# Se envía (al confirmar la transacción) cuando un lote de solicitudes cambia
+# con bulk_update, que no dispara post_save. Argumento: solicitudes (instancias)
+solicitudes_actualizadas = Signal()
@@ -0,0 +1,24 @@
+-- ==============================================================================
+-- RESERVAS/SQL/INDICES_SOLICITUDES.SQL - Índices de apoyo para reportes
+-- ==============================================================================
+-- Los modelos son managed = False: Django no crea estos índices, se ejecutan
+-- a mano en Oracle (sqlplus / SQL Developer) con el usuario dueño del esquema.
+
+-- Resumen de entregas y devoluciones (reportes/calculos.py):
+-- todas las condiciones filtran por TIPO_SERVICIO_ID y ESTADO_ID, y las
+-- "próximas devoluciones" por rango de FECHA_FIN. FECHA_INICIO cubre el
+-- promedio de duración y SOLICITUD_ID los COUNT(CASE WHEN ... THEN
+-- SOLICITUD_ID END) que genera el ORM; con las cinco columnas la consulta se
+-- resuelve leyendo solo el índice sin tocar la tabla.
+CREATE INDEX IX_SOLICITUDES_TIPO_ESTADO_FFIN
+    ON SOLICITUDES (TIPO_SERVICIO_ID, ESTADO_ID, FECHA_FIN, FECHA_INICIO, SOLICITUD_ID);
+
+-- Estadísticas actualizadas para que el optimizador elija el índice
+BEGIN
+    DBMS_STATS.GATHER_TABLE_STATS(
+        ownname => USER,
+        tabname => 'SOLICITUDES',
+        cascade => TRUE
+    );
+END;
+/
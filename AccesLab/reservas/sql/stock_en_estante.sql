@@ -0,0 +1,19 @@
+-- ==============================================================================
+-- RESERVAS/SQL/STOCK_EN_ESTANTE.SQL - CANT_STOCK como unidades en estante
+-- ==============================================================================
+-- Los modelos son managed = False: se ejecuta a mano en Oracle (sqlplus /
+-- SQL Developer) con el usuario dueño del esquema, una sola vez.
+--
+-- CANT_STOCK pasa a ser el conteo de unidades en estante: la entrega las
+-- descuenta y la devolución las repone (reservas/prestamos.py); crear una
+-- solicitud ya no toca el stock. Los valores actuales arrastran lo que se
+-- descontaba al crear solicitudes (también las que luego se rechazaron), así
+-- que después de este script conviene cargar el conteo físico con
+-- POST /api/maestros/objetos/ajuste-inventario/ ({"objetos_id", "cantidad"}).
+
+-- Un descuento sin guarda pudo dejar filas negativas
+UPDATE OBJETOS SET CANT_STOCK = 0 WHERE CANT_STOCK < 0;
+COMMIT;
+
+-- Ninguna escritura (ORM o SQL directo) puede volver a dejarlo negativo
+ALTER TABLE OBJETOS ADD CONSTRAINT CK_OBJETOS_CANT_STOCK CHECK (CANT_STOCK >= 0);
@@ -1,3 +1,347 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from maestros.models import (
+    Categorias, Devoluciones, Entregas, Estados, Frecuencia_Servicio, Objetos, Roles, Tipo_Identificacion,
+    Tipo_Servicio,
+)
+from maestros.serializers import get_next_id
+from monitoreo.pruebas import reiniciar_catalogos
+from usuarios.models import Usuarios, Usuarios_Roles
+
+from .disponibilidad import _pico
+from .models import Solicitudes, Solicitudes_Objetos
+
+
+class PicoTests(SimpleTestCase):
+    """reservas/disponibilidad.py: máximo de unidades simultáneas."""
+
+    def test_sin_intervalos(self):
+        self.assertEqual(_pico([]), 0)
+
+    def test_solapados_suman(self):
+        self.assertEqual(_pico([(0, 10, 2), (5, 15, 3), (8, 9, 1)]), 6)
+
+    def test_disjuntos_no_suman(self):
+        self.assertEqual(_pico([(0, 5, 2), (6, 10, 3)]), 3)
+
+    def test_contiguos_no_se_solapan(self):
+        # La salida en t=5 se procesa antes que la entrada en t=5
+        self.assertEqual(_pico([(5, 10, 3), (0, 5, 2)]), 3)
+
+
+URL_DISPONIBILIDAD = '/api/reservas/solicitudes/disponibilidad/'
+
+
+def _hora(fecha, hora):
+    return timezone.make_aware(datetime.combine(fecha, time(hora)))
+
+
+class DisponibilidadCarritoAPITests(APITestCase):
+    """POST /api/reservas/solicitudes/disponibilidad/ sobre el perfil SQLite."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        cls.user = User.objects.create_user(username='estudiante', password='x')
+        cls.usuario = Usuarios.objects.create(
+            Usuario_Id=cls.user, Tipo_Id=tipo_id, Nombres='Luis', Apellido1='Gómez'
+        )
+        cls.servicio = Tipo_Servicio.objects.create(Tipo_Servicio_Id=2, Nombre_Tipo_Servicio='Préstamo')
+        cls.estados = {
+            nombre: Estados.objects.create(Estado_Id=i, Nombre_Estado=nombre)
+            for i, nombre in enumerate(('Pendiente', 'Aprobada', 'En Uso', 'Devuelto', 'Rechazada'), start=1)
+        }
+        categoria = Categorias.objects.create(Categoria_Id=1, Nombre_Categoria='Electrónica')
+        cls.osciloscopio = Objetos.objects.create(
+            Objetos_Id=1, Nombre_Objetos='Osciloscopio', Categoria_Id=categoria, Cant_Stock=5
+        )
+        cls.inactivo = Objetos.objects.create(
+            Objetos_Id=2, Nombre_Objetos='Fuente', Categoria_Id=categoria, Cant_Stock=3, Activo=False
+        )
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+        self.client.force_authenticate(self.user)
+
+    def _solicitud(self, estado, inicio, fin, cantidad, horas=(8, 12)):
+        solicitud = Solicitudes.objects.create(
+            Fecha_solicitud=inicio,
+            Asignatura='Circuitos',
+            N_asistentes=1,
+            Fecha_Inicio=inicio,
+            Fecha_Fin=fin,
+            Hora_Inicio=_hora(inicio, horas[0]),
+            Hora_Fin=_hora(fin, horas[1]),
+            Usuario_Id=self.usuario,
+            Tipo_Servicio_Id=self.servicio,
+            Estado_Id=self.estados[estado],
+        )
+        Solicitudes_Objetos.objects.create(Solicitud_Id=solicitud, Objetos_Id=self.osciloscopio, Cantidad_Objetos=cantidad)
+        return solicitud
+
+    def _consultar(self, cantidad, objetos_id=1, inicio='2025-03-05', fin='2025-03-05', horas=('09', '11')):
+        return self.client.post(URL_DISPONIBILIDAD, {
+            'Fecha_Inicio': inicio,
+            'Fecha_Fin': fin,
+            'Hora_Inicio': f'{inicio}T{horas[0]}:00:00Z',
+            'Hora_Fin': f'{fin}T{horas[1]}:00:00Z',
+            'objetos_solicitados': [{'objetos_id': objetos_id, 'Cantidad_Objetos': cantidad}],
+        }, format='json')
+
+    def test_sin_reservas_alcanza_todo_el_stock(self):
+        respuesta = self._consultar(5)
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertTrue(respuesta.data['disponible_todo'])
+        item = respuesta.data['items'][0]
+        self.assertEqual((item['capacidad'], item['comprometido'], item['disponible']), (5, 0, 5))
+
+    def test_descuenta_el_pico_de_solicitudes_activas_en_la_ventana(self):
+        self._solicitud('Aprobada', date(2025, 3, 5), date(2025, 3, 5), 2)
+        self._solicitud('Pendiente', date(2025, 3, 4), date(2025, 3, 6), 1)
+        # Fuera de la ventana o sin uso: no cuentan
+        self._solicitud('Aprobada', date(2025, 3, 10), date(2025, 3, 10), 4)
+        self._solicitud('Rechazada', date(2025, 3, 5), date(2025, 3, 5), 4)
+
+        respuesta = self._consultar(3)
+        item = respuesta.data['items'][0]
+        self.assertEqual((item['comprometido'], item['disponible']), (3, 2))
+        self.assertFalse(respuesta.data['disponible_todo'])
+        self.assertTrue(self._consultar(2).data['disponible_todo'])
+
+    def test_unidades_en_uso_suman_a_la_capacidad(self):
+        # Entregadas: ya no están en Cant_Stock, pero comprometen su ventana
+        Objetos.objects.filter(pk=1).update(Cant_Stock=3)
+        self._solicitud('En Uso', date(2025, 3, 1), date(2025, 3, 2), 2)
+
+        item = self._consultar(5).data['items'][0]
+        self.assertEqual((item['capacidad'], item['comprometido'], item['disponible']), (5, 0, 5))
+
+    def test_estados_por_nombre_sin_mayusculas_ni_tildes(self):
+        # El catálogo del despliegue escribe los nombres a su manera
+        Estados.objects.filter(pk=self.estados['En Uso'].pk).update(Nombre_Estado='EN USO')
+        Estados.objects.filter(pk=self.estados['Aprobada'].pk).update(Nombre_Estado='aprobada ')
+        Objetos.objects.filter(pk=1).update(Cant_Stock=3)
+        self._solicitud('En Uso', date(2025, 3, 1), date(2025, 3, 2), 2)
+        self._solicitud('Aprobada', date(2025, 3, 5), date(2025, 3, 5), 1)
+
+        item = self._consultar(5).data['items'][0]
+        self.assertEqual((item['capacidad'], item['comprometido'], item['disponible']), (5, 1, 4))
+
+    def test_objeto_inactivo_o_inexistente(self):
+        respuesta = self._consultar(1, objetos_id=2)
+        self.assertEqual(respuesta.data['items'][0]['disponible'], 0)
+        self.assertFalse(respuesta.data['disponible_todo'])
+
+        respuesta = self._consultar(1, objetos_id=99)
+        self.assertFalse(respuesta.data['items'][0]['existe'])
+
+    def test_valida_el_cuerpo(self):
+        respuesta = self._consultar(1, inicio='2025-03-06', fin='2025-03-05')
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Fecha_Fin', respuesta.data)
+
+    def test_requiere_autenticacion(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self._consultar(1).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+URL_SOLICITUDES = '/api/reservas/solicitudes/'
+
+
+class PrestamosAPITests(APITestCase):
+    """Entrega y devolución de equipos (reservas/prestamos.py) por la API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo_id = Tipo_Identificacion.objects.create(Tipo_Id=1, Nombre_Tipo_Identificacion='CC')
+        rol_admin = Roles.objects.create(Rol_Id=1, Nombre_Roles='Administrador')
+        cls.admin = User.objects.create_user(username='admin', password='x')
+        perfil = Usuarios.objects.create(Usuario_Id=cls.admin, Tipo_Id=tipo_id, Nombres='Eva', Apellido1='Mora')
+        Usuarios_Roles.objects.create(Usuario_Id=perfil, Rol_Id=rol_admin)
+        cls.estudiante = User.objects.create_user(username='estudiante', password='x')
+        cls.usuario = Usuarios.objects.create(
+            Usuario_Id=cls.estudiante, Tipo_Id=tipo_id, Nombres='Luis', Apellido1='Gómez'
+        )
+        cls.servicio = Tipo_Servicio.objects.create(Tipo_Servicio_Id=2, Nombre_Tipo_Servicio='Préstamo')
+        cls.estados = {
+            nombre: Estados.objects.create(Estado_Id=i, Nombre_Estado=nombre)
+            for i, nombre in enumerate(
+                ('Pendiente', 'Aprobada', 'En Uso', 'Devuelto', 'Devuelto Tarde', 'Rechazada'), start=1
+            )
+        }
+        Frecuencia_Servicio.objects.create(Frecuencia_Servicio_Id=1, Nombre_Frecuencia_Servicio='Única')
+        categoria = Categorias.objects.create(Categoria_Id=1, Nombre_Categoria='Electrónica')
+        cls.osciloscopio = Objetos.objects.create(
+            Objetos_Id=1, Nombre_Objetos='Osciloscopio', Categoria_Id=categoria, Cant_Stock=5
+        )
+        cls.fuente = Objetos.objects.create(
+            Objetos_Id=2, Nombre_Objetos='Fuente', Categoria_Id=categoria, Cant_Stock=2
+        )
+
+    def setUp(self):
+        cache.clear()
+        reiniciar_catalogos()
+        self.client.force_authenticate(self.admin)
+
+    def _solicitud(self, estado, cantidades, fin=None):
+        fin = fin or timezone.localdate() + timedelta(days=1)
+        solicitud = Solicitudes.objects.create(
+            Fecha_solicitud=timezone.now(),
+            Asignatura='Circuitos',
+            N_asistentes=1,
+            Fecha_Inicio=fin - timedelta(days=1),
+            Fecha_Fin=fin,
+            Hora_Inicio=_hora(fin - timedelta(days=1), 8),
+            Hora_Fin=_hora(fin, 12),
+            Usuario_Id=self.usuario,
+            Tipo_Servicio_Id=self.servicio,
+            Estado_Id=self.estados[estado],
+        )
+        for objeto, cantidad in cantidades:
+            Solicitudes_Objetos.objects.create(Solicitud_Id=solicitud, Objetos_Id=objeto, Cantidad_Objetos=cantidad)
+        return solicitud
+
+    def _post(self, ruta, datos=None):
+        return self.client.post(f'{URL_SOLICITUDES}{ruta}/', datos or {}, format='json')
+
+    def _stock(self):
+        return dict(Objetos.objects.values_list('Objetos_Id', 'Cant_Stock'))
+
+    def test_entregar_vincula_la_entrega_y_descuenta_stock(self):
+        solicitud = self._solicitud('Aprobada', [(self.osciloscopio, 2), (self.fuente, 1)])
+
+        respuesta = self._post(f'{solicitud.Solicitud_Id}/entregar', {'observacion': 'Sin cables'})
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        entrega_id = respuesta.data[0]['entrega_id']
+        self.assertEqual(respuesta.data[0]['estado'], 'En Uso')
+
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.Entrega_Id_id, entrega_id)
+        self.assertEqual(solicitud.Estado_Id_id, self.estados['En Uso'].Estado_Id)
+        entrega = Entregas.objects.get(pk=entrega_id)
+        self.assertEqual(entrega.Observacion_Entrega, 'Sin cables')
+        self.assertEqual(entrega.Frecuencia_Servicio_Id_id, 1)
+        self.assertEqual(self._stock(), {1: 3, 2: 1})
+
+        # Ya no está Aprobada: una segunda entrega se rechaza
+        self.assertEqual(self._post(f'{solicitud.Solicitud_Id}/entregar').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recibir_a_tiempo_repone_stock(self):
+        solicitud = self._solicitud('Aprobada', [(self.osciloscopio, 2)])
+        self._post(f'{solicitud.Solicitud_Id}/entregar')
+
+        respuesta = self._post(f'{solicitud.Solicitud_Id}/recibir')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        devolucion = respuesta.data['devoluciones'][0]
+        self.assertEqual((devolucion['estado'], devolucion['tarde']), ('Devuelto', False))
+        self.assertEqual(respuesta.data['stock_restaurado'], {1: 2})
+
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.Devolucion_Id_id, devolucion['devolucion_id'])
+        self.assertEqual(solicitud.Estado_Id_id, self.estados['Devuelto'].Estado_Id)
+        self.assertEqual(self._stock()[1], 5)
+
+    def test_recibir_despues_del_vencimiento_marca_tarde(self):
+        # Ya entregada y con Fecha_Fin vencida
+        solicitud = self._solicitud('En Uso', [(self.osciloscopio, 1)], fin=timezone.localdate() - timedelta(days=2))
+        Objetos.objects.filter(pk=1).update(Cant_Stock=4)
+
+        devolucion = self._post(f'{solicitud.Solicitud_Id}/recibir').data['devoluciones'][0]
+        self.assertEqual((devolucion['estado'], devolucion['tarde']), ('Devuelto Tarde', True))
+        solicitud.refresh_from_db()
+        self.assertEqual(solicitud.Estado_Id_id, self.estados['Devuelto Tarde'].Estado_Id)
+        self.assertEqual(self._stock()[1], 5)
+
+    def test_lotes(self):
+        primera = self._solicitud('Aprobada', [(self.osciloscopio, 2)])
+        segunda = self._solicitud('Aprobada', [(self.osciloscopio, 1), (self.fuente, 2)])
+        ids = [primera.Solicitud_Id, segunda.Solicitud_Id]
+
+        respuesta = self._post('entregar-lote', {'solicitudes': ids})
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        entregas = [item['entrega_id'] for item in respuesta.data]
+        self.assertEqual(len(set(entregas)), 2)
+        self.assertEqual(self._stock(), {1: 2, 2: 0})
+
+        respuesta = self._post('recibir-lote', {'solicitudes': ids})
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(respuesta.data['stock_restaurado'], {1: 3, 2: 2})
+        self.assertEqual(self._stock(), {1: 5, 2: 2})
+        self.assertEqual(Devoluciones.objects.count(), 2)
+
+    def test_lote_invalido_no_aplica_nada(self):
+        aprobada = self._solicitud('Aprobada', [(self.osciloscopio, 2)])
+        pendiente = self._solicitud('Pendiente', [(self.osciloscopio, 1)])
+
+        respuesta = self._post('entregar-lote', {'solicitudes': [aprobada.Solicitud_Id, pendiente.Solicitud_Id, 999]})
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error['solicitud_id'] for error in respuesta.data['errores']], [pendiente.Solicitud_Id, 999]
+        )
+        aprobada.refresh_from_db()
+        self.assertIsNone(aprobada.Entrega_Id_id)
+        self.assertEqual(aprobada.Estado_Id_id, self.estados['Aprobada'].Estado_Id)
+        self.assertEqual(Entregas.objects.count(), 0)
+        self.assertEqual(self._stock()[1], 5)
+
+    def test_stock_insuficiente_revierte_el_lote(self):
+        # Entre las dos piden 3 fuentes y solo hay 2 en estante
+        primera = self._solicitud('Aprobada', [(self.fuente, 2)])
+        segunda = self._solicitud('Aprobada', [(self.osciloscopio, 1), (self.fuente, 1)])
+
+        respuesta = self._post('entregar-lote', {'solicitudes': [primera.Solicitud_Id, segunda.Solicitud_Id]})
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('unidades en stock', respuesta.data['errores'][0]['error'])
+        self.assertEqual(self._stock(), {1: 5, 2: 2})
+        self.assertFalse(Solicitudes.objects.filter(Entrega_Id__isnull=False).exists())
+
+    def test_valida_el_lote(self):
+        self.assertEqual(self._post('entregar-lote', {'solicitudes': []}).status_code, status.HTTP_400_BAD_REQUEST)
+        respuesta = self._post('recibir-lote', {'solicitudes': [1, 1]})
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('repetidas', respuesta.data['errores'][0]['error'])
+
+    def test_reintenta_si_otro_lote_tomo_el_id(self):
+        solicitud = self._solicitud('Aprobada', [(self.osciloscopio, 1)])
+        ahora = timezone.now()
+        Entregas.objects.create(
+            Entrega_Id=7, Fecha_Entrega=ahora.date(), Hora_Entrega=ahora, Observacion_Entrega='',
+            Frecuencia_Servicio_Id_id=1,
+        )
+
+        # El primer MAX(ID) llega antes de que el otro lote confirme el 7
+        with mock.patch('reservas.prestamos.get_next_id', side_effect=[7, 8]) as siguiente:
+            respuesta = self._post(f'{solicitud.Solicitud_Id}/entregar')
+        self.assertEqual(respuesta.status_code, status.HTTP_200_OK)
+        self.assertEqual(respuesta.data[0]['entrega_id'], 8)
+        self.assertEqual(siguiente.call_count, 2)
+        self.assertEqual(self._stock()[1], 4)
+
+    def test_agota_los_reintentos_sin_aplicar_nada(self):
+        solicitud = self._solicitud('Aprobada', [(self.osciloscopio, 1)])
+        ahora = timezone.now()
+        Entregas.objects.create(
+            Entrega_Id=7, Fecha_Entrega=ahora.date(), Hora_Entrega=ahora, Observacion_Entrega='',
+            Frecuencia_Servicio_Id_id=1,
+        )
+
+        with mock.patch('reservas.prestamos.get_next_id', return_value=7):
+            respuesta = self._post(f'{solicitud.Solicitud_Id}/entregar')
+        self.assertEqual(respuesta.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('ENTREGAS', respuesta.data['errores'][0]['error'])
+        self.assertEqual(self._stock()[1], 5)
+        self.assertEqual(get_next_id(Entregas, 'Entrega_Id'), 8)
+
+    def test_requiere_administrador(self):
+        solicitud = self._solicitud('Aprobada', [(self.osciloscopio, 1)])
+        self.client.force_authenticate(self.estudiante)
+        self.assertEqual(self._post(f'{solicitud.Solicitud_Id}/entregar').status_code, status.HTTP_403_FORBIDDEN)
@@ -1,7 +1,9 @@
 # reservas/urls.py
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import SolicitudesViewSet, UsuarioSolicitudViewSet
+from .views_async import listar_solicitudes
 
 # ============================================
 # ROUTER PARA LÓGICA DE NEGOCIO
@@ -17,6 +19,10 @@ router = DefaultRouter()
 # - PUT    /api/reservas/solicitudes/{id}/      -> Actualizar completamente
 # - PATCH  /api/reservas/solicitudes/{id}/      -> Actualizar parcialmente (aprobar/rechazar)
 # - DELETE /api/reservas/solicitudes/{id}/      -> Eliminar solicitud
+# - POST   /api/reservas/solicitudes/{id}/entregar/ -> Entregar equipos (Aprobada -> En Uso)
+# - POST   /api/reservas/solicitudes/{id}/recibir/  -> Recibir equipos y reponer stock
+# - POST   /api/reservas/solicitudes/entregar-lote/ y recibir-lote/ -> Lo mismo para varias
+# - POST   /api/reservas/solicitudes/disponibilidad/ -> Unidades disponibles del carrito en esas fechas
 router.register(r'solicitudes', SolicitudesViewSet, basename='solicitudes')
 
 # --- PARTICIPANTES/INTEGRANTES ---
@@ -29,4 +35,7 @@ router.register(r'solicitudes', SolicitudesViewSet, basename='solicitudes')
 router.register(r'participantes', UsuarioSolicitudViewSet, basename='participantes')
 
 # Exportar las URLs del router
-urlpatterns = router.urls
\ No newline at end of file
+# GET /api/reservas/async/solicitudes/ -> lista de solicitudes en versión async (ASGI)
+urlpatterns = [
+    path('async/solicitudes/', listar_solicitudes, name='solicitudes-async'),
+] + router.urls
\ No newline at end of file
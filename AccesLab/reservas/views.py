@@ -2,16 +2,52 @@
 # RESERVAS/VIEWS.PY - CON ELIMINACIÓN PARA USUARIOS (CORREGIDO)
 # ==============================================================================
 
+import logging
+
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import (
     SolicitudesWriteSerializer, 
     SolicitudesReadSerializer,
+    DisponibilidadCarritoSerializer,
     IntegranteSolicitudSerializer as UsuarioSolicitudSerializer 
 )
 from .models import Solicitudes, Integrante_Solicitud 
 from usuarios.permissions import IsAdminUser 
+from maestros import catalogos
+from . import disponibilidad, prestamos
+
+logger = logging.getLogger(__name__)
+
+
+def solicitudes_visibles(base_queryset, user, usuario_param=None):
+    """
+    Solicitudes que puede ver el usuario (compartido con reservas/views_async.py):
+    - Admin: todas, o las de usuario_param si viene
+    - Usuario regular: solo las suyas
+    """
+    if not user.is_authenticated:
+        return Solicitudes.objects.none()
+
+    # Identificar si es Admin
+    perfil = getattr(user, 'perfil_oracle', None)
+    is_admin = user.is_staff or (perfil and getattr(perfil, 'is_admin', False))
+
+    # Admin: puede ver todas o filtrar por usuario
+    if is_admin:
+        if usuario_param:
+            return base_queryset.filter(Usuario_Id__Usuario_Id=usuario_param)
+        return base_queryset
+
+    # Usuario regular: solo sus solicitudes
+    try:
+        if perfil:
+            return base_queryset.filter(Usuario_Id__Usuario_Id=perfil.Usuario_Id)
+        return Solicitudes.objects.none()
+    except AttributeError:
+        return Solicitudes.objects.none()
 
 
 class SolicitudesViewSet(viewsets.ModelViewSet):
@@ -40,11 +76,12 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         """
         Permisos por acción:
-        - list/retrieve/create: Requiere autenticación
+        - list/retrieve/create/disponibilidad: Requiere autenticación
         - destroy: Usuario puede eliminar sus propias solicitudes
         - update/partial_update: Requiere Admin
+        - entregar/recibir (y sus versiones en lote): Requiere Admin
         """
-        if self.action in ['list', 'retrieve', 'create']:
+        if self.action in ['list', 'retrieve', 'create', 'disponibilidad']:
             self.permission_classes = [permissions.IsAuthenticated]
         elif self.action == 'destroy':
             # 🔥 PERMITIR que usuarios eliminen sus propias solicitudes
@@ -60,30 +97,9 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         - Admin: Ve todas las solicitudes (puede filtrar por Usuario_Id)
         - Usuario regular: Solo ve sus propias solicitudes
         """
-        user = self.request.user
-        base_queryset = super().get_queryset()
-        
-        if not user.is_authenticated:
-            return Solicitudes.objects.none()
-
-        # Identificar si es Admin
-        perfil = getattr(user, 'perfil_oracle', None)
-        is_admin = user.is_staff or (perfil and getattr(perfil, 'is_admin', False))
-        
-        # Admin: puede ver todas o filtrar por usuario
-        if is_admin:
-            usuario_param = self.request.query_params.get('Usuario_Id')
-            if usuario_param:
-                return base_queryset.filter(Usuario_Id__Usuario_Id=usuario_param)
-            return base_queryset
-        
-        # Usuario regular: solo sus solicitudes
-        try:
-            if perfil:
-                return base_queryset.filter(Usuario_Id__Usuario_Id=perfil.Usuario_Id)
-            return Solicitudes.objects.none()
-        except AttributeError:
-            return Solicitudes.objects.none()
+        return solicitudes_visibles(
+            super().get_queryset(), self.request.user, self.request.query_params.get('Usuario_Id')
+        )
 
     # 🔥 MÉTODO PERSONALIZADO: DESTROY (ELIMINAR) - CORREGIDO
     def destroy(self, request, *args, **kwargs):
@@ -94,18 +110,16 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
         
-        print(f"🗑️ DELETE recibido para Solicitud {instance.Solicitud_Id}")
+        logger.debug('DELETE de la solicitud %s', instance.Solicitud_Id)
         
         # 🔥 VALIDACIÓN: Determinar si es admin
         perfil = getattr(request.user, 'perfil_oracle', None)
         is_admin = request.user.is_staff or (perfil and getattr(perfil, 'is_admin', False))
         
-        print(f"🔐 ¿Es admin?: {is_admin}")
-        
         if not is_admin:
             # 🔥 OBTENER EL ID DEL USUARIO DE ORACLE (NO DE DJANGO)
             if perfil is None:
-                print("❌ Usuario no tiene perfil de Oracle")
+                logger.warning('Usuario %s sin perfil de Oracle intenta eliminar la solicitud %s', request.user.pk, instance.Solicitud_Id)
                 return Response(
                     {'error': 'Usuario sin perfil válido'},
                     status=status.HTTP_403_FORBIDDEN
@@ -114,25 +128,20 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
             usuario_oracle_id = perfil.Usuario_Id
             solicitud_usuario_id = instance.Usuario_Id.Usuario_Id
             
-            print(f"👤 Usuario de Django (request.user.id): {request.user.id}")
-            print(f"👤 Usuario de Oracle que hace petición: {usuario_oracle_id}")
-            print(f"👤 Usuario dueño de la solicitud (Oracle): {solicitud_usuario_id}")
-            print(f"👤 Nombre del usuario dueño: {instance.Usuario_Id.Nombres} {instance.Usuario_Id.Apellido1}")
-            
             # 🔥 COMPARAR IDs DE ORACLE (NO DE DJANGO)
             if solicitud_usuario_id != usuario_oracle_id:
-                print(f"❌ Usuario {usuario_oracle_id} intenta eliminar solicitud de usuario {solicitud_usuario_id}")
+                logger.warning(
+                    'Usuario %s intenta eliminar la solicitud %s del usuario %s',
+                    usuario_oracle_id, instance.Solicitud_Id, solicitud_usuario_id,
+                )
                 return Response(
                     {'error': 'No tienes permiso para eliminar esta solicitud'},
                     status=status.HTTP_403_FORBIDDEN
                 )
-            print("✅ Usuario autorizado para eliminar su solicitud")
-        else:
-            print("✅ Admin autorizado para eliminar cualquier solicitud")
         
         # 🔥 ELIMINAR LA SOLICITUD
         self.perform_destroy(instance)
-        print(f"✅ Solicitud {instance.Solicitud_Id} eliminada correctamente")
+        logger.info('Solicitud %s eliminada por el usuario %s (admin: %s)', instance.Solicitud_Id, request.user.pk, bool(is_admin))
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -144,24 +153,21 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         """
         instance = self.get_object()
         
-        print(f"🔧 PATCH recibido para Solicitud {instance.Solicitud_Id}")
-        print(f"📥 Datos recibidos: {request.data}")
-        print(f"📊 Estado actual: {instance.Estado_Id}")
+        logger.debug('PATCH de la solicitud %s: %s', instance.Solicitud_Id, request.data)
         
         # 🔥 ACTUALIZAR ESTADO EXPLÍCITAMENTE (si viene en la request)
         if 'Estado_Id' in request.data:
             from maestros.models import Estados
             
             nuevo_estado_id = request.data['Estado_Id']
-            print(f"🔄 Cambiando estado de {instance.Estado_Id} a {nuevo_estado_id}")
+            logger.info('Solicitud %s: estado %s -> %s', instance.Solicitud_Id, instance.Estado_Id_id, nuevo_estado_id)
             
             try:
-                nuevo_estado = Estados.objects.get(Estado_Id=nuevo_estado_id)
+                nuevo_estado = catalogos.obtener(Estados, nuevo_estado_id)
                 instance.Estado_Id = nuevo_estado
                 instance.save()
-                print(f"✅ Estado guardado correctamente: {instance.Estado_Id}")
             except Estados.DoesNotExist:
-                print(f"❌ Estado {nuevo_estado_id} no existe")
+                logger.warning('Estado %s no existe (solicitud %s)', nuevo_estado_id, instance.Solicitud_Id)
                 return Response(
                     {'error': f'Estado {nuevo_estado_id} no existe'},
                     status=status.HTTP_400_BAD_REQUEST
@@ -174,7 +180,6 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         
         # 🔥 VERIFICAR QUE EL ESTADO SE GUARDÓ
         instance.refresh_from_db()
-        print(f"🔍 Estado después de guardar: {instance.Estado_Id}")
         
         # Usar el serializer de lectura para la respuesta
         if getattr(instance, '_prefetched_objects_cache', None):
@@ -192,21 +197,19 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
-        print(f"🔧 UPDATE recibido para Solicitud {instance.Solicitud_Id}")
-        print(f"📥 Datos recibidos: {request.data}")
+        logger.debug('PUT de la solicitud %s: %s', instance.Solicitud_Id, request.data)
         
         # 🔥 ACTUALIZAR ESTADO EXPLÍCITAMENTE (si viene en la request)
         if 'Estado_Id' in request.data:
             from maestros.models import Estados
             
             nuevo_estado_id = request.data['Estado_Id']
-            print(f"🔄 Cambiando estado de {instance.Estado_Id} a {nuevo_estado_id}")
+            logger.info('Solicitud %s: estado %s -> %s', instance.Solicitud_Id, instance.Estado_Id_id, nuevo_estado_id)
             
             try:
-                nuevo_estado = Estados.objects.get(Estado_Id=nuevo_estado_id)
+                nuevo_estado = catalogos.obtener(Estados, nuevo_estado_id)
                 instance.Estado_Id = nuevo_estado
                 instance.save()
-                print(f"✅ Estado guardado correctamente: {instance.Estado_Id}")
             except Estados.DoesNotExist:
                 return Response(
                     {'error': f'Estado {nuevo_estado_id} no existe'},
@@ -219,7 +222,6 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         
         # 🔥 VERIFICAR QUE EL ESTADO SE GUARDÓ
         instance.refresh_from_db()
-        print(f"🔍 Estado después de guardar: {instance.Estado_Id}")
         
         if getattr(instance, '_prefetched_objects_cache', None):
             instance._prefetched_objects_cache = {}
@@ -228,6 +230,76 @@ class SolicitudesViewSet(viewsets.ModelViewSet):
         
         return Response(response_serializer.data)
 
+    # ============================================
+    # DISPONIBILIDAD DEL CARRITO (reservas/disponibilidad.py)
+    # ============================================
+    @action(detail=False, methods=['post'])
+    def disponibilidad(self, request):
+        """
+        ¿Alcanzan las unidades de cada objeto en esas fechas? Mismo cuerpo que
+        una solicitud: Fecha_Inicio, Fecha_Fin, Hora_Inicio, Hora_Fin y
+        objetos_solicitados [{objetos_id, Cantidad_Objetos}]. Todo en una pasada.
+        """
+        serializer = DisponibilidadCarritoSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+
+        periodo = disponibilidad.ventana(
+            datos.get('Fecha_Inicio'), datos.get('Fecha_Fin'), datos.get('Hora_Inicio'), datos.get('Hora_Fin')
+        )
+        desde, hasta = periodo if periodo else (None, None)
+        resultado = disponibilidad.verificar_carrito(
+            [(item['objetos_id'], item['Cantidad_Objetos']) for item in datos['objetos_solicitados']],
+            desde, hasta,
+        )
+        resultado['desde'] = desde.isoformat() if desde else None
+        resultado['hasta'] = hasta.isoformat() if hasta else None
+        return Response(resultado, status=status.HTTP_200_OK)
+
+    # ============================================
+    # ENTREGA Y DEVOLUCIÓN DE EQUIPOS (reservas/prestamos.py)
+    # ============================================
+    def _transicion(self, funcion, solicitudes_ids, **parametros):
+        try:
+            resultado = funcion(solicitudes_ids, **parametros)
+        except prestamos.TransicionInvalida as e:
+            return Response({'error': str(e), 'errores': e.errores}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def entregar(self, request, Solicitud_Id=None):
+        """Entrega una solicitud aprobada: crea la Entrega, la vincula y pasa a "En Uso"."""
+        return self._transicion(
+            prestamos.entregar, [Solicitud_Id],
+            observacion=request.data.get('observacion', ''),
+            frecuencia_id=request.data.get('frecuencia_servicio_id'),
+        )
+
+    @action(detail=True, methods=['post'])
+    def recibir(self, request, Solicitud_Id=None):
+        """Recibe una solicitud en uso: crea la Devolución, marca a tiempo/tarde y repone stock."""
+        return self._transicion(
+            prestamos.recibir, [Solicitud_Id],
+            observacion=request.data.get('observacion', ''),
+        )
+
+    @action(detail=False, methods=['post'], url_path='entregar-lote')
+    def entregar_lote(self, request):
+        """Body: {"solicitudes": [ids], "observacion": "", "frecuencia_servicio_id": null}"""
+        return self._transicion(
+            prestamos.entregar, request.data.get('solicitudes'),
+            observacion=request.data.get('observacion', ''),
+            frecuencia_id=request.data.get('frecuencia_servicio_id'),
+        )
+
+    @action(detail=False, methods=['post'], url_path='recibir-lote')
+    def recibir_lote(self, request):
+        """Body: {"solicitudes": [ids], "observacion": ""}"""
+        return self._transicion(
+            prestamos.recibir, request.data.get('solicitudes'),
+            observacion=request.data.get('observacion', ''),
+        )
+
 
 class UsuarioSolicitudViewSet(viewsets.ModelViewSet):
     """
@@ -0,0 +1,59 @@
+# ==============================================================================
+# RESERVAS/VIEWS_ASYNC.PY - Lista de solicitudes en versión async (ASGI)
+# ==============================================================================
+# Mismos filtros y serializer que GET /api/reservas/solicitudes/. Con
+# ?limite (y ?desplazamiento) la respuesta se pagina y el conteo (ORM async)
+# y la página (serializer en el pool de hilos) se consultan a la vez.
+# Ruta: /api/reservas/async/solicitudes/
+
+import asyncio
+
+from rest_framework import status
+
+from AccesLab.asincrono import en_hilo, vista_async
+
+from .serializers import SolicitudesReadSerializer
+from .views import SolicitudesViewSet, solicitudes_visibles
+
+
+def _entero(valor, nombre, defecto):
+    if valor in (None, ''):
+        return defecto
+    try:
+        entero = int(valor)
+    except (TypeError, ValueError):
+        entero = -1
+    if entero < 0:
+        raise ValueError(f'El parámetro "{nombre}" debe ser un entero no negativo')
+    return entero
+
+
+def _serializar(queryset, request):
+    return SolicitudesReadSerializer(queryset, many=True, context={'request': request}).data
+
+
+@vista_async
+async def listar_solicitudes(request):
+    """
+    Solicitudes visibles para el usuario (admin: todas o ?Usuario_Id=).
+    Sin ?limite: la lista completa, igual que la vista síncrona.
+    Con ?limite: {'count', 'limite', 'desplazamiento', 'results'}.
+    """
+    try:
+        limite = _entero(request.GET.get('limite'), 'limite', None)
+        desplazamiento = _entero(request.GET.get('desplazamiento'), 'desplazamiento', 0)
+    except ValueError as e:
+        return {'error': str(e)}, status.HTTP_400_BAD_REQUEST
+
+    # Decidir si es admin puede consultar el perfil: se hace en el pool de hilos
+    queryset = await en_hilo(
+        solicitudes_visibles, SolicitudesViewSet.queryset.all(), request.user, request.GET.get('Usuario_Id')
+    )
+    if limite is None:
+        return await en_hilo(_serializar, queryset, request)
+
+    total, pagina = await asyncio.gather(
+        queryset.acount(),
+        en_hilo(_serializar, queryset[desplazamiento:desplazamiento + limite], request),
+    )
+    return {'count': total, 'limite': limite, 'desplazamiento': desplazamiento, 'results': pagina}
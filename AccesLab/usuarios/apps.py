@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
+
+    def ready(self):
+        # Invalida el mapa usuario -> programa cuando cambian las inscripciones
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+# usuarios/programas.py
+# Mapa precalculado usuario -> programas (y facultad) para reportes
+# - Una consulta por tabla (Usuarios_Programas, Programas), sin joins por solicitud
+# - Programa principal = el de menor Programa_Id del usuario
+# - Se guarda en la caché de Django y en memoria del proceso; la versión vive
+#   en la caché y se incrementa cuando cambian Usuarios_Programas, Programas
+#   o Facultades (ver usuarios/signals.py)
+# - Requiere una caché compartida entre workers (CACHE_BACKEND db o redis; ver
+#   settings.py): con LocMem la versión solo sube en el worker que escribió
+
+import threading
+
+from django.core.cache import cache
+
+from maestros.models import Programas
+from monitoreo import versiones
+from .models import Usuarios_Programas
+
+CLAVE_VERSION = 'usuarios:mapa_programas:version'
+TIMEOUT_MAPA = 60 * 60 * 24
+
+_local = {'version': None, 'mapa': None}
+_lock = threading.Lock()
+
+
+def version_actual():
+    return versiones.actual(CLAVE_VERSION)
+
+
+def invalidar_mapa_programas():
+    versiones.incrementar(CLAVE_VERSION)
+
+
+def _construir_mapa():
+    programas = {
+        programa_id: {
+            'programa': nombre,
+            'facultad_id': facultad_id,
+            'facultad': nombre_facultad,
+        }
+        for programa_id, nombre, facultad_id, nombre_facultad in Programas.objects.values_list(
+            'Programa_Id', 'Nombre_Programa', 'Facultad_Id', 'Facultad_Id__Nombre_Facultad'
+        )
+    }
+
+    usuarios = {}
+    for usuario_id, programa_id in Usuarios_Programas.objects.order_by(
+        'Usuario_Id', 'Programa_Id'
+    ).values_list('Usuario_Id', 'Programa_Id'):
+        if programa_id in programas:
+            usuarios.setdefault(usuario_id, []).append(programa_id)
+
+    return {'usuarios': usuarios, 'programas': programas}
+
+
+def mapa_programas():
+    """
+    {'usuarios': {usuario_id: [programa_id, ...] ordenados},
+     'programas': {programa_id: {'programa', 'facultad_id', 'facultad'}}}
+    """
+    version = version_actual()
+    if _local['version'] == version:
+        return _local['mapa']
+
+    with _lock:
+        if _local['version'] == version:
+            return _local['mapa']
+        clave = f'usuarios:mapa_programas:v{version}'
+        mapa = cache.get(clave)
+        if mapa is None:
+            mapa = _construir_mapa()
+            cache.set(clave, mapa, timeout=TIMEOUT_MAPA)
+        _local['version'], _local['mapa'] = version, mapa
+        return mapa
@@ -6,6 +6,7 @@ from django.db import transaction, models
 # Importaciones de Modelos
 from .models import Usuarios, Usuarios_Roles, Usuarios_Programas
 from maestros.models import Roles, Tipo_Identificacion, Tipo_Solicitantes, Objetos, Programas
+from maestros import catalogos
 
 logger = logging.getLogger(__name__)
 
@@ -181,7 +182,7 @@ class UsuarioAdminSerializer(serializers.ModelSerializer):
         
         if rol_id:
             try:
-                return Roles.objects.get(Rol_Id=rol_id)
+                return catalogos.obtener(Roles, rol_id)
             except Roles.DoesNotExist:
                 if not rol_nombre:
                     raise serializers.ValidationError({
@@ -189,9 +190,9 @@ class UsuarioAdminSerializer(serializers.ModelSerializer):
                     })
         
         if rol_nombre:
-            rol, created = Roles.objects.get_or_create(
-                Nombre_Roles=rol_nombre,
-                defaults={
+            rol, created = catalogos.obtener_o_crear_por_nombre(
+                Roles, rol_nombre,
+                defaults=lambda: {
                     'Rol_Id': get_next_id(Roles, 'Rol_Id')
                 }
             )
@@ -206,7 +207,7 @@ class UsuarioAdminSerializer(serializers.ModelSerializer):
         
         if tipo_id:
             try:
-                return Tipo_Identificacion.objects.get(Tipo_Id=tipo_id)
+                return catalogos.obtener(Tipo_Identificacion, tipo_id)
             except Tipo_Identificacion.DoesNotExist:
                 if not tipo_nombre:
                     raise serializers.ValidationError({
@@ -214,9 +215,9 @@ class UsuarioAdminSerializer(serializers.ModelSerializer):
                     })
         
         if tipo_nombre:
-            tipo, created = Tipo_Identificacion.objects.get_or_create(
-                Nombre_Tipo_Identificacion=tipo_nombre,
-                defaults={
+            tipo, created = catalogos.obtener_o_crear_por_nombre(
+                Tipo_Identificacion, tipo_nombre,
+                defaults=lambda: {
                     'Tipo_Id': get_next_id(Tipo_Identificacion, 'Tipo_Id')
                 }
             )
@@ -231,15 +232,15 @@ class UsuarioAdminSerializer(serializers.ModelSerializer):
         
         if solicitante_id:
             try:
-                return Tipo_Solicitantes.objects.get(Solicitante_Id=solicitante_id)
+                return catalogos.obtener(Tipo_Solicitantes, solicitante_id)
             except Tipo_Solicitantes.DoesNotExist:
                 if not solicitante_nombre:
                     return None
         
         if solicitante_nombre:
-            solicitante, created = Tipo_Solicitantes.objects.get_or_create(
-                Nombre_Tipo_Solicitante=solicitante_nombre,
-                defaults={
+            solicitante, created = catalogos.obtener_o_crear_por_nombre(
+                Tipo_Solicitantes, solicitante_nombre,
+                defaults=lambda: {
                     'Solicitante_Id': get_next_id(Tipo_Solicitantes, 'Solicitante_Id')
                 }
             )
@@ -442,7 +443,7 @@ class UsuariosProgramasSerializer(serializers.ModelSerializer):
             })
 
         # Si se proporciona programa_id, validar existencia
-        if programa_id and not Programas.objects.filter(Programa_Id=programa_id).exists():
+        if programa_id and not catalogos.existe(Programas, programa_id):
             if not programa_nombre:
                 raise serializers.ValidationError({
                     "programa_id": "El Programa_Id proporcionado no existe."
@@ -480,9 +481,9 @@ class UsuariosProgramasSerializer(serializers.ModelSerializer):
         
         if facultad_nombre:
             from maestros.models import Facultades
-            facultad, created = Facultades.objects.get_or_create(
-                Nombre_Facultad=facultad_nombre,
-                defaults={
+            facultad, created = catalogos.obtener_o_crear_por_nombre(
+                Facultades, facultad_nombre,
+                defaults=lambda: {
                     'Facultad_Id': get_next_id(Facultades, 'Facultad_Id')
                 }
             )
@@ -497,7 +498,7 @@ class UsuariosProgramasSerializer(serializers.ModelSerializer):
         
         if programa_id:
             try:
-                return Programas.objects.get(Programa_Id=programa_id)
+                return catalogos.obtener(Programas, programa_id)
             except Programas.DoesNotExist:
                 if not programa_nombre:
                     raise serializers.ValidationError({
@@ -508,9 +509,9 @@ class UsuariosProgramasSerializer(serializers.ModelSerializer):
             # Obtener o crear la facultad si se proporciona
             facultad_id = self._get_or_create_facultad(validated_data)
             
-            programa, created = Programas.objects.get_or_create(
-                Nombre_Programa=programa_nombre,
-                defaults={
+            programa, created = catalogos.obtener_o_crear_por_nombre(
+                Programas, programa_nombre,
+                defaults=lambda: {
                     'Programa_Id': get_next_id(Programas, 'Programa_Id'),
                     'Facultad_Id_id': facultad_id
                 }
@@ -0,0 +1,20 @@
+# usuarios/signals.py
+# Invalidación del mapa usuario -> programa (usuarios/programas.py)
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from maestros.models import Facultades, Programas
+from .models import Usuarios_Programas
+from .programas import invalidar_mapa_programas
+
+
+@receiver(post_save, sender=Usuarios_Programas)
+@receiver(post_delete, sender=Usuarios_Programas)
+@receiver(post_save, sender=Programas)
+@receiver(post_delete, sender=Programas)
+@receiver(post_save, sender=Facultades)
+@receiver(post_delete, sender=Facultades)
+def invalidar_por_escritura(sender, **kwargs):
+    transaction.on_commit(invalidar_mapa_programas)